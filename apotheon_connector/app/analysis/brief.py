@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from ..core.config import REPORTS_DIR
+from ..core.jobs import Job
+from ..storage.index import SiteIndex
+from .clusters import get_cluster_engine
+from .links import suggest_internal_links
+from .lint import get_lint_engine
+from .recommend import get_recommender
+
+JOURNAL_PAGE = 1000
+LIST_MAX = 50
+LINK_PAGES_MAX = 10
+
+
+def _state_path(index: SiteIndex) -> Path:
+    return index.data_dir / 'brief_state.json'
+
+
+def load_state(index: SiteIndex) -> Dict[str, Any]:
+    try:
+        return json.loads(_state_path(index).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {'cursor': 0}
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f'.{path.name}.tmp')
+    tmp.write_text(text, encoding='utf-8')
+    os.replace(tmp, path)
+
+
+def net_changes(events: Sequence[Dict[str, Any]]) -> Dict[str, str]:
+    """Collapse an event stream to one change type per slug (e.g. added then removed -> nothing)."""
+    out: Dict[str, str] = {}
+    for e in events:
+        prev, kind = out.pop(e['slug'], None), e['type']
+        if prev == 'added':
+            if kind == 'removed':
+                continue
+            kind = 'added'
+        elif prev == 'removed' and kind == 'added':
+            kind = 'modified'
+        out[e['slug']] = kind
+    return out
+
+
+def _bullets(items: List[str]) -> List[str]:
+    lines = [f'- {s}' for s in items[:LIST_MAX]]
+    if len(items) > LIST_MAX:
+        lines.append(f'- … and {len(items) - LIST_MAX} more')
+    return lines
+
+
+def build_daily_brief(
+    index: SiteIndex,
+    goals: Optional[List[str]] = None,
+    audience: Optional[str] = None,
+    job: Optional[Job] = None,
+    reports_dir: str = REPORTS_DIR,
+) -> Dict[str, Any]:
+    """Write a markdown brief covering journal events since the previous brief.
+
+    Only changed pages are examined: lint evaluates just those pages and answers its
+    duplicate and link rules by slug, and their clusters come from the cached assignment,
+    so the brief's cost follows the number of changes rather than the site size.
+    The cursor advances only after the report is written.
+    """
+    started = time.perf_counter()
+
+    def stage(name: str) -> None:
+        if job is not None:
+            job.check_cancelled()
+            job.progress['stage'] = name
+
+    stage('journal')
+    state = load_state(index)
+    cursor = int(state.get('cursor', 0))
+    events: List[Dict[str, Any]] = []
+    while True:
+        page = index.journal.read(after_seq=cursor, limit=JOURNAL_PAGE)
+        events.extend(page['events'])
+        cursor = int(page['nextCursor'])
+        if not page['hasMore']:
+            break
+    changes = net_changes(events)
+    by_type = {t: sorted(s for s, k in changes.items() if k == t) for t in ('added', 'modified', 'removed')}
+    touched = [s for s in by_type['added'] + by_type['modified'] if index.pages.get(s) is not None]
+
+    now = datetime.now()
+    lines = [
+        f'# Daily brief — {now:%Y-%m-%d}',
+        '',
+        f'Generated {now:%Y-%m-%d %H:%M}, index generation {index.generation}, '
+        f'{len(events)} journal events (seq {state.get("cursor", 0)} → {cursor}).',
+        '',
+        '## Changes',
+        '',
+        f'{len(by_type["added"])} added, {len(by_type["modified"])} modified, {len(by_type["removed"])} removed.',
+    ]
+    for t in ('added', 'modified', 'removed'):
+        if by_type[t]:
+            lines += ['', f'### {t.capitalize()}', ''] + _bullets(by_type[t])
+
+    stage('lint')
+    issues: List[Dict[str, Any]] = []
+    if touched:
+        issues = get_lint_engine(index).lint(scope_slugs=touched)['issues']
+    lines += ['', '## Lint issues on changed pages', '']
+    lines += _bullets([f'`{i["slug"]}` {i["rule"]} ({i["severity"]}): {i["message"]}' for i in issues]) or ['None.']
+
+    stage('clusters')
+    touched_clusters: List[str] = []
+    if touched:
+        for c in get_cluster_engine(index).clusters_of(touched):
+            touched_clusters.append(f'**{c["label"]}** ({c["size"]} pages): {", ".join(c["matches"][:5])}')
+    lines += ['', '## Topic clusters with changes', '']
+    lines += _bullets(touched_clusters) or ['None.']
+
+    stage('links')
+    link_lines: List[str] = []
+    for slug in touched[:LINK_PAGES_MAX]:
+        sugg = suggest_internal_links(index, slug, limit=3)
+        if sugg['addLinksFrom']:
+            link_lines.append(f'`{slug}` ← ' + ', '.join(f'`{r["slug"]}`' for r in sugg['addLinksFrom']))
+    lines += ['', '## Internal link opportunities', '']
+    lines += _bullets(link_lines) or ['None.']
+
+    recs: List[Dict[str, Any]] = []
+    goals = [g for g in goals or [] if g and g.strip()]
+    if goals:
+        stage('recommend')
+        recs = get_recommender(index).recommend(goals, audience)['recommendations']
+        lines += ['', '## Recommendations', '']
+        lines += _bullets([f'{r.get("type")}: **{r.get("title")}** (`{r.get("slug")}`) — {r.get("rationale", "")}' for r in recs]) or ['None.']
+
+    stage('write')
+    reports = Path(reports_dir)
+    path = reports / f'daily-brief-{now:%Y-%m-%d}.md'
+    n = 1
+    while path.exists():  # a second brief the same day gets a numbered sibling
+        n += 1
+        path = reports / f'daily-brief-{now:%Y-%m-%d}-{n}.md'
+    _write_atomic(path, '\n'.join(lines) + '\n')
+    _write_atomic(_state_path(index), json.dumps({'cursor': cursor, 'generatedAt': time.time(), 'report': str(path)}))
+
+    return {
+        'path': str(path),
+        'cursor': cursor,
+        'events': len(events),
+        'changes': {t: len(v) for t, v in by_type.items()},
+        'lintIssues': len(issues),
+        'recommendations': len(recs),
+        'tookMs': round((time.perf_counter() - started) * 1000, 3),
+    }
@@ -0,0 +1,358 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..core.config import CLUSTER_BLOCK_MB
+from ..storage.index import SiteIndex
+from ..storage.lexical import tokenize
+
+CLUSTER_METHODS = ('labelprop', 'components')
+# Fraction of pages that may change before incremental assignment gives way to a full rebuild.
+INCREMENTAL_MAX_CHANGED = 0.1
+# Above this many pages the kNN graph is built over coarse cells instead of all pairs.
+EXACT_KNN_MAX = 4096
+
+_STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'how', 'in', 'is', 'it', 'of',
+    'on', 'or', 'our', 'the', 'to', 'we', 'what', 'with', 'you', 'your', 'page', 'home',
+}
+
+
+def _topk_block(q: np.ndarray, cand: np.ndarray, q_ids: np.ndarray, cand_ids: np.ndarray, k: int, block_bytes: int):
+    """Top-k neighbours of each query row among candidate rows, in memory-bounded slabs."""
+    kk = min(k, len(cand_ids) - 1)
+    nbr = np.full((len(q_ids), k), -1, dtype=np.int32)
+    sim = np.full((len(q_ids), k), -np.inf, dtype=np.float32)
+    if kk < 1:
+        return nbr, sim
+    block = max(1, min(len(q_ids), block_bytes // (4 * len(cand_ids))))
+    for start in range(0, len(q_ids), block):
+        stop = min(len(q_ids), start + block)
+        s = q[start:stop] @ cand.T
+        s[q_ids[start:stop, None] == cand_ids[None, :]] = -np.inf  # no self edges
+        top = np.argpartition(-s, kk - 1, axis=1)[:, :kk]
+        nbr[start:stop, :kk] = cand_ids[top]
+        sim[start:stop, :kk] = np.take_along_axis(s, top, axis=1)
+    return nbr, sim
+
+
+def _coarse_cells(x: np.ndarray, n_cells: int, iters: int = 8, sample: int = 20000) -> Tuple[np.ndarray, np.ndarray]:
+    """Spherical k-means on a sample; returns (cell centroids, cell id per row)."""
+    rng = np.random.default_rng(0)
+    train = x[rng.choice(len(x), size=min(len(x), sample), replace=False)]
+    cent = train[rng.choice(len(train), size=n_cells, replace=False)].copy()
+    for _ in range(iters):
+        a = (train @ cent.T).argmax(axis=1)
+        sums = np.zeros_like(cent)
+        np.add.at(sums, a, train)
+        norms = np.linalg.norm(sums, axis=1)
+        live = norms > 0
+        cent[live] = sums[live] / norms[live, None]
+    return cent, (x @ cent.T).argmax(axis=1)
+
+
+def knn_graph(
+    x: np.ndarray,
+    k: int,
+    threshold: float,
+    block_bytes: int,
+    exact_max: int = EXACT_KNN_MAX,
+    n_probe: int = 4,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Sparse kNN graph over unit-length rows, computed in blocks.
+
+    Up to `exact_max` rows every row is compared with every other row, one
+    (block x n) slab at a time. Beyond that, rows are bucketed into ~sqrt(n)
+    coarse cells and each cell is compared only with its `n_probe` nearest cells,
+    so cost grows ~n^1.5 rather than n^2 and the full n x n matrix never exists.
+    Returns directed (src, dst, weight) edges at or above `threshold`.
+    """
+    n = len(x)
+    if n < 2 or k < 1:
+        empty = np.zeros(0, dtype=np.int32)
+        return empty, empty, np.zeros(0, dtype=np.float32)
+
+    ids = np.arange(n, dtype=np.int32)
+    if n <= exact_max:
+        nbr, sim = _topk_block(x, x, ids, ids, k, block_bytes)
+    else:
+        n_cells = int(np.sqrt(n))
+        cent, cell = _coarse_cells(x, n_cells)
+        probe = np.argsort(-(cent @ cent.T), axis=1)[:, :n_probe]
+        order = np.argsort(cell, kind='stable')
+        bounds = np.searchsorted(cell[order], np.arange(n_cells + 1))
+        members = [order[bounds[c]:bounds[c + 1]].astype(np.int32) for c in range(n_cells)]
+        nbr = np.full((n, k), -1, dtype=np.int32)
+        sim = np.full((n, k), -np.inf, dtype=np.float32)
+        for c in range(n_cells):
+            q_ids = members[c]
+            if not len(q_ids):
+                continue
+            cand_ids = np.concatenate([members[p] for p in probe[c]])
+            nbr[q_ids], sim[q_ids] = _topk_block(x[q_ids], x[cand_ids], q_ids, cand_ids, k, block_bytes)
+
+    src = np.repeat(ids, k)
+    dst = nbr.ravel()
+    w = sim.ravel()
+    keep = (dst >= 0) & (w >= threshold)
+    return src[keep], dst[keep], w[keep]
+
+
+def connected_components(n: int, src: np.ndarray, dst: np.ndarray) -> np.ndarray:
+    labels = np.arange(n, dtype=np.int64)
+    if not len(src):
+        return labels
+    while True:
+        prev = labels.copy()
+        np.minimum.at(labels, src, labels[dst])
+        np.minimum.at(labels, dst, labels[src])
+        labels = labels[labels]  # pointer jumping
+        if np.array_equal(labels, prev):
+            return labels
+
+
+def label_propagation(n: int, src: np.ndarray, dst: np.ndarray, w: np.ndarray, max_iter: int = 30) -> np.ndarray:
+    """Weighted label propagation (vectorized, synchronous with damping).
+
+    Unlike plain connected components, a few weak bridges between two dense
+    groups do not merge them, which matters on kNN graphs of real sites.
+    """
+    labels = np.arange(n, dtype=np.int64)
+    if not len(src):
+        return labels
+    # Undirected edges plus a self-loop so a node only moves for a strictly better label.
+    s = np.concatenate([src, dst, np.arange(n)]).astype(np.int64)
+    d = np.concatenate([dst, src, np.arange(n)]).astype(np.int64)
+    wt = np.concatenate([w, w, np.full(n, float(w.mean()) if len(w) else 1.0, dtype=np.float32)])
+    rng = np.random.default_rng(0)
+    for _ in range(max_iter):
+        keys = s * n + labels[d]
+        order = np.argsort(keys, kind='stable')
+        uk, idx = np.unique(keys[order], return_index=True)
+        sums = np.add.reduceat(wt[order], idx)
+        node = uk // n
+        lab = uk % n
+        # Best label per node: sort by node, then by weight descending.
+        best = np.lexsort((-sums, node))
+        first = np.ones(len(best), dtype=bool)
+        first[1:] = node[best][1:] != node[best][:-1]
+        new = labels.copy()
+        new[node[best][first]] = lab[best][first]
+        changed = new != labels
+        if not changed.any():
+            break
+        # Damping: only half of the movers update per round, which stops 2-cycles.
+        move = changed & (rng.random(n) < 0.5)
+        labels[move] = new[move]
+    return labels
+
+
+@dataclass
+class ClusterState:
+    generation: int
+    params: Tuple[Any, ...]
+    slugs: List[str]
+    labels: Dict[str, int]
+    centroids: Dict[int, np.ndarray] = field(default_factory=dict)
+    result: Dict[str, Any] = field(default_factory=dict)
+    by_label: Dict[int, Dict[str, Any]] = field(default_factory=dict)  # label -> rendered cluster
+
+
+class ClusterEngine:
+    """Topic clustering over page centroid vectors, cached per index generation."""
+
+    def __init__(self, index: SiteIndex, block_bytes: int = CLUSTER_BLOCK_MB * 1024 * 1024):
+        self.index = index
+        self.block_bytes = block_bytes
+        self._state: Optional[ClusterState] = None
+        self._lock = threading.Lock()
+
+    def clusters(
+        self,
+        similarity_threshold: float = 0.35,
+        k: int = 10,
+        method: str = 'labelprop',
+        max_pages: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        if method not in CLUSTER_METHODS:
+            raise ValueError(f'method must be one of {", ".join(CLUSTER_METHODS)}')
+        params = (round(similarity_threshold, 6), k, method, max_pages)
+        with self._lock:
+            st = self._state
+            gen = self.index.generation
+            if st is not None and st.params == params and st.generation == gen:
+                return st.result
+
+            started = time.perf_counter()
+            slugs, x = self.index.page_vectors.matrix()
+            if max_pages is not None and len(slugs) > max_pages:
+                slugs, x = slugs[:max_pages], x[:max_pages]
+
+            # A restored (older) generation is not a superset of the cached state: rebuild.
+            incremental = (st is not None and st.params == params and gen > st.generation
+                           and self._assign_incremental(st, slugs, x, similarity_threshold))
+            if not incremental:
+                st = self._full(slugs, x, similarity_threshold, k, method, params)
+            st.generation = gen
+            st.result = self._render(st, slugs, x, incremental, started)
+            self._state = st
+            return st.result
+
+    def clusters_of(self, slugs: List[str]) -> List[Dict[str, Any]]:
+        """Clusters containing any of `slugs`, from the last computed clustering, largest first.
+
+        Nothing is reclustered: pages the cached assignment predates are matched to the
+        nearest cluster centroid, as the incremental path would place them, so the cost is
+        O(len(slugs) x clusters). Only the first call in a process, with nothing cached
+        yet, computes `clusters()` with its defaults.
+        """
+        if self._state is None:
+            self.clusters()
+        pv = self.index.page_vectors
+        with self._lock:
+            st = self._state
+            ids = np.fromiter(st.centroids.keys(), dtype=np.int64)
+            cent = np.vstack([st.centroids[i] for i in ids]) if len(ids) else None
+            hits: Dict[int, List[str]] = {}
+            for s in dict.fromkeys(slugs):
+                v = pv.get(s)
+                if v is None:
+                    continue  # removed since
+                label = st.labels.get(s)
+                if label is None or pv.updated_in(s) > st.generation:
+                    if cent is None:
+                        continue
+                    sims = cent @ v
+                    best = int(sims.argmax())
+                    if sims[best] < st.params[0]:
+                        continue
+                    label = int(ids[best])
+                if label in st.by_label:
+                    hits.setdefault(label, []).append(s)
+            out = [{**{k: v for k, v in st.by_label[label].items() if k != 'slugs'}, 'matches': matched}
+                   for label, matched in hits.items()]
+        out.sort(key=lambda c: c['id'])
+        return out
+
+    def _full(self, slugs, x, threshold, k, method, params) -> ClusterState:
+        n = len(slugs)
+        src, dst, w = knn_graph(x, k, threshold, self.block_bytes)
+        if method == 'components':
+            raw = connected_components(n, src, dst)
+        else:
+            raw = label_propagation(n, src, dst, w)
+        _, dense = np.unique(raw, return_inverse=True)
+        labels = {slug: int(c) for slug, c in zip(slugs, dense)}
+        st = ClusterState(generation=0, params=params, slugs=list(slugs), labels=labels)
+        st.centroids = self._centroids(labels, slugs, x)
+        return st
+
+    @staticmethod
+    def _centroids(labels: Dict[str, int], slugs: List[str], x: np.ndarray) -> Dict[int, np.ndarray]:
+        if not len(slugs):
+            return {}
+        lab = np.fromiter((labels[s] for s in slugs), dtype=np.int64, count=len(slugs))
+        sums = np.zeros((int(lab.max()) + 1, x.shape[1]), dtype=np.float32)
+        np.add.at(sums, lab, x)
+        norms = np.linalg.norm(sums, axis=1)
+        return {int(c): sums[c] / norms[c] for c in np.unique(lab) if norms[c] > 0}
+
+    def _assign_incremental(self, st: ClusterState, slugs: List[str], x: np.ndarray, threshold: float) -> bool:
+        """Fold new/changed pages into existing clusters; False when a rebuild is due."""
+        pv = self.index.page_vectors
+        current = set(slugs)
+        changed = [s for s in slugs if s not in st.labels or pv.updated_in(s) > st.generation]
+        removed = [s for s in st.labels if s not in current]
+        if not changed and not removed:
+            return True
+        if len(changed) + len(removed) > INCREMENTAL_MAX_CHANGED * max(1, len(slugs)):
+            return False
+
+        for s in removed:
+            st.labels.pop(s, None)
+        if changed and st.centroids:
+            ids = np.fromiter(st.centroids.keys(), dtype=np.int64)
+            c = np.vstack([st.centroids[i] for i in ids])
+            pos = {s: i for i, s in enumerate(slugs)}
+            q = x[[pos[s] for s in changed]]
+            sims = q @ c.T
+            best = sims.argmax(axis=1)
+            next_id = int(ids.max()) + 1
+            for row, s in enumerate(changed):
+                if sims[row, best[row]] >= threshold:
+                    st.labels[s] = int(ids[best[row]])
+                else:
+                    st.labels[s] = next_id
+                    next_id += 1
+        else:
+            next_id = max(st.labels.values(), default=-1) + 1
+            for s in changed:
+                st.labels[s] = next_id
+                next_id += 1
+        st.slugs = list(slugs)
+        st.centroids = self._centroids(st.labels, slugs, x)
+        return True
+
+    def _render(self, st: ClusterState, slugs: List[str], x: np.ndarray, incremental: bool, started: float) -> Dict[str, Any]:
+        pos = {s: i for i, s in enumerate(slugs)}
+        members: Dict[int, List[str]] = {}
+        for s in slugs:
+            members.setdefault(st.labels[s], []).append(s)
+
+        clusters: List[Dict[str, Any]] = []
+        unclustered: List[str] = []
+        st.by_label = {}
+        for cid, group in members.items():
+            if len(group) < 2:
+                unclustered.extend(group)
+                continue
+            rows = x[[pos[s] for s in group]]
+            centroid = st.centroids.get(cid)
+            sims = rows @ centroid if centroid is not None else np.zeros(len(group), dtype=np.float32)
+            order = np.argsort(-sims)
+            st.by_label[cid] = {
+                'label': self._label(group),
+                'size': len(group),
+                'representative': group[int(order[0])],
+                'cohesion': round(float(sims.mean()), 4),
+                'slugs': [group[int(i)] for i in order],
+            }
+            clusters.append(st.by_label[cid])
+        clusters.sort(key=lambda c: (-c['size'], c['representative']))
+        for i, c in enumerate(clusters):
+            c['id'] = i
+
+        return {
+            'generation': self.index.generation,
+            'pages': len(slugs),
+            'clusters': clusters,
+            'unclustered': sorted(unclustered),
+            'incremental': incremental,
+            'tookMs': round((time.perf_counter() - started) * 1000, 3),
+        }
+
+    def _label(self, group: List[str]) -> str:
+        counts: Counter = Counter()
+        for s in group:
+            page = self.index.pages.get(s)
+            title = page.title if page else s.replace('/', ' ')
+            counts.update({t for t in tokenize(title) if t not in _STOPWORDS and not t.isdigit() and len(t) > 2})
+        return ' / '.join(t for t, _ in counts.most_common(3)) or group[0]
+
+
+_engine: Optional[ClusterEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_cluster_engine(index: SiteIndex) -> ClusterEngine:
+    global _engine
+    with _engine_lock:
+        if _engine is None or _engine.index is not index:
+            _engine = ClusterEngine(index)
+        return _engine
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from ..storage.index import SiteIndex
+
+
+def similar_pages(index: SiteIndex, slug: str, limit: int = 20) -> List[Tuple[str, float]]:
+    """Nearest pages to `slug` by centroid cosine similarity (excluding itself)."""
+    v = index.page_vectors.get(slug)
+    slugs, x = index.page_vectors.matrix()
+    if v is None or not len(slugs):
+        return []
+    sims = x @ v
+    want = min(len(slugs), limit + 1)
+    top = np.argpartition(-sims, want - 1)[:want]
+    top = top[np.argsort(-sims[top])]
+    return [(slugs[i], float(sims[i])) for i in top if slugs[i] != slug][:limit]
+
+
+def suggest_internal_links(index: SiteIndex, slug: str, limit: int = 10) -> Dict[str, Any]:
+    """Similar pages that should link to `slug`, and similar pages `slug` should link to."""
+    graph = index.links
+    # Over-fetch: most near neighbours are often already linked.
+    near = similar_pages(index, slug, limit=limit * 4)
+    sim = dict(near)
+    ranked = [s for s, _ in near]
+
+    inbound = graph.unlinked_sources(slug, ranked)[:limit]
+    already = set(graph.out_links(slug))
+    outbound = [s for s in ranked if s not in already][:limit]
+
+    def row(s: str) -> Dict[str, Any]:
+        return {'slug': s, 'similarity': round(sim[s], 4), **graph.stats(s)}
+
+    return {
+        'slug': slug,
+        **graph.stats(slug),
+        'addLinksFrom': [row(s) for s in inbound],
+        'addLinksTo': [row(s) for s in outbound],
+    }
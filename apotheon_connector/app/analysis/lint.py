@@ -0,0 +1,284 @@
+from __future__ import annotations
+
+import hashlib
+import multiprocessing
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from ..core.config import LINT_WORKERS
+from ..storage.index import SiteIndex
+from ..storage.models import PageRecord
+
+# Bump whenever a rule changes so cached per-page results are re-evaluated.
+RULESET_VERSION = 1
+# Below this many changed pages the pool's startup and pickling cost more than the rules.
+PARALLEL_MIN_PAGES = 256
+BATCH_SIZE = 512
+JOURNAL_PAGE = 1000
+
+Issue = Dict[str, Any]
+# Minimal per-page payload shipped to workers: (slug, title, description, headings, word_count).
+PageLite = Tuple[str, str, str, List[List[Any]], int]
+
+
+def _issue(slug: str, rule: str, severity: str, message: str, **detail: Any) -> Issue:
+    out: Issue = {'slug': slug, 'rule': rule, 'severity': severity, 'message': message}
+    if detail:
+        out['detail'] = detail
+    return out
+
+
+# ---- per-page rules (pure functions of one page; cached by content hash) ----
+
+def rule_thin_content(p: PageLite, thin_word_threshold: int) -> List[Issue]:
+    slug, _, _, _, words = p
+    if words < thin_word_threshold:
+        return [_issue(slug, 'thin_content', 'warning', f'{words} words (threshold {thin_word_threshold})', words=words)]
+    return []
+
+
+def rule_missing_title(p: PageLite, thin_word_threshold: int) -> List[Issue]:
+    if not p[1].strip():
+        return [_issue(p[0], 'missing_title', 'error', 'Page has no <title>')]
+    return []
+
+
+def rule_missing_meta(p: PageLite, thin_word_threshold: int) -> List[Issue]:
+    if not p[2].strip():
+        return [_issue(p[0], 'missing_meta_description', 'warning', 'Page has no meta description')]
+    return []
+
+
+def rule_heading_levels(p: PageLite, thin_word_threshold: int) -> List[Issue]:
+    slug, _, _, headings, _ = p
+    out: List[Issue] = []
+    h1 = sum(1 for level, _ in headings if level == 1)
+    if h1 == 0 and headings:
+        out.append(_issue(slug, 'missing_h1', 'warning', 'Page has headings but no <h1>'))
+    elif h1 > 1:
+        out.append(_issue(slug, 'multiple_h1', 'warning', f'{h1} <h1> elements', count=h1))
+    prev = 0
+    for level, text in headings:
+        if prev and level > prev + 1:
+            out.append(_issue(slug, 'heading_skip', 'warning', f'h{prev} -> h{level} at "{text[:80]}"', fromLevel=prev, toLevel=level))
+        prev = level
+    return out
+
+
+PAGE_RULES = (rule_thin_content, rule_missing_title, rule_missing_meta, rule_heading_levels)
+
+
+def evaluate_pages(pages: Sequence[PageLite], thin_word_threshold: int) -> List[List[Issue]]:
+    """Run every per-page rule; module-level so it can execute in a worker process."""
+    return [[i for rule in PAGE_RULES for i in rule(p, thin_word_threshold)] for p in pages]
+
+
+def _lite(page: PageRecord) -> PageLite:
+    return (page.slug, page.title, page.description, page.headings, page.word_count)
+
+
+def _norm_hash(text: str) -> Optional[str]:
+    norm = ' '.join(text.lower().split())
+    return hashlib.blake2b(norm.encode('utf-8'), digest_size=12).hexdigest() if norm else None
+
+
+# ---- site-level rules (hash indexes / link lookups; linear in pages + links) ----
+
+DUPLICATE_RULES = ('duplicate_title', 'duplicate_meta_description')
+
+
+def _duplicate_issue(slug: str, rule: str, group: Sequence[str]) -> Issue:
+    others = [o for o in group[:21] if o != slug][:20]
+    return _issue(slug, rule, 'warning', f'Shared with {len(group) - 1} other page(s)', others=others)
+
+
+def duplicate_issues(pages: Iterable[PageRecord]) -> List[Issue]:
+    titles: Dict[str, List[str]] = {}
+    metas: Dict[str, List[str]] = {}
+    for p in pages:
+        h = _norm_hash(p.title)
+        if h:
+            titles.setdefault(h, []).append(p.slug)
+        h = _norm_hash(p.description)
+        if h:
+            metas.setdefault(h, []).append(p.slug)
+
+    out: List[Issue] = []
+    for rule, groups in zip(DUPLICATE_RULES, (titles, metas)):
+        for slugs in groups.values():
+            if len(slugs) < 2:
+                continue
+            slugs.sort()
+            out.extend(_duplicate_issue(s, rule, slugs) for s in slugs)
+    return out
+
+
+class DuplicateGroups:
+    """Slugs per normalized title and meta description hash, for duplicate lookups by slug.
+
+    Built with one pass over the pages on first use; after that `sync` applies only the
+    change-journal events since the previous sync, so a scoped lint costs O(changes).
+    """
+
+    def __init__(self) -> None:
+        self.cursor: Optional[int] = None
+        self.keys: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+        self.groups: Tuple[Dict[str, Set[str]], Dict[str, Set[str]]] = ({}, {})
+
+    def _set(self, slug: str, page: Optional[PageRecord]) -> None:
+        for groups, h in zip(self.groups, self.keys.pop(slug, (None, None))):
+            if h is not None:
+                members = groups[h]
+                members.discard(slug)
+                if not members:
+                    del groups[h]
+        if page is None:
+            return
+        keys = (_norm_hash(page.title), _norm_hash(page.description))
+        self.keys[slug] = keys
+        for groups, h in zip(self.groups, keys):
+            if h is not None:
+                groups.setdefault(h, set()).add(slug)
+
+    def sync(self, index: SiteIndex) -> None:
+        journal = index.journal
+        if self.cursor is None:
+            self.cursor = journal.last_seq  # events after this are re-applied; _set is idempotent
+            for page in index.pages:
+                self._set(page.slug, page)
+            return
+        while self.cursor < journal.last_seq:
+            batch = journal.read(after_seq=self.cursor, limit=JOURNAL_PAGE)
+            for slug in dict.fromkeys(e['slug'] for e in batch['events']):
+                self._set(slug, index.pages.get(slug))
+            self.cursor = int(batch['nextCursor'])
+            if not batch['hasMore']:
+                break
+
+    def issues(self, slug: str) -> List[Issue]:
+        out: List[Issue] = []
+        for rule, groups, h in zip(DUPLICATE_RULES, self.groups, self.keys.get(slug, (None, None))):
+            members = groups.get(h) if h is not None else None
+            if members and len(members) > 1:
+                out.append(_duplicate_issue(slug, rule, sorted(members)))
+        return out
+
+
+def _broken_link_issue(slug: str, broken: List[str]) -> Issue:
+    return _issue(slug, 'broken_internal_link', 'error', f'{len(broken)} internal link(s) to unindexed pages', targets=broken[:50])
+
+
+def _orphan_issue(slug: str) -> Issue:
+    return _issue(slug, 'orphan_page', 'info', 'No other indexed page links here')
+
+
+def link_graph_issues(index: SiteIndex, scope: Optional[Sequence[str]] = None) -> List[Issue]:
+    """Broken-link and orphan issues for every page, or only for `scope` (O(degree) per slug)."""
+    graph = index.links
+    out: List[Issue] = []
+    if scope is None:
+        for slug, broken in graph.broken_links().items():
+            out.append(_broken_link_issue(slug, broken))
+        out.extend(_orphan_issue(slug) for slug in graph.orphans)
+        return out
+    for slug in scope:
+        broken = graph.broken_targets(slug)
+        if broken:
+            out.append(_broken_link_issue(slug, broken))
+        if slug in graph.orphans:
+            out.append(_orphan_issue(slug))
+    return out
+
+
+class LintEngine:
+    """Rule-based linter over stored page records with a per-page result cache.
+
+    With `scope_slugs` only those pages are loaded and evaluated, and site-level rules
+    are answered by slug (duplicate groups kept current from the journal, link graph
+    rows), so linting the day's changes does not cost a pass over the site.
+    """
+
+    def __init__(self, index: SiteIndex, workers: int = LINT_WORKERS):
+        self.index = index
+        self.workers = max(1, workers)
+        # slug -> (content hash, ruleset version, params, issues)
+        self._cache: Dict[str, Tuple[str, int, Tuple[Any, ...], List[Issue]]] = {}
+        self._groups = DuplicateGroups()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def lint(self, thin_word_threshold: int = 250, scope_slugs: Optional[List[str]] = None) -> Dict[str, Any]:
+        started = time.perf_counter()
+        params = (thin_word_threshold,)
+        with self._lock:
+            if scope_slugs:
+                pages = [p for p in map(self.index.pages.get, dict.fromkeys(scope_slugs)) if p is not None]
+            else:
+                pages = list(self.index.pages)
+                live = {p.slug for p in pages}
+                for slug in [s for s in self._cache if s not in live]:
+                    del self._cache[slug]
+
+            stale = []
+            for p in pages:
+                hit = self._cache.get(p.slug)
+                if hit is None or hit[0] != p.content_hash or hit[1] != RULESET_VERSION or hit[2] != params:
+                    stale.append(p)
+            for page, issues in zip(stale, self._evaluate(stale, thin_word_threshold)):
+                self._cache[page.slug] = (page.content_hash, RULESET_VERSION, params, issues)
+
+            issues = [i for p in pages for i in self._cache[p.slug][3]]
+
+            if scope_slugs:
+                self._groups.sync(self.index)
+                for p in pages:
+                    issues.extend(self._groups.issues(p.slug))
+            else:
+                issues.extend(duplicate_issues(pages))
+
+        issues.extend(link_graph_issues(self.index, [p.slug for p in pages] if scope_slugs else None))
+        issues.sort(key=lambda i: (i['slug'], i['rule']))
+
+        return {
+            'generation': self.index.generation,
+            'rulesetVersion': RULESET_VERSION,
+            'pages': len(pages),
+            'evaluated': len(stale),
+            'cached': len(pages) - len(stale),
+            'summary': dict(Counter(i['rule'] for i in issues)),
+            'issues': issues,
+            'tookMs': round((time.perf_counter() - started) * 1000, 3),
+        }
+
+    def _evaluate(self, pages: List[PageRecord], thin_word_threshold: int) -> List[List[Issue]]:
+        lite = [_lite(p) for p in pages]
+        if self.workers < 2 or len(lite) < PARALLEL_MIN_PAGES:
+            return evaluate_pages(lite, thin_word_threshold)
+        batches = [lite[i:i + BATCH_SIZE] for i in range(0, len(lite), BATCH_SIZE)]
+        if self._pool is None:
+            # One pool per engine, so workers start once; spawn, not fork, because the server is multi-threaded.
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'))
+        results = self._pool.map(evaluate_pages, batches, [thin_word_threshold] * len(batches))
+        return [issues for batch in results for issues in batch]
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+
+_engine: Optional[LintEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_lint_engine(index: SiteIndex) -> LintEngine:
+    global _engine
+    with _engine_lock:
+        if _engine is None or _engine.index is not index:
+            if _engine is not None:
+                _engine.close()
+            _engine = LintEngine(index)
+        return _engine
@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..core.cache import LRUCache
+from ..core.llm import OllamaGenerator
+from ..storage.index import SiteIndex
+from .links import suggest_internal_links
+
+CONTEXT_CHARS = 400
+LINK_SUGGESTIONS = 3
+RETRIEVAL_CACHE_SIZE = 256
+RESULT_CACHE_SIZE = 64
+RECOMMENDATION_TYPES = ('new_page', 'improve_page', 'internal_link')
+
+PROMPT = """You are a content strategist for a website. Using only the site context below, recommend
+new pages, improvements to existing pages, and internal links that advance the goals.
+
+Goals:
+{goals}
+Audience: {audience}
+Constraints: {constraints}
+
+Site context (existing pages, slug: title - summary):
+{context}
+
+Respond with one JSON object per line and nothing else. Each object has the keys
+"type" (one of new_page, improve_page, internal_link), "title", "slug" (existing slug for
+improve_page/internal_link, suggested slug for new_page), "goal" (the goal number it serves),
+"rationale", and for internal_link also "from" and "to" slugs.
+"""
+
+
+def _summary(page: Dict[str, Any]) -> str:
+    text = page.get('description') or ' '.join(s.get('text', '') for s in page.get('sections') or [])
+    text = ' '.join(text.split())
+    return text[:CONTEXT_CHARS]
+
+
+def parse_line(line: str) -> Optional[Dict[str, Any]]:
+    """One recommendation from a line of model output; None for chatter or malformed JSON."""
+    line = line.strip().strip(',')
+    if not line.startswith('{'):
+        return None
+    try:
+        rec = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(rec, dict) or rec.get('type') not in RECOMMENDATION_TYPES:
+        return None
+    rec['source'] = 'llm'
+    return rec
+
+
+class Recommender:
+    """Goal-grounded recommendations: one batched retrieval, then streamed generation.
+
+    All goals are embedded in a single call and scored against the page centroid
+    matrix with one matmul; the union of hits is the shared context. Retrieval and
+    complete answers are cached per index generation.
+    """
+
+    def __init__(self, index: SiteIndex, llm: Optional[OllamaGenerator] = None):
+        self.index = index
+        self.llm = llm or OllamaGenerator()
+        self.retrievals: LRUCache[Dict[str, Any]] = LRUCache(RETRIEVAL_CACHE_SIZE, 'recommend_retrievals')
+        self.answers: LRUCache[Dict[str, Any]] = LRUCache(RESULT_CACHE_SIZE, 'recommend_answers')
+
+    def retrieve(self, goals: Sequence[str], per_goal: int = 5) -> Dict[str, Any]:
+        key = (tuple(goals), per_goal, self.index.generation)
+        cached = self.retrievals.get(key)
+        if cached is not None:
+            return cached
+        started = time.perf_counter()
+        slugs, x = self.index.page_vectors.matrix()
+        hits: List[List[Tuple[str, float]]] = [[] for _ in goals]
+        if goals and len(slugs):
+            q = np.asarray(self.index.embed_queries(goals), dtype=np.float32)
+            q /= np.maximum(np.linalg.norm(q, axis=1, keepdims=True), 1e-12)
+            sims = q @ x.T
+            k = min(per_goal, len(slugs))
+            top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+            for g in range(len(goals)):
+                row = top[g][np.argsort(-sims[g, top[g]])]
+                hits[g] = [(slugs[i], float(sims[g, i])) for i in row]
+
+        # Pages shared by several goals appear once in the context, tagged with every goal they serve.
+        context: Dict[str, Dict[str, Any]] = {}
+        for g, row in enumerate(hits):
+            for slug, score in row:
+                entry = context.get(slug)
+                if entry is None:
+                    page = self.index.pages.get(slug)
+                    if page is None:
+                        continue
+                    d = page.to_dict()
+                    entry = context[slug] = {
+                        'slug': slug,
+                        'url': d['url'],
+                        'title': d['title'],
+                        'summary': _summary(d),
+                        'goals': [],
+                        'score': 0.0,
+                    }
+                entry['goals'].append(g + 1)
+                entry['score'] = max(entry['score'], round(score, 4))
+        result = {
+            'generation': self.index.generation,
+            'goals': [{'goal': goal, 'pages': [s for s, _ in row]} for goal, row in zip(goals, hits)],
+            'context': sorted(context.values(), key=lambda e: (-len(e['goals']), -e['score'])),
+            'tookMs': round((time.perf_counter() - started) * 1000, 3),
+        }
+        self.retrievals.put(key, result)
+        return result
+
+    def _link_suggestions(self, context: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        out = []
+        for entry in context[:LINK_SUGGESTIONS]:
+            links = suggest_internal_links(self.index, entry['slug'], limit=1)
+            for src in links['addLinksFrom']:
+                out.append({
+                    'type': 'internal_link',
+                    'title': f'Link to {entry["title"] or entry["slug"]}',
+                    'slug': entry['slug'],
+                    'from': src['slug'],
+                    'to': entry['slug'],
+                    'goal': entry['goals'][0],
+                    'rationale': f'Similar page (cosine {src["similarity"]}) does not link here yet.',
+                    'source': 'graph',
+                })
+        return out
+
+    def stream(
+        self,
+        goals: Sequence[str],
+        audience: Optional[str] = None,
+        constraints: Optional[Dict[str, Any]] = None,
+        per_goal: int = 5,
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Yield ('context' | 'recommendation' | 'done', payload) events as they become available."""
+        started = time.perf_counter()
+        goals = [' '.join(g.split()) for g in goals if g and g.strip()]
+        key = (tuple(goals), audience, json.dumps(constraints, sort_keys=True, default=str), per_goal, self.index.generation)
+        retrieval = self.retrieve(goals, per_goal=per_goal)
+        yield 'context', retrieval
+
+        cached = self.answers.get(key)
+        if cached is not None:
+            for rec in cached['recommendations']:
+                yield 'recommendation', rec
+            yield 'done', {**cached['done'], 'cached': True, 'tookMs': round((time.perf_counter() - started) * 1000, 3)}
+            return
+
+        recs: List[Dict[str, Any]] = []
+        # Graph-derived link suggestions need no model call, so they go out first.
+        for rec in self._link_suggestions(retrieval['context']):
+            recs.append(rec)
+            yield 'recommendation', rec
+
+        first_ms = None
+        if goals:
+            prompt = PROMPT.format(
+                goals='\n'.join(f'{i}. {g}' for i, g in enumerate(goals, start=1)),
+                audience=audience or 'general',
+                constraints=json.dumps(constraints or {}, sort_keys=True),
+                context='\n'.join(f'- {e["slug"]}: {e["title"]} - {e["summary"]}' for e in retrieval['context']) or '(no pages indexed)',
+            )
+            buf = ''
+            for fragment in self.llm.stream(prompt):
+                buf += fragment
+                while '\n' in buf:
+                    line, buf = buf.split('\n', 1)
+                    rec = parse_line(line)
+                    if rec is not None:
+                        if first_ms is None:
+                            first_ms = round((time.perf_counter() - started) * 1000, 3)
+                        recs.append(rec)
+                        yield 'recommendation', rec
+            rec = parse_line(buf)
+            if rec is not None:
+                recs.append(rec)
+                yield 'recommendation', rec
+
+        done = {
+            'generation': retrieval['generation'],
+            'count': len(recs),
+            'model': self.llm.model,
+            'firstLlmResultMs': first_ms,
+            'cached': False,
+            'tookMs': round((time.perf_counter() - started) * 1000, 3),
+        }
+        self.answers.put(key, {'recommendations': recs, 'done': done})
+        yield 'done', done
+
+    def recommend(
+        self,
+        goals: Sequence[str],
+        audience: Optional[str] = None,
+        constraints: Optional[Dict[str, Any]] = None,
+        per_goal: int = 5,
+    ) -> Dict[str, Any]:
+        """Non-streaming form: the whole answer as one document."""
+        out: Dict[str, Any] = {'recommendations': []}
+        for event, data in self.stream(goals, audience, constraints, per_goal):
+            if event == 'recommendation':
+                out['recommendations'].append(data)
+            else:
+                out[event] = data
+        return out
+
+
+_recommender: Optional[Recommender] = None
+_recommender_lock = threading.Lock()
+
+
+def get_recommender(index: SiteIndex) -> Recommender:
+    global _recommender
+    with _recommender_lock:
+        if _recommender is None or _recommender.index is not index:
+            _recommender = Recommender(index)
+        return _recommender
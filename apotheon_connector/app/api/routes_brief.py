@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel
+
+from ..analysis.brief import build_daily_brief, load_state
+from ..core.auth import require_admin
+from ..core.jobs import get_jobs
+from ..storage.index import get_index
+
+router = APIRouter()
+
+
+class DailyBriefReq(BaseModel):
+    goals: Optional[List[str]] = None
+    audience: Optional[str] = None
+
+
+@router.post('/daily-brief', status_code=202, dependencies=[Depends(require_admin)])
+def daily_brief(req: DailyBriefReq):
+    # Returns at once; a brief already in progress is returned instead of starting another.
+    index = get_index()
+    job = get_jobs().submit('daily-brief', lambda j: build_daily_brief(index, req.goals, req.audience, job=j))
+    return {'jobId': job.job_id, 'status': job.status, 'lastBrief': load_state(index).get('report')}
+
+
+@router.get('/daily-brief/{job_id}', dependencies=[Depends(require_admin)])
+def daily_brief_status(job_id: str):
+    job = get_jobs().get(job_id)
+    if job is None or job.kind != 'daily-brief':
+        raise HTTPException(status_code=404, detail=f'Unknown job: {job_id}')
+    return job.to_dict()
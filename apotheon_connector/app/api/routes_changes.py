@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from ..core.auth import require_read
+from ..storage.index import get_index
+
+router = APIRouter()
+
+
+def _parse_since(since: str) -> float:
+    try:
+        return float(since)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(since.replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        raise HTTPException(status_code=400, detail='since must be epoch seconds or an ISO 8601 timestamp')
+
+
+@router.get('/changes', dependencies=[Depends(require_read)])
+def changes(
+    since: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(default=100, ge=1, le=1000),
+):
+    # `cursor` (from a previous nextCursor) wins over `since`; neither means from the start.
+    index = get_index()
+    if cursor is not None:
+        try:
+            after = int(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail='Invalid cursor')
+        page = index.journal.read(after_seq=after, limit=limit)
+    elif since is not None:
+        page = index.journal.read(since_ts=_parse_since(since), limit=limit)
+    else:
+        page = index.journal.read(after_seq=0, limit=limit)
+    return {'generation': index.generation, **page}
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends
+from pydantic import BaseModel, Field
+
+from ..analysis.clusters import get_cluster_engine
+from ..core.auth import require_admin
+from ..storage.index import get_index
+
+router = APIRouter()
+
+
+class ClustersReq(BaseModel):
+    maxPages: Optional[int] = Field(default=None, ge=1)  # None clusters every indexed page
+    similarityThreshold: float = Field(default=0.35, ge=-1.0, le=1.0)
+    k: int = Field(default=10, ge=1, le=100)
+    method: Literal['labelprop', 'components'] = 'labelprop'
+
+
+@router.post('/clusters', dependencies=[Depends(require_admin)])
+def clusters(req: ClustersReq):
+    engine = get_cluster_engine(get_index())
+    return engine.clusters(
+        similarity_threshold=req.similarityThreshold,
+        k=req.k,
+        method=req.method,
+        max_pages=req.maxPages,
+    )
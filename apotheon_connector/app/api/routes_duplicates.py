@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, Query
+
+from ..core.auth import require_read
+from ..storage.index import get_index
+
+router = APIRouter()
+
+
+@router.get('/duplicates', dependencies=[Depends(require_read)])
+def duplicates(top: int = Query(default=10, ge=0, le=200)):
+    return get_index().duplicate_report(top=top)
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from ..core.auth import require_admin, require_read
+from ..core.jobs import get_jobs
+from ..storage.index import get_index
+
+router = APIRouter()
+
+
+@router.get('/generations', dependencies=[Depends(require_read)])
+def generations():
+    return get_index().generations()
+
+
+@router.post('/generations/{generation}/restore', dependencies=[Depends(require_admin)])
+def restore(generation: int):
+    # A running reindex builds on the current generation; restoring under it would be overwritten on publish.
+    if get_jobs().active('reindex') is not None:
+        raise HTTPException(status_code=409, detail='A reindex is running; cancel it or wait before restoring')
+    index = get_index()
+    previous = index.generation
+    try:
+        index.restore(generation)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f'Generation {generation} is not retained')
+    return {'ok': True, 'previous': previous, **index.generations()}
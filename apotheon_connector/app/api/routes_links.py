@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from ..analysis.links import suggest_internal_links
+from ..core.auth import require_read
+from ..storage.index import get_index
+
+router = APIRouter()
+
+
+@router.get('/links', dependencies=[Depends(require_read)])
+def link_summary(top: int = Query(default=20, ge=1, le=500)):
+    graph = get_index().links
+    return {
+        'pages': int(graph.exists.sum()),
+        'edges': int(len(graph.indices)),
+        'orphans': sorted(graph.orphans),
+        'deadEnds': sorted(graph.dead_ends),
+        'topPagerank': [{'slug': s, 'pagerank': round(pr, 6)} for s, pr in graph.top_pages(top)],
+    }
+
+
+@router.get('/links/{slug:path}', dependencies=[Depends(require_read)])
+def page_links(slug: str, limit: int = Query(default=10, ge=1, le=100)):
+    index = get_index()
+    if index.pages.get(slug) is None:
+        raise HTTPException(status_code=404, detail=f'Unknown page: {slug}')
+    return {
+        **suggest_internal_links(index, slug, limit=limit),
+        'outLinks': index.links.out_links(slug),
+        'inLinks': index.links.in_links(slug),
+    }
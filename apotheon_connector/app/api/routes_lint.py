@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends
+from pydantic import BaseModel, Field
+
+from ..analysis.lint import get_lint_engine
+from ..core.auth import require_admin
+from ..storage.index import get_index
+
+router = APIRouter()
+
+
+class LintReq(BaseModel):
+    thinWordThreshold: int = Field(default=250, ge=0)
+    scopeSlugs: Optional[List[str]] = None
+
+
+@router.post('/lint', dependencies=[Depends(require_admin)])
+def lint(req: LintReq):
+    engine = get_lint_engine(get_index())
+    return engine.lint(thin_word_threshold=req.thinWordThreshold, scope_slugs=req.scopeSlugs)
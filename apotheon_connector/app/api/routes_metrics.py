@@ -0,0 +1,14 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from ..core.auth import require_read
+from ..core.metrics import REGISTRY
+
+router = APIRouter()
+
+
+@router.get('/metrics', dependencies=[Depends(require_read)], response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type='text/plain; version=0.0.4')
@@ -1 +1,18 @@
-# routes_page.py placeholder
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+
+from ..core.auth import require_read
+from ..core.http import blob_response
+from ..indexing.extractor import slug_for_path
+from ..storage.index import get_index
+
+router = APIRouter()
+
+
+@router.get('/page/{slug:path}', dependencies=[Depends(require_read)])
+def page(slug: str, request: Request):
+    blob = get_index().pages.blob(slug_for_path(slug))
+    if blob is None:
+        raise HTTPException(status_code=404, detail=f'Unknown page: {slug}')
+    return blob_response(request, blob)
@@ -1 +1,44 @@
-# routes_recommend.py placeholder
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+
+from ..analysis.recommend import get_recommender
+from ..core.auth import require_read
+from ..storage.index import get_index
+
+router = APIRouter()
+
+
+class RecommendReq(BaseModel):
+    goals: Union[str, List[str]] = Field(default_factory=list)
+    audience: Optional[str] = None
+    constraints: Optional[Dict[str, Any]] = None
+    perGoal: int = Field(default=5, ge=1, le=50)
+    # Server-sent events; also selected by `Accept: text/event-stream`.
+    stream: bool = False
+
+
+def _sse(events: Iterator) -> Iterator[str]:
+    try:
+        for event, data in events:
+            yield f'event: {event}\ndata: {json.dumps(data)}\n\n'
+    except Exception as e:  # headers are already sent; report the failure in-band
+        yield f'event: error\ndata: {json.dumps({"detail": str(e)})}\n\n'
+
+
+@router.post('/recommend', dependencies=[Depends(require_read)])
+def recommend(req: RecommendReq, request: Request):
+    goals = [req.goals] if isinstance(req.goals, str) else req.goals
+    recommender = get_recommender(get_index())
+    if req.stream or 'text/event-stream' in request.headers.get('accept', ''):
+        return StreamingResponse(
+            _sse(recommender.stream(goals, req.audience, req.constraints, per_goal=req.perGoal)),
+            media_type='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+        )
+    return recommender.recommend(goals, req.audience, req.constraints, per_goal=req.perGoal)
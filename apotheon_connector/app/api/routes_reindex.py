@@ -1 +1,56 @@
-# routes_reindex.py placeholder
+from __future__ import annotations
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel
+
+from ..core.auth import require_admin
+from ..core.jobs import get_jobs
+from ..indexing.pipeline import ReindexRun
+from ..storage.index import get_index
+
+router = APIRouter()
+
+
+class ReindexReq(BaseModel):
+    mode: Optional[str] = None  # 'crawl' | 'build'; defaults to CONNECTOR_SOURCE
+    changedOnly: bool = True
+    resume: bool = True  # continue from the checkpoint of an interrupted run
+
+
+@router.post('/reindex', status_code=202, dependencies=[Depends(require_admin)])
+def reindex(req: ReindexReq):
+    # One reindex at a time: while a job is active, its ID is returned instead of a new one.
+    jobs = get_jobs()
+    active = jobs.active('reindex')
+    if active is not None:
+        return {'ok': True, 'jobId': active.job_id, 'status': active.status, 'alreadyRunning': True}
+    try:
+        run = ReindexRun(get_index(), mode=req.mode, changed_only=req.changedOnly, resume=req.resume)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    def work(job):
+        run.job = job
+        return run.run()
+
+    job = jobs.submit('reindex', work)
+    return {'ok': True, 'jobId': job.job_id, 'status': job.status, 'alreadyRunning': False}
+
+
+@router.get('/reindex/{job_id}', dependencies=[Depends(require_admin)])
+def reindex_status(job_id: str):
+    job = get_jobs().get(job_id)
+    if job is None or job.kind != 'reindex':
+        raise HTTPException(status_code=404, detail=f'Unknown job: {job_id}')
+    return job.to_dict()
+
+
+@router.delete('/reindex/{job_id}', dependencies=[Depends(require_admin)])
+def cancel_reindex(job_id: str):
+    job = get_jobs().get(job_id)
+    if job is None or job.kind != 'reindex':
+        raise HTTPException(status_code=404, detail=f'Unknown job: {job_id}')
+    get_jobs().cancel(job_id)
+    return job.to_dict()
@@ -1 +1,37 @@
-# routes_search.py placeholder
+from __future__ import annotations
+
+import time
+from typing import Any, Dict, Literal, Optional
+
+from fastapi import APIRouter, Depends
+from pydantic import BaseModel, Field
+
+from ..core.auth import require_read
+from ..storage.index import get_index
+
+router = APIRouter()
+
+
+class SearchReq(BaseModel):
+    query: str = Field(min_length=1)
+    limit: int = Field(default=8, ge=1, le=100)
+    filters: Optional[Dict[str, Any]] = None
+    # lexical: BM25 only (no embedding call); vector: embeddings only; hybrid: RRF of both.
+    mode: Literal['lexical', 'vector', 'hybrid'] = 'hybrid'
+
+
+@router.post('/search', dependencies=[Depends(require_read)])
+def search(req: SearchReq):
+    started = time.perf_counter()
+    results = get_index().search(req.query, mode=req.mode, limit=req.limit, filters=req.filters)
+    return {
+        'query': req.query,
+        'mode': req.mode,
+        'results': results,
+        'tookMs': round((time.perf_counter() - started) * 1000, 3),
+    }
+
+
+@router.get('/search/cache', dependencies=[Depends(require_read)])
+def search_cache_stats():
+    return get_index().cache_stats()
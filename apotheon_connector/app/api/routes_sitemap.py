@@ -1 +1,15 @@
-# routes_sitemap.py placeholder
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, Request
+
+from ..core.auth import require_read
+from ..core.http import blob_response
+from ..storage.index import get_index
+
+router = APIRouter()
+
+
+@router.get('/sitemap', dependencies=[Depends(require_read)])
+def sitemap(request: Request):
+    # Built once per index commit; a fetch is one write of the stored (gzip) bytes.
+    return blob_response(request, get_index().pages.sitemap())
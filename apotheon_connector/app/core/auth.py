@@ -0,0 +1,16 @@
+from typing import Optional
+
+from fastapi import Header, HTTPException
+
+from .config import READ_TOKEN, ADMIN_TOKEN
+
+
+def require_read(authorization: Optional[str] = Header(None)):
+    # Admin tokens can always read.
+    if authorization not in (f'Bearer {READ_TOKEN}', f'Bearer {ADMIN_TOKEN}'):
+        raise HTTPException(status_code=401)
+
+
+def require_admin(authorization: Optional[str] = Header(None)):
+    if authorization != f'Bearer {ADMIN_TOKEN}':
+        raise HTTPException(status_code=401)
@@ -13,6 +13,56 @@ CONNECTOR_SITE_ID = os.getenv('CONNECTOR_SITE_ID', 'apotheon-dev')
 CONNECTOR_SOURCE = os.getenv('CONNECTOR_SOURCE', 'crawl')
 CHROMA_DIR = os.getenv('CONNECTOR_CHROMA_DIR', './.chroma')
 
+# Connector-owned index state (lexical index, page records) lives next to Chroma.
+DATA_DIR = os.getenv('CONNECTOR_DATA_DIR', './.connector')
+
+# Daily brief markdown output (pruned by scripts/maintenance/connector-cleanup.sh).
+REPORTS_DIR = os.getenv('CONNECTOR_REPORTS_DIR', './reports')
+
+# Crawl limits
+CRAWL_MAX_PAGES = int(os.getenv('CONNECTOR_MAX_PAGES', '2000'))
+CRAWL_TIMEOUT_SEC = float(os.getenv('CONNECTOR_CRAWL_TIMEOUT', '15'))
+
+# Reindex pipeline: concurrent fetches, extraction processes, queue bound between
+# stages, and how often (seconds) progress is committed so a crashed run can resume.
+CRAWL_CONCURRENCY = int(os.getenv('CONNECTOR_CRAWL_CONCURRENCY', '8'))
+EXTRACT_WORKERS = int(os.getenv('CONNECTOR_EXTRACT_WORKERS', str(min(4, os.cpu_count() or 1))))
+REINDEX_QUEUE_SIZE = int(os.getenv('CONNECTOR_REINDEX_QUEUE', '64'))
+REINDEX_CHECKPOINT_SEC = float(os.getenv('CONNECTOR_REINDEX_CHECKPOINT_SEC', '30'))
+
+# Chunking
+CHUNK_WORDS = int(os.getenv('CONNECTOR_CHUNK_WORDS', '200'))
+CHUNK_OVERLAP_WORDS = int(os.getenv('CONNECTOR_CHUNK_OVERLAP_WORDS', '40'))
+
+# Embeddings (Ollama)
+OLLAMA_BASE_URL = os.getenv('OLLAMA_BASE_URL', 'http://127.0.0.1:11434').rstrip('/')
+EMBED_MODEL = os.getenv('CONNECTOR_EMBED_MODEL', 'nomic-embed-text')
+EMBED_BATCH_SIZE = int(os.getenv('CONNECTOR_EMBED_BATCH', '32'))
+
+# Generation (Ollama) for /recommend
+LLM_MODEL = os.getenv('CONNECTOR_LLM_MODEL', 'llama3.1')
+
+# Query caches (entries). Results are keyed by index generation, so no TTL is needed.
+QUERY_EMBED_CACHE_SIZE = int(os.getenv('CONNECTOR_QUERY_EMBED_CACHE', '2048'))
+SEARCH_RESULT_CACHE_SIZE = int(os.getenv('CONNECTOR_SEARCH_RESULT_CACHE', '4096'))
+
+# Published index generations kept on disk for instant restore (the current one always is).
+KEEP_GENERATIONS = int(os.getenv('CONNECTOR_KEEP_GENERATIONS', '3'))
+
+# Near-duplicate pages: max SimHash Hamming distance (64-bit signatures).
+NEARDUP_MAX_DISTANCE = int(os.getenv('CONNECTOR_NEARDUP_DISTANCE', '6'))
+# Near-duplicate chunks: reuse a stored canonical chunk within this distance (0 = exact only).
+CHUNK_NEARDUP_MAX_DISTANCE = int(os.getenv('CONNECTOR_CHUNK_NEARDUP_DISTANCE', '6'))
+
+# Clustering: memory budget for one block of the blocked similarity computation.
+CLUSTER_BLOCK_MB = int(os.getenv('CONNECTOR_CLUSTER_BLOCK_MB', '64'))
+
+# Lint: worker processes used when many pages need re-evaluation.
+LINT_WORKERS = int(os.getenv('CONNECTOR_LINT_WORKERS', str(os.cpu_count() or 1)))
+
+# Prometheus metrics at /metrics and per-route request timings.
+METRICS_ENABLED = os.getenv('CONNECTOR_METRICS', '1').lower() not in ('0', 'false', 'no')
+
 # Token configuration
 # If specific tokens are not provided, default to CONNECTOR_TOKEN when present.
 READ_TOKEN = os.getenv('CONNECTOR_READ_TOKEN') or os.getenv('CONNECTOR_TOKEN') or 'read-token'
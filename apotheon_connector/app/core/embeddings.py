@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import time
+from typing import List, Sequence
+
+import requests
+
+from .config import OLLAMA_BASE_URL, EMBED_MODEL, EMBED_BATCH_SIZE
+from .metrics import REGISTRY, SIZE_BUCKETS
+
+EMBED_SECONDS = REGISTRY.histogram('connector_embed_request_seconds', 'Ollama /api/embed request latency.')
+EMBED_BATCH = REGISTRY.histogram('connector_embed_batch_size', 'Texts per Ollama /api/embed request.', buckets=SIZE_BUCKETS)
+
+
+class OllamaEmbedder:
+    """Batched client for Ollama's /api/embed endpoint."""
+
+    def __init__(self, base_url: str = OLLAMA_BASE_URL, model: str = EMBED_MODEL, batch_size: int = EMBED_BATCH_SIZE):
+        self.base_url = base_url.rstrip('/')
+        self.model = model
+        self.batch_size = max(1, batch_size)
+        self._session = requests.Session()
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        out: List[List[float]] = []
+        for i in range(0, len(texts), self.batch_size):
+            batch = list(texts[i:i + self.batch_size])
+            started = time.perf_counter()
+            r = self._session.post(
+                f'{self.base_url}/api/embed',
+                json={'model': self.model, 'input': batch},
+                timeout=120,
+            )
+            EMBED_SECONDS.observe(time.perf_counter() - started)
+            EMBED_BATCH.observe(len(batch))
+            r.raise_for_status()
+            vectors = r.json().get('embeddings') or []
+            if len(vectors) != len(batch):
+                raise RuntimeError(f'Ollama returned {len(vectors)} embeddings for {len(batch)} inputs')
+            out.extend(vectors)
+        return out
+
+    def embed_one(self, text: str) -> List[float]:
+        return self.embed([text])[0]
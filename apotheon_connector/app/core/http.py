@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from fastapi import Request, Response
+
+from ..storage.pages import Blob
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    # If-None-Match uses weak comparison: W/"x" matches "x".
+    for tag in header.split(','):
+        tag = tag.strip()
+        if tag == '*' or tag.removeprefix('W/') == etag:
+            return True
+    return False
+
+
+def blob_response(request: Request, blob: Blob) -> Response:
+    """Serve a pre-serialized body: 304 on a matching ETag, stored gzip bytes when accepted."""
+    headers = {'ETag': blob.etag, 'Cache-Control': 'no-cache', 'Vary': 'Accept-Encoding'}
+    inm = request.headers.get('if-none-match')
+    if inm and _etag_matches(inm, blob.etag):
+        return Response(status_code=304, headers=headers)
+    if blob.body_gz is not None and 'gzip' in request.headers.get('accept-encoding', ''):
+        headers['Content-Encoding'] = 'gzip'
+        return Response(blob.body_gz, media_type='application/json', headers=headers)
+    return Response(blob.body, media_type='application/json', headers=headers)
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+JOB_HISTORY = 100
+ACTIVE = ('queued', 'running')
+
+
+class JobCancelled(Exception):
+    pass
+
+
+@dataclass
+class Job:
+    job_id: str
+    kind: str
+    status: str = 'queued'  # queued | running | succeeded | failed | cancelled
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    progress: Dict[str, Any] = field(default_factory=dict)
+    result: Any = None
+    error: Optional[str] = None
+    cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    def check_cancelled(self) -> None:
+        """Called by job code between units of work."""
+        if self.cancel_event.is_set():
+            raise JobCancelled()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'jobId': self.job_id,
+            'kind': self.kind,
+            'status': self.status,
+            'createdAt': self.created_at,
+            'startedAt': self.started_at,
+            'finishedAt': self.finished_at,
+            'progress': dict(self.progress),
+            'result': self.result,
+            'error': self.error,
+        }
+
+
+class JobManager:
+    """Background jobs on daemon threads, one active job per kind.
+
+    Submitting a kind that already has a queued or running job returns that job
+    instead of starting a second one. Finished jobs are kept for status queries,
+    up to JOB_HISTORY of them.
+    """
+
+    def __init__(self, history: int = JOB_HISTORY):
+        self.history = history
+        self._jobs: 'OrderedDict[str, Job]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, fn: Callable[[Job], Any]) -> Job:
+        with self._lock:
+            for job in self._jobs.values():
+                if job.kind == kind and job.status in ACTIVE:
+                    return job
+            job = Job(job_id=uuid.uuid4().hex, kind=kind)
+            self._jobs[job.job_id] = job
+            self._trim()
+        threading.Thread(target=self._run, args=(job, fn), name=f'job-{kind}', daemon=True).start()
+        return job
+
+    def _run(self, job: Job, fn: Callable[[Job], Any]) -> None:
+        job.status = 'running'
+        job.started_at = time.time()
+        try:
+            job.check_cancelled()
+            job.result = fn(job)
+            job.status = 'succeeded'
+        except JobCancelled:
+            job.status = 'cancelled'
+        except Exception as e:
+            job.error = f'{type(e).__name__}: {e}'
+            job.status = 'failed'
+        finally:
+            job.finished_at = time.time()
+
+    def _trim(self) -> None:
+        done = [jid for jid, j in self._jobs.items() if j.status not in ACTIVE]
+        for jid in done[:max(0, len(self._jobs) - self.history)]:
+            del self._jobs[jid]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def active(self, kind: str) -> Optional[Job]:
+        with self._lock:
+            return next((j for j in self._jobs.values() if j.kind == kind and j.status in ACTIVE), None)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        job = self._jobs.get(job_id)
+        if job is not None and job.status in ACTIVE:
+            job.cancel_event.set()
+        return job
+
+
+_jobs: Optional[JobManager] = None
+_jobs_lock = threading.Lock()
+
+
+def get_jobs() -> JobManager:
+    global _jobs
+    with _jobs_lock:
+        if _jobs is None:
+            _jobs = JobManager()
+        return _jobs
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, Iterator, Optional
+
+import requests
+
+from .config import OLLAMA_BASE_URL, LLM_MODEL
+
+
+class OllamaGenerator:
+    """Streaming client for Ollama's /api/generate endpoint."""
+
+    def __init__(self, base_url: str = OLLAMA_BASE_URL, model: str = LLM_MODEL):
+        self.base_url = base_url.rstrip('/')
+        self.model = model
+        self._session = requests.Session()
+
+    def stream(self, prompt: str, options: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        """Yield response text fragments as Ollama produces them."""
+        payload: Dict[str, Any] = {'model': self.model, 'prompt': prompt, 'stream': True}
+        if options:
+            payload['options'] = options
+        # (connect, read) timeouts: the read timeout applies between chunks, not to the whole answer.
+        with self._session.post(f'{self.base_url}/api/generate', json=payload, stream=True, timeout=(10, 120)) as r:
+            r.raise_for_status()
+            for line in r.iter_lines():
+                if not line:
+                    continue
+                data = json.loads(line)
+                if data.get('error'):
+                    raise RuntimeError(f'Ollama error: {data["error"]}')
+                if data.get('response'):
+                    yield data['response']
+                if data.get('done'):
+                    return
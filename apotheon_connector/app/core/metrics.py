@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import abc
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple
+
+# Seconds; spans sub-millisecond cache hits to minute-long embedding batches.
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+# Any other request method is counted as 'other', so clients cannot mint new series.
+HTTP_METHODS = frozenset({'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'})
+
+
+def _fmt(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+class _Metric(abc.ABC):
+    kind = ''
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str) -> Any:
+        """The child for one label combination; look it up once and keep it on hot paths."""
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    @abc.abstractmethod
+    def _new_child(self) -> Any:
+        ...
+
+    @abc.abstractmethod
+    def _samples(self) -> Iterator[str]:
+        ...
+
+    def render(self) -> List[str]:
+        return [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}', *self._samples()]
+
+
+class _Value:
+    __slots__ = ('value', '_lock')
+
+    def __init__(self) -> None:
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def _samples(self) -> Iterator[str]:
+        for key, child in list(self._children.items()):
+            yield f'{self.name}{_labels(self.labelnames, key)} {_fmt(child.value)}'
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+
+class _Buckets:
+    __slots__ = ('bounds', 'counts', 'sum', 'count', '_lock')
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        i = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _Buckets:
+        return _Buckets(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def _samples(self) -> Iterator[str]:
+        for key, child in list(self._children.items()):
+            with child._lock:
+                counts, total, count = list(child.counts), child.sum, child.count
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float('inf'),), counts):
+                cumulative += n
+                le = f'le="{_fmt(bound)}"'
+                yield f'{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}'
+            yield f'{self.name}_sum{_labels(self.labelnames, key)} {_fmt(total)}'
+            yield f'{self.name}_count{_labels(self.labelnames, key)} {count}'
+
+
+class Registry:
+    """Metrics are updated in place; text is only produced when /metrics is scraped.
+
+    Collectors are callbacks run at scrape time for values that already exist
+    elsewhere (cache counters, index sizes), so they cost nothing between scrapes.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: Dict[str, Callable[[], List[str]]] = {}
+        self._lock = threading.Lock()
+
+    def _add(self, metric: _Metric) -> Any:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing  # module reloads and repeated imports share one series
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._add(Gauge(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def collector(self, key: str, fn: Callable[[], List[str]]) -> None:
+        """Register (or replace) a scrape-time callback returning exposition lines."""
+        with self._lock:
+            self._collectors[key] = fn
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors.values())
+        for metric in metrics:
+            lines.extend(metric.render())
+        for fn in collectors:
+            lines.extend(fn())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+_caches: Dict[str, Any] = {}
+
+
+def register_cache(name: str, cache: Any) -> None:
+    """Expose an LRUCache's counters as connector_cache_* series; a later cache with the same name replaces it."""
+    _caches[name] = cache
+
+
+def _cache_lines() -> List[str]:
+    stats = {name: cache.stats() for name, cache in list(_caches.items())}
+    lines: List[str] = []
+    for field, metric, kind, help in (
+        ('hits', 'connector_cache_hits_total', 'counter', 'Cache lookups that hit.'),
+        ('misses', 'connector_cache_misses_total', 'counter', 'Cache lookups that missed.'),
+        ('evictions', 'connector_cache_evictions_total', 'counter', 'Entries evicted to stay within maxsize.'),
+        ('size', 'connector_cache_entries', 'gauge', 'Entries currently cached.'),
+        ('hitRatio', 'connector_cache_hit_ratio', 'gauge', 'Hits over lookups since start.'),
+    ):
+        lines += [f'# HELP {metric} {help}', f'# TYPE {metric} {kind}']
+        lines += [f'{metric}{{cache="{name}"}} {_fmt(s[field] or 0)}' for name, s in stats.items()]
+    return lines
+
+
+REGISTRY.collector('caches', _cache_lines)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request count and latency per route template."""
+
+    def __init__(self, app: Any, registry: Registry = REGISTRY):
+        self.app = app
+        self.requests = registry.counter('connector_http_requests_total', 'HTTP requests by route and status.', ('method', 'route', 'status'))
+        self.latency = registry.histogram('connector_http_request_seconds', 'HTTP request latency until the response is complete.', ('method', 'route'))
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = [500]
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            if message['type'] == 'http.response.start':
+                status[0] = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # The router stores the matched route in the scope; templates keep label cardinality bounded.
+            route = getattr(scope.get('route'), 'path', None) or 'unmatched'
+            method = scope['method'] if scope['method'] in HTTP_METHODS else 'other'
+            self.requests.labels(method, route, status[0]).inc()
+            self.latency.labels(method, route).observe(time.perf_counter() - started)
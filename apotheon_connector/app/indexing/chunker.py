@@ -1 +1,30 @@
-# chunker.py placeholder
+from __future__ import annotations
+
+from typing import List
+
+from ..core.config import CHUNK_WORDS, CHUNK_OVERLAP_WORDS
+from ..storage.models import Chunk, PageRecord
+
+
+def chunk_page(page: PageRecord, size: int = CHUNK_WORDS, overlap: int = CHUNK_OVERLAP_WORDS) -> List[Chunk]:
+    """Split a page into overlapping word windows, never crossing a section heading."""
+    step = max(1, size - max(0, overlap))
+    chunks: List[Chunk] = []
+    for sec in page.sections:
+        words = sec.text.split()
+        if not words:
+            continue
+        start = 0
+        while True:
+            window = words[start:start + size]
+            chunks.append(Chunk(
+                chunk_id=f'{page.slug}#{len(chunks)}',
+                slug=page.slug,
+                ordinal=len(chunks),
+                text=' '.join(window),
+                heading=sec.heading,
+            ))
+            if start + size >= len(words):
+                break
+            start += step
+    return chunks
@@ -1 +1,145 @@
-# crawler.py placeholder
+from __future__ import annotations
+
+import os
+import re
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit, urlunsplit
+
+import requests
+
+from ..core.config import CRAWL_CONCURRENCY, CRAWL_MAX_PAGES, CRAWL_TIMEOUT_SEC
+
+_HREF_RE = re.compile(r'''<a\s[^>]*?href\s*=\s*["']([^"']+)["']''', re.IGNORECASE)
+_SKIP_EXT = {
+    '.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp', '.ico', '.pdf', '.zip', '.css', '.js',
+    '.json', '.xml', '.txt', '.woff', '.woff2', '.ttf', '.mp4', '.webm', '.mp3',
+}
+
+
+# Answers that mean the page no longer exists, as opposed to a failed fetch.
+GONE_STATUSES = (404, 410)
+
+
+@dataclass
+class SourceReport:
+    """What a source could not deliver, filled in while it is iterated.
+
+    Pages missing from a run are only known to be deleted when the report is complete;
+    otherwise only the `gone` URLs are.
+    """
+
+    failed: Dict[str, str] = field(default_factory=dict)  # url -> reason (timeout, HTTP 503, read error)
+    gone: List[str] = field(default_factory=list)  # urls that answered 404/410
+    truncated: bool = False  # stopped at max_pages with pages left
+
+    @property
+    def complete(self) -> bool:
+        return not self.failed and not self.truncated
+
+
+def _normalize(url: str) -> str:
+    u = urlsplit(url)
+    return urlunsplit((u.scheme, u.netloc, u.path or '/', '', ''))
+
+
+def _is_crawlable(url: str, netloc: str) -> bool:
+    u = urlsplit(url)
+    if u.scheme not in ('http', 'https') or u.netloc != netloc:
+        return False
+    return os.path.splitext(u.path)[1].lower() not in _SKIP_EXT
+
+
+def crawl(
+    base_url: str,
+    max_pages: int = CRAWL_MAX_PAGES,
+    session: Optional[requests.Session] = None,
+    workers: int = CRAWL_CONCURRENCY,
+    report: Optional[SourceReport] = None,
+) -> Iterator[Tuple[str, str]]:
+    """Breadth-first same-host crawl yielding (url, html), with up to `workers` requests in flight.
+
+    Pages are yielded in completion order, so the frontier keeps growing while slow
+    responses are still outstanding. Failed fetches, 404/410 answers and hitting
+    `max_pages` are recorded in `report`.
+    """
+    report = report if report is not None else SourceReport()
+    s = session or requests.Session()
+    netloc = urlsplit(base_url).netloc
+    start = _normalize(base_url)
+    frontier = deque([start])
+    seen = {start}
+    fetched = 0
+
+    def fetch(url: str) -> Tuple[str, Optional[str]]:
+        try:
+            r = s.get(url, timeout=CRAWL_TIMEOUT_SEC)
+        except requests.RequestException as e:
+            report.failed[url] = type(e).__name__
+            return url, None
+        if r.status_code in GONE_STATUSES:
+            report.gone.append(url)
+            return url, None
+        if r.status_code != 200:
+            report.failed[url] = f'HTTP {r.status_code}'
+            return url, None
+        if 'html' not in r.headers.get('content-type', ''):
+            return url, None
+        return (r.url if _is_crawlable(r.url, netloc) else url), r.text
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='crawl') as pool:
+        inflight: Dict[Future, str] = {}
+        while frontier or inflight:
+            while frontier and len(inflight) < workers and fetched + len(inflight) < max_pages:
+                url = frontier.popleft()
+                inflight[pool.submit(fetch, url)] = url
+            if not inflight:
+                report.truncated = bool(frontier)
+                break
+            done, _ = wait(inflight, return_when=FIRST_COMPLETED)
+            for fut in done:
+                url = inflight.pop(fut)
+                final_url, html = fut.result()
+                if html is None:
+                    continue
+                fetched += 1
+                yield final_url, html
+
+                for href in _HREF_RE.findall(html):
+                    nxt = _normalize(urljoin(url, href))
+                    if nxt not in seen and _is_crawlable(nxt, netloc):
+                        seen.add(nxt)
+                        frontier.append(nxt)
+
+
+def iter_build_dir(
+    build_dir: str,
+    base_url: str,
+    max_pages: int = CRAWL_MAX_PAGES,
+    report: Optional[SourceReport] = None,
+) -> Iterator[Tuple[str, str]]:
+    """Yield (url, html) for every HTML file in a static build output directory."""
+    report = report if report is not None else SourceReport()
+    root = Path(build_dir)
+    base = base_url.rstrip('/')
+    count = 0
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith('.'))
+        for fn in sorted(filenames):
+            if not fn.endswith(('.html', '.htm')):
+                continue
+            if count >= max_pages:
+                report.truncated = True
+                return
+            fp = Path(dirpath) / fn
+            rel = fp.relative_to(root).as_posix()
+            try:
+                html = fp.read_text(encoding='utf-8', errors='replace')
+            except OSError as e:
+                report.failed[f'{base}/{rel}'] = type(e).__name__
+                continue
+            yield f'{base}/{rel}', html
+            count += 1
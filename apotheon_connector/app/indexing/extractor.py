@@ -1 +1,159 @@
-# extractor.py placeholder
+from __future__ import annotations
+
+import hashlib
+import re
+import time
+from html.parser import HTMLParser
+from typing import List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+from ..storage.models import PageRecord, Section
+
+_SKIP_TAGS = {'script', 'style', 'noscript', 'template', 'svg', 'iframe'}
+# Chrome regions: their links count for the link graph but their text is not content.
+_CHROME_TAGS = {'nav', 'header', 'footer', 'aside'}
+_BLOCK_TAGS = {
+    'p', 'div', 'section', 'article', 'main', 'li', 'ul', 'ol', 'br', 'tr', 'table',
+    'blockquote', 'pre', 'dd', 'dt', 'figcaption',
+}
+_HEADING_TAGS = {'h1': 1, 'h2': 2, 'h3': 3, 'h4': 4, 'h5': 5, 'h6': 6}
+_WS_RE = re.compile(r'[ \t\r\f\v]+')
+_NL_RE = re.compile(r'\n\s*\n+')
+
+
+def slug_for_path(path: str) -> str:
+    path = path.split('#', 1)[0].split('?', 1)[0].strip('/')
+    for suffix in ('index.html', 'index.htm'):
+        if path.endswith(suffix):
+            path = path[: -len(suffix)].rstrip('/')
+    if path.endswith('.html'):
+        path = path[:-5]
+    elif path.endswith('.htm'):
+        path = path[:-4]
+    return path or 'index'
+
+
+def slug_for_url(url: str, base_url: str) -> Optional[str]:
+    """Slug for an internal URL, or None when the URL points off-site."""
+    u = urlsplit(url)
+    b = urlsplit(base_url)
+    if u.scheme not in ('http', 'https', '') or (u.netloc and u.netloc != b.netloc):
+        return None
+    base_path = b.path.rstrip('/')
+    path = u.path
+    if base_path and path.startswith(base_path):
+        path = path[len(base_path):]
+    return slug_for_path(path)
+
+
+class _PageParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = ''
+        self.description = ''
+        self.hrefs: List[str] = []
+        self.headings: List[List[object]] = []
+        self.sections: List[Section] = [Section(heading=None, level=0, text='')]
+        self._buf: List[str] = []
+        self._skip = 0
+        self._chrome = 0
+        self._in_title = False
+        self._heading: Optional[Tuple[int, List[str]]] = None
+
+    def _flush(self) -> None:
+        text = _NL_RE.sub('\n\n', _WS_RE.sub(' ', ''.join(self._buf))).strip()
+        sec = self.sections[-1]
+        if text:
+            sec.text = f'{sec.text}\n\n{text}' if sec.text else text
+        self._buf = []
+
+    def handle_starttag(self, tag, attrs):
+        a = dict(attrs)
+        if tag in _SKIP_TAGS:
+            self._skip += 1
+        elif tag in _CHROME_TAGS:
+            self._chrome += 1
+        elif tag == 'title':
+            self._in_title = True
+        elif tag == 'meta' and (a.get('name') or '').lower() == 'description':
+            self.description = (a.get('content') or '').strip()
+        elif tag == 'a' and a.get('href'):
+            self.hrefs.append(a['href'])
+        elif tag in _HEADING_TAGS and not self._skip and not self._chrome:
+            self._flush()
+            self._heading = (_HEADING_TAGS[tag], [])
+        elif tag in _BLOCK_TAGS:
+            self._buf.append('\n')
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TAGS:
+            self._skip = max(0, self._skip - 1)
+        elif tag in _CHROME_TAGS:
+            self._chrome = max(0, self._chrome - 1)
+        elif tag == 'title':
+            self._in_title = False
+        elif tag in _HEADING_TAGS and self._heading is not None:
+            level, parts = self._heading
+            text = _WS_RE.sub(' ', ''.join(parts)).strip()
+            self._heading = None
+            self.headings.append([level, text])
+            self.sections.append(Section(heading=text or None, level=level, text=''))
+        elif tag in _BLOCK_TAGS:
+            self._buf.append('\n')
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+        elif self._skip or self._chrome:
+            return
+        elif self._heading is not None:
+            self._heading[1].append(data)
+        else:
+            self._buf.append(data)
+
+    def close(self):
+        super().close()
+        self._flush()
+
+
+def content_hash(page: PageRecord) -> str:
+    h = hashlib.sha256()
+    for part in (page.title, page.description, page.text, '\n'.join(page.links)):
+        h.update(part.encode('utf-8'))
+        h.update(b'\0')
+    return h.hexdigest()
+
+
+def extract(html: str, url: str, base_url: str) -> PageRecord:
+    p = _PageParser()
+    p.feed(html)
+    p.close()
+
+    links: List[str] = []
+    seen = set()
+    for href in p.hrefs:
+        if href.startswith(('mailto:', 'tel:', 'javascript:', '#')):
+            continue
+        slug = slug_for_url(urljoin(url, href), base_url)
+        if slug is not None and slug not in seen:
+            seen.add(slug)
+            links.append(slug)
+
+    sections = [s for s in p.sections if s.text or s.heading]
+    title = _WS_RE.sub(' ', p.title).strip()
+    if not title:
+        title = next((h[1] for h in p.headings if h[0] == 1), '')
+
+    page = PageRecord(
+        slug=slug_for_url(url, base_url) or slug_for_path(urlsplit(url).path),
+        url=url,
+        title=title,
+        description=p.description,
+        headings=p.headings,
+        sections=sections,
+        links=links,
+        fetched_at=time.time(),
+    )
+    page.word_count = len(page.text.split())
+    page.content_hash = content_hash(page)
+    return page
@@ -1 +1,457 @@
-# pipeline.py placeholder
+from __future__ import annotations
+
+import json
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from ..core.config import (
+    CONNECTOR_BASE_URL,
+    CONNECTOR_BUILD_DIR,
+    CONNECTOR_SOURCE,
+    EMBED_BATCH_SIZE,
+    EXTRACT_WORKERS,
+    REINDEX_CHECKPOINT_SEC,
+    REINDEX_QUEUE_SIZE,
+)
+from ..core.jobs import Job
+from ..core.metrics import REGISTRY, SIZE_BUCKETS
+from ..storage.index import SiteIndex
+from ..storage.models import PageRecord
+from .chunker import chunk_page
+from .crawler import SourceReport, crawl, iter_build_dir
+from .extractor import extract, slug_for_url
+
+STAGES = ('fetch', 'extract', 'chunk', 'embed', 'upsert')
+EXTRACT_BATCH = 16
+UPSERT_BATCH = 32
+_DONE = object()
+_run_lock = threading.Lock()
+
+STAGE_SECONDS = REGISTRY.histogram('connector_reindex_stage_seconds', 'Busy time per unit of work (page or batch) by pipeline stage.', ('stage',))
+STAGE_ITEMS = REGISTRY.counter('connector_reindex_items_total', 'Pages handled by each pipeline stage.', ('stage',))
+QUEUE_DEPTH = REGISTRY.gauge('connector_reindex_queue_depth', 'Items waiting in the queue after each stage.', ('queue',))
+EMBED_BATCH = REGISTRY.histogram('connector_reindex_embed_batch_chunks', 'Chunks per embedding batch.', buckets=SIZE_BUCKETS)
+PAGES_PER_SEC = REGISTRY.gauge('connector_reindex_pages_per_second', 'Throughput of the running (or last) reindex.')
+
+
+def iter_source(mode: Optional[str] = None, report: Optional[SourceReport] = None) -> Iterator[Tuple[str, str]]:
+    source = (mode or CONNECTOR_SOURCE).lower()
+    if source == 'build':
+        if not CONNECTOR_BUILD_DIR:
+            raise ValueError('CONNECTOR_BUILD_DIR must be set for build mode')
+        return iter_build_dir(CONNECTOR_BUILD_DIR, CONNECTOR_BASE_URL, report=report)
+    if source == 'crawl':
+        return crawl(CONNECTOR_BASE_URL, report=report)
+    raise ValueError(f'Unknown source mode: {source}')
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _extract_pool(workers: int) -> ProcessPoolExecutor:
+    """Long-lived extraction pool; worker start-up is paid once per process, not per run."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            # spawn, not fork: this process is multi-threaded (server, Chroma, pipeline stages).
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+            _pool_workers = workers
+        return _pool
+
+
+def extract_batch(items: Sequence[Tuple[str, str]], base_url: str) -> Tuple[List[PageRecord], float]:
+    """Process-pool entry point: parse a batch of (url, html); also returns the worker's busy seconds."""
+    started = time.perf_counter()
+    return [extract(html, url, base_url) for url, html in items], time.perf_counter() - started
+
+
+class ReindexRun:
+    """One reindex as five stages joined by bounded queues:
+
+        fetch -> extract -> chunk -> embed -> upsert
+
+    Fetch is concurrent I/O (crawler thread pool or build-dir reads), extract runs in a
+    process pool, chunk does the unchanged check, chunking and dedup planning, embed
+    batches chunks across pages, and upsert applies pages to the index in planning order.
+    Full queues block the producer, so a slow embedder throttles the crawl instead of
+    buffering the site in memory.
+
+    Pages are written to a new index generation that search does not see until the run
+    publishes it at the end. Every REINDEX_CHECKPOINT_SEC that generation is saved together
+    with a checkpoint of the pages already handled; a run that crashed or was cancelled
+    resumes from it.
+    """
+
+    def __init__(
+        self,
+        index: SiteIndex,
+        mode: Optional[str] = None,
+        changed_only: bool = True,
+        resume: bool = True,
+        job: Optional[Job] = None,
+        extract_workers: int = EXTRACT_WORKERS,
+        queue_size: int = REINDEX_QUEUE_SIZE,
+    ):
+        self.index = index
+        self.mode = (mode or CONNECTOR_SOURCE).lower()
+        self.changed_only = changed_only
+        self.resume = resume
+        self.job = job
+        self.extract_workers = extract_workers
+        self.report = SourceReport()
+        self.source = iter_source(self.mode, self.report)  # raises ValueError for a bad mode before any work starts
+        self.checkpoint_path = index.data_dir / 'reindex_checkpoint.json'
+
+        self.queues = {name: queue.Queue(maxsize=max(1, queue_size)) for name in STAGES[:-1]}
+        self.stop = threading.Event()
+        self.errors: List[BaseException] = []
+        self.counts = {name: 0 for name in STAGES}
+        self.busy = {name: 0.0 for name in STAGES + ('commit',)}  # seconds spent working, not waiting on queues
+        self.stats = {'pages': 0, 'updated': 0, 'unchanged': 0, 'removed': 0, 'chunks': 0, 'dedupedChunks': 0, 'resumed': 0}
+        self.seen: Set[str] = set()  # every slug the source produced (including before a resume); drives pruning
+        self.done: Set[str] = set()  # slugs whose current content is in the index
+        self.previous: Set[str] = set()  # `done` from the checkpoint being resumed
+        if resume:
+            self._load_checkpoint()
+
+    # ---- checkpoint ----
+
+    def _load_checkpoint(self) -> None:
+        try:
+            cp = json.loads(self.checkpoint_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return
+        if cp.get('mode') != self.mode:
+            return
+        self.seen = set(cp.get('seen') or [])
+        self.previous = set(cp.get('done') or [])
+        self.done = set(self.previous)
+
+    def _commit(self, publish: bool) -> None:
+        started = time.perf_counter()
+        if publish:
+            self.index.commit()
+        else:
+            self.index.checkpoint()
+        self._timed('commit', time.perf_counter() - started, items=0)
+
+    def _checkpoint(self) -> None:
+        self._commit(publish=False)
+        self.checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.checkpoint_path.with_suffix('.json.tmp')
+        tmp.write_text(json.dumps({
+            'jobId': self.job.job_id if self.job else None,
+            'mode': self.mode,
+            'changedOnly': self.changed_only,
+            'seen': sorted(self.seen),
+            'done': sorted(self.done),
+            'updatedAt': time.time(),
+        }), encoding='utf-8')
+        os.replace(tmp, self.checkpoint_path)
+
+    # ---- instrumentation ----
+
+    def _timed(self, stage: str, seconds: float, items: int = 1) -> None:
+        self.busy[stage] += seconds
+        STAGE_SECONDS.labels(stage).observe(seconds)
+        if items:
+            STAGE_ITEMS.labels(stage).inc(items)
+
+    def timings(self) -> Dict[str, Dict[str, Any]]:
+        """Per-stage busy time and throughput; the stage with the most busy time is the bottleneck."""
+        out = {}
+        for stage, seconds in self.busy.items():
+            items = self.counts.get(stage)
+            out[stage] = {
+                'busySec': round(seconds, 3),
+                'items': items,
+                'itemsPerSec': round(items / seconds, 2) if items and seconds > 0 else None,
+            }
+        return out
+
+    # ---- queue helpers (every wait wakes up to notice cancellation) ----
+
+    def _stopped(self) -> bool:
+        return self.stop.is_set() or (self.job is not None and self.job.cancel_event.is_set())
+
+    def _put(self, name: str, item: Any) -> bool:
+        q = self.queues[name]
+        while not self._stopped():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, name: str) -> Any:
+        q = self.queues[name]
+        while True:
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                if self._stopped():
+                    return _DONE
+
+    def _guard(self, fn: Callable[[], None]) -> Callable[[], None]:
+        def run() -> None:
+            try:
+                fn()
+            except BaseException as e:
+                self.errors.append(e)
+                self.stop.set()
+        return run
+
+    # ---- stages ----
+
+    def _fetch(self) -> None:
+        try:
+            source = iter(self.source)
+            while True:
+                started = time.perf_counter()
+                item = next(source, _DONE)
+                if item is _DONE:
+                    break
+                self._timed('fetch', time.perf_counter() - started)
+                self.counts['fetch'] += 1
+                if not self._put('fetch', item):
+                    return
+        finally:
+            close = getattr(self.source, 'close', None)
+            if close is not None:
+                close()
+        self._put('fetch', _DONE)
+
+    def _extract(self) -> None:
+        if self.extract_workers < 2:
+            while (item := self._get('fetch')) is not _DONE:
+                started = time.perf_counter()
+                page = extract(item[1], item[0], CONNECTOR_BASE_URL)
+                self._timed('extract', time.perf_counter() - started)
+                self.counts['extract'] += 1
+                if not self._put('extract', page):
+                    return
+            self._put('extract', _DONE)
+            return
+
+        pool = _extract_pool(self.extract_workers)
+        inflight: Set[Future] = set()
+
+        def drain(until: int) -> bool:
+            while len(inflight) > until:
+                done, _ = wait(inflight, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    inflight.discard(fut)
+                    pages, seconds = fut.result()
+                    self._timed('extract', seconds, items=len(pages))
+                    for page in pages:
+                        self.counts['extract'] += 1
+                        if not self._put('extract', page):
+                            return False
+            return True
+
+        batch: List[Tuple[str, str]] = []
+        finished = False
+        while not finished:
+            item = self._get('fetch')
+            if item is _DONE:
+                finished = True
+            else:
+                batch.append(item)
+            if batch and (finished or len(batch) >= EXTRACT_BATCH or self.queues['fetch'].empty()):
+                inflight.add(pool.submit(extract_batch, batch, CONNECTOR_BASE_URL))
+                batch = []
+                if not drain(self.extract_workers * 2 - 1):
+                    return
+        if not drain(0):
+            return
+        if not self._stopped():
+            self._put('extract', _DONE)
+
+    def _chunk(self) -> None:
+        pending: Dict[str, str] = {}
+        handled: Set[str] = set()
+        while (page := self._get('extract')) is not _DONE:
+            if page.slug in handled:
+                continue  # another URL for a slug already handled in this run
+            handled.add(page.slug)
+            self.seen.add(page.slug)
+            self.stats['pages'] += 1
+            started = time.perf_counter()
+
+            prev = self.index.staged_pages.get(page.slug)
+            same = prev is not None and prev.content_hash == page.content_hash
+            if same and page.slug in self.previous:
+                # Committed by the interrupted run this one resumes; skipped even when changedOnly is off.
+                self.stats['resumed'] += 1
+                continue
+            if same and self.changed_only:
+                self.stats['unchanged'] += 1
+                self.done.add(page.slug)
+                continue
+
+            chunks = chunk_page(page)
+            canonical = self.index.dedup_plan(page, chunks, pending)
+            self._timed('chunk', time.perf_counter() - started)
+            self.counts['chunk'] += 1
+            if not self._put('chunk', (page, chunks, canonical)):
+                return
+        self._put('chunk', _DONE)
+
+    def _embed(self) -> None:
+        batch: List[Tuple[PageRecord, Any, Any, int]] = []
+        texts: List[str] = []
+
+        def flush() -> bool:
+            started = time.perf_counter()
+            vectors = self.index.embedder.embed(texts) if texts else []
+            self._timed('embed', time.perf_counter() - started, items=len(batch))
+            EMBED_BATCH.observe(len(texts))
+            i = 0
+            for page, chunks, canonical, n in batch:
+                self.counts['embed'] += 1
+                if not self._put('embed', (page, chunks, canonical, vectors[i:i + n])):
+                    return False
+                i += n
+            batch.clear()
+            texts.clear()
+            return True
+
+        while True:
+            # Fill batches across pages, but never sit on a partial batch while upstream is idle.
+            try:
+                item = self.queues['chunk'].get_nowait()
+            except queue.Empty:
+                if batch and not flush():
+                    return
+                item = self._get('chunk')
+            if item is _DONE:
+                break
+            page, chunks, canonical = item
+            unique = [c.text for c, canon in zip(chunks, canonical) if canon is None]
+            batch.append((page, chunks, canonical, len(unique)))
+            texts.extend(unique)
+            if len(texts) >= EMBED_BATCH_SIZE and not flush():
+                return
+        if (not batch or flush()) and not self._stopped():
+            self._put('embed', _DONE)
+
+    # ---- driver (upsert stage) ----
+
+    def _progress(self, started: float) -> None:
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        queues = {name: q.qsize() for name, q in self.queues.items()}
+        for name, depth in queues.items():
+            QUEUE_DEPTH.labels(name).set(depth)
+        PAGES_PER_SEC.set(round(self.stats['pages'] / elapsed, 2))
+        if self.job is None:
+            return
+        self.job.progress.update({
+            'stages': dict(self.counts),
+            'queues': queues,
+            'stats': dict(self.stats),
+            'pagesPerSec': round(self.stats['pages'] / elapsed, 2),
+            'timings': self.timings(),
+        })
+
+    def run(self) -> Dict[str, Any]:
+        if not _run_lock.acquire(blocking=False):
+            raise RuntimeError('A reindex is already running')
+        try:
+            return self._run()
+        finally:
+            _run_lock.release()
+
+    def _run(self) -> Dict[str, Any]:
+        started = time.perf_counter()
+        if not self.resume:
+            self.index.discard_build()
+        threads = [
+            threading.Thread(target=self._guard(fn), name=f'reindex-{name}', daemon=True)
+            for name, fn in (('fetch', self._fetch), ('extract', self._extract), ('chunk', self._chunk), ('embed', self._embed))
+        ]
+        for t in threads:
+            t.start()
+
+        completed = False
+        last_checkpoint = time.monotonic()
+        try:
+            while (item := self._get('embed')) is not _DONE:
+                # Apply whatever is ready as one batch: a Chroma upsert costs about the same for 1 or 100 chunks.
+                batch = [item]
+                while len(batch) < UPSERT_BATCH:
+                    try:
+                        nxt = self.queues['embed'].get_nowait()
+                    except queue.Empty:
+                        break
+                    if nxt is _DONE:
+                        self.queues['embed'].put(nxt)
+                        break
+                    batch.append(nxt)
+                upsert_started = time.perf_counter()
+                self.index.replace_pages([(page, chunks, vectors, canonical) for page, chunks, canonical, vectors in batch])
+                self._timed('upsert', time.perf_counter() - upsert_started, items=len(batch))
+                for page, chunks, canonical, _ in batch:
+                    self.done.add(page.slug)
+                    self.counts['upsert'] += 1
+                    self.stats['updated'] += 1
+                    self.stats['chunks'] += len(chunks)
+                    self.stats['dedupedChunks'] += sum(1 for c in canonical if c is not None)
+                self._progress(started)
+                if time.monotonic() - last_checkpoint >= REINDEX_CHECKPOINT_SEC:
+                    self._checkpoint()
+                    last_checkpoint = time.monotonic()
+            completed = not self._stopped()
+        finally:
+            self.stop.set()
+            for t in threads:
+                t.join()
+            if not completed:
+                # Keep what was indexed so the next run resumes instead of starting over.
+                self._checkpoint()
+
+        if self.errors:
+            raise self.errors[0]
+        if self.job is not None:
+            self.job.check_cancelled()
+
+        # Pages the source did not produce are only pruned when it reached everything; after a
+        # failed fetch or at the page cap they may just have been missed (and with them every
+        # page only linked from them), so then only pages that answered 404/410 go.
+        self.stats['fetchFailed'] = len(self.report.failed)
+        self.stats['sourceTruncated'] = self.report.truncated
+        if self.report.complete and self.seen:
+            stale = [slug for slug in self.index.staged_pages.slugs() if slug not in self.seen]
+        else:
+            gone = {slug_for_url(url, CONNECTOR_BASE_URL) for url in self.report.gone}
+            stale = [slug for slug in gone if slug is not None and slug not in self.seen
+                     and self.index.staged_pages.get(slug) is not None]
+        for slug in stale:
+            self.index.remove_page(slug)
+            self.stats['removed'] += 1
+
+        self._commit(publish=True)
+        self.checkpoint_path.unlink(missing_ok=True)
+        self._progress(started)
+        self.stats['tookSec'] = round(time.perf_counter() - started, 3)
+        return {**self.stats, 'timings': self.timings()}
+
+
+def run_reindex(
+    index: SiteIndex,
+    mode: Optional[str] = None,
+    changed_only: bool = True,
+    resume: bool = True,
+    job: Optional[Job] = None,
+) -> Dict[str, Any]:
+    """Crawl/read the site and bring the vector and lexical indexes up to date."""
+    return ReindexRun(index, mode=mode, changed_only=changed_only, resume=resume, job=job).run()
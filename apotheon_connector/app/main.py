@@ -1,15 +1,28 @@
-from fastapi import FastAPI, Header, HTTPException
-from .core.config import READ_TOKEN, ADMIN_TOKEN
+from fastapi import FastAPI
 
-app = FastAPI(title='Apotheon Website Connector', version='0.5.0')
+from .core.auth import require_read, require_admin  # noqa: F401  (historical import location)
+from .core.config import METRICS_ENABLED
+from .core.metrics import MetricsMiddleware
+from .api import routes_brief, routes_changes, routes_clusters, routes_duplicates, routes_generations, routes_links, routes_lint, routes_metrics, routes_page, routes_recommend, routes_reindex, routes_search, routes_sitemap
 
-def require_read(auth: str = Header(None)):
-    if auth != f'Bearer {READ_TOKEN}':
-        raise HTTPException(status_code=401)
+app = FastAPI(title='Apotheon Website Connector', version='0.6.0')
 
-def require_admin(auth: str = Header(None)):
-    if auth != f'Bearer {ADMIN_TOKEN}':
-        raise HTTPException(status_code=401)
+app.include_router(routes_page.router)
+app.include_router(routes_sitemap.router)
+app.include_router(routes_search.router)
+app.include_router(routes_reindex.router)
+app.include_router(routes_clusters.router)
+app.include_router(routes_lint.router)
+app.include_router(routes_links.router)
+app.include_router(routes_duplicates.router)
+app.include_router(routes_recommend.router)
+app.include_router(routes_changes.router)
+app.include_router(routes_brief.router)
+app.include_router(routes_generations.router)
+
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(routes_metrics.router)
 
 @app.get('/health')
 def health():
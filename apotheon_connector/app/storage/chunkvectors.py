@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .vectordb import VectorStore
+
+MATRIX_FILE = 'chunk_vectors.npy'
+META_FILE = 'chunk_vectors.json'
+EXPORT_BATCH = 1000
+
+
+def export_chunk_vectors(vectors: VectorStore, directory: Path, batch: int = EXPORT_BATCH) -> int:
+    """Write every chunk of a collection to `directory` as unit rows plus ids and metadata.
+
+    Called when a generation is published. Chroma rewrites its segment files whenever a
+    client opens them, so processes other than the connector search this snapshot instead.
+    """
+    ids: List[str] = []
+    metas: List[Dict[str, Any]] = []
+    blocks: List[np.ndarray] = []
+    while True:
+        res = vectors.collection.get(include=['embeddings', 'metadatas'], limit=batch, offset=len(ids))
+        got = res.get('ids') or []
+        if not got:
+            break
+        rows = np.asarray(res['embeddings'], dtype=np.float32)
+        norms = np.linalg.norm(rows, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        blocks.append(rows / norms)
+        ids.extend(got)
+        metas.extend(dict(m or {}) for m in res.get('metadatas') or [{}] * len(got))
+    matrix = np.concatenate(blocks) if blocks else np.zeros((0, 0), dtype=np.float32)
+    mat_tmp = directory / f'.{MATRIX_FILE}.tmp'
+    meta_tmp = directory / f'.{META_FILE}.tmp'
+    with open(mat_tmp, 'wb') as f:
+        np.save(f, matrix)
+    meta_tmp.write_text(json.dumps({'ids': ids, 'metas': metas}), encoding='utf-8')
+    os.replace(mat_tmp, directory / MATRIX_FILE)
+    os.replace(meta_tmp, directory / META_FILE)
+    return len(ids)
+
+
+def _matches(meta: Dict[str, Any], filters: Dict[str, Any]) -> bool:
+    return all(meta.get(k) == v for k, v in filters.items())
+
+
+class ChunkVectorSnapshot:
+    """Read-only chunk vectors of one published generation, memory-mapped from its directory.
+
+    `query` has VectorStore's signature and similarity (cosine), computed exactly over
+    the matrix, so `search_generation` can use it in place of Chroma.
+    """
+
+    def __init__(self, ids: List[str], metas: List[Dict[str, Any]], matrix: np.ndarray):
+        self.ids = ids
+        self.metas = metas
+        self.matrix = matrix
+
+    @staticmethod
+    def exists(directory: Path) -> bool:
+        return (directory / MATRIX_FILE).exists() and (directory / META_FILE).exists()
+
+    @classmethod
+    def load(cls, directory: Path) -> Optional['ChunkVectorSnapshot']:
+        try:
+            doc = json.loads((directory / META_FILE).read_text(encoding='utf-8'))
+            matrix = np.load(directory / MATRIX_FILE, mmap_mode='r')
+        except (OSError, ValueError):
+            return None  # published before snapshots were written
+        if len(doc.get('ids') or []) != len(matrix):
+            return None
+        return cls(doc['ids'], doc['metas'], matrix)
+
+    def count(self) -> int:
+        return len(self.ids)
+
+    def query(
+        self,
+        embedding: Sequence[float],
+        limit: int = 10,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> List[Tuple[str, float, Dict[str, Any]]]:
+        """Return up to `limit` (chunk id, similarity, metadata) tuples, best first."""
+        if not self.ids:
+            return []
+        q = np.asarray(embedding, dtype=np.float32)
+        n = float(np.linalg.norm(q))
+        scores = self.matrix @ (q / n if n else q)
+        if filters:
+            keep = np.fromiter((_matches(m, filters) for m in self.metas), dtype=bool, count=len(self.metas))
+            scores = np.where(keep, scores, -np.inf)
+            available = int(keep.sum())
+        else:
+            available = len(self.ids)
+        k = min(limit, available)
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.ids[i], float(scores[i]), dict(self.metas[i])) for i in top]
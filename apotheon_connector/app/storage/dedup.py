@@ -0,0 +1,271 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from .lexical import tokenize
+
+SHINGLE_WORDS = 3
+# Shorter chunks are only deduplicated exactly: the fewer the words, the more one changed word matters.
+NEAR_CHUNK_MIN_WORDS = 50
+_BITS = np.arange(64, dtype=np.uint64)
+
+
+def chunk_key(text: str) -> str:
+    """Exact-duplicate key: hash of the normalized token stream."""
+    return hashlib.blake2b(' '.join(tokenize(text)).encode('utf-8'), digest_size=16).hexdigest()
+
+
+def simhash(text: str) -> Optional[int]:
+    """64-bit SimHash over word 3-shingles, weighted by shingle frequency."""
+    toks = tokenize(text)
+    if not toks:
+        return None
+    if len(toks) >= SHINGLE_WORDS:
+        shingles = Counter(' '.join(toks[i:i + SHINGLE_WORDS]) for i in range(len(toks) - SHINGLE_WORDS + 1))
+    else:
+        shingles = Counter([' '.join(toks)])
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), 'little') for s in shingles),
+        dtype=np.uint64,
+        count=len(shingles),
+    )
+    weights = np.fromiter(shingles.values(), dtype=np.float64, count=len(shingles))
+    bits = ((hashes[:, None] >> _BITS) & np.uint64(1)).astype(np.int8) * 2 - 1
+    acc = weights @ bits
+    return int(np.packbits((acc > 0).astype(np.uint8)[::-1]).view('>u8')[0])
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def _bands(max_distance: int) -> List[Tuple[int, int]]:
+    # Pigeonhole: split 64 bits into d+1 bands; any pair within distance d agrees on one band.
+    n = max_distance + 1
+    edges = [round(i * 64 / n) for i in range(n + 1)]
+    return [(edges[i], edges[i + 1] - edges[i]) for i in range(n)]
+
+
+class NearDuplicateIndex:
+    """SimHash LSH over pages: candidate lookup touches only matching band buckets."""
+
+    def __init__(self, max_distance: int = 6):
+        self.max_distance = max_distance
+        self.bands = _bands(max_distance)
+        self.sigs: Dict[str, int] = {}
+        self.buckets: Dict[Tuple[int, int], Set[str]] = {}
+        self.neighbors: Dict[str, Dict[str, int]] = {}
+
+    def _keys(self, sig: int) -> List[Tuple[int, int]]:
+        return [(i, (sig >> start) & ((1 << width) - 1)) for i, (start, width) in enumerate(self.bands)]
+
+    def update(self, slug: str, sig: Optional[int]) -> None:
+        if self.sigs.get(slug) == sig and sig is not None:
+            return
+        self.remove(slug)
+        if sig is None:
+            return
+        candidates: Set[str] = set()
+        for key in self._keys(sig):
+            bucket = self.buckets.setdefault(key, set())
+            candidates |= bucket
+            bucket.add(slug)
+        self.sigs[slug] = sig
+        for other in candidates:
+            d = hamming(sig, self.sigs[other])
+            if d <= self.max_distance:
+                self.neighbors.setdefault(slug, {})[other] = d
+                self.neighbors.setdefault(other, {})[slug] = d
+
+    def nearest(self, sig: int) -> Optional[str]:
+        """Closest entry within max_distance of `sig` (ties by name), without adding it."""
+        best: Optional[str] = None
+        best_d = self.max_distance + 1
+        for key in self._keys(sig):
+            for other in self.buckets.get(key, ()):
+                d = hamming(sig, self.sigs[other])
+                if d < best_d or (d == best_d and best is not None and other < best):
+                    best, best_d = other, d
+        return best
+
+    def remove(self, slug: str) -> None:
+        sig = self.sigs.pop(slug, None)
+        if sig is None:
+            return
+        for key in self._keys(sig):
+            bucket = self.buckets.get(key)
+            if bucket is not None:
+                bucket.discard(slug)
+                if not bucket:
+                    del self.buckets[key]
+        for other in self.neighbors.pop(slug, {}):
+            nb = self.neighbors.get(other)
+            if nb is not None:
+                nb.pop(slug, None)
+                if not nb:
+                    del self.neighbors[other]
+
+    def clusters(self) -> List[Dict[str, object]]:
+        """Connected groups of near-duplicate pages, largest first."""
+        seen: Set[str] = set()
+        out: List[Dict[str, object]] = []
+        for start in sorted(self.neighbors):
+            if start in seen:
+                continue
+            group, stack, worst = [], [start], 0
+            seen.add(start)
+            while stack:
+                s = stack.pop()
+                group.append(s)
+                for o, d in self.neighbors.get(s, {}).items():
+                    worst = max(worst, d)
+                    if o not in seen:
+                        seen.add(o)
+                        stack.append(o)
+            out.append({'size': len(group), 'maxDistance': worst, 'slugs': sorted(group)})
+        out.sort(key=lambda c: (-c['size'], c['slugs'][0]))
+        return out
+
+
+class ChunkRegistry:
+    """Exact-duplicate chunk owners. The first owner of a key is the stored canonical.
+
+    With `max_distance` > 0 stored chunks also carry a SimHash in an LSH index. A new
+    chunk within `max_distance` bits of one (boilerplate with a changed date or name)
+    borrows that chunk's embedding instead of being embedded; it is still stored and
+    indexed under its own text, so the words that differ stay searchable.
+    """
+
+    def __init__(self, max_distance: int = 0):
+        # key -> {slug: (chunk id, heading)} in insertion order; the first entry is the one
+        # stored in the vector/lexical indexes. Dicts keep release/plan O(1) for boilerplate
+        # shared by thousands of pages.
+        self.owners: Dict[str, Dict[str, Tuple[str, str]]] = {}
+        self.by_slug: Dict[str, Set[str]] = {}
+        self.near: Optional[NearDuplicateIndex] = NearDuplicateIndex(max_distance) if max_distance > 0 else None
+        # chunk id -> stored chunk whose embedding it reuses; set by `plan`, taken by the index
+        self.borrowed: Dict[str, str] = {}
+        self._sigs: Dict[str, int] = {}  # chunk id -> signature computed by `plan`
+
+    def _signature(self, text: str) -> Optional[int]:
+        if self.near is None or len(tokenize(text)) < NEAR_CHUNK_MIN_WORDS:
+            return None
+        return simhash(text)
+
+    def _owner(self, key: str, slug: str) -> Optional[str]:
+        return next((v[0] for s, v in self.owners.get(key, {}).items() if s != slug), None)
+
+    def plan(
+        self,
+        slug: str,
+        chunk_ids: Sequence[str],
+        keys: Sequence[str],
+        pending: Optional[Dict[str, str]] = None,
+        texts: Optional[Sequence[str]] = None,
+    ) -> List[Optional[str]]:
+        """Canonical chunk id for each chunk, or None when it must be embedded and stored.
+
+        `pending` (key -> chunk id) carries chunks planned for earlier pages that are not
+        registered yet; new keys from this page are added to it. When `texts` is given,
+        a new chunk near a registered one gets that chunk's id too and is recorded in
+        `borrowed`: it is stored, but with the embedding of the chunk it matched.
+        """
+        local: Dict[str, str] = pending if pending is not None else {}
+        out: List[Optional[str]] = []
+        for i, (cid, key) in enumerate(zip(chunk_ids, keys)):
+            other = self._owner(key, slug)
+            if other is not None:
+                out.append(other)
+                continue
+            if key in local:
+                out.append(local[key])
+                continue
+            local[key] = cid
+            sig = self._signature(texts[i]) if texts is not None else None
+            match = self.near.nearest(sig) if sig is not None else None
+            source = self._owner(match, slug) if match is not None else None
+            if source is not None:
+                self.borrowed[cid] = source
+            elif sig is not None:
+                self._sigs[cid] = sig
+            out.append(source)
+        return out
+
+    def release(self, slug: str) -> List[Tuple[str, Tuple[str, str, str]]]:
+        """Drop a page's entries; returns (old canonical id, (chunk id, slug, heading) promoted)."""
+        promotions = []
+        for key in self.by_slug.pop(slug, ()):
+            owners = self.owners.get(key)
+            if not owners:
+                continue
+            was_canonical = next(iter(owners)) == slug
+            old = owners.pop(slug, None)
+            if not owners:
+                del self.owners[key]
+                if self.near is not None:
+                    self.near.remove(key)
+            elif was_canonical and old is not None:
+                nxt_slug, (cid, heading) = next(iter(owners.items()))
+                promotions.append((old[0], (cid, nxt_slug, heading)))
+        return promotions
+
+    def register(self, slug: str, entries: Sequence[Tuple[str, str, str]]) -> None:
+        """entries: (chunk id, heading, text) in page order; repeats within a page alias the first."""
+        for cid, heading, text in entries:
+            key = chunk_key(text)
+            sig = self._sigs.pop(cid, None)
+            owners = self.owners.get(key)
+            if owners is None:
+                owners = self.owners[key] = {}
+                if sig is None:
+                    sig = self._signature(text)
+                if sig is not None:
+                    self.near.update(key, sig)
+            owners.setdefault(slug, (cid, heading))
+            self.by_slug.setdefault(slug, set()).add(key)
+
+    def stats(self, top: int = 10) -> Dict[str, object]:
+        shared = [v for v in self.owners.values() if len(v) > 1]
+        shared.sort(key=len, reverse=True)
+        return {
+            'uniqueChunks': len(self.owners),
+            'aliasedPages': sum(len(v) - 1 for v in shared),
+            'topShared': [{'canonical': next(iter(v.values()))[0], 'pages': len(v)} for v in shared[:top]],
+        }
+
+
+def save_dedup(path: Path, registry: ChunkRegistry, near: NearDuplicateIndex) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + '.tmp')
+    with tmp.open('wb') as f:
+        pickle.dump({'owners': registry.owners, 'by_slug': registry.by_slug, 'sigs': near.sigs,
+                     'chunk_sigs': registry.near.sigs if registry.near is not None else {},
+                     'max_distance': near.max_distance}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+def load_dedup(path: Path, max_distance: int, chunk_max_distance: int = 0) -> Tuple[ChunkRegistry, NearDuplicateIndex]:
+    registry = ChunkRegistry(chunk_max_distance)
+    near = NearDuplicateIndex(max_distance)
+    if not path.exists():
+        return registry, near
+    with path.open('rb') as f:
+        state = pickle.load(f)
+    registry.owners = state.get('owners', {})
+    registry.by_slug = state.get('by_slug', {})
+    # Buckets and neighbour lists are derived; rebuilding also applies a changed max distance.
+    for slug, sig in state.get('sigs', {}).items():
+        near.update(slug, sig)
+    if registry.near is not None:
+        # Canonicals stored before chunk signatures were kept have none; they only match exactly.
+        for key, sig in state.get('chunk_sigs', {}).items():
+            if key in registry.owners:
+                registry.near.update(key, sig)
+    return registry, near
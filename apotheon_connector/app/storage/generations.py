@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ..core.config import CHUNK_NEARDUP_MAX_DISTANCE, NEARDUP_MAX_DISTANCE
+from .chunkvectors import export_chunk_vectors
+from .dedup import load_dedup, save_dedup
+from .lexical import BM25Index
+from .linkgraph import LinkGraph
+from .pages import PageStore
+from .pagevectors import PageVectors
+from .vectordb import VectorStore, collection_name, rename_collection
+
+BUILDING_MARKER = 'building.json'
+PUBLISHED_MARKER = 'published.json'
+# Files the components keep in a generation directory (pages.db is copied with the SQLite backup API).
+LEGACY_FILES = ('lexical.pkl', 'pages.db', 'pages.db-wal', 'pages.db-shm', 'pages.json', 'pages.json.migrated',
+                'page_vectors.npy', 'page_vectors.json', 'links.npz', 'links.json', 'dedup.pkl')
+
+
+def _write_json(path: Path, doc: Dict[str, Any]) -> None:
+    tmp = path.with_name(f'.{path.name}.tmp')
+    tmp.write_text(json.dumps(doc), encoding='utf-8')
+    os.replace(tmp, path)
+
+
+def _read_json(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads(path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+
+
+class Generation:
+    """One complete copy of the index: files under `generations/<n>/` plus Chroma collection `-g<n>`.
+
+    A published generation is never written again. Reindexing writes a clone and
+    publishing it is a pointer flip, so readers never see a half-applied reindex.
+    `refs` counts in-flight queries; a generation is only dropped at zero.
+    """
+
+    def __init__(self, number: int, root: Path, chroma_dir: str, site_id: str):
+        self.number = number
+        self.dir = root / str(number)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.vectors = VectorStore(chroma_dir, site_id, generation=number)
+        self.lexical = BM25Index.load(self.dir / 'lexical.pkl')
+        self.pages = PageStore(self.dir / 'pages.db')
+        self.page_vectors = PageVectors(self.dir)
+        self.links = LinkGraph(self.dir)
+        self.chunk_registry, self.near_duplicates = load_dedup(self.dir / 'dedup.pkl', NEARDUP_MAX_DISTANCE, CHUNK_NEARDUP_MAX_DISTANCE)
+        self.refs = 0
+        self.dirty = False
+
+    def save(self) -> None:
+        self.lexical.maybe_compact()
+        self.lexical.save(self.dir / 'lexical.pkl')
+        self.pages.save()
+        self.page_vectors.save()
+        self.links.commit()
+        save_dedup(self.dir / 'dedup.pkl', self.chunk_registry, self.near_duplicates)
+
+    def mark_building(self, base: int, checkpointed: bool) -> None:
+        _write_json(self.dir / BUILDING_MARKER, {
+            'generation': self.number, 'base': base, 'checkpointed': checkpointed, 'dirty': self.dirty, 'savedAt': time.time(),
+        })
+
+    def mark_published(self, base: Optional[int]) -> None:
+        export_chunk_vectors(self.vectors, self.dir)  # what out-of-process readers search; see chunkvectors
+        _write_json(self.dir / PUBLISHED_MARKER, {'generation': self.number, 'base': base, 'publishedAt': time.time(), 'pages': len(self.pages)})
+        (self.dir / BUILDING_MARKER).unlink(missing_ok=True)
+
+    def drop(self) -> None:
+        self.vectors.drop()
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+
+def clone(src: Generation, number: int, root: Path, chroma_dir: str, site_id: str) -> Generation:
+    """A writable copy of a published generation under a new number."""
+    dst = root / str(number)
+    if dst.exists():
+        shutil.rmtree(dst)
+    VectorStore(chroma_dir, site_id, generation=number).drop()  # leftovers of an abandoned build
+    dst.mkdir(parents=True)
+    for f in src.dir.iterdir():
+        if f.is_file() and not f.name.startswith(('pages.db', '.')) and f.name not in (BUILDING_MARKER, PUBLISHED_MARKER):
+            shutil.copy2(f, dst / f.name)
+    src.pages.copy_to(dst / 'pages.db')
+    gen = Generation(number, root, chroma_dir, site_id)
+    gen.vectors.copy_from(src.vectors)
+    return gen
+
+
+def scan(root: Path) -> Dict[int, Dict[str, Any]]:
+    """Generation directories by number, with their marker contents."""
+    out: Dict[int, Dict[str, Any]] = {}
+    if not root.exists():
+        return out
+    for d in root.iterdir():
+        if not d.is_dir() or not d.name.isdigit():
+            continue
+        published = _read_json(d / PUBLISHED_MARKER)
+        building = _read_json(d / BUILDING_MARKER)
+        out[int(d.name)] = {'published': published, 'building': building}
+    return out
+
+
+def drop_unloaded(number: int, root: Path, chroma_dir: str, site_id: str) -> None:
+    """Delete a generation that is not open in this process."""
+    VectorStore(chroma_dir, site_id, generation=number).drop()
+    shutil.rmtree(root / str(number), ignore_errors=True)
+
+
+def migrate_flat_layout(data_dir: Path, root: Path, chroma_dir: str, site_id: str, number: int) -> bool:
+    """Move a pre-generations index (files directly in data_dir, unsuffixed collection) into generation `number`."""
+    files = [data_dir / name for name in LEGACY_FILES if (data_dir / name).exists()]
+    renamed = rename_collection(chroma_dir, collection_name(site_id), collection_name(site_id, number))
+    if not files and not renamed:
+        return False
+    dst = root / str(number)
+    dst.mkdir(parents=True, exist_ok=True)
+    for f in files:
+        os.replace(f, dst / f.name)
+    _write_json(dst / PUBLISHED_MARKER, {'generation': number, 'base': None, 'publishedAt': time.time(), 'migrated': True})
+    return True
+
+
+def published_numbers(root: Path) -> List[int]:
+    return sorted(n for n, m in scan(root).items() if m['published'] is not None)
@@ -0,0 +1,559 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from ..core.cache import LRUCache
+from ..core.config import (
+    CHROMA_DIR,
+    DATA_DIR,
+    CONNECTOR_SITE_ID,
+    KEEP_GENERATIONS,
+    QUERY_EMBED_CACHE_SIZE,
+    SEARCH_RESULT_CACHE_SIZE,
+)
+from ..core.embeddings import OllamaEmbedder
+from ..core.metrics import REGISTRY
+from .chunkvectors import ChunkVectorSnapshot, export_chunk_vectors
+from .dedup import ChunkRegistry, NearDuplicateIndex, chunk_key, simhash
+from .generations import Generation, clone, drop_unloaded, migrate_flat_layout, published_numbers, scan
+from .journal import ChangeJournal
+from .lexical import BM25Index
+from .linkgraph import LinkGraph
+from .models import Chunk, PageRecord
+from .pages import PageStore
+from .pagevectors import PageVectors
+from .vectordb import VectorStore
+
+SEARCH_MODES = ('lexical', 'vector', 'hybrid')
+RRF_K = 60
+SNIPPET_CHARS = 240
+
+COMMIT_SECONDS = REGISTRY.histogram('connector_index_commit_seconds', 'Time to save and publish a new generation.')
+GENERATION = REGISTRY.gauge('connector_index_generation', 'Current index generation.')
+PAGES = REGISTRY.gauge('connector_index_pages', 'Pages in the index.')
+
+
+def rrf_fuse(rankings: Sequence[Sequence[str]], k: int = RRF_K) -> List[Tuple[str, float]]:
+    """Reciprocal rank fusion: score(d) = sum over rankings of 1 / (k + rank(d))."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, start=1):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+
+
+def _normalize_query(query: str) -> str:
+    return ' '.join(query.split())
+
+
+def _matches(meta: Dict[str, Any], filters: Dict[str, Any]) -> bool:
+    return all(meta.get(k) == v for k, v in filters.items())
+
+
+def search_generation(
+    gen: Any,
+    query: str,
+    mode: str,
+    limit: int,
+    filters: Optional[Dict[str, Any]],
+    embed_query: Callable[[str], List[float]],
+) -> List[Dict[str, Any]]:
+    """Ranked hits (one per page) from a generation's `lexical` and `vectors`.
+
+    Shared by SiteIndex and the read-only SiteReader, which passes its own view of a generation.
+    """
+    # Fetch extra chunks so collapsing to one hit per page still fills `limit`.
+    fetch = max(limit * 3, 20)
+    metas: Dict[str, Dict[str, Any]] = {}
+    rankings: List[List[str]] = []
+    raw_scores: Dict[str, float] = {}
+
+    if mode in ('lexical', 'hybrid'):
+        accept = (lambda m: _matches(m, filters)) if filters else None
+        hits = gen.lexical.search(query, limit=fetch, accept=accept)
+        rankings.append([cid for cid, _, _ in hits])
+        for cid, score, meta in hits:
+            metas[cid] = meta
+            raw_scores[cid] = score
+
+    if mode in ('vector', 'hybrid'):
+        hits = gen.vectors.query(embed_query(query), limit=fetch, filters=filters)
+        rankings.append([cid for cid, _, _ in hits])
+        for cid, score, meta in hits:
+            metas.setdefault(cid, meta)
+            raw_scores.setdefault(cid, score)
+
+    fused = rrf_fuse(rankings) if mode == 'hybrid' else [(cid, raw_scores[cid]) for cid in rankings[0]]
+
+    results: List[Dict[str, Any]] = []
+    seen = set()
+    for cid, score in fused:
+        meta = metas[cid]
+        slug = meta.get('slug', '')
+        if slug in seen:
+            continue
+        seen.add(slug)
+        results.append({
+            'slug': slug,
+            'url': meta.get('url'),
+            'title': meta.get('title'),
+            'heading': meta.get('heading') or None,
+            'chunkId': cid,
+            'snippet': meta.get('snippet', ''),
+            'score': round(score, 6),
+        })
+        if len(results) >= limit:
+            break
+    return results
+
+
+class SiteIndex:
+    """Vector (Chroma) and lexical (BM25) indexes over one site, kept in lockstep.
+
+    State lives in immutable generations (see `generations.Generation`). Reads go to
+    the current one, pinned for the duration of a query; writes go to a clone that
+    `commit` publishes with an atomic pointer flip, so a reindex never blocks or
+    disturbs search. The last KEEP_GENERATIONS published generations stay on disk
+    and `restore` switches back to one without rebuilding anything.
+    """
+
+    def __init__(self, data_dir: Path, chroma_dir: str, site_id: str, embedder: Optional[OllamaEmbedder] = None, keep: int = KEEP_GENERATIONS):
+        self.data_dir = data_dir
+        self.chroma_dir = chroma_dir
+        self.site_id = site_id
+        self.keep = max(1, keep)
+        self.root = data_dir / 'generations'
+        self.embedder = embedder or OllamaEmbedder()
+        self.journal = ChangeJournal(data_dir)
+        self._lock = threading.RLock()  # writers
+        self._pin_lock = threading.Lock()
+        self._upserts: Optional[Dict[str, Tuple[Sequence[float], str, Dict[str, Any]]]] = None
+        self._building: Optional[Generation] = None
+        self._draining: Dict[int, Generation] = {}  # superseded but possibly still pinned
+        self._current = self._open()
+        GENERATION.set(self.generation)
+        PAGES.set(len(self.pages))
+        self.query_embeddings: LRUCache[List[float]] = LRUCache(QUERY_EMBED_CACHE_SIZE, 'query_embeddings')
+        self.results: LRUCache[List[Dict[str, Any]]] = LRUCache(SEARCH_RESULT_CACHE_SIZE, 'search_results')
+
+    # ---- generations ----
+
+    def _load_pointer(self) -> Optional[int]:
+        try:
+            return int(json.loads((self.data_dir / 'generation.json').read_text())['generation'])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _save_pointer(self, number: int) -> None:
+        path = self.data_dir / 'generation.json'
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix('.json.tmp')
+        tmp.write_text(json.dumps({'generation': number}))
+        os.replace(tmp, path)
+
+    def _open(self) -> Generation:
+        pointer = self._load_pointer()
+        if not self.root.exists():
+            migrate_flat_layout(self.data_dir, self.root, self.chroma_dir, self.site_id, pointer or 0)
+        found = scan(self.root)
+        published = sorted(n for n, m in found.items() if m['published'] is not None)
+        if pointer not in published:
+            pointer = published[-1] if published else 0
+        current = Generation(pointer, self.root, self.chroma_dir, self.site_id)
+        if pointer not in published:
+            current.mark_published(None)
+            self._save_pointer(pointer)
+        elif not ChunkVectorSnapshot.exists(current.dir):
+            export_chunk_vectors(current.vectors, current.dir)  # published before snapshots were written
+
+        # An unpublished generation is a reindex that stopped early. One saved by a checkpoint
+        # on top of the current generation is reopened so the run can resume; others are dropped.
+        for n, m in sorted(found.items()):
+            if m['published'] is not None or n == pointer:
+                continue
+            b = m['building'] or {}
+            if b.get('checkpointed') and b.get('base') == pointer and self._building is None:
+                self._building = Generation(n, self.root, self.chroma_dir, self.site_id)
+                self._building.dirty = bool(b.get('dirty'))
+            else:
+                drop_unloaded(n, self.root, self.chroma_dir, self.site_id)
+        self._current = current
+        self._gc()
+        return current
+
+    @property
+    def generation(self) -> int:
+        return self._current.number
+
+    @contextmanager
+    def pinned(self) -> Iterator[Generation]:
+        """The current generation, protected from garbage collection until the block exits."""
+        with self._pin_lock:
+            gen = self._current
+            gen.refs += 1
+        try:
+            yield gen
+        finally:
+            with self._pin_lock:
+                gen.refs -= 1
+                drained = gen.refs == 0 and gen.number in self._draining
+            if drained:
+                self._gc()
+
+    def _gc(self) -> None:
+        """Drop published generations outside the retention window once nothing pins them."""
+        with self._pin_lock:
+            published = published_numbers(self.root)
+            keep = set(published[-self.keep:]) | {self._current.number}
+            if self._building is not None:
+                keep.add(self._building.number)
+            for n, gen in list(self._draining.items()):
+                if gen.refs == 0:
+                    del self._draining[n]
+                    if n not in keep:
+                        gen.drop()
+            busy = set(self._draining)
+        for n in published:
+            if n not in keep and n not in busy:
+                drop_unloaded(n, self.root, self.chroma_dir, self.site_id)
+
+    def _retire(self, old: Generation) -> None:
+        with self._pin_lock:
+            self._draining[old.number] = old
+        self._gc()
+
+    def _build(self) -> Generation:
+        """The generation being written, cloned from the current one on first use."""
+        if self._building is None:
+            number = max([self.generation, *scan(self.root)]) + 1
+            self._building = clone(self._current, number, self.root, self.chroma_dir, self.site_id)
+            self._building.mark_building(self.generation, checkpointed=False)
+        return self._building
+
+    @property
+    def staged_pages(self) -> PageStore:
+        """Pages as the writer sees them: the generation being built if there is one."""
+        return (self._building or self._current).pages
+
+    def discard_build(self) -> None:
+        """Abandon an unpublished generation (e.g. before a reindex that must not resume)."""
+        with self._lock:
+            if self._building is not None:
+                self._building.drop()
+                self._building = None
+
+    def checkpoint(self) -> None:
+        """Persist the generation being built without publishing it, so a later run can resume it."""
+        with self._lock:
+            b = self._building
+            if b is None:
+                return
+            b.save()
+            b.mark_building(self.generation, checkpointed=True)
+
+    def generations(self) -> Dict[str, Any]:
+        found = scan(self.root)
+        return {
+            'current': self.generation,
+            'building': self._building.number if self._building is not None else None,
+            'keep': self.keep,
+            'generations': [
+                {'generation': n, 'current': n == self.generation, **(m['published'] or {})}
+                for n, m in sorted(found.items(), reverse=True) if m['published'] is not None
+            ],
+        }
+
+    def restore(self, number: int) -> int:
+        """Make a retained published generation current again."""
+        with self._lock:
+            if number == self.generation:
+                return number
+            if number not in published_numbers(self.root):
+                raise KeyError(number)
+            self.discard_build()  # built on top of the generation being replaced
+            target = self._draining.get(number) or Generation(number, self.root, self.chroma_dir, self.site_id)
+            self._stage_changes(self._current, target)
+            self._flip(target)
+            return number
+
+    def _stage_changes(self, old: Generation, new: Generation) -> None:
+        for page in new.pages:
+            prev = old.pages.get(page.slug)
+            if prev is None:
+                self.journal.stage('added', page.slug, page.content_hash)
+            elif prev.content_hash != page.content_hash:
+                self.journal.stage('modified', page.slug, page.content_hash)
+        for slug in old.pages.slugs():
+            if new.pages.get(slug) is None:
+                self.journal.stage('removed', slug)
+
+    def _flip(self, new: Generation) -> None:
+        # Pointer first: a crash after this line reopens the new generation.
+        self._save_pointer(new.number)
+        with self._pin_lock:
+            old, self._current = self._current, new
+            self._draining.pop(new.number, None)
+        # After the swap, so a reader that sees an event also sees the generation it describes.
+        self.journal.append_pending(new.number)
+        self._retire(old)
+        GENERATION.set(new.number)
+        PAGES.set(len(new.pages))
+
+    # ---- writes ----
+
+    def dedup_plan(
+        self,
+        page: PageRecord,
+        chunks: Sequence[Chunk],
+        pending: Optional[Dict[str, str]] = None,
+    ) -> List[Optional[str]]:
+        """Canonical chunk id per duplicate chunk, or the chunk whose embedding a near duplicate
+        reuses; None marks chunks that need embedding.
+
+        Pipelines that plan ahead of `replace_page` pass one `pending` dict for the whole run,
+        and must then replace pages in the order they were planned.
+        """
+        keys = [chunk_key(c.text) for c in chunks]
+        with self._lock:
+            return self._build().chunk_registry.plan(page.slug, [c.chunk_id for c in chunks], keys, pending, [c.text for c in chunks])
+
+    def _meta(self, page: PageRecord, chunk_id: str, heading: Optional[str], text: str) -> Dict[str, Any]:
+        return {
+            'slug': page.slug,
+            'url': page.url,
+            'title': page.title or '',
+            'heading': heading or '',
+            'ordinal': int(chunk_id.rsplit('#', 1)[-1]),
+            'snippet': text[:SNIPPET_CHARS],
+        }
+
+    def _index_chunks(self, b: Generation, page: PageRecord, items: Sequence[Tuple[str, Optional[str], str, Sequence[float]]]) -> None:
+        """items: (chunk id, heading, text, embedding)."""
+        metas = [self._meta(page, cid, heading, text) for cid, heading, text, _ in items]
+        if self._upserts is not None:
+            for (cid, _, text, emb), meta in zip(items, metas):
+                self._upserts[cid] = (emb, text, meta)
+        else:
+            b.vectors.upsert([i[0] for i in items], [i[3] for i in items], [i[2] for i in items], metas)
+        for (cid, heading, text, _), meta in zip(items, metas):
+            b.lexical.add(cid, f'{page.title}\n{heading or ""}\n{text}', meta)
+
+    def _vector_get(self, b: Generation, ids: Sequence[str]) -> Dict[str, Tuple[List[float], str]]:
+        # Chunks buffered by `replace_pages` are not in Chroma yet.
+        buffered = self._upserts or {}
+        out = {cid: (buffered[cid][0], buffered[cid][1]) for cid in ids if cid in buffered}
+        rest = [cid for cid in dict.fromkeys(ids) if cid not in out]  # several chunks may map to one id
+        if rest:
+            out.update(b.vectors.get(rest))
+        return out
+
+    def _release_chunks(self, b: Generation, slug: str) -> None:
+        # Chunks this page held as canonical for other pages move to the next owner
+        # (same text, so the stored embedding is reused) before the page is dropped.
+        promotions = b.chunk_registry.release(slug)
+        if promotions:
+            stored = self._vector_get(b, [old for old, _ in promotions])
+            for old, (cid, owner, heading) in promotions:
+                page = b.pages.get(owner)
+                if old in stored and page is not None:
+                    emb, text = stored[old]
+                    self._index_chunks(b, page, [(cid, heading, text, emb)])
+        if self._upserts:
+            for cid in [cid for cid, (_, _, meta) in self._upserts.items() if meta['slug'] == slug]:
+                del self._upserts[cid]
+        if b.pages.get(slug) is not None:
+            b.vectors.delete_slug(slug)
+            b.lexical.remove_slug(slug)
+
+    def replace_page(
+        self,
+        page: PageRecord,
+        chunks: Sequence[Chunk],
+        embeddings: Sequence[Sequence[float]],
+        canonical: Optional[Sequence[Optional[str]]] = None,
+    ) -> None:
+        """Index a page. `embeddings` covers only chunks whose `canonical` entry is None;
+        exact duplicates are linked to their canonical chunk instead, and near duplicates
+        `dedup_plan` matched are stored with the embedding of the chunk they matched."""
+        canonical = list(canonical) if canonical is not None else [None] * len(chunks)
+        unique = [c for c, canon in zip(chunks, canonical) if canon is None]
+        own = {c.chunk_id: e for c, e in zip(unique, embeddings)}
+        with self._lock:
+            b = self._build()
+            self._release_chunks(b, page.slug)
+            # Near duplicates are stored under their own text, with the embedding of the chunk they matched.
+            borrowed = {i: b.chunk_registry.borrowed.pop(c.chunk_id) for i, c in enumerate(chunks)
+                        if canonical[i] is not None and c.chunk_id in b.chunk_registry.borrowed}
+            if borrowed:
+                sources = self._vector_get(b, [src for src in borrowed.values() if src not in own])
+                for i, src in borrowed.items():
+                    vec = own.get(src) or sources.get(src, (None,))[0]
+                    if vec is None:  # the source was removed after planning
+                        vec = self.embedder.embed([chunks[i].text])[0]
+                    own[chunks[i].chunk_id] = vec
+                    canonical[i] = None
+                    unique.append(chunks[i])
+            self._index_chunks(b, page, [(c.chunk_id, c.heading, c.text, own[c.chunk_id]) for c in unique])
+            b.chunk_registry.register(page.slug, [(c.chunk_id, c.heading or '', c.text) for c in chunks])
+
+            # The page centroid still counts duplicate chunks, via their canonical embeddings.
+            foreign = [canon for canon in canonical if canon is not None and canon not in own]
+            stored = self._vector_get(b, foreign) if foreign else {}
+            vectors = [own[c.chunk_id] if canon is None else (own.get(canon) or stored.get(canon, (None,))[0])
+                       for c, canon in zip(chunks, canonical)]
+
+            b.pages.put(page)
+            b.page_vectors.put(page.slug, [v for v in vectors if v is not None], b.number)
+            b.links.set_links(page.slug, page.links)
+            b.near_duplicates.update(page.slug, simhash(page.text))
+            b.dirty = True
+
+    def replace_pages(self, items: Sequence[Tuple[PageRecord, Sequence[Chunk], Sequence[Sequence[float]], Optional[Sequence[Optional[str]]]]]) -> None:
+        """`replace_page` for several pages with one Chroma upsert; each upsert call has a large fixed cost."""
+        with self._lock:
+            b = self._build()
+            self._upserts = {}
+            try:
+                for page, chunks, embeddings, canonical in items:
+                    self.replace_page(page, chunks, embeddings, canonical)
+                if self._upserts:
+                    ids = list(self._upserts)
+                    rows = [self._upserts[cid] for cid in ids]
+                    b.vectors.upsert(ids, [r[0] for r in rows], [r[1] for r in rows], [r[2] for r in rows])
+            finally:
+                self._upserts = None
+
+    def remove_page(self, slug: str) -> None:
+        with self._lock:
+            b = self._build()
+            self._release_chunks(b, slug)
+            if b.pages.delete(slug):
+                b.dirty = True
+            b.page_vectors.delete(slug)
+            b.links.remove(slug)
+            b.near_duplicates.remove(slug)
+
+    def commit(self) -> int:
+        """Publish the generation being built, if it changed anything; returns the current generation."""
+        with self._lock:
+            b = self._building
+            if b is None:
+                return self.generation
+            if not b.dirty:
+                self.discard_build()
+                return self.generation
+            started = time.perf_counter()
+            b.save()
+            b.mark_published(self.generation)
+            self._building = None
+            self._stage_changes(self._current, b)
+            self._flip(b)
+            COMMIT_SECONDS.observe(time.perf_counter() - started)
+            return self.generation
+
+    def embed_query(self, query: str) -> List[float]:
+        key = (self.embedder.model, query)
+        vec = self.query_embeddings.get(key)
+        if vec is None:
+            vec = self.embedder.embed_one(query)
+            self.query_embeddings.put(key, vec)
+        return vec
+
+    def embed_queries(self, queries: Sequence[str]) -> List[List[float]]:
+        """Embed several queries in one batch, reusing cached embeddings."""
+        keys = [(self.embedder.model, _normalize_query(q)) for q in queries]
+        vecs: List[Optional[List[float]]] = [self.query_embeddings.get(k) for k in keys]
+        missing = [i for i, v in enumerate(vecs) if v is None]
+        if missing:
+            fresh = self.embedder.embed([keys[i][1] for i in missing])
+            for i, v in zip(missing, fresh):
+                vecs[i] = v
+                self.query_embeddings.put(keys[i], v)
+        return vecs  # type: ignore[return-value]
+
+    def cache_stats(self) -> Dict[str, Any]:
+        return {
+            'generation': self.generation,
+            'queryEmbeddings': self.query_embeddings.stats(),
+            'results': self.results.stats(),
+        }
+
+    # ---- reads ----
+
+    # Components of the current generation. Callers that make several reads and need them
+    # to agree should hold `pinned()` instead.
+
+    @property
+    def pages(self) -> PageStore:
+        return self._current.pages
+
+    @property
+    def lexical(self) -> BM25Index:
+        return self._current.lexical
+
+    @property
+    def vectors(self) -> VectorStore:
+        return self._current.vectors
+
+    @property
+    def page_vectors(self) -> PageVectors:
+        return self._current.page_vectors
+
+    @property
+    def links(self) -> LinkGraph:
+        return self._current.links
+
+    @property
+    def chunk_registry(self) -> ChunkRegistry:
+        return self._current.chunk_registry
+
+    @property
+    def near_duplicates(self) -> NearDuplicateIndex:
+        return self._current.near_duplicates
+
+    def duplicate_report(self, top: int = 10) -> Dict[str, Any]:
+        with self.pinned() as gen:
+            return {
+                'generation': gen.number,
+                'maxDistance': gen.near_duplicates.max_distance,
+                'clusters': gen.near_duplicates.clusters(),
+                'chunks': gen.chunk_registry.stats(top=top),
+            }
+
+    def search(
+        self,
+        query: str,
+        mode: str = 'hybrid',
+        limit: int = 8,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        if mode not in SEARCH_MODES:
+            raise ValueError(f'mode must be one of {", ".join(SEARCH_MODES)}')
+        query = _normalize_query(query)
+        with self.pinned() as gen:
+            key = (query, mode, json.dumps(filters, sort_keys=True, default=str), limit, gen.number)
+            cached = self.results.get(key)
+            if cached is not None:
+                return cached
+            results = search_generation(gen, query, mode, limit, filters, self.embed_query)
+        self.results.put(key, results)
+        return results
+
+
+_index: Optional[SiteIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> SiteIndex:
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = SiteIndex(Path(DATA_DIR), CHROMA_DIR, CONNECTOR_SITE_ID)
+    return _index
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import bisect
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+CHANGE_TYPES = ('added', 'modified', 'removed')
+INDEX_EVERY = 256
+
+
+class ChangeJournal:
+    """Append-only JSONL log of page changes with a sparse seq/time -> byte offset index.
+
+    Every event carries a strictly increasing `seq` and a non-decreasing `ts`. One
+    index entry is kept per INDEX_EVERY events, so a reader seeks close to its cursor
+    and only reads the events it returns: polling costs O(new events), not O(site).
+    Events are staged by the index and appended on commit, so the journal only ever
+    describes committed generations.
+    """
+
+    def __init__(self, data_dir: Path):
+        self.path = data_dir / 'changes.jsonl'
+        self.index_path = data_dir / 'changes.idx.json'
+        self.last_seq = 0
+        self.last_ts = 0.0
+        self._size = 0  # bytes of complete, committed lines; readers never look past it
+        self._sparse: List[Tuple[int, float, int]] = []  # (seq, ts, offset) of every INDEX_EVERY-th event
+        self._sparse_seq: List[int] = []
+        self._sparse_ts: List[float] = []
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    # ---- writes ----
+
+    def stage(self, kind: str, slug: str, content_hash: Optional[str] = None) -> None:
+        """Record a change for the next append; repeated changes to a slug coalesce."""
+        if kind not in CHANGE_TYPES:
+            raise ValueError(f'Unknown change type: {kind}')
+        prev = self._pending.pop(slug, None)
+        if prev is not None:
+            if prev['type'] == 'added':
+                if kind == 'removed':
+                    return  # never committed, nothing to report
+                kind = 'added'
+            elif prev['type'] == 'removed' and kind == 'added':
+                kind = 'modified'
+        self._pending[slug] = {'type': kind, 'slug': slug, 'hash': content_hash}
+
+    def append_pending(self, generation: int) -> int:
+        """Write staged events as one batch; returns how many were written."""
+        with self._lock:
+            if not self._pending:
+                return 0
+            ts = max(time.time(), self.last_ts)
+            offset = self._size
+            lines = []
+            entries = []
+            for event in self._pending.values():
+                self.last_seq += 1
+                if self.last_seq % INDEX_EVERY == 1:
+                    entries.append((self.last_seq, ts, offset))
+                line = (json.dumps({'seq': self.last_seq, 'ts': ts, 'generation': generation, **event}) + '\n').encode('utf-8')
+                lines.append(line)
+                offset += len(line)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open('ab') as f:
+                f.write(b''.join(lines))
+                f.flush()
+                os.fsync(f.fileno())
+            self._size = offset
+            self.last_ts = ts
+            count = len(self._pending)
+            self._pending.clear()
+            if entries:
+                self._sparse.extend(entries)
+                self._reindex_sparse()
+                self._save_index()
+            return count
+
+    def _reindex_sparse(self) -> None:
+        self._sparse_seq = [e[0] for e in self._sparse]
+        self._sparse_ts = [e[1] for e in self._sparse]
+
+    def _save_index(self) -> None:
+        tmp = self.index_path.with_suffix('.json.tmp')
+        tmp.write_text(json.dumps(self._sparse), encoding='utf-8')
+        os.replace(tmp, self.index_path)
+
+    # ---- reads ----
+
+    def _seek_offset(self, after_seq: Optional[int], since_ts: Optional[float]) -> int:
+        # Last sparse entry at or before the target; events before it are never read.
+        if after_seq is not None:
+            i = bisect.bisect_right(self._sparse_seq, after_seq + 1) - 1
+        elif since_ts is not None:
+            i = bisect.bisect_left(self._sparse_ts, since_ts) - 1
+        else:
+            return 0
+        return self._sparse[i][2] if i >= 0 else 0
+
+    def read(self, after_seq: Optional[int] = None, since_ts: Optional[float] = None, limit: int = 100) -> Dict[str, Any]:
+        """Events with seq > after_seq (or ts >= since_ts), oldest first, at most `limit`."""
+        with self._lock:
+            end = self._size
+            offset = self._seek_offset(after_seq, since_ts)
+        events: List[Dict[str, Any]] = []
+        more = False
+        if end and (after_seq is None or after_seq < self.last_seq):
+            with self.path.open('rb') as f:
+                f.seek(offset)
+                while f.tell() < end:
+                    event = json.loads(f.readline())
+                    if after_seq is not None and event['seq'] <= after_seq:
+                        continue
+                    if since_ts is not None and event['ts'] < since_ts:
+                        continue
+                    if len(events) >= limit:
+                        more = True
+                        break
+                    events.append(event)
+        if events:
+            cursor = events[-1]['seq']
+        elif after_seq is not None:
+            cursor = after_seq
+        else:
+            # Nothing new since the timestamp: resume from the current head.
+            cursor = self.last_seq
+        return {'events': events, 'nextCursor': str(cursor), 'hasMore': more, 'latestSeq': self.last_seq}
+
+    # ---- recovery ----
+
+    def _load(self) -> None:
+        if self.index_path.exists():
+            try:
+                self._sparse = [tuple(e) for e in json.loads(self.index_path.read_text(encoding='utf-8'))]
+            except ValueError:
+                self._sparse = []
+        if not self.path.exists():
+            self._sparse = []
+            return
+        size = self.path.stat().st_size
+        self._sparse = [e for e in self._sparse if e[2] < size]
+        # Only the tail after the last index entry is scanned to recover the head.
+        offset = self._sparse[-1][2] if self._sparse else 0
+        good = offset
+        with self.path.open('rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    break
+                if event['seq'] % INDEX_EVERY == 1 and (not self._sparse or self._sparse[-1][0] < event['seq']):
+                    self._sparse.append((event['seq'], event['ts'], good))
+                self.last_seq, self.last_ts = event['seq'], event['ts']
+                good += len(line)
+        if good < size:
+            # A torn write from a crash mid-append; drop the partial line.
+            with self.path.open('r+b') as f:
+                f.truncate(good)
+        self._size = good
+        self._reindex_sparse()
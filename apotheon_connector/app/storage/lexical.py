@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import math
+import os
+import pickle
+import re
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Keep hyphenated/dotted identifiers (error codes, slugs, versions) as single tokens
+# and also emit their parts so partial queries still match.
+_TOKEN_RE = re.compile(r'\w+(?:[-_.]\w+)*')
+_SPLIT_RE = re.compile(r'[-_.]')
+
+
+def tokenize(text: str) -> List[str]:
+    out: List[str] = []
+    for m in _TOKEN_RE.finditer(text.lower()):
+        tok = m.group(0)
+        out.append(tok)
+        if _SPLIT_RE.search(tok):
+            out.extend(p for p in _SPLIT_RE.split(tok) if p)
+    return out
+
+
+class BM25Index:
+    """Compact BM25 inverted index with array-backed postings.
+
+    Postings are append-only `array('i')` pairs (doc ids, term frequencies), scored
+    with numpy views over the raw buffers. Removed documents are tombstoned and
+    dropped on the next compaction.
+    """
+
+    VERSION = 1
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.vocab: Dict[str, int] = {}
+        self.post_docs: List[array] = []
+        self.post_tfs: List[array] = []
+        self.doc_ids: List[Optional[str]] = []  # doc -> chunk id (None when removed)
+        self.doc_meta: List[Optional[Dict[str, Any]]] = []
+        self.doc_len = array('i')
+        self.live = bytearray()
+        self.by_key: Dict[str, int] = {}
+        self.by_slug: Dict[str, List[int]] = {}
+        self.total_len = 0
+        self.n_live = 0
+
+    # ---- writes ----
+
+    def add(self, key: str, text: str, meta: Dict[str, Any]) -> None:
+        if key in self.by_key:
+            self.remove(key)
+        doc = len(self.doc_ids)
+        counts = Counter(tokenize(text))
+        for term, tf in counts.items():
+            tid = self.vocab.get(term)
+            if tid is None:
+                tid = len(self.post_docs)
+                self.vocab[term] = tid
+                self.post_docs.append(array('i'))
+                self.post_tfs.append(array('i'))
+            self.post_docs[tid].append(doc)
+            self.post_tfs[tid].append(tf)
+        length = sum(counts.values())
+        self.doc_ids.append(key)
+        self.doc_meta.append(meta)
+        self.doc_len.append(length)
+        self.live.append(1)
+        self.by_key[key] = doc
+        self.by_slug.setdefault(meta.get('slug', ''), []).append(doc)
+        self.total_len += length
+        self.n_live += 1
+
+    def remove(self, key: str) -> bool:
+        doc = self.by_key.pop(key, None)
+        if doc is None:
+            return False
+        meta = self.doc_meta[doc] or {}
+        docs = self.by_slug.get(meta.get('slug', ''))
+        if docs is not None:
+            docs.remove(doc)
+            if not docs:
+                self.by_slug.pop(meta.get('slug', ''), None)
+        self.live[doc] = 0
+        self.doc_ids[doc] = None
+        self.doc_meta[doc] = None
+        self.total_len -= self.doc_len[doc]
+        self.n_live -= 1
+        return True
+
+    def remove_slug(self, slug: str) -> int:
+        keys = [self.doc_ids[d] for d in list(self.by_slug.get(slug, []))]
+        for key in keys:
+            self.remove(key)
+        return len(keys)
+
+    def maybe_compact(self, dead_ratio: float = 0.25) -> bool:
+        dead = len(self.doc_ids) - self.n_live
+        if not self.doc_ids or dead / len(self.doc_ids) < dead_ratio:
+            return False
+        self._compact()
+        return True
+
+    def _compact(self) -> None:
+        remap = np.full(len(self.doc_ids), -1, dtype=np.int32)
+        keep = np.flatnonzero(np.frombuffer(self.live, dtype=np.uint8))
+        remap[keep] = np.arange(len(keep), dtype=np.int32)
+
+        vocab: Dict[str, int] = {}
+        post_docs: List[array] = []
+        post_tfs: List[array] = []
+        for term, tid in self.vocab.items():
+            docs = np.frombuffer(self.post_docs[tid], dtype=np.int32)
+            new_docs = remap[docs]
+            mask = new_docs >= 0
+            if not mask.any():
+                continue
+            vocab[term] = len(post_docs)
+            post_docs.append(array('i', new_docs[mask].tobytes()))
+            post_tfs.append(array('i', np.frombuffer(self.post_tfs[tid], dtype=np.int32)[mask].tobytes()))
+
+        self.vocab = vocab
+        self.post_docs = post_docs
+        self.post_tfs = post_tfs
+        self.doc_ids = [self.doc_ids[i] for i in keep]
+        self.doc_meta = [self.doc_meta[i] for i in keep]
+        self.doc_len = array('i', (self.doc_len[i] for i in keep))
+        self.live = bytearray(b'\x01' * len(keep))
+        self.by_key = {k: i for i, k in enumerate(self.doc_ids)}
+        self.by_slug = {}
+        for i, meta in enumerate(self.doc_meta):
+            self.by_slug.setdefault((meta or {}).get('slug', ''), []).append(i)
+
+    # ---- reads ----
+
+    def search(
+        self,
+        query: str,
+        limit: int = 10,
+        accept: Optional[Callable[[Dict[str, Any]], bool]] = None,
+    ) -> List[Tuple[str, float, Dict[str, Any]]]:
+        """Return up to `limit` (chunk id, score, metadata) tuples, best first."""
+        n_docs = len(self.doc_ids)
+        if not n_docs or not self.n_live:
+            return []
+        terms = {self.vocab[t] for t in tokenize(query) if t in self.vocab}
+        if not terms:
+            return []
+
+        avgdl = self.total_len / max(1, self.n_live)
+        doc_len = np.frombuffer(self.doc_len, dtype=np.int32)
+        scores = np.zeros(n_docs, dtype=np.float32)
+        for tid in terms:
+            docs = np.frombuffer(self.post_docs[tid], dtype=np.int32)
+            tfs = np.frombuffer(self.post_tfs[tid], dtype=np.int32).astype(np.float32)
+            # df counts tombstoned docs until compaction; close enough for ranking.
+            df = len(docs)
+            idf = math.log(1.0 + (self.n_live - df + 0.5) / (df + 0.5))
+            norm = self.k1 * (1.0 - self.b + self.b * doc_len[docs] / avgdl)
+            scores[docs] += idf * tfs * (self.k1 + 1.0) / (tfs + norm)
+        scores *= np.frombuffer(self.live, dtype=np.uint8)
+
+        candidates = np.flatnonzero(scores)
+        if not len(candidates):
+            return []
+        # Walk candidates best-first in growing windows until `limit` are accepted, so a
+        # selective filter still finds matches ranked far below the unfiltered top-k.
+        out: List[Tuple[str, float, Dict[str, Any]]] = []
+        seen: set = set()
+        want = limit if accept is None else limit * 4
+        while True:
+            want = min(want, len(candidates))
+            if want < len(candidates):
+                top = candidates[np.argpartition(-scores[candidates], want - 1)[:want]]
+            else:
+                top = candidates
+            top = top[np.argsort(-scores[top], kind='stable')]
+            for doc in top:
+                if doc in seen:
+                    continue
+                seen.add(doc)
+                meta = self.doc_meta[doc]
+                if meta is None or (accept is not None and not accept(meta)):
+                    continue
+                out.append((self.doc_ids[doc], float(scores[doc]), meta))
+                if len(out) >= limit:
+                    return out
+            if want >= len(candidates):
+                return out
+            want *= 4
+
+    def slugs(self) -> Iterable[str]:
+        return self.by_slug.keys()
+
+    def __len__(self) -> int:
+        return self.n_live
+
+    # ---- persistence ----
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        state = {
+            'version': self.VERSION,
+            'k1': self.k1,
+            'b': self.b,
+            'vocab': self.vocab,
+            'post_docs': self.post_docs,
+            'post_tfs': self.post_tfs,
+            'doc_ids': self.doc_ids,
+            'doc_meta': self.doc_meta,
+            'doc_len': self.doc_len,
+            'live': bytes(self.live),
+        }
+        tmp = path.with_suffix(path.suffix + '.tmp')
+        with tmp.open('wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path) -> 'BM25Index':
+        idx = cls()
+        if not path.exists():
+            return idx
+        with path.open('rb') as f:
+            state = pickle.load(f)
+        if state.get('version') != cls.VERSION:
+            return idx
+        idx.k1 = state['k1']
+        idx.b = state['b']
+        idx.vocab = state['vocab']
+        idx.post_docs = state['post_docs']
+        idx.post_tfs = state['post_tfs']
+        idx.doc_ids = state['doc_ids']
+        idx.doc_meta = state['doc_meta']
+        idx.doc_len = state['doc_len']
+        idx.live = bytearray(state['live'])
+        for i, key in enumerate(idx.doc_ids):
+            if key is None:
+                continue
+            idx.by_key[key] = i
+            idx.by_slug.setdefault(idx.doc_meta[i].get('slug', ''), []).append(i)
+            idx.total_len += idx.doc_len[i]
+            idx.n_live += 1
+        return idx
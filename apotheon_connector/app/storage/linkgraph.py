@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+PAGERANK_DAMPING = 0.85
+PAGERANK_TOL = 1e-6
+PAGERANK_MAX_ITER = 50
+
+
+class LinkGraph:
+    """Internal link graph as CSR int32 arrays over stable page ids.
+
+    Every slug seen as a page or as a link target gets an id; `exists` marks the
+    ones that are indexed pages. Writers update per-page out-link rows; `commit()`
+    rebuilds the forward/reverse CSR arrays and the precomputed metrics in one
+    vectorized pass, warm-starting PageRank from the previous vector.
+    """
+
+    def __init__(self, data_dir: Path):
+        self.data_dir = data_dir
+        self.ids: Dict[str, int] = {}
+        self.slugs: List[str] = []
+        self.exists = np.zeros(0, dtype=bool)
+        self._out: Dict[int, np.ndarray] = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+
+        empty = np.zeros(0, dtype=np.int32)
+        self.indptr = np.zeros(1, dtype=np.int32)
+        self.indices = empty
+        self.rev_indptr = np.zeros(1, dtype=np.int32)
+        self.rev_indices = empty
+        self.in_degree = empty
+        self.pagerank = np.zeros(0, dtype=np.float32)
+        self.orphans: FrozenSet[str] = frozenset()
+        self.dead_ends: FrozenSet[str] = frozenset()
+        self._load()
+
+    # ---- ids ----
+
+    def _id(self, slug: str) -> int:
+        i = self.ids.get(slug)
+        if i is None:
+            i = len(self.slugs)
+            self.ids[slug] = i
+            self.slugs.append(slug)
+        return i
+
+    def id_of(self, slug: str) -> Optional[int]:
+        return self.ids.get(slug)
+
+    # ---- writes ----
+
+    def set_links(self, slug: str, targets: Sequence[str]) -> None:
+        with self._lock:
+            src = self._id(slug)
+            dst = np.fromiter((self._id(t) for t in targets if t != slug), dtype=np.int32)
+            self._grow()
+            self.exists[src] = True
+            self._out[src] = np.unique(dst)
+            self._dirty = True
+
+    def remove(self, slug: str) -> None:
+        with self._lock:
+            i = self.ids.get(slug)
+            if i is None:
+                return
+            self._grow()
+            self.exists[i] = False
+            self._out.pop(i, None)
+            self._dirty = True
+
+    def _grow(self) -> None:
+        n = len(self.slugs)
+        if len(self.exists) < n:
+            self.exists = np.concatenate([self.exists, np.zeros(n - len(self.exists), dtype=bool)])
+
+    def commit(self) -> bool:
+        with self._lock:
+            if not self._dirty:
+                return False
+            self._rebuild()
+            self._dirty = False
+        self.save()
+        return True
+
+    def _rebuild(self) -> None:
+        n = len(self.slugs)
+        self._grow()
+        counts = np.zeros(n, dtype=np.int32)
+        for i, row in self._out.items():
+            counts[i] = len(row)
+        indptr = np.zeros(n + 1, dtype=np.int32)
+        np.cumsum(counts, out=indptr[1:])
+        indices = np.empty(int(indptr[-1]), dtype=np.int32)
+        for i, row in self._out.items():
+            indices[indptr[i]:indptr[i + 1]] = row
+
+        src = np.repeat(np.arange(n, dtype=np.int32), counts)
+        # Edges into non-existent pages are broken links: kept in CSR, excluded from metrics.
+        live = self.exists[indices] if len(indices) else np.zeros(0, dtype=bool)
+        order = np.argsort(indices, kind='stable')
+        rev_indptr = np.zeros(n + 1, dtype=np.int32)
+        np.cumsum(np.bincount(indices, minlength=n), out=rev_indptr[1:])
+
+        self.indptr, self.indices = indptr, indices
+        self.rev_indptr, self.rev_indices = rev_indptr, src[order]
+        self.in_degree = np.bincount(indices[live], minlength=n).astype(np.int32)
+        out_live = np.bincount(src[live], minlength=n).astype(np.int32)
+        self.pagerank = self._pagerank(src[live], indices[live], out_live)
+
+        ex = self.exists
+        self.orphans = frozenset(self.slugs[i] for i in np.flatnonzero(ex & (self.in_degree == 0)) if self.slugs[i] != 'index')
+        self.dead_ends = frozenset(self.slugs[i] for i in np.flatnonzero(ex & (out_live == 0)))
+
+    def _pagerank(self, src: np.ndarray, dst: np.ndarray, out_deg: np.ndarray) -> np.ndarray:
+        n = len(self.slugs)
+        ex = self.exists.astype(np.float64)
+        m = ex.sum()
+        if not m:
+            return np.zeros(n, dtype=np.float32)
+        teleport = ex / m
+        prev = self.pagerank.astype(np.float64)
+        if len(prev) == n and prev.sum() > 0:
+            pr = prev * ex
+            pr /= pr.sum()
+        else:
+            pr = teleport.copy()
+        w = 1.0 / np.maximum(out_deg[src], 1)
+        dangling = ex.astype(bool) & (out_deg == 0)
+        for _ in range(PAGERANK_MAX_ITER):
+            nxt = np.bincount(dst, weights=pr[src] * w, minlength=n)
+            nxt = PAGERANK_DAMPING * (nxt + pr[dangling].sum() * teleport) + (1 - PAGERANK_DAMPING) * teleport
+            delta = np.abs(nxt - pr).sum()
+            pr = nxt
+            if delta < PAGERANK_TOL:
+                break
+        return pr.astype(np.float32)
+
+    # ---- reads (O(1) / O(degree)) ----
+
+    def out_links(self, slug: str) -> List[str]:
+        i = self.ids.get(slug)
+        if i is None or i + 1 >= len(self.indptr):
+            return []
+        return [self.slugs[j] for j in self.indices[self.indptr[i]:self.indptr[i + 1]]]
+
+    def in_link_ids(self, slug: str) -> np.ndarray:
+        i = self.ids.get(slug)
+        if i is None or i + 1 >= len(self.rev_indptr):
+            return np.zeros(0, dtype=np.int32)
+        src = self.rev_indices[self.rev_indptr[i]:self.rev_indptr[i + 1]]
+        return src[self.exists[src]]
+
+    def in_links(self, slug: str) -> List[str]:
+        return [self.slugs[j] for j in self.in_link_ids(slug)]
+
+    def stats(self, slug: str) -> Dict[str, object]:
+        i = self.ids.get(slug)
+        if i is None or i >= len(self.in_degree):
+            return {'inDegree': 0, 'pagerank': 0.0, 'orphan': False, 'deadEnd': False}
+        return {
+            'inDegree': int(self.in_degree[i]),
+            'pagerank': float(self.pagerank[i]),
+            'orphan': slug in self.orphans,
+            'deadEnd': slug in self.dead_ends,
+        }
+
+    def broken_links(self) -> Dict[str, List[str]]:
+        """Existing page -> link targets that are not indexed pages."""
+        if not len(self.indices):
+            return {}
+        src = np.repeat(np.arange(len(self.indptr) - 1, dtype=np.int32), np.diff(self.indptr))
+        bad = self.exists[src] & ~self.exists[self.indices]
+        out: Dict[str, List[str]] = {}
+        for s, t in zip(src[bad], self.indices[bad]):
+            out.setdefault(self.slugs[s], []).append(self.slugs[t])
+        return out
+
+    def broken_targets(self, slug: str) -> List[str]:
+        """Link targets of one existing page that are not indexed pages (O(out-degree))."""
+        i = self.ids.get(slug)
+        if i is None or i + 1 >= len(self.indptr) or not self.exists[i]:
+            return []
+        return [self.slugs[j] for j in self.indices[self.indptr[i]:self.indptr[i + 1]] if not self.exists[j]]
+
+    def unlinked_sources(self, target: str, candidates: Iterable[str]) -> List[str]:
+        """Candidates (in order) that are indexed pages and do not already link to `target`."""
+        cand = [c for c in candidates if c != target and c in self.ids]
+        if not cand:
+            return []
+        ids = np.fromiter((self.ids[c] for c in cand), dtype=np.int32, count=len(cand))
+        keep = self.exists[ids] & ~np.isin(ids, self.in_link_ids(target))
+        return [c for c, k in zip(cand, keep) if k]
+
+    def top_pages(self, limit: int = 20) -> List[Tuple[str, float]]:
+        if not len(self.pagerank):
+            return []
+        order = np.argsort(-self.pagerank)[:limit]
+        return [(self.slugs[i], float(self.pagerank[i])) for i in order if self.exists[i]]
+
+    # ---- persistence ----
+
+    def save(self) -> None:
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.data_dir / 'links.npz.tmp'
+        with tmp.open('wb') as f:
+            np.savez(
+                f,
+                indptr=self.indptr,
+                indices=self.indices,
+                exists=self.exists,
+                pagerank=self.pagerank,
+            )
+        slugs_tmp = self.data_dir / 'links.json.tmp'
+        slugs_tmp.write_text(json.dumps(self.slugs), encoding='utf-8')
+        os.replace(tmp, self.data_dir / 'links.npz')
+        os.replace(slugs_tmp, self.data_dir / 'links.json')
+
+    def _load(self) -> None:
+        npz_path = self.data_dir / 'links.npz'
+        slugs_path = self.data_dir / 'links.json'
+        if not npz_path.exists() or not slugs_path.exists():
+            return
+        slugs = json.loads(slugs_path.read_text(encoding='utf-8'))
+        with np.load(npz_path) as z:
+            indptr, indices = z['indptr'], z['indices']
+            exists, pagerank = z['exists'], z['pagerank']
+        if len(indptr) != len(slugs) + 1:
+            return
+        self.slugs = slugs
+        self.ids = {s: i for i, s in enumerate(slugs)}
+        self.exists = exists.astype(bool)
+        self.pagerank = pagerank
+        for i in np.flatnonzero(self.exists):
+            self._out[int(i)] = indices[indptr[i]:indptr[i + 1]].copy()
+        self._rebuild()
@@ -1 +1,49 @@
-# models.py placeholder
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+
+@dataclass
+class Section:
+    heading: Optional[str]
+    level: int
+    text: str
+
+
+@dataclass
+class PageRecord:
+    """Structured content for one indexed page."""
+
+    slug: str
+    url: str
+    title: str = ''
+    description: str = ''
+    headings: List[List[Any]] = field(default_factory=list)  # [[level, text], ...]
+    sections: List[Section] = field(default_factory=list)
+    links: List[str] = field(default_factory=list)  # internal slugs, in document order
+    word_count: int = 0
+    content_hash: str = ''
+    fetched_at: float = 0.0
+
+    @property
+    def text(self) -> str:
+        return '\n\n'.join(s.text for s in self.sections if s.text)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @staticmethod
+    def from_dict(d: Dict[str, Any]) -> 'PageRecord':
+        d = dict(d)
+        d['sections'] = [Section(**s) for s in d.get('sections') or []]
+        return PageRecord(**d)
+
+
+@dataclass
+class Chunk:
+    chunk_id: str
+    slug: str
+    ordinal: int
+    text: str
+    heading: Optional[str] = None
@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set
+
+import orjson
+
+from .models import PageRecord
+
+GZIP_MIN_BYTES = 1024
+SITEMAP_KEY = 'sitemap'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    slug TEXT PRIMARY KEY,
+    body BLOB NOT NULL,
+    body_gz BLOB,
+    etag TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS documents (
+    name TEXT PRIMARY KEY,
+    body BLOB NOT NULL,
+    body_gz BLOB,
+    etag TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+class Blob(NamedTuple):
+    """A response body serialized once: JSON bytes, gzip bytes (None when small), strong ETag."""
+
+    body: bytes
+    body_gz: Optional[bytes]
+    etag: str
+
+
+def make_blob(doc: Any) -> Blob:
+    body = orjson.dumps(doc)
+    body_gz = gzip.compress(body, compresslevel=6, mtime=0) if len(body) >= GZIP_MIN_BYTES else None
+    return Blob(body, body_gz, '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"')
+
+
+def page_document(page: PageRecord) -> Dict[str, Any]:
+    """The GET /page representation of a record."""
+    return {
+        'slug': page.slug,
+        'url': page.url,
+        'title': page.title,
+        'description': page.description,
+        'headings': page.headings,
+        'sections': [{'heading': s.heading, 'level': s.level, 'text': s.text} for s in page.sections],
+        'links': page.links,
+        'wordCount': page.word_count,
+        'contentHash': page.content_hash,
+        'fetchedAt': page.fetched_at,
+    }
+
+
+def sitemap_document(pages: Iterable[PageRecord]) -> Dict[str, Any]:
+    """The GET /sitemap representation of a set of records."""
+    entries = [
+        {
+            'slug': p.slug,
+            'url': p.url,
+            'title': p.title,
+            'description': p.description,
+            'wordCount': p.word_count,
+            'contentHash': p.content_hash,
+            'fetchedAt': p.fetched_at,
+        }
+        for p in sorted(pages, key=lambda p: p.slug)
+    ]
+    return {'count': len(entries), 'generatedAt': time.time(), 'pages': entries}
+
+
+def _record(doc: Dict[str, Any]) -> PageRecord:
+    return PageRecord.from_dict({
+        'slug': doc['slug'],
+        'url': doc['url'],
+        'title': doc['title'],
+        'description': doc['description'],
+        'headings': doc['headings'],
+        'sections': doc['sections'],
+        'links': doc['links'],
+        'word_count': doc['wordCount'],
+        'content_hash': doc['contentHash'],
+        'fetched_at': doc['fetchedAt'],
+    })
+
+
+class PageStore:
+    """Page records keyed by slug, persisted in SQLite (WAL) as ready-to-serve JSON.
+
+    Records stay in memory for the analysis engines. On disk each row holds the
+    page's API body, its gzip form and ETag, so GET /page is one primary-key lookup
+    and no serialization. `save` writes only rows touched since the last save, in
+    one transaction, and rebuilds the sitemap document when anything changed.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._pages: Dict[str, PageRecord] = {}
+        self._dirty: Set[str] = set()
+        self._write_lock = threading.Lock()
+        self._local = threading.local()
+        self._sitemap: Optional[Blob] = None
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._write_lock:
+            conn = self._conn()
+            conn.executescript(SCHEMA)
+            for (body,) in conn.execute('SELECT body FROM pages'):
+                page = _record(orjson.loads(body))
+                self._pages[page.slug] = page
+            row = conn.execute('SELECT body, body_gz, etag FROM documents WHERE name = ?', (SITEMAP_KEY,)).fetchone()
+            if row is not None:
+                self._sitemap = Blob(*row)
+        self._migrate_json(path.with_name('pages.json'))
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread; WAL lets request threads read while a commit writes.
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _migrate_json(self, legacy: Path) -> None:
+        """Import a pages.json left by older versions, then set it aside."""
+        if self._pages or not legacy.exists():
+            return
+        raw = json.loads(legacy.read_text(encoding='utf-8'))
+        for d in raw.values():
+            self.put(PageRecord.from_dict(d))
+        self.save()
+        os.replace(legacy, legacy.with_name(legacy.name + '.migrated'))
+
+    def get(self, slug: str) -> Optional[PageRecord]:
+        return self._pages.get(slug)
+
+    def put(self, page: PageRecord) -> None:
+        self._pages[page.slug] = page
+        self._dirty.add(page.slug)
+
+    def delete(self, slug: str) -> bool:
+        if self._pages.pop(slug, None) is None:
+            return False
+        self._dirty.add(slug)
+        return True
+
+    def slugs(self) -> Iterator[str]:
+        return iter(list(self._pages))
+
+    def __iter__(self) -> Iterator[PageRecord]:
+        return iter(list(self._pages.values()))
+
+    def __len__(self) -> int:
+        return len(self._pages)
+
+    # ---- serving ----
+
+    def blob(self, slug: str) -> Optional[Blob]:
+        row = self._conn().execute('SELECT body, body_gz, etag FROM pages WHERE slug = ?', (slug,)).fetchone()
+        return Blob(*row) if row is not None else None
+
+    def sitemap(self) -> Blob:
+        if self._sitemap is None:
+            with self._write_lock:
+                if self._sitemap is None:
+                    self._save_sitemap(self._conn())
+        return self._sitemap
+
+    def _save_sitemap(self, conn: sqlite3.Connection) -> None:
+        blob = make_blob(sitemap_document(self._pages.values()))
+        with conn:
+            conn.execute('INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?)', (SITEMAP_KEY, *blob))
+        self._sitemap = blob
+
+    # ---- persistence ----
+
+    def copy_to(self, path: Path) -> None:
+        """Consistent copy of the database (including WAL contents) to a new file."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        dst = sqlite3.connect(str(path))
+        try:
+            with self._write_lock:
+                self._conn().backup(dst)
+        finally:
+            dst.close()
+
+    def save(self) -> None:
+        with self._write_lock:
+            if not self._dirty:
+                return
+            dirty, self._dirty = self._dirty, set()
+            rows = []
+            gone = []
+            for slug in dirty:
+                page = self._pages.get(slug)
+                if page is None:
+                    gone.append((slug,))
+                else:
+                    rows.append((slug, *make_blob(page_document(page))))
+            conn = self._conn()
+            with conn:
+                conn.executemany('DELETE FROM pages WHERE slug = ?', gone)
+                conn.executemany('INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?)', rows)
+            self._save_sitemap(conn)
+
+
+class PageBlobs:
+    """Read-only view of a pages.db written by another process.
+
+    Connections are opened with `mode=ro` (one per thread, like PageStore) and no
+    records are loaded, so opening a generation costs one file open and a lookup
+    is a primary-key read. WAL keeps these reads consistent while the connector writes.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._local = threading.local()
+        self._conns: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._sitemap: Optional[Blob] = None
+        self._conn()  # fail now, not on the first lookup, if the file is missing
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(f'{self.path.as_uri()}?mode=ro', uri=True, check_same_thread=False)
+            self._local.conn = conn
+            with self._lock:
+                self._conns.append(conn)
+        return conn
+
+    def blob(self, slug: str) -> Optional[Blob]:
+        row = self._conn().execute('SELECT body, body_gz, etag FROM pages WHERE slug = ?', (slug,)).fetchone()
+        return Blob(*row) if row is not None else None
+
+    def sitemap(self) -> Blob:
+        if self._sitemap is None:
+            conn = self._conn()
+            row = conn.execute('SELECT body, body_gz, etag FROM documents WHERE name = ?', (SITEMAP_KEY,)).fetchone()
+            if row is not None:
+                self._sitemap = Blob(*row)
+            else:  # written before sitemaps were stored: build it here, without writing
+                pages = (_record(orjson.loads(body)) for (body,) in conn.execute('SELECT body FROM pages'))
+                self._sitemap = make_blob(sitemap_document(pages))
+        return self._sitemap
+
+    def close(self) -> None:
+        with self._lock:
+            conns, self._conns = self._conns, []
+        for conn in conns:
+            conn.close()
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class PageVectors:
+    """One unit-length centroid vector per page (mean of its chunk embeddings).
+
+    Kept beside the chunk index so page-level analyses (clustering, similar-page
+    lookups) work on an n x d float32 matrix instead of re-reading every chunk.
+    """
+
+    def __init__(self, data_dir: Path):
+        self.data_dir = data_dir
+        self._rows: Dict[str, np.ndarray] = {}
+        self._updated: Dict[str, int] = {}  # slug -> generation that last wrote it
+        self._matrix: Optional[Tuple[List[str], np.ndarray]] = None
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        meta_path = self.data_dir / 'page_vectors.json'
+        mat_path = self.data_dir / 'page_vectors.npy'
+        if not meta_path.exists() or not mat_path.exists():
+            return
+        meta = json.loads(meta_path.read_text(encoding='utf-8'))
+        mat = np.load(mat_path)
+        slugs = meta.get('slugs') or []
+        if len(slugs) != len(mat):
+            return
+        updated = meta.get('updated') or {}
+        for i, slug in enumerate(slugs):
+            self._rows[slug] = mat[i]
+            self._updated[slug] = int(updated.get(slug, 0))
+
+    def put(self, slug: str, chunk_embeddings: Sequence[Sequence[float]], generation: int) -> None:
+        if not len(chunk_embeddings):
+            self.delete(slug)
+            return
+        v = np.asarray(chunk_embeddings, dtype=np.float32).mean(axis=0)
+        n = float(np.linalg.norm(v))
+        with self._lock:
+            self._rows[slug] = v / n if n else v
+            self._updated[slug] = generation
+            self._matrix = None
+
+    def delete(self, slug: str) -> None:
+        with self._lock:
+            if self._rows.pop(slug, None) is not None:
+                self._updated.pop(slug, None)
+                self._matrix = None
+
+    def get(self, slug: str) -> Optional[np.ndarray]:
+        return self._rows.get(slug)
+
+    def updated_in(self, slug: str) -> int:
+        return self._updated.get(slug, 0)
+
+    def matrix(self) -> Tuple[List[str], np.ndarray]:
+        """(slugs, n x d matrix) in slug order; cached until the next write."""
+        with self._lock:
+            if self._matrix is None:
+                slugs = sorted(self._rows)
+                if slugs:
+                    mat = np.vstack([self._rows[s] for s in slugs]).astype(np.float32, copy=False)
+                else:
+                    mat = np.zeros((0, 0), dtype=np.float32)
+                self._matrix = (slugs, mat)
+            return self._matrix
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def save(self) -> None:
+        slugs, mat = self.matrix()
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        mat_tmp = self.data_dir / 'page_vectors.npy.tmp'
+        with mat_tmp.open('wb') as f:
+            np.save(f, mat)
+        meta_tmp = self.data_dir / 'page_vectors.json.tmp'
+        meta_tmp.write_text(json.dumps({'slugs': slugs, 'updated': self._updated}), encoding='utf-8')
+        os.replace(mat_tmp, self.data_dir / 'page_vectors.npy')
+        os.replace(meta_tmp, self.data_dir / 'page_vectors.json')
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import orjson
+
+from ..core.cache import LRUCache
+from ..core.config import QUERY_EMBED_CACHE_SIZE, SEARCH_RESULT_CACHE_SIZE
+from ..core.embeddings import OllamaEmbedder
+from .chunkvectors import ChunkVectorSnapshot
+from .generations import published_numbers
+from .index import SEARCH_MODES, _normalize_query, search_generation
+from .lexical import BM25Index
+from .pages import PageBlobs
+
+PAGE_CACHE_SIZE = 4096
+
+
+class GenerationView:
+    """Read-only handles on one published generation (or the pre-generations flat layout).
+
+    Page lookups open nothing but pages.db. The BM25 index and the chunk vector snapshot
+    are loaded on the first search. Chroma is never opened: its client rewrites segment
+    files on load, which is not safe next to the connector.
+    """
+
+    def __init__(self, number: Optional[int], directory: Path):
+        self.number = number
+        self.dir = directory
+        self.pages = PageBlobs(directory / 'pages.db')
+        self._lexical: Optional[BM25Index] = None
+        self._vectors: Optional[ChunkVectorSnapshot] = None
+        self._lock = threading.Lock()
+        self.refs = 0
+
+    @property
+    def lexical(self) -> BM25Index:
+        if self._lexical is None:
+            with self._lock:
+                if self._lexical is None:
+                    self._lexical = BM25Index.load(self.dir / 'lexical.pkl')
+        return self._lexical
+
+    @property
+    def vectors(self) -> ChunkVectorSnapshot:
+        if self._vectors is None:
+            with self._lock:
+                if self._vectors is None:
+                    snapshot = ChunkVectorSnapshot.load(self.dir)
+                    if snapshot is None:
+                        raise RuntimeError(
+                            f'{self.dir} has no chunk vector snapshot; the connector writes one when it next publishes a generation'
+                        )
+                    self._vectors = snapshot
+        return self._vectors
+
+    def close(self) -> None:
+        self.pages.close()
+
+
+class SiteReader:
+    """In-process, read-only access to the index a connector process maintains.
+
+    Nothing is written to `data_dir` and Chroma is not opened, so it can run next to the connector
+    (or several times over). Every call stats `generation.json`. When the connector
+    publishes or restores a generation, new calls switch to it, and calls already running
+    finish on the generation they pinned, which is closed once the last one exits.
+    """
+
+    def __init__(self, data_dir: Path, embedder: Optional[OllamaEmbedder] = None):
+        self.data_dir = data_dir
+        self.root = data_dir / 'generations'
+        self.embedder = embedder or OllamaEmbedder()
+        self._pin_lock = threading.Lock()
+        self._switch_lock = threading.Lock()
+        self._pointer: Optional[Tuple[int, int, int]] = None
+        self._current: Optional[GenerationView] = None
+        self.query_embeddings: LRUCache[List[float]] = LRUCache(QUERY_EMBED_CACHE_SIZE)
+        self.results: LRUCache[List[Dict[str, Any]]] = LRUCache(SEARCH_RESULT_CACHE_SIZE)
+        self.pages: LRUCache[Dict[str, Any]] = LRUCache(PAGE_CACHE_SIZE)
+
+    # ---- generations ----
+
+    def _pointer_stat(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = os.stat(self.data_dir / 'generation.json')
+        except OSError:
+            return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    def _locate(self) -> Tuple[Optional[int], Path]:
+        """The generation the connector serves, found the way SiteIndex finds it (without repairing anything)."""
+        try:
+            pointer: Optional[int] = int(json.loads((self.data_dir / 'generation.json').read_text())['generation'])
+        except (OSError, ValueError, KeyError):
+            pointer = None
+        if not self.root.exists():
+            return None, self.data_dir  # not migrated yet: files directly in data_dir, unsuffixed collection
+        published = published_numbers(self.root)
+        if pointer not in published:
+            if not published:
+                raise RuntimeError(f'No published index generation under {self.root}')
+            pointer = published[-1]
+        return pointer, self.root / str(pointer)
+
+    def _refresh(self) -> None:
+        stat = self._pointer_stat()
+        if self._current is not None and stat == self._pointer:
+            return
+        with self._switch_lock:
+            if self._current is not None and stat == self._pointer:
+                return
+            number, directory = self._locate()
+            old = self._current
+            if old is not None and old.number == number and old.dir == directory:
+                self._pointer = stat
+                return
+            view = GenerationView(number, directory)
+            with self._pin_lock:
+                self._current, self._pointer = view, stat
+                idle = old is not None and old.refs == 0
+            if idle:
+                old.close()
+
+    @property
+    def generation(self) -> Optional[int]:
+        self._refresh()
+        return self._current.number
+
+    @contextmanager
+    def pinned(self) -> Iterator[GenerationView]:
+        """The current generation, kept open until the block exits."""
+        self._refresh()
+        with self._pin_lock:
+            view = self._current
+            view.refs += 1
+        try:
+            yield view
+        finally:
+            with self._pin_lock:
+                view.refs -= 1
+                retired = view.refs == 0 and view is not self._current
+            if retired:
+                view.close()
+
+    # ---- reads ----
+
+    def page(self, slug: str) -> Optional[Dict[str, Any]]:
+        with self.pinned() as view:
+            key = (view.number, slug)
+            doc = self.pages.get(key) if view.number is not None else None
+            if doc is None:
+                blob = view.pages.blob(slug)
+                if blob is None:
+                    return None
+                doc = orjson.loads(blob.body)
+                if view.number is not None:
+                    self.pages.put(key, doc)
+            return doc
+
+    def sitemap(self) -> Dict[str, Any]:
+        with self.pinned() as view:
+            return orjson.loads(view.pages.sitemap().body)
+
+    def embed_query(self, query: str) -> List[float]:
+        key = (self.embedder.model, query)
+        vec = self.query_embeddings.get(key)
+        if vec is None:
+            vec = self.embedder.embed_one(query)
+            self.query_embeddings.put(key, vec)
+        return vec
+
+    def search(self, query: str, mode: str = 'hybrid', limit: int = 8, filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        if mode not in SEARCH_MODES:
+            raise ValueError(f'mode must be one of {", ".join(SEARCH_MODES)}')
+        query = _normalize_query(query)
+        with self.pinned() as view:
+            # The flat layout is still written in place, so only generations are cached.
+            key = (query, mode, json.dumps(filters, sort_keys=True, default=str), limit, view.number)
+            cached = self.results.get(key) if view.number is not None else None
+            if cached is not None:
+                return cached
+            results = search_generation(view, query, mode, limit, filters, self.embed_query)
+        if view.number is not None:
+            self.results.put(key, results)
+        return results
+
+    def cache_stats(self) -> Dict[str, Any]:
+        return {
+            'generation': self.generation,
+            'queryEmbeddings': self.query_embeddings.stats(),
+            'results': self.results.stats(),
+            'pages': self.pages.stats(),
+        }
@@ -1 +1,127 @@
-# vectordb.py placeholder
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import chromadb
+
+from ..core.metrics import REGISTRY
+
+COLLECTION_PREFIX = 'chunks'
+COPY_BATCH = 1000
+VECTORDB_SECONDS = REGISTRY.histogram('connector_vectordb_seconds', 'Chroma call latency by operation.', ('op',))
+
+
+def _where(filters: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if not filters:
+        return None
+    clauses = [{k: v} for k, v in filters.items()]
+    return clauses[0] if len(clauses) == 1 else {'$and': clauses}
+
+
+class VectorStore:
+    """Thin wrapper around a persistent Chroma collection of page chunks.
+
+    Each index generation has its own collection, suffixed `-g<generation>`.
+    """
+
+    def __init__(self, path: str, site_id: str, generation: Optional[int] = None):
+        self.client = chromadb.PersistentClient(path=path)
+        self.name = collection_name(site_id, generation)
+        self.collection = self.client.get_or_create_collection(
+            self.name,
+            metadata={'hnsw:space': 'cosine'},
+        )
+
+    def upsert(
+        self,
+        ids: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        documents: Sequence[str],
+        metadatas: Sequence[Dict[str, Any]],
+    ) -> None:
+        if not ids:
+            return
+        with VECTORDB_SECONDS.labels('upsert').time():
+            self.collection.upsert(
+                ids=list(ids),
+                embeddings=[list(e) for e in embeddings],
+                documents=list(documents),
+                metadatas=list(metadatas),
+            )
+
+    def get(self, ids: Sequence[str]) -> Dict[str, Tuple[List[float], str]]:
+        """Stored (embedding, document) by chunk id; missing ids are omitted."""
+        if not ids:
+            return {}
+        with VECTORDB_SECONDS.labels('get').time():
+            res = self.collection.get(ids=list(ids), include=['embeddings', 'documents'])
+        embs = res.get('embeddings')
+        docs = res.get('documents') or []
+        return {cid: (list(embs[i]), docs[i] or '') for i, cid in enumerate(res.get('ids') or [])}
+
+    def delete_slug(self, slug: str) -> None:
+        with VECTORDB_SECONDS.labels('delete').time():
+            self.collection.delete(where={'slug': slug})
+
+    def query(
+        self,
+        embedding: Sequence[float],
+        limit: int = 10,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> List[Tuple[str, float, Dict[str, Any]]]:
+        """Return up to `limit` (chunk id, similarity, metadata) tuples, best first."""
+        if self.collection.count() == 0:
+            return []
+        with VECTORDB_SECONDS.labels('query').time():
+            res = self.collection.query(
+                query_embeddings=[list(embedding)],
+                n_results=limit,
+                where=_where(filters),
+                include=['metadatas', 'distances'],
+            )
+        ids = (res.get('ids') or [[]])[0]
+        dists = (res.get('distances') or [[]])[0]
+        metas = (res.get('metadatas') or [[]])[0]
+        return [(cid, 1.0 - float(d), dict(m or {})) for cid, d, m in zip(ids, dists, metas)]
+
+    def count(self) -> int:
+        return self.collection.count()
+
+    def copy_from(self, other: 'VectorStore', batch: int = COPY_BATCH) -> int:
+        """Seed this collection with every row of `other` (local Chroma cannot fork collections)."""
+        copied = 0
+        with VECTORDB_SECONDS.labels('copy').time():
+            while True:
+                res = other.collection.get(include=['embeddings', 'documents', 'metadatas'], limit=batch, offset=copied)
+                ids = res.get('ids') or []
+                if not ids:
+                    return copied
+                self.collection.upsert(
+                    ids=ids,
+                    embeddings=res['embeddings'],
+                    documents=res['documents'],
+                    metadatas=res['metadatas'],
+                )
+                copied += len(ids)
+
+    def drop(self) -> None:
+        try:
+            self.client.delete_collection(self.name)
+        except Exception:  # NotFoundError; ValueError on older chromadb
+            pass
+
+
+def collection_name(site_id: str, generation: Optional[int] = None) -> str:
+    name = f'{COLLECTION_PREFIX}-{site_id}'
+    return name if generation is None else f'{name}-g{generation}'
+
+
+def rename_collection(path: str, old: str, new: str) -> bool:
+    """Rename a collection in place; False when `old` does not exist."""
+    client = chromadb.PersistentClient(path=path)
+    try:
+        collection = client.get_collection(old)
+    except Exception:  # NotFoundError; ValueError on older chromadb
+        return False
+    collection.modify(name=new)
+    return True
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+import numpy as np
+
+_TOKEN_RE = re.compile(r'\w+')
+
+
+def hashed_embedding(text: str, dim: int) -> List[float]:
+    """Feature-hashed bag of words: texts sharing words get similar vectors, with no model."""
+    vec = np.zeros(dim, dtype=np.float32)
+    for token in _TOKEN_RE.findall(text.lower()):
+        h = int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'little')
+        vec[h % dim] += 1.0 if (h >> 63) else -1.0
+    norm = float(np.linalg.norm(vec))
+    if norm:
+        vec /= norm
+    return vec.tolist()
+
+
+class FakeEmbedServer:
+    """Stand-in for Ollama's /api/embed on a local port.
+
+    Latency is `base_ms + per_text_ms * batch size`, so embedding cost and batching
+    effects can be modelled without a GPU.
+    """
+
+    def __init__(self, dim: int = 384, base_ms: float = 5.0, per_text_ms: float = 0.5, host: str = '127.0.0.1', port: int = 0):
+        self.dim = dim
+        self.base_ms = base_ms
+        self.per_text_ms = per_text_ms
+        self.requests = 0
+        self.texts = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self) -> None:
+                if self.path != '/api/embed':
+                    self.send_error(404)
+                    return
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)) or b'{}')
+                inputs = body.get('input') or []
+                if isinstance(inputs, str):
+                    inputs = [inputs]
+                server.requests += 1
+                server.texts += len(inputs)
+                time.sleep((server.base_ms + server.per_text_ms * len(inputs)) / 1000.0)
+                out = json.dumps({'model': body.get('model'), 'embeddings': [hashed_embedding(t, server.dim) for t in inputs]}).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(out)))
+                self.end_headers()
+                self.wfile.write(out)
+
+            def log_message(self, *args) -> None:
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> 'FakeEmbedServer':
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='fake-embed', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
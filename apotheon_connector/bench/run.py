@@ -0,0 +1,308 @@
+"""Connector benchmark: index throughput, incremental cost, search latency and peak RSS.
+
+    python -m apotheon_connector.bench.run --pages 1000 --change 0.05 --out bench-results/run.json
+
+Everything runs against a generated site and a fake embedding server, so numbers are
+comparable between machines of the same class and between releases (`--compare`).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import requests
+
+from .fake_embed import FakeEmbedServer
+from .sitegen import SiteSpec, generate_site, mutate_site
+
+SEARCH_MODES = ('lexical', 'hybrid')
+COMPARE_KEYS = (
+    ('full.pagesPerSec', True),
+    ('full.tookSec', False),
+    ('noop.tookSec', False),
+    ('incremental.tookSec', False),
+    ('peakRssMb.self', False),
+)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _peak_rss_mb(who: int = resource.RUSAGE_SELF) -> float:
+    kb = resource.getrusage(who).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return round((kb / 1024 if sys.platform.startswith('linux') else kb / (1024 * 1024)), 1)
+
+
+def _percentile(values: Sequence[float], p: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    k = min(len(ordered) - 1, max(0, int(round(p / 100.0 * (len(ordered) - 1)))))
+    return ordered[k]
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+class _StaticSite:
+    """Serves the generated site over HTTP for crawl-mode runs."""
+
+    def __init__(self, root: Path):
+        handler = partial(SimpleHTTPRequestHandler, directory=str(root))
+        handler.log_message = lambda *args: None  # type: ignore[assignment]
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self.httpd.daemon_threads = True
+        threading.Thread(target=self.httpd.serve_forever, name='bench-site', daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def _reindex(index: Any, run_reindex: Any, source: str) -> Dict[str, Any]:
+    started = time.perf_counter()
+    stats = run_reindex(index, mode=source, changed_only=True, resume=False)
+    took = time.perf_counter() - started
+    return {
+        **stats,
+        'tookSec': round(took, 3),
+        'pagesPerSec': round(stats['pages'] / took, 2) if took else None,
+        'chunksPerSec': round(stats['chunks'] / took, 2) if took else None,
+        'peakRssMb': _peak_rss_mb(),
+    }
+
+
+def _queries(index: Any, n: int, seed: int) -> List[str]:
+    # Distinct two-word queries drawn from page titles, so the result cache does not answer them.
+    rng = random.Random(seed)
+    words = sorted({w.lower() for p in index.pages for w in p.title.split() if w.isalpha()})
+    if len(words) < 2:
+        return ['benchmark'] * n
+    out: List[str] = []
+    seen = set()
+    while len(out) < n and len(seen) < len(words) ** 2:
+        q = ' '.join(rng.sample(words, 2))
+        if q not in seen:
+            seen.add(q)
+            out.append(q)
+    return out
+
+
+def _search_bench(base: str, token: str, queries: List[str], concurrency: int, mode: str) -> Dict[str, Any]:
+    session = requests.Session()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    def one(q: str) -> float:
+        started = time.perf_counter()
+        r = session.post(f'{base}/search', json={'query': q, 'limit': 8, 'mode': mode}, headers=headers, timeout=60)
+        r.raise_for_status()
+        return (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(one, queries))
+    wall = time.perf_counter() - started
+    return {
+        'requests': len(latencies),
+        'p50Ms': round(_percentile(latencies, 50), 2),
+        'p90Ms': round(_percentile(latencies, 90), 2),
+        'p99Ms': round(_percentile(latencies, 99), 2),
+        'maxMs': round(max(latencies), 2) if latencies else 0.0,
+        'qps': round(len(latencies) / wall, 2) if wall else None,
+    }
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    spec = SiteSpec(
+        pages=args.pages,
+        topics=args.topics,
+        links_per_page=args.links_per_page,
+        duplicate_ratio=args.duplicate_ratio,
+        page_words=args.page_words,
+        seed=args.seed,
+    )
+    work = Path(args.workdir or tempfile.mkdtemp(prefix='connector-bench-'))
+    site_dir = work / 'site'
+
+    started = time.perf_counter()
+    paths = generate_site(site_dir, spec)
+    generate_sec = time.perf_counter() - started
+
+    embed = FakeEmbedServer(dim=args.embed_dim, base_ms=args.embed_base_ms, per_text_ms=args.embed_per_text_ms).start()
+    static = _StaticSite(site_dir) if args.source == 'crawl' else None
+
+    # Connector config is read at import time, so the environment is set before importing it.
+    os.environ.update({
+        'CONNECTOR_SOURCE': args.source,
+        'CONNECTOR_BUILD_DIR': str(site_dir),
+        'CONNECTOR_TARGET_URL': static.url if static else 'http://bench.local',
+        'CONNECTOR_DATA_DIR': str(work / 'data'),
+        'CONNECTOR_CHROMA_DIR': str(work / 'chroma'),
+        'CONNECTOR_REPORTS_DIR': str(work / 'reports'),
+        'CONNECTOR_MAX_PAGES': str(spec.pages + spec.topics + 10),
+        'OLLAMA_BASE_URL': embed.url,
+    })
+    import uvicorn
+
+    from ..app.core.config import READ_TOKEN
+    from ..app.indexing import pipeline
+    from ..app.main import app
+    from ..app.storage.index import get_index
+
+    index = get_index()
+    results: Dict[str, Any] = {'generateSec': round(generate_sec, 3)}
+    try:
+        print(f'[bench] indexing {spec.pages} pages ({args.source})', file=sys.stderr)
+        results['full'] = _reindex(index, pipeline.run_reindex, args.source)
+        results['noop'] = _reindex(index, pipeline.run_reindex, args.source)
+        changed = mutate_site(site_dir, paths, args.change, seed=args.seed + 1)
+        results['incremental'] = {
+            'changeFraction': args.change,
+            'changedPages': len(changed),
+            **_reindex(index, pipeline.run_reindex, args.source),
+        }
+        full = results['full']['tookSec']
+        results['incremental']['costVsFull'] = round(results['incremental']['tookSec'] / full, 4) if full else None
+
+        port = _free_port()
+        server = uvicorn.Server(uvicorn.Config(app, host='127.0.0.1', port=port, log_level='warning'))
+        thread = threading.Thread(target=server.run, name='bench-api', daemon=True)
+        thread.start()
+        while not server.started:
+            time.sleep(0.05)
+        base = f'http://127.0.0.1:{port}'
+        try:
+            queries = _queries(index, args.queries * len(args.concurrency) * len(args.search_modes), args.seed)
+            results['search'] = {}
+            offset = 0
+            for mode in args.search_modes:
+                results['search'][mode] = {}
+                for c in args.concurrency:
+                    batch = queries[offset:offset + args.queries] or queries[:args.queries]
+                    offset += args.queries
+                    print(f'[bench] search mode={mode} concurrency={c}', file=sys.stderr)
+                    results['search'][mode][str(c)] = _search_bench(base, READ_TOKEN, batch, c, mode)
+        finally:
+            server.should_exit = True
+            thread.join(timeout=10)
+
+        results['embedServer'] = {'requests': embed.requests, 'texts': embed.texts}
+    finally:
+        embed.stop()
+        if static is not None:
+            static.stop()
+        # Extraction workers are separate processes; their peak shows up once they are reaped.
+        if pipeline._pool is not None:
+            pipeline._pool.shutdown(wait=True)
+    results['peakRssMb'] = {'self': _peak_rss_mb(), 'children': _peak_rss_mb(resource.RUSAGE_CHILDREN)}
+
+    return {
+        'benchmark': 'apotheon_connector',
+        'version': app.version,
+        'gitCommit': _git_commit(),
+        'startedAt': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpuCount': os.cpu_count(),
+        'site': spec.to_dict(),
+        'source': args.source,
+        'embed': {'dim': args.embed_dim, 'baseMs': args.embed_base_ms, 'perTextMs': args.embed_per_text_ms},
+        'workdir': str(work),
+        'results': results,
+    }
+
+
+def _lookup(doc: Dict[str, Any], dotted: str) -> Optional[float]:
+    cur: Any = doc.get('results', {})
+    for part in dotted.split('.'):
+        if not isinstance(cur, dict) or part not in cur:
+            return None
+        cur = cur[part]
+    return cur if isinstance(cur, (int, float)) else None
+
+
+def compare(current: Dict[str, Any], previous: Dict[str, Any]) -> List[str]:
+    """Side-by-side of headline numbers; regressions are marked with '!'."""
+    keys = list(COMPARE_KEYS)
+    for mode, by_c in current['results'].get('search', {}).items():
+        for c in by_c:
+            keys += [(f'search.{mode}.{c}.p50Ms', False), (f'search.{mode}.{c}.p99Ms', False)]
+    lines = []
+    for key, higher_is_better in keys:
+        now, before = _lookup(current, key), _lookup(previous, key)
+        if now is None or before is None or not before:
+            continue
+        delta = (now - before) / before * 100
+        worse = delta < -5 if higher_is_better else delta > 5
+        lines.append(f'{"!" if worse else " "} {key:<32} {before:>12} -> {now:<12} ({delta:+.1f}%)')
+    return lines
+
+
+def _csv_ints(value: str) -> List[int]:
+    return [int(v) for v in value.split(',') if v.strip()]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument('--pages', type=int, default=1000)
+    p.add_argument('--topics', type=int, default=20)
+    p.add_argument('--links-per-page', type=int, default=8)
+    p.add_argument('--duplicate-ratio', type=float, default=0.1)
+    p.add_argument('--page-words', type=int, default=600)
+    p.add_argument('--seed', type=int, default=7)
+    p.add_argument('--source', choices=('build', 'crawl'), default='build')
+    p.add_argument('--change', type=float, default=0.05, help='fraction of pages changed before the incremental reindex')
+    p.add_argument('--queries', type=int, default=200, help='search requests per mode and concurrency level')
+    p.add_argument('--concurrency', type=_csv_ints, default=[1, 4, 16])
+    p.add_argument('--search-modes', type=lambda v: [m for m in v.split(',') if m], default=list(SEARCH_MODES))
+    p.add_argument('--embed-dim', type=int, default=384)
+    p.add_argument('--embed-base-ms', type=float, default=5.0)
+    p.add_argument('--embed-per-text-ms', type=float, default=0.5)
+    p.add_argument('--workdir', help='keep site and index here instead of a temporary directory')
+    p.add_argument('--out', help='result JSON path (default: bench-results/connector-<timestamp>.json)')
+    p.add_argument('--compare', help='previous result JSON to diff against')
+    args = p.parse_args(argv)
+
+    doc = run(args)
+    out = Path(args.out or f'bench-results/connector-{datetime.now():%Y%m%d-%H%M%S}.json')
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(doc, indent=2), encoding='utf-8')
+    print(json.dumps(doc['results'], indent=2))
+    print(f'[bench] wrote {out}', file=sys.stderr)
+    if args.compare:
+        for line in compare(doc, json.loads(Path(args.compare).read_text(encoding='utf-8'))):
+            print(line)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import html
+import random
+import shutil
+from pathlib import Path
+from typing import Dict, List
+
+SYLLABLES = ('ka', 'lo', 'mi', 'ren', 'tu', 'sa', 'vor', 'ne', 'qui', 'dal', 'pe', 'zor', 'ha', 'lin', 'mo', 'tes')
+COMMON_WORDS = 200
+TOPIC_WORDS = 60
+SECTION_WORDS = 120
+
+
+def _vocabulary(rng: random.Random, n: int) -> List[str]:
+    words = set()
+    while len(words) < n:
+        words.add(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+class SiteSpec:
+    """Shape of a synthetic site: size, link density, duplicate ratio and page length."""
+
+    def __init__(
+        self,
+        pages: int = 1000,
+        topics: int = 20,
+        links_per_page: int = 8,
+        duplicate_ratio: float = 0.1,
+        page_words: int = 600,
+        seed: int = 7,
+    ):
+        if pages < 1 or topics < 1:
+            raise ValueError('pages and topics must be positive')
+        if not 0.0 <= duplicate_ratio < 1.0:
+            raise ValueError('duplicate_ratio must be in [0, 1)')
+        self.pages = pages
+        self.topics = min(topics, pages)
+        self.links_per_page = links_per_page
+        self.duplicate_ratio = duplicate_ratio
+        self.page_words = page_words
+        self.seed = seed
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            'pages': self.pages,
+            'topics': self.topics,
+            'linksPerPage': self.links_per_page,
+            'duplicateRatio': self.duplicate_ratio,
+            'pageWords': self.page_words,
+            'seed': self.seed,
+        }
+
+
+def page_path(topic: int, i: int) -> str:
+    return f'topic-{topic}/page-{i}.html'
+
+
+def _paragraphs(rng: random.Random, words: List[str], common: List[str], n: int) -> List[str]:
+    # Two parts topic vocabulary to one part shared: pages in a topic are similar, topics are not.
+    out = []
+    while n > 0:
+        size = min(n, rng.randint(40, 90))
+        out.append(' '.join(rng.choice(words) if rng.random() < 0.67 else rng.choice(common) for _ in range(size)).capitalize() + '.')
+        n -= size
+    return out
+
+
+def _render(title: str, description: str, sections: List[List[str]], links: List[str], nav: str) -> str:
+    body = []
+    for s, paragraphs in enumerate(sections):
+        body.append(f'<h2>Section {s + 1}</h2>')
+        body.extend(f'<p>{html.escape(p)}</p>' for p in paragraphs)
+    if links:
+        body.append('<ul>' + ''.join(f'<li><a href="/{href}">{html.escape(href)}</a></li>' for href in links) + '</ul>')
+    return (
+        '<!doctype html><html><head>'
+        f'<title>{html.escape(title)}</title><meta name="description" content="{html.escape(description)}">'
+        f'</head><body>{nav}<main><h1>{html.escape(title)}</h1>{"".join(body)}</main>'
+        '<footer><p>Synthetic site generated for connector benchmarks.</p></footer></body></html>'
+    )
+
+
+def generate_site(out_dir: Path, spec: SiteSpec) -> List[str]:
+    """Write the site under out_dir (replacing it) and return the content page paths.
+
+    index.html links to one hub per topic and each hub links to its pages, so a crawl
+    from the root reaches everything. Each page links to `links_per_page` others, mostly
+    within its topic. A `duplicate_ratio` share of pages copy another page with a few
+    words changed, to exercise near-duplicate detection.
+    """
+    rng = random.Random(spec.seed)
+    vocab = _vocabulary(rng, COMMON_WORDS + spec.topics * TOPIC_WORDS)
+    common = vocab[:COMMON_WORDS]
+    topic_words = [vocab[COMMON_WORDS + t * TOPIC_WORDS:COMMON_WORDS + (t + 1) * TOPIC_WORDS] for t in range(spec.topics)]
+
+    if out_dir.exists():
+        shutil.rmtree(out_dir)
+    out_dir.mkdir(parents=True)
+    nav = '<nav>' + ''.join(f'<a href="/topic-{t}/index.html">Topic {t}</a>' for t in range(spec.topics)) + '</nav>'
+
+    pages = [(i % spec.topics, i) for i in range(spec.pages)]
+    by_topic: Dict[int, List[str]] = {}
+    for t, i in pages:
+        by_topic.setdefault(t, []).append(page_path(t, i))
+    paths = [page_path(t, i) for t, i in pages]
+
+    sections_per_page = max(1, spec.page_words // SECTION_WORDS)
+    originals: List[List[List[str]]] = []
+    for t, i in pages:
+        if originals and rng.random() < spec.duplicate_ratio:
+            sections = [list(s) for s in rng.choice(originals)]
+            s = rng.randrange(len(sections))
+            sections[s][0] = ' '.join(rng.choice(topic_words[t]) for _ in range(8)).capitalize() + '. ' + sections[s][0]
+        else:
+            sections = [_paragraphs(rng, topic_words[t], common, SECTION_WORDS) for _ in range(sections_per_page)]
+            originals.append(sections)
+        same = by_topic[t]
+        links = []
+        for _ in range(spec.links_per_page):
+            pool = same if rng.random() < 0.8 else paths
+            links.append(rng.choice(pool))
+        title = f'{" ".join(rng.choice(topic_words[t]) for _ in range(3)).title()} {i}'
+        description = ' '.join(rng.choice(topic_words[t]) for _ in range(16)).capitalize() + '.'
+        target = out_dir / page_path(t, i)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(_render(title, description, sections, sorted(set(links)), nav), encoding='utf-8')
+
+    for t, members in by_topic.items():
+        (out_dir / f'topic-{t}' / 'index.html').write_text(
+            _render(f'Topic {t}', f'Pages about topic {t}.', [], members, nav), encoding='utf-8')
+    (out_dir / 'index.html').write_text(
+        _render('Home', 'Synthetic benchmark site.', [], [f'topic-{t}/index.html' for t in range(spec.topics)], nav),
+        encoding='utf-8')
+    return paths
+
+
+def mutate_site(out_dir: Path, paths: List[str], fraction: float, seed: int = 11) -> List[str]:
+    """Append a paragraph to `fraction` of the pages so their content hash changes."""
+    rng = random.Random(seed)
+    changed = rng.sample(paths, max(1, round(len(paths) * fraction))) if fraction > 0 else []
+    for path in changed:
+        fp = out_dir / path
+        text = fp.read_text(encoding='utf-8')
+        extra = f'<p>Revision {rng.randrange(1 << 30)}: updated content for benchmark.</p>'
+        fp.write_text(text.replace('</main>', extra + '</main>', 1), encoding='utf-8')
+    return changed
@@ -0,0 +1,111 @@
+"""Fixtures for the website connector: a SiteIndex in a temp dir, embedded without a model.
+
+Config is read from the environment at import time, so it is pointed at a scratch
+directory here, before any test imports `apotheon_connector.app`.
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence, Tuple, Union
+
+import pytest
+
+_SCRATCH = Path(tempfile.mkdtemp(prefix='connector-tests-'))
+os.environ.update({
+    'CONNECTOR_DATA_DIR': str(_SCRATCH / 'data'),
+    'CONNECTOR_CHROMA_DIR': str(_SCRATCH / 'chroma'),
+    'CONNECTOR_REPORTS_DIR': str(_SCRATCH / 'reports'),
+    'CONNECTOR_TARGET_URL': 'http://site.test',
+    'CONNECTOR_SOURCE': 'build',
+    'CONNECTOR_BUILD_DIR': str(_SCRATCH / 'build'),
+    'CONNECTOR_EXTRACT_WORKERS': '1',
+    'CONNECTOR_READ_TOKEN': 'read-token',
+    'CONNECTOR_ADMIN_TOKEN': 'admin-token',
+    'OLLAMA_BASE_URL': 'http://127.0.0.1:9',  # nothing listens; a test that reaches Ollama fails fast
+    'ANONYMIZED_TELEMETRY': 'False',
+})
+
+from apotheon_connector.bench.fake_embed import hashed_embedding  # noqa: E402
+from apotheon_connector.app.indexing.chunker import chunk_page  # noqa: E402
+from apotheon_connector.app.indexing.extractor import content_hash  # noqa: E402
+from apotheon_connector.app.storage.index import SiteIndex  # noqa: E402
+from apotheon_connector.app.storage.models import PageRecord, Section  # noqa: E402
+
+class HashEmbedder:
+    """OllamaEmbedder stand-in using the benchmark's feature-hashed vectors; counts what it embeds."""
+
+    model = 'hash'
+
+    def __init__(self, dim: int = 64):
+        self.dim = dim
+        self.texts = 0
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        self.texts += len(texts)
+        return [hashed_embedding(t, self.dim) for t in texts]
+
+    def embed_one(self, text: str) -> List[float]:
+        return self.embed([text])[0]
+
+
+def _make_page(slug: str, *sections: Union[str, Tuple[str, str]], title: Optional[str] = None, links: Sequence[str] = ()) -> PageRecord:
+    """A page with one untitled section per text; `sections` may also be (heading, text) pairs."""
+    secs = [Section(s[0], 2, s[1]) if isinstance(s, tuple) else Section(None, 1, s) for s in sections]
+    page = PageRecord(slug, f'http://site.test/{slug}', title if title is not None else slug.replace('-', ' ').title(),
+                      sections=secs, links=list(links))
+    page.headings = [[2, s.heading] for s in secs if s.heading]
+    page.word_count = len(page.text.split())
+    page.content_hash = content_hash(page)
+    return page
+
+
+@pytest.fixture
+def make_page() -> Callable[..., PageRecord]:
+    return _make_page
+
+
+@pytest.fixture
+def embedder() -> HashEmbedder:
+    return HashEmbedder()
+
+
+@pytest.fixture
+def index(tmp_path: Path, embedder: HashEmbedder) -> SiteIndex:
+    return SiteIndex(tmp_path / 'data', str(tmp_path / 'chroma'), 'test', embedder=embedder)
+
+
+@pytest.fixture
+def reopen(tmp_path: Path, embedder: HashEmbedder) -> Callable[[], SiteIndex]:
+    """A fresh SiteIndex over the `index` fixture's directories, as after a restart."""
+    return lambda: SiteIndex(tmp_path / 'data', str(tmp_path / 'chroma'), 'test', embedder=embedder)
+
+
+@pytest.fixture
+def put(index: SiteIndex, embedder: HashEmbedder) -> Callable[..., PageRecord]:
+    """Chunk, dedup-plan, embed and index a page the way the reindex pipeline does (without committing)."""
+
+    def put(slug: str, *sections: Union[str, Tuple[str, str]], into: Optional[SiteIndex] = None, **kw) -> PageRecord:
+        target = into or index
+        page = _make_page(slug, *sections, **kw)
+        chunks = chunk_page(page)
+        canonical = target.dedup_plan(page, chunks)
+        vectors = embedder.embed([c.text for c, canon in zip(chunks, canonical) if canon is None])
+        target.replace_page(page, chunks, vectors, canonical)
+        return page
+
+    return put
+
+
+@pytest.fixture
+def api(index: SiteIndex, monkeypatch: pytest.MonkeyPatch):
+    """TestClient for the connector app, serving `index`."""
+    from fastapi.testclient import TestClient
+
+    from apotheon_connector.app.main import app
+    from apotheon_connector.app.storage import index as index_module
+
+    monkeypatch.setattr(index_module, '_index', index)
+    with TestClient(app) as client:
+        yield client
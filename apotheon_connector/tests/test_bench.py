@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import hashlib
+
+import numpy as np
+import pytest
+
+from apotheon_connector.app.core.embeddings import OllamaEmbedder
+from apotheon_connector.app.indexing import pipeline
+from apotheon_connector.app.indexing.pipeline import ReindexRun
+from apotheon_connector.bench.fake_embed import FakeEmbedServer, hashed_embedding
+from apotheon_connector.bench.run import compare
+from apotheon_connector.bench.sitegen import SiteSpec, generate_site, mutate_site
+
+
+def _digest(root):
+    return {p.relative_to(root).as_posix(): hashlib.sha256(p.read_bytes()).hexdigest() for p in sorted(root.rglob('*.html'))}
+
+
+def test_generated_sites_are_deterministic(tmp_path):
+    spec = SiteSpec(pages=40, topics=4, seed=3)
+    paths = generate_site(tmp_path / 'a', spec)
+    generate_site(tmp_path / 'b', spec)
+    assert len(paths) == 40
+    assert _digest(tmp_path / 'a') == _digest(tmp_path / 'b')
+    assert len(_digest(tmp_path / 'a')) == 40 + 4 + 1  # pages, topic hubs, home
+
+    before = _digest(tmp_path / 'a')
+    changed = mutate_site(tmp_path / 'a', paths, fraction=0.25)
+    after = _digest(tmp_path / 'a')
+    assert len(changed) == 10
+    assert {p for p in before if before[p] != after[p]} == set(changed)
+
+    with pytest.raises(ValueError):
+        SiteSpec(duplicate_ratio=1.0)
+
+
+def test_hashed_embeddings_are_unit_length_and_topical():
+    a, b, c = (np.array(hashed_embedding(t, 128)) for t in (
+        'kubernetes pods and nodes', 'pods on kubernetes nodes today', 'chocolate cake recipe'))
+    assert np.linalg.norm(a) == pytest.approx(1.0)
+    assert a @ b > a @ c
+    assert hashed_embedding('same text', 32) == hashed_embedding('same text', 32)
+
+
+def test_fake_embed_server_speaks_the_ollama_api():
+    server = FakeEmbedServer(dim=16, base_ms=0, per_text_ms=0).start()
+    try:
+        embedder = OllamaEmbedder(base_url=server.url, model='fake', batch_size=2)
+        texts = ['one', 'two', 'three', 'four', 'five']
+        assert embedder.embed(texts) == [hashed_embedding(t, 16) for t in texts]
+        assert (server.requests, server.texts) == (3, 5)
+    finally:
+        server.stop()
+
+
+def test_compare_flags_regressions():
+    prev = {'results': {'full': {'pagesPerSec': 100.0, 'tookSec': 10.0}}}
+    cur = {'results': {'full': {'pagesPerSec': 80.0, 'tookSec': 10.2}}}
+    lines = compare(cur, prev)
+    assert any(line.startswith('!') and 'full.pagesPerSec' in line for line in lines)
+    assert any(line.startswith(' ') and 'full.tookSec' in line for line in lines)
+
+
+def test_generated_site_reindexes_with_near_duplicates(tmp_path, index, monkeypatch):
+    generate_site(tmp_path / 'site', SiteSpec(pages=30, topics=3, duplicate_ratio=0.3, page_words=240, seed=5))
+    monkeypatch.setattr(pipeline, 'CONNECTOR_BUILD_DIR', str(tmp_path / 'site'))
+    stats = ReindexRun(index, mode='build', extract_workers=1).run()
+    assert stats['pages'] == 34
+    assert stats['dedupedChunks'] > 0
+    assert index.duplicate_report()['clusters']
+    assert not index.links.broken_links()
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from apotheon_connector.app.analysis.brief import build_daily_brief, load_state, net_changes
+from apotheon_connector.app.core.jobs import Job, JobCancelled, JobManager
+
+
+def test_net_changes_collapse_per_slug():
+    events = [
+        {'slug': 'a', 'type': 'added'}, {'slug': 'a', 'type': 'modified'},
+        {'slug': 'b', 'type': 'added'}, {'slug': 'b', 'type': 'removed'},
+        {'slug': 'c', 'type': 'removed'}, {'slug': 'c', 'type': 'added'},
+    ]
+    assert net_changes(events) == {'a': 'added', 'c': 'modified'}
+
+
+def test_each_brief_covers_only_changes_since_the_last(index, put, tmp_path):
+    reports = tmp_path / 'reports'
+    put('a', 'alpha', title='Alpha')
+    put('b', 'beta', title='Beta')
+    index.commit()
+
+    first = build_daily_brief(index, reports_dir=str(reports))
+    assert first['changes'] == {'added': 2, 'modified': 0, 'removed': 0}
+    assert load_state(index)['cursor'] == first['cursor'] == 2
+
+    assert build_daily_brief(index, reports_dir=str(reports))['events'] == 0
+
+    put('b', 'beta', title='Alpha')  # now shares a title with a
+    index.commit()
+    third = build_daily_brief(index, reports_dir=str(reports))
+    assert third['changes'] == {'added': 0, 'modified': 1, 'removed': 0}
+    text = open(third['path'], encoding='utf-8').read()
+    assert '`b` duplicate_title' in text
+    assert '`a` duplicate_title' not in text  # unchanged pages are not re-reported
+    assert len(list(reports.iterdir())) == 3
+
+
+def test_a_cancelled_brief_leaves_the_cursor_alone(index, put, tmp_path):
+    put('a', 'alpha')
+    index.commit()
+    job = Job('j', 'daily-brief')
+    job.cancel_event.set()
+    with pytest.raises(JobCancelled):
+        build_daily_brief(index, job=job, reports_dir=str(tmp_path / 'reports'))
+    assert load_state(index)['cursor'] == 0
+    assert not (tmp_path / 'reports').exists()
+
+
+def _until(predicate, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_job_manager_runs_one_job_per_kind_and_cancels():
+    jobs = JobManager()
+    release = threading.Event()
+
+    def work(job):
+        while not release.wait(0.01):
+            job.check_cancelled()
+        return 'done'
+
+    first = jobs.submit('brief', work)
+    assert jobs.submit('brief', work) is first
+    jobs.cancel(first.job_id)
+    assert _until(lambda: first.status == 'cancelled')
+
+    second = jobs.submit('brief', work)
+    assert second is not first
+    release.set()
+    assert _until(lambda: second.status == 'succeeded')
+    assert second.to_dict()['result'] == 'done'
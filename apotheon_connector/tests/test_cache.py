@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from apotheon_connector.app.core.cache import LRUCache
+
+
+def test_lru_evicts_least_recently_used_and_counts():
+    cache: LRUCache[int] = LRUCache(2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+    assert cache.stats()['hits'] == 3 and cache.stats()['misses'] == 1
+
+
+def test_zero_size_cache_stores_nothing():
+    cache: LRUCache[int] = LRUCache(0)
+    cache.put('a', 1)
+    assert cache.get('a') is None and len(cache) == 0
+
+
+def test_repeated_queries_reuse_the_embedding_and_result(index, put, embedder):
+    put('install', 'Install the agent on every host.')
+    index.commit()
+
+    first = index.search('install  the agent')
+    embedded = embedder.texts
+    assert index.search('install the agent') == first  # whitespace-normalized to the same key
+    assert embedder.texts == embedded
+    assert index.results.stats()['hits'] == 1
+
+
+def test_results_are_invalidated_by_a_new_generation(index, put, embedder):
+    put('install', 'Install the agent on every host.')
+    index.commit()
+    assert [h['slug'] for h in index.search('upgrade', mode='lexical')] == []
+
+    put('upgrade', 'Upgrade the agent in place.')
+    assert [h['slug'] for h in index.search('upgrade', mode='lexical')] == []  # not published yet
+    index.commit()
+    assert [h['slug'] for h in index.search('upgrade', mode='lexical')] == ['upgrade']
+
+
+def test_embed_queries_batches_only_the_misses(index, embedder):
+    index.embed_query('alpha')
+    before = embedder.texts
+    vecs = index.embed_queries(['alpha', 'beta', 'gamma'])
+    assert embedder.texts - before == 2
+    assert vecs[0] == index.embed_query('alpha')
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from apotheon_connector.app.analysis.clusters import ClusterEngine, connected_components, knn_graph, label_propagation
+
+INFRA = ['kubernetes cluster nodes pods deployment scaling {}', 'deployment of pods across kubernetes nodes {}',
+         'scaling kubernetes cluster deployment with pods {}', 'kubernetes nodes and pods deployment rollout {}',
+         'pods deployment on kubernetes cluster nodes {}', 'cluster nodes kubernetes pods scaling {}']
+BAKING = ['chocolate cake baking recipe oven flour {}', 'baking a chocolate cake in the oven {}',
+          'flour sugar chocolate cake recipe baking {}', 'oven temperature for baking chocolate cake {}',
+          'recipe for chocolate cake flour oven {}', 'cake baking with chocolate and flour {}']
+
+
+def _two_blobs(n: int, dim: int = 16, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = np.zeros((2, dim), dtype=np.float32)
+    centers[0, 0] = centers[1, 1] = 1.0
+    x = centers[np.arange(n) % 2] + rng.normal(0, 0.05, (n, dim)).astype(np.float32)
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+@pytest.mark.parametrize('exact_max', [4096, 16])
+def test_knn_graph_only_links_similar_rows(exact_max):
+    x = _two_blobs(200)
+    src, dst, w = knn_graph(x, k=5, threshold=0.5, block_bytes=4096, exact_max=exact_max)
+    assert len(src) > 0
+    assert np.all(src % 2 == dst % 2)
+    assert np.all(w >= 0.5)
+    assert np.all(src != dst)
+    labels = label_propagation(len(x), src, dst, w)
+    assert len(np.unique(labels)) >= 2
+    assert not set(labels[0::2]) & set(labels[1::2])
+
+
+def test_knn_graph_small_inputs_have_no_edges():
+    src, dst, w = knn_graph(np.ones((1, 4), dtype=np.float32), k=3, threshold=0.0, block_bytes=1024)
+    assert len(src) == len(dst) == len(w) == 0
+
+
+def test_connected_components_follow_chains():
+    labels = connected_components(5, np.array([0, 1, 3]), np.array([1, 2, 4]))
+    assert labels[0] == labels[1] == labels[2]
+    assert labels[3] == labels[4] != labels[0]
+
+
+@pytest.fixture
+def topics(index, put):
+    for i, text in enumerate(INFRA):
+        put(f'infra-{i}', text.format(i), title=f'Kubernetes {i}')
+    for i, text in enumerate(BAKING):
+        put(f'bake-{i}', text.format(i), title=f'Chocolate cake {i}')
+    index.commit()
+    return index
+
+
+def test_clusters_separate_topics_and_are_cached_per_generation(topics, put):
+    engine = ClusterEngine(topics)
+    result = engine.clusters()
+    groups = [set(c['slugs']) for c in result['clusters']]
+    assert {f'infra-{i}' for i in range(6)} in groups
+    assert {f'bake-{i}' for i in range(6)} in groups
+    assert engine.clusters() is result
+
+    for method in ('labelprop', 'components'):
+        assert len(engine.clusters(method=method)['clusters']) == 2
+    with pytest.raises(ValueError):
+        engine.clusters(method='kmeans')
+
+
+def test_new_pages_are_assigned_incrementally(topics, put):
+    engine = ClusterEngine(topics)
+    engine.clusters()
+    put('bake-new', 'chocolate cake recipe with flour baked in the oven')
+    topics.commit()
+
+    result = engine.clusters()
+    assert result['incremental'] is True
+    bake = next(c for c in result['clusters'] if 'bake-0' in c['slugs'])
+    assert 'bake-new' in bake['slugs']
+
+    of = engine.clusters_of(['bake-new', 'missing'])
+    assert len(of) == 1 and of[0]['matches'] == ['bake-new']
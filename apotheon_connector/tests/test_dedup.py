@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from apotheon_connector.app.storage.dedup import NearDuplicateIndex, hamming, simhash
+
+_rng = random.Random(0)
+FOOTER = ' '.join(_rng.choices([f'boiler{i}' for i in range(300)], k=120))
+FOOTER_WORD = FOOTER.split()[0]
+
+
+def _words(seed: int, n: int = 150) -> str:
+    rng = random.Random(seed)
+    return ' '.join(rng.choices([f'w{i}' for i in range(2000)], k=n))
+
+
+def _slugs(hits):
+    return [h['slug'] for h in hits]
+
+
+def test_simhash_distance_tracks_edits():
+    text = _words(1)
+    edited = text.replace(text.split()[70], 'changed', 1)
+    assert hamming(simhash(text), simhash(text)) == 0
+    assert hamming(simhash(text), simhash(edited)) <= 6
+    assert hamming(simhash(text), simhash(_words(2))) > 12
+    assert simhash('') is None
+
+
+def test_near_duplicate_index_clusters_and_forgets():
+    near = NearDuplicateIndex(max_distance=6)
+    text = _words(1)
+    near.update('a', simhash(text))
+    near.update('b', simhash(text + ' extra'))
+    near.update('c', simhash(_words(2)))
+    assert near.clusters() == [{'size': 2, 'maxDistance': hamming(near.sigs['a'], near.sigs['b']), 'slugs': ['a', 'b']}]
+    assert near.nearest(simhash(text)) == 'a'
+    near.remove('b')
+    assert near.clusters() == []
+
+
+def test_exact_duplicate_chunks_are_embedded_once(index, put, embedder):
+    put('a', 'unique intro for a', FOOTER)
+    before = embedder.texts
+    put('b', 'unique intro for b', FOOTER)
+    index.commit()
+
+    assert embedder.texts - before == 1
+    assert index.chunk_registry.stats()['aliasedPages'] == 1
+    assert _slugs(index.search(FOOTER_WORD, mode='lexical')) == ['a']
+
+
+def test_near_duplicate_chunks_keep_their_own_words_searchable(index, put, embedder):
+    put('a', 'unique intro for a', FOOTER + ' release2024')
+    before = embedder.texts
+    put('b', 'unique intro for b', FOOTER + ' release2025')
+    index.commit()
+
+    assert embedder.texts - before == 1  # only b's intro; the footer borrowed a's vector
+    assert _slugs(index.search('release2025', mode='lexical')) == ['b']
+    assert _slugs(index.search('release2024', mode='lexical')) == ['a']
+    stored = index.vectors.get(['a#1', 'b#1'])
+    assert list(stored['b#1'][0]) == pytest.approx(list(stored['a#1'][0]), abs=1e-6)
+    assert stored['b#1'][1].endswith('release2025')
+
+
+def test_several_chunks_of_one_page_may_borrow_the_same_vector(index, put, embedder):
+    put('a', FOOTER + ' edition0')
+    before = embedder.texts
+    put('b', FOOTER + ' edition1', FOOTER + ' edition2')
+    index.commit()
+    assert embedder.texts == before
+    assert _slugs(index.search('edition2', mode='lexical')) == ['b']
+
+
+def test_removing_the_canonical_promotes_the_next_owner(index, put, reopen, embedder):
+    put('a', 'unique intro for a', FOOTER)
+    put('b', 'unique intro for b', FOOTER)
+    index.commit()
+
+    again = reopen()
+    again.remove_page('a')
+    again.commit()
+    assert _slugs(again.search(FOOTER_WORD, mode='lexical')) == ['b']
+    assert again.chunk_registry.stats()['aliasedPages'] == 0
+
+    # Chunk signatures survive the reload, so a later near duplicate still borrows.
+    before = embedder.texts
+    put('c', FOOTER + ' release2026', into=again)
+    again.commit()
+    assert embedder.texts == before
+    assert _slugs(again.search('release2026', mode='lexical')) == ['c']
+
+
+def test_near_duplicate_pages_are_reported(index, put):
+    body = _words(3, 300)
+    put('a', body)
+    put('b', body + ' trailing')
+    put('c', _words(4, 300))
+    index.commit()
+    clusters = index.duplicate_report()['clusters']
+    assert [c['slugs'] for c in clusters] == [['a', 'b']]
+
+
+def test_nearest_ignores_candidates_just_past_the_limit():
+    near = NearDuplicateIndex(max_distance=1)
+    near.update('a', 0b0)
+    # Shares a band with 'a' but is 2 bits away: must be no match, not a comparison with None.
+    assert near.nearest(0b11) is None
+    assert near.nearest(0b1) == 'a'
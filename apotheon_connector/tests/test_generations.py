@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from apotheon_connector.app.storage.index import SiteIndex
+
+
+def _hits(index, term):
+    return [h['slug'] for h in index.search(term, mode='lexical')]
+
+
+def _published(index):
+    return [g['generation'] for g in index.generations()['generations']]
+
+
+@pytest.fixture
+def index(tmp_path, embedder):
+    return SiteIndex(tmp_path / 'data', str(tmp_path / 'chroma'), 'test', embedder=embedder, keep=2)
+
+
+def test_writes_are_invisible_until_commit_flips_the_generation(index, put):
+    start = index.generation
+    put('a', 'alpha topicone')
+    assert _hits(index, 'topicone') == [] and len(index.pages) == 0
+    assert index.commit() == start + 1
+    assert _hits(index, 'topicone') == ['a']
+    assert index.commit() == start + 1  # nothing staged: no new generation
+
+
+def test_old_generations_are_collected_beyond_the_retention_window(index, put):
+    for i in range(4):
+        put(f'p{i}', f'page {i}')
+        index.commit()
+    assert _published(index) == [index.generation, index.generation - 1]
+    assert sorted(int(d.name) for d in index.root.iterdir()) == sorted(_published(index))
+
+
+def test_a_pinned_generation_outlives_retention_until_released(index, put):
+    put('a', 'alpha version one')
+    index.commit()
+    with index.pinned() as gen:
+        for i in range(3):
+            put('a', f'alpha version {i + 2}')
+            index.commit()
+        assert gen.dir.exists()
+        assert gen.lexical.search('one', limit=1)[0][0] == 'a#0'
+    assert not gen.dir.exists()
+
+
+def test_restore_switches_back_and_journals_the_difference(index, put, api):
+    put('a', 'alpha topicone')
+    first = index.commit()
+    put('a', 'alpha topictwo')
+    put('b', 'beta')
+    index.commit()
+
+    assert index.restore(first) == first
+    assert _hits(index, 'topicone') == ['a'] and _hits(index, 'topictwo') == []
+    assert [(e['type'], e['slug']) for e in index.journal.read(after_seq=3)['events']] == [('modified', 'a'), ('removed', 'b')]
+    with pytest.raises(KeyError):
+        index.restore(999)
+
+    admin = {'Authorization': 'Bearer admin-token'}
+    assert api.post('/generations/999/restore', headers=admin).status_code == 404
+    assert api.post(f'/generations/{first + 1}/restore', headers=admin).json()['current'] == first + 1
+    assert api.post(f'/generations/{first}/restore', headers={'Authorization': 'Bearer read-token'}).status_code in (401, 403)
+
+
+def test_a_checkpointed_build_is_reopened_and_others_dropped(index, put, reopen):
+    put('a', 'alpha')
+    index.commit()
+    put('b', 'beta')
+    index.checkpoint()
+
+    again = reopen()
+    assert again.generation == index.generation
+    assert again.staged_pages.get('b') is not None and again.pages.get('b') is None
+    again.commit()
+    assert _hits(again, 'beta') == ['b']
+
+    put('c', 'gamma', into=again)  # never checkpointed
+    third = reopen()
+    assert third.staged_pages.get('c') is None
+    assert sorted(int(d.name) for d in third.root.iterdir()) == _published(third)[::-1]
+
+
+def test_search_is_not_blocked_by_a_writer(index, put):
+    put('a', 'alpha topicone')
+    index.commit()
+    with index._lock:  # a reindex holds the writer lock for its whole upsert batch
+        result = []
+        reader = threading.Thread(target=lambda: result.append(_hits(index, 'topicone')))
+        reader.start()
+        reader.join(timeout=5)
+        assert result == [['a']]
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import pytest
+
+from apotheon_connector.app.storage import journal as journal_module
+from apotheon_connector.app.storage.journal import ChangeJournal
+
+
+@pytest.fixture(autouse=True)
+def small_sparse_index(monkeypatch):
+    monkeypatch.setattr(journal_module, 'INDEX_EVERY', 4)
+
+
+def _fill(j: ChangeJournal, batches: int, per_batch: int) -> None:
+    for b in range(batches):
+        for i in range(per_batch):
+            j.stage('modified', f'p{b}-{i}', 'h')
+        j.append_pending(b + 1)
+
+
+def _walk(j: ChangeJournal, limit: int):
+    seqs, cursor = [], '0'
+    while True:
+        page = j.read(after_seq=int(cursor), limit=limit)
+        seqs += [e['seq'] for e in page['events']]
+        cursor = page['nextCursor']
+        if not page['hasMore']:
+            return seqs, cursor
+
+
+def test_cursor_pages_return_every_event_once(tmp_path):
+    j = ChangeJournal(tmp_path)
+    _fill(j, batches=7, per_batch=5)
+    seqs, cursor = _walk(j, limit=3)
+    assert seqs == list(range(1, 36))
+    assert cursor == '35'
+    assert j.read(after_seq=35)['events'] == []
+    assert j.read(after_seq=35)['nextCursor'] == '35'
+
+
+def test_since_timestamp_skips_older_batches(tmp_path, monkeypatch):
+    clock = iter([100.0, 200.0, 300.0])
+    monkeypatch.setattr(journal_module.time, 'time', lambda: next(clock))
+    j = ChangeJournal(tmp_path)
+    _fill(j, batches=3, per_batch=5)
+    page = j.read(since_ts=200.0, limit=100)
+    assert [e['seq'] for e in page['events']] == list(range(6, 16))
+    assert j.read(since_ts=301.0)['nextCursor'] == '15'
+
+
+def test_staged_changes_coalesce_per_slug(tmp_path):
+    j = ChangeJournal(tmp_path)
+    j.stage('added', 'new', 'h1')
+    j.stage('removed', 'new')
+    j.stage('removed', 'old')
+    j.stage('added', 'old', 'h2')
+    assert j.append_pending(1) == 1
+    assert [(e['type'], e['slug']) for e in j.read()['events']] == [('modified', 'old')]
+    with pytest.raises(ValueError):
+        j.stage('renamed', 'x')
+
+
+def test_reopen_recovers_the_head_and_drops_a_torn_write(tmp_path):
+    j = ChangeJournal(tmp_path)
+    _fill(j, batches=3, per_batch=3)
+    with j.path.open('ab') as f:
+        f.write(b'{"seq": 10, "ts": 1')
+
+    again = ChangeJournal(tmp_path)
+    assert again.last_seq == 9
+    assert _walk(again, limit=4)[0] == list(range(1, 10))
+    again.stage('removed', 'p0-0')
+    again.append_pending(4)
+    assert again.read(after_seq=9)['events'][0]['seq'] == 10
+
+    (tmp_path / 'changes.idx.json').unlink()  # the sparse index is only an accelerator
+    assert _walk(ChangeJournal(tmp_path), limit=4)[0] == list(range(1, 11))
+
+
+def test_commits_journal_page_changes(index, put, api):
+    put('a', 'alpha')
+    put('b', 'beta')
+    index.commit()
+    put('a', 'alpha changed')
+    index.remove_page('b')
+    index.commit()
+
+    events = index.journal.read()['events']
+    assert [(e['type'], e['slug'], e['generation']) for e in events] == [
+        ('added', 'a', 1), ('added', 'b', 1), ('modified', 'a', 2), ('removed', 'b', 2)]
+
+    auth = {'Authorization': 'Bearer read-token'}
+    first = api.get('/changes', params={'limit': 3}, headers=auth).json()
+    assert first['hasMore'] is True
+    rest = api.get('/changes', params={'cursor': first['nextCursor']}, headers=auth).json()
+    assert [e['seq'] for e in first['events'] + rest['events']] == [1, 2, 3, 4]
+    assert api.get('/changes', params={'cursor': 'x'}, headers=auth).status_code == 400
+    assert api.get('/changes', params={'since': 'yesterday'}, headers=auth).status_code == 400
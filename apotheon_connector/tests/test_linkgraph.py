@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import pytest
+
+from apotheon_connector.app.analysis.links import suggest_internal_links
+from apotheon_connector.app.storage.linkgraph import LinkGraph
+
+
+@pytest.fixture
+def graph(tmp_path):
+    g = LinkGraph(tmp_path)
+    g.set_links('index', ['a', 'b'])
+    g.set_links('a', ['b', 'b', 'a', 'missing'])  # duplicates and self links are dropped
+    g.set_links('b', ['index'])
+    g.set_links('lonely', [])
+    g.commit()
+    return g
+
+
+def test_csr_rows_metrics_and_broken_links(graph):
+    assert graph.out_links('a') == ['b', 'missing']
+    assert sorted(graph.in_links('b')) == ['a', 'index']
+    assert graph.broken_links() == {'a': ['missing']}
+    assert graph.broken_targets('a') == ['missing'] and graph.broken_targets('b') == []
+    assert graph.orphans == frozenset({'lonely'})  # 'index' is never an orphan
+    assert graph.dead_ends == frozenset({'lonely'})
+    assert graph.stats('b')['inDegree'] == 2
+    assert sum(float(p) for p in graph.pagerank) == pytest.approx(1.0, abs=1e-4)
+    assert graph.top_pages(1)[0][0] in ('b', 'index')
+    assert graph.unlinked_sources('b', ['lonely', 'a', 'index', 'missing']) == ['lonely']
+
+
+def test_removing_a_page_turns_its_inbound_links_broken(graph):
+    graph.remove('b')
+    graph.commit()
+    assert graph.in_links('index') == []
+    assert sorted(graph.broken_links()['a']) == ['b', 'missing']
+    assert graph.out_links('index') == ['a', 'b']  # the row is kept; only metrics skip the dead edge
+    assert graph.stats('a')['inDegree'] == 1
+    assert not graph.commit()  # nothing changed since
+
+
+def test_graph_survives_a_reload(graph, tmp_path):
+    again = LinkGraph(tmp_path)
+    assert again.out_links('a') == graph.out_links('a')
+    assert sorted(again.in_links('b')) == sorted(graph.in_links('b'))
+    assert again.orphans == graph.orphans
+    assert list(again.pagerank) == pytest.approx(list(graph.pagerank), abs=1e-5)
+
+
+def test_suggestions_skip_pages_that_already_link(index, put):
+    put('guide', 'install the agent on linux hosts', links=['install'])
+    put('install', 'install the agent on linux hosts quickly')
+    put('faq', 'install agent linux hosts questions')
+    index.commit()
+
+    out = suggest_internal_links(index, 'install', limit=5)
+    assert [r['slug'] for r in out['addLinksFrom']] == ['faq']
+    assert {r['slug'] for r in out['addLinksTo']} == {'guide', 'faq'}
+    assert out['inDegree'] == 1
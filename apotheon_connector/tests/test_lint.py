@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from apotheon_connector.app.analysis import lint
+from apotheon_connector.app.analysis.lint import LintEngine, evaluate_pages
+
+
+def _rules(issues, slug):
+    return sorted(i['rule'] for i in issues if i['slug'] == slug)
+
+
+def test_page_rules():
+    pages = [
+        ('ok', 'Title', 'Description', [[1, 'Top'], [2, 'Sub']], 300),
+        ('bad', '', '', [[2, 'Sub'], [4, 'Deep']], 10),
+    ]
+    ok, bad = evaluate_pages(pages, thin_word_threshold=250)
+    assert ok == []
+    assert sorted(i['rule'] for i in bad) == ['heading_skip', 'missing_h1', 'missing_meta_description', 'missing_title', 'thin_content']
+
+
+def test_lint_reuses_cached_results_until_content_changes(index, put):
+    put('a', 'alpha text', title='Same title', links=['b'])
+    put('b', 'beta text', title='Same title', links=['gone'])
+    index.commit()
+    engine = LintEngine(index, workers=1)
+
+    first = engine.lint()
+    assert (first['evaluated'], first['cached']) == (2, 0)
+    assert 'duplicate_title' in _rules(first['issues'], 'a')
+    assert 'broken_internal_link' in _rules(first['issues'], 'b')
+    assert 'orphan_page' in _rules(first['issues'], 'a')
+
+    second = engine.lint()
+    assert (second['evaluated'], second['cached']) == (0, 2)
+    assert second['issues'] == first['issues']
+
+    put('b', 'beta text rewritten', title='Other title')
+    index.commit()
+    third = engine.lint()
+    assert (third['evaluated'], third['cached']) == (1, 1)
+    assert 'duplicate_title' not in _rules(third['issues'], 'a')
+
+    assert engine.lint(thin_word_threshold=1)['evaluated'] == 2  # params are part of the cache key
+
+
+def test_parallel_evaluation_matches_serial(index, put, monkeypatch):
+    for i in range(12):
+        put(f'p{i}', 'word ' * (i * 30), title=f'Page {i % 4}')
+    index.commit()
+    serial = LintEngine(index, workers=1).lint()['issues']
+
+    monkeypatch.setattr(lint, 'PARALLEL_MIN_PAGES', 2)
+    monkeypatch.setattr(lint, 'BATCH_SIZE', 5)
+    engine = LintEngine(index, workers=2)
+    try:
+        assert engine.lint()['issues'] == serial
+        assert engine._pool is not None
+    finally:
+        engine.close()
+
+
+def test_scoped_lint_matches_the_full_lint_for_those_pages(index, put):
+    put('a', 'alpha', title='Shared', links=['b', 'gone'])
+    put('b', 'beta', title='Shared')
+    put('c', 'gamma', title='Other')
+    index.commit()
+    engine = LintEngine(index, workers=1)
+
+    def scoped(slugs):
+        return engine.lint(scope_slugs=slugs)['issues']
+
+    def full(slugs):
+        return [i for i in engine.lint()['issues'] if i['slug'] in slugs]
+
+    assert scoped(['a', 'c']) == full({'a', 'c'})
+
+    # Duplicate groups follow the journal, so a later change is reflected by slug.
+    put('c', 'gamma', title='Shared')
+    index.remove_page('b')
+    index.commit()
+    assert scoped(['a', 'c']) == full({'a', 'c'})
+    assert 'duplicate_title' in _rules(scoped(['c']), 'c')
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from apotheon_connector.app.core.metrics import MetricsMiddleware, Registry, _Metric
+
+
+def test_exposition_format():
+    reg = Registry()
+    hits = reg.counter('t_hits_total', 'Hits.', ('route',))
+    hits.labels('/a').inc()
+    hits.labels('/a').inc(2)
+    reg.gauge('t_depth', 'Depth.').set(1.5)
+    hist = reg.histogram('t_seconds', 'Latency.', buckets=(0.1, 1.0))
+    for v in (0.05, 0.5, 5.0):
+        hist.observe(v)
+
+    text = reg.render()
+    assert '# TYPE t_hits_total counter' in text
+    assert 't_hits_total{route="/a"} 3' in text
+    assert 't_depth 1.5' in text
+    assert 't_seconds_bucket{le="0.1"} 1' in text
+    assert 't_seconds_bucket{le="1"} 2' in text
+    assert 't_seconds_bucket{le="+Inf"} 3' in text
+    assert 't_seconds_count 3' in text
+    assert reg.counter('t_hits_total', 'Again.', ('route',)) is hits
+
+
+def test_metric_base_is_abstract():
+    with pytest.raises(TypeError):
+        _Metric('x', 'y')
+
+
+def test_middleware_labels_by_route_template_and_bounds_methods():
+    reg = Registry()
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware, registry=reg)
+
+    @app.get('/page/{slug}')
+    def page(slug: str):
+        return {'slug': slug}
+
+    client = TestClient(app)
+    client.get('/page/a')
+    client.get('/page/b')
+    client.get('/nowhere')
+    client.request('PROPFIND', '/page/a')
+    client.request('X-RANDOM-1234', '/page/a')
+
+    text = reg.render()
+    assert 'connector_http_requests_total{method="GET",route="/page/{slug}",status="200"} 2' in text
+    assert 'connector_http_requests_total{method="GET",route="unmatched",status="404"} 1' in text
+    assert 'connector_http_requests_total{method="other",route="/page/{slug}",status="405"} 2' in text
+    assert 'PROPFIND' not in text and 'X-RANDOM' not in text
+
+
+def test_metrics_endpoint(api, index):
+    index.search('warm the caches')
+    r = api.get('/metrics', headers={'Authorization': 'Bearer read-token'})
+    assert r.status_code == 200
+    assert 'connector_cache_hits_total{cache="search_results"}' in r.text
+    assert 'connector_index_generation' in r.text
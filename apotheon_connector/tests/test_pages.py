@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import gzip
+import json
+
+from apotheon_connector.app.storage.pages import GZIP_MIN_BYTES, PageBlobs, PageStore, make_blob
+
+AUTH = {'Authorization': 'Bearer read-token'}
+
+
+def test_blobs_are_gzipped_only_when_large_enough():
+    small = make_blob({'a': 1})
+    assert small.body_gz is None and small.etag.startswith('"')
+    big = make_blob({'text': 'x' * GZIP_MIN_BYTES})
+    assert gzip.decompress(big.body_gz) == big.body
+    assert make_blob({'text': 'x' * GZIP_MIN_BYTES}).etag == big.etag
+
+
+def test_store_persists_rows_and_sitemap(tmp_path, make_page):
+    store = PageStore(tmp_path / 'pages.db')
+    store.put(make_page('a', 'alpha'))
+    store.put(make_page('b', 'beta'))
+    store.save()
+    store.delete('b')
+    store.save()
+
+    again = PageStore(tmp_path / 'pages.db')
+    assert list(again.slugs()) == ['a']
+    assert again.get('a').text == 'alpha'
+    assert json.loads(again.blob('a').body)['sections'][0]['text'] == 'alpha'
+    assert again.blob('b') is None
+    assert [p['slug'] for p in json.loads(again.sitemap().body)['pages']] == ['a']
+
+    readonly = PageBlobs(tmp_path / 'pages.db')
+    try:
+        assert readonly.blob('a') == again.blob('a')
+        assert readonly.sitemap() == again.sitemap()
+    finally:
+        readonly.close()
+
+
+def test_page_etag_revalidation(api, index, put):
+    put('a', 'alpha')
+    index.commit()
+
+    r = api.get('/page/a', headers=AUTH)
+    assert r.status_code == 200 and r.json()['slug'] == 'a'
+    etag = r.headers['etag']
+    assert api.get('/page/a.html', headers=AUTH).headers['etag'] == etag
+
+    for inm in (etag, f'W/{etag}', f'"other", {etag}', '*'):
+        cached = api.get('/page/a', headers={**AUTH, 'If-None-Match': inm})
+        assert cached.status_code == 304 and cached.content == b''
+
+    put('a', 'alpha changed')
+    index.commit()
+    fresh = api.get('/page/a', headers={**AUTH, 'If-None-Match': etag})
+    assert fresh.status_code == 200 and fresh.headers['etag'] != etag
+    assert api.get('/page/missing', headers=AUTH).status_code == 404
+
+
+def test_large_pages_and_sitemap_are_served_gzipped(api, index, put):
+    put('long', 'word ' * 2000)
+    put('short', 'tiny')
+    index.commit()
+
+    r = api.get('/page/long', headers={**AUTH, 'Accept-Encoding': 'gzip'})
+    assert r.headers['content-encoding'] == 'gzip'
+    assert r.json()['wordCount'] == 2000
+    assert 'content-encoding' not in api.get('/page/long', headers={**AUTH, 'Accept-Encoding': 'identity'}).headers
+
+    sitemap = api.get('/sitemap', headers=AUTH)
+    assert [p['slug'] for p in sitemap.json()['pages']] == ['long', 'short']
+    assert api.get('/sitemap', headers={**AUTH, 'If-None-Match': sitemap.headers['etag']}).status_code == 304
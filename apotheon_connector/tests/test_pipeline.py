@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import time
+from pathlib import Path
+
+import pytest
+import requests
+
+from apotheon_connector.app.core.jobs import Job, JobCancelled
+from apotheon_connector.app.indexing import pipeline
+from apotheon_connector.app.indexing.crawler import SourceReport, crawl, iter_build_dir
+from apotheon_connector.app.indexing.pipeline import ReindexRun
+
+BASE = 'http://site.test'
+
+
+def _html(title: str, body: str, links=()) -> str:
+    anchors = ''.join(f'<a href="/{href}">{href}</a>' for href in links)
+    return f'<html><head><title>{title}</title></head><body><h1>{title}</h1><p>{body}</p>{anchors}</body></html>'
+
+
+def _slugs(index):
+    return sorted(index.pages.slugs())
+
+
+@pytest.fixture
+def build_dir(tmp_path, monkeypatch):
+    root = tmp_path / 'build'
+    root.mkdir()
+    for name in ('a', 'b', 'c'):
+        (root / f'{name}.html').write_text(_html(name.upper(), f'page {name} talks about topic{name}'), encoding='utf-8')
+    monkeypatch.setattr(pipeline, 'CONNECTOR_BUILD_DIR', str(root))
+    return root
+
+
+def _run(index, **kw):
+    return ReindexRun(index, mode=kw.pop('mode', 'build'), extract_workers=1, **kw).run()
+
+
+def test_build_reindex_indexes_updates_and_prunes(index, build_dir):
+    stats = _run(index)
+    assert (stats['pages'], stats['updated']) == (3, 3)
+    assert _slugs(index) == ['a', 'b', 'c']
+    assert index.search('topicb', mode='lexical')[0]['slug'] == 'b'
+
+    assert _run(index)['unchanged'] == 3
+
+    (build_dir / 'b.html').write_text(_html('B', 'page b now covers topicz'), encoding='utf-8')
+    (build_dir / 'c.html').unlink()
+    stats = _run(index)
+    assert (stats['updated'], stats['unchanged'], stats['removed']) == (1, 1, 1)
+    assert _slugs(index) == ['a', 'b']
+    assert index.search('topicz', mode='lexical')[0]['slug'] == 'b'
+    assert not index.search('topicc', mode='lexical')
+    assert set(stats['timings']) >= set(pipeline.STAGES)
+
+
+def _partial_source(pages, failed=(), gone=(), truncated=False):
+    def iter_source(mode, report: SourceReport):
+        report.failed.update({f'{BASE}/{s}': 'ConnectionError' for s in failed})
+        report.gone.extend(f'{BASE}/{s}' for s in gone)
+        report.truncated = truncated
+        return iter([(f'{BASE}/{s}', _html(s, f'page {s}')) for s in pages])
+    return iter_source
+
+
+@pytest.mark.parametrize('report', [{'failed': ['hub']}, {'truncated': True}])
+def test_an_incomplete_source_does_not_prune_unseen_pages(index, build_dir, monkeypatch, report):
+    _run(index)
+    monkeypatch.setattr(pipeline, 'iter_source', _partial_source(['a'], **report))
+    stats = _run(index, mode='crawl')
+    assert stats['removed'] == 0
+    assert _slugs(index) == ['a', 'b', 'c']
+    assert stats['fetchFailed'] == len(report.get('failed', ())) and stats['sourceTruncated'] == report.get('truncated', False)
+
+
+def test_an_incomplete_source_still_prunes_pages_that_are_gone(index, build_dir, monkeypatch):
+    _run(index)
+    monkeypatch.setattr(pipeline, 'iter_source', _partial_source(['a'], failed=['hub'], gone=['c']))
+    assert _run(index, mode='crawl')['removed'] == 1
+    assert _slugs(index) == ['a', 'b']
+
+
+def test_a_cancelled_run_resumes_from_its_checkpoint(index, tmp_path, monkeypatch):
+    job = Job('j', 'reindex')
+    names = [f'p{i}' for i in range(6)]
+
+    def slow_source(mode, report):
+        for i, name in enumerate(names):
+            if i == 3:
+                deadline = time.monotonic() + 10
+                while len(index.staged_pages) < 3 and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                job.cancel_event.set()
+            yield f'{BASE}/{name}', _html(name, f'page {name}')
+
+    monkeypatch.setattr(pipeline, 'iter_source', slow_source)
+    with pytest.raises(JobCancelled):
+        ReindexRun(index, mode='crawl', job=job, extract_workers=1).run()
+    assert (index.data_dir / 'reindex_checkpoint.json').exists()
+    assert len(index.pages) == 0  # nothing was published
+
+    monkeypatch.setattr(pipeline, 'iter_source', _partial_source(names))
+    stats = _run(index, mode='crawl')
+    assert stats['resumed'] == 3 and stats['updated'] == 3
+    assert _slugs(index) == names
+    assert not (index.data_dir / 'reindex_checkpoint.json').exists()
+
+
+class _Response:
+    def __init__(self, url, status=200, text='', content_type='text/html'):
+        self.url, self.status_code, self.text = url, status, text
+        self.headers = {'content-type': content_type}
+
+
+class _Session:
+    """requests.Session stand-in serving a fixed site."""
+
+    def __init__(self, site):
+        self.site = site
+
+    def get(self, url, timeout=None):
+        answer = self.site.get(url, 404)
+        if isinstance(answer, Exception):
+            raise answer
+        if isinstance(answer, int):
+            return _Response(url, answer)
+        return _Response(url, 200, answer)
+
+
+def test_crawl_reports_failures_gone_pages_and_the_page_cap():
+    site = {
+        f'{BASE}/': _html('Home', 'home', links=['ok', 'broken', 'missing', 'down', 'logo.png']),
+        f'{BASE}/ok': _html('Ok', 'ok'),
+        f'{BASE}/broken': 500,
+        f'{BASE}/down': requests.ConnectionError('refused'),
+    }
+    report = SourceReport()
+    urls = sorted(url for url, _ in crawl(f'{BASE}/', session=_Session(site), workers=2, report=report))
+    assert urls == [f'{BASE}/', f'{BASE}/ok']
+    assert report.failed == {f'{BASE}/broken': 'HTTP 500', f'{BASE}/down': 'ConnectionError'}
+    assert report.gone == [f'{BASE}/missing']
+    assert not report.truncated and not report.complete
+
+    capped = SourceReport()
+    assert len(list(crawl(f'{BASE}/', max_pages=1, session=_Session(site), workers=1, report=capped))) == 1
+    assert capped.truncated and not capped.failed
+
+
+def test_build_dir_source_reports_the_page_cap(tmp_path: Path):
+    for name in ('a', 'b', 'index'):
+        (tmp_path / f'{name}.html').write_text(_html(name, name), encoding='utf-8')
+    (tmp_path / 'notes.txt').write_text('skipped', encoding='utf-8')
+    report = SourceReport()
+    assert [u for u, _ in iter_build_dir(str(tmp_path), BASE, report=report)] == [f'{BASE}/a.html', f'{BASE}/b.html', f'{BASE}/index.html']
+    assert report.complete
+    capped = SourceReport()
+    assert len(list(iter_build_dir(str(tmp_path), BASE, max_pages=2, report=capped))) == 2
+    assert capped.truncated
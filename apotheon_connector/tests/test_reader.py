@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from apotheon_connector.app.storage.reader import SiteReader
+
+
+@pytest.fixture
+def site(index, put):
+    put('pricing', ('Plans', 'Pricing plans for small teams and enterprises'), links=['contact'])
+    put('contact', 'Contact the sales team by email')
+    put('blog-launch', 'We launched a new analytics dashboard', title='Launch')
+    index.commit()
+    return index
+
+
+@pytest.fixture
+def reader(tmp_path, embedder):
+    return SiteReader(tmp_path / 'data', embedder=embedder)
+
+
+def _files(root):
+    return {p: (p.stat().st_mtime_ns, p.stat().st_size) for p in root.rglob('*') if p.is_file()}
+
+
+def _same_hits(a, b):
+    # Chroma and the chunk vector snapshot may round vector scores differently in the last place.
+    assert [{**h, 'score': None} for h in a] == [{**h, 'score': None} for h in b]
+    assert [h['score'] for h in a] == pytest.approx([h['score'] for h in b], abs=1e-5)
+
+
+@pytest.mark.parametrize('mode', ['lexical', 'vector', 'hybrid'])
+def test_search_matches_the_connector(site, reader, mode):
+    for query in ('pricing plans', 'sales email', 'analytics dashboard'):
+        _same_hits(reader.search(query, mode=mode, limit=3), site.search(query, mode=mode, limit=3))
+    filters = {'slug': 'blog-launch'}
+    hits = reader.search('launched analytics', mode=mode, filters=filters)
+    assert [h['slug'] for h in hits] == ['blog-launch']
+    _same_hits(hits, site.search('launched analytics', mode=mode, filters=filters))
+    with pytest.raises(ValueError):
+        reader.search('x', mode='fuzzy')
+
+
+def test_page_and_sitemap_match_the_api(site, reader, api):
+    headers = {'Authorization': 'Bearer read-token'}
+    assert reader.page('pricing') == api.get('/page/pricing', headers=headers).json()
+    assert reader.sitemap() == api.get('/sitemap', headers=headers).json()
+    assert reader.page('missing') is None
+
+
+def test_reads_never_touch_the_data_dir(site, reader, tmp_path):
+    before = _files(tmp_path / 'data')
+    reader.search('pricing', mode='hybrid')
+    reader.page('contact')
+    reader.sitemap()
+    assert _files(tmp_path / 'data') == before
+
+
+def test_a_new_generation_is_picked_up_and_results_are_cached_per_generation(site, reader, put, embedder):
+    assert reader.generation == site.generation
+    assert [h['slug'] for h in reader.search('newsletter', mode='lexical')] == []
+    embedded = embedder.texts
+    reader.search('pricing plans')
+    reader.search('pricing plans')
+    assert embedder.texts == embedded + 1  # one query embedding, then cached results
+
+    put('newsletter', 'Subscribe to the monthly newsletter')
+    site.commit()
+    assert reader.generation == site.generation
+    assert [h['slug'] for h in reader.search('newsletter', mode='lexical')] == ['newsletter']
+    embedded = embedder.texts
+    reader.search('pricing plans')
+    assert embedder.texts == embedded  # new generation, new results, but the query vector is reused
+    assert reader.cache_stats()['generation'] == site.generation
+
+
+def test_a_pinned_generation_stays_open_across_a_switch(site, reader, put):
+    with reader.pinned() as view:
+        put('contact', 'Reach support by phone')
+        site.commit()
+        assert reader.generation == site.generation and view.number == site.generation - 1
+        assert view.pages.blob('contact') is not None
+        assert view.lexical.search('email', limit=1)[0][0].startswith('contact')
+    assert reader.page('contact')['sections'][0]['text'] == 'Reach support by phone'
+
+
+def test_restore_is_followed(site, reader, put):
+    first = site.generation
+    put('pricing', 'Pricing changed')
+    site.commit()
+    assert 'changed' in reader.page('pricing')['sections'][0]['text']
+    site.restore(first)
+    assert reader.generation == first
+    assert reader.page('pricing')['sections'][0]['heading'] == 'Plans'
+
+
+def test_mcp_server_serves_through_the_reader(site, reader, monkeypatch):
+    server = pytest.importorskip('mcp_website_connector.server')
+    monkeypatch.setattr(server, 'reader', reader)
+    assert server.get_page('/contact/')['slug'] == 'contact'
+    assert server.get_sitemap() == reader.sitemap()
+    with pytest.raises(ValueError, match='Unknown page'):
+        server.get_page('nope')
+
+
+def test_a_missing_index_is_reported(tmp_path, embedder):
+    os.makedirs(tmp_path / 'empty' / 'generations')
+    with pytest.raises(RuntimeError, match='No published index generation'):
+        SiteReader(tmp_path / 'empty', embedder=embedder).sitemap()
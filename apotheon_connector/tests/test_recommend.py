@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from apotheon_connector.app.analysis import recommend
+from apotheon_connector.app.analysis.recommend import Recommender, parse_line
+
+LINES = [
+    'Here are my recommendations:',
+    json.dumps({'type': 'new_page', 'title': 'Kubernetes FAQ', 'slug': 'k8s-faq', 'goal': 1, 'rationale': 'gap'}),
+    json.dumps({'type': 'improve_page', 'title': 'Cake', 'slug': 'cake', 'goal': 2, 'rationale': 'thin'}),
+]
+
+
+class ScriptedLLM:
+    """OllamaGenerator stand-in: streams canned output in fragments that split lines."""
+
+    model = 'scripted'
+
+    def __init__(self, lines=LINES):
+        self.text = '\n'.join(lines)
+        self.prompts = []
+
+    def stream(self, prompt, options=None):
+        self.prompts.append(prompt)
+        for i in range(0, len(self.text), 7):
+            yield self.text[i:i + 7]
+
+
+@pytest.fixture
+def site(index, put):
+    put('k8s', 'kubernetes cluster deployment with pods and nodes', title='Kubernetes')
+    put('k8s-scaling', 'scaling kubernetes pods across nodes', title='Scaling')
+    put('cake', 'chocolate cake recipe baked in the oven', title='Cake')
+    index.commit()
+    return index
+
+
+def test_parse_line_accepts_only_known_recommendation_objects():
+    assert parse_line(LINES[1] + ',')['source'] == 'llm'
+    assert parse_line(LINES[0]) is None
+    assert parse_line('{"type": "essay"}') is None
+    assert parse_line('{not json') is None
+
+
+def test_goals_are_embedded_in_one_batch_and_pages_shared(site, embedder):
+    r = Recommender(site, llm=ScriptedLLM())
+    before = embedder.texts
+    out = r.retrieve(['kubernetes pods', 'kubernetes nodes scaling'], per_goal=2)
+    assert embedder.texts - before == 2
+    assert {p for g in out['goals'] for p in g['pages']} == {'k8s', 'k8s-scaling'}
+    assert all(e['goals'] == [1, 2] for e in out['context'])
+    assert r.retrieve(['kubernetes pods', 'kubernetes nodes scaling'], per_goal=2) is out
+
+
+def test_stream_yields_context_first_and_parses_split_lines(site):
+    llm = ScriptedLLM()
+    r = Recommender(site, llm=llm)
+    events = list(r.stream(['kubernetes pods', 'chocolate cake']))
+    assert events[0][0] == 'context'
+    assert events[-1][0] == 'done'
+    llm_recs = [d for e, d in events if e == 'recommendation' and d['source'] == 'llm']
+    assert [d['slug'] for d in llm_recs] == ['k8s-faq', 'cake']
+    assert events[-1][1]['count'] == len(events) - 2
+    assert 'k8s: Kubernetes' in llm.prompts[0]
+
+
+def test_answers_are_cached_per_generation(site, put):
+    llm = ScriptedLLM()
+    r = Recommender(site, llm=llm)
+    first = r.recommend(['kubernetes pods'])
+    second = r.recommend(['kubernetes pods'])
+    assert len(llm.prompts) == 1
+    assert second['done']['cached'] is True
+    assert second['recommendations'] == first['recommendations']
+
+    put('k8s-faq', 'kubernetes questions about pods', title='FAQ')
+    site.commit()
+    r.recommend(['kubernetes pods'])
+    assert len(llm.prompts) == 2
+
+
+def test_recommend_endpoint_streams_server_sent_events(api, site, monkeypatch):
+    monkeypatch.setattr(recommend, '_recommender', Recommender(site, llm=ScriptedLLM()))
+    r = api.post('/recommend', json={'goals': 'kubernetes pods', 'stream': True}, headers={'Authorization': 'Bearer read-token'})
+    assert r.status_code == 200
+    assert r.headers['content-type'].startswith('text/event-stream')
+    events = [block.split('\n')[0] for block in r.text.strip().split('\n\n')]
+    assert events[0] == 'event: context' and events[-1] == 'event: done'
+    assert 'event: recommendation' in events
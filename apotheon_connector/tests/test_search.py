@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import pytest
+
+from apotheon_connector.app.storage.index import RRF_K, rrf_fuse
+from apotheon_connector.app.storage.lexical import BM25Index
+
+
+def test_rrf_prefers_documents_ranked_by_both_retrievers():
+    fused = rrf_fuse([['a', 'b', 'c'], ['c', 'd', 'a']])
+    assert [key for key, _ in fused][:2] == ['a', 'c']
+    assert dict(fused)['a'] == pytest.approx(1 / (RRF_K + 1) + 1 / (RRF_K + 3))
+    assert dict(fused)['d'] == pytest.approx(1 / (RRF_K + 2))
+
+
+def test_filtered_lexical_search_reaches_past_the_unfiltered_top_k():
+    lex = BM25Index()
+    for i in range(200):
+        lex.add(f'blog-{i}#0', 'widget widget widget pricing', {'slug': f'blog-{i}', 'section': 'blog'})
+    lex.add('docs-1#0', 'widget setup guide with many other words in a much longer chunk of text', {'slug': 'docs-1', 'section': 'docs'})
+
+    hits = lex.search('widget', limit=3, accept=lambda m: m['section'] == 'docs')
+    assert [cid for cid, _, _ in hits] == ['docs-1#0']
+    assert len(lex.search('widget', limit=5)) == 5
+
+
+def test_hybrid_search_finds_exact_terms_and_returns_one_hit_per_page(index, put):
+    put('pricing', 'Plans and pricing for teams. ' * 30, 'Enterprise pricing is quoted per seat. ' * 30)
+    put('install', 'Install the agent with the xq7-installer package on every host.')
+    put('about', 'Our company builds observability tooling for small teams.')
+    index.commit()
+
+    hits = index.search('xq7-installer', mode='lexical')
+    assert hits[0]['slug'] == 'install'
+
+    hybrid = index.search('pricing teams', mode='hybrid', limit=8)
+    slugs = [h['slug'] for h in hybrid]
+    assert slugs[0] == 'pricing'
+    assert len(slugs) == len(set(slugs))
+
+    assert index.search('pricing', mode='vector')[0]['slug'] == 'pricing'
+
+
+def test_search_filters_apply_to_both_retrievers(index, put):
+    put('a', 'Shared words about deployment pipelines for alpha.')
+    put('b', 'Shared words about deployment pipelines for beta.')
+    index.commit()
+
+    for mode in ('lexical', 'vector', 'hybrid'):
+        assert {h['slug'] for h in index.search('deployment pipelines', mode=mode, filters={'slug': 'b'})} == {'b'}
+
+
+def test_search_rejects_unknown_modes(index):
+    with pytest.raises(ValueError):
+        index.search('anything', mode='fuzzy')
+
+
+def test_search_endpoint(api, put, index):
+    put('install', 'Install the agent with the xq7-installer package on every host.')
+    index.commit()
+
+    r = api.post('/search', json={'query': 'xq7-installer', 'mode': 'lexical'}, headers={'Authorization': 'Bearer read-token'})
+    assert r.status_code == 200
+    assert r.json()['results'][0]['slug'] == 'install'
+    assert api.post('/search', json={'query': 'x'}).status_code in (401, 403)
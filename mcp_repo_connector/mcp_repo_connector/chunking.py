@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import ast
+import re
+from typing import List, NamedTuple, Optional, Tuple
+
+WINDOW_LINES = 60
+WINDOW_OVERLAP = 10
+MAX_SPAN_LINES = 150
+MAX_EMBED_CHARS = 6000
+
+# Lines that start a definition in common non-Python languages (JS/TS, Go, Rust, Java-likes).
+_DEF_RE = re.compile(
+    r"^\s{0,4}(?:export\s+(?:default\s+)?)?(?:pub(?:\([\w:]+\))?\s+)?(?:async\s+)?(?:"
+    r"function\*?\s+(?P<fn>\w+)"
+    r"|class\s+(?P<cls>\w+)"
+    r"|(?:const|let|var)\s+(?P<var>\w+)\s*(?::[^=]+)?=\s*(?:async\s*)?(?:\([^)]*\)\s*(?::[^=]+)?=>|function\b|\w+\s*=>)"
+    r"|func\s+(?:\([^)]*\)\s*)?(?P<go>\w+)"
+    r"|fn\s+(?P<rs>\w+)"
+    r"|(?:interface|struct|enum|trait|impl|type)\s+(?P<ty>\w+)"
+    r"|(?:(?:public|private|protected|static|final|abstract|override)\s+)+[\w<>\[\],\s]*?\s(?P<meth>\w+)\s*\("
+    r")"
+)
+_HEADING_RE = re.compile(r"^#{1,6}\s+(.+?)\s*#*\s*$")
+
+
+class Chunk(NamedTuple):
+    start_line: int  # 1-based, inclusive
+    end_line: int
+    symbol: str
+    text: str
+
+
+Span = Tuple[int, int, str]  # (start line, end line, symbol), 1-based inclusive
+
+
+def _python_spans(text: str) -> Optional[List[Span]]:
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return None
+    spans: List[Span] = []
+
+    def visit(body, prefix: str) -> None:
+        for node in body:
+            if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                continue
+            start = min([node.lineno, *(d.lineno for d in node.decorator_list)])
+            name = prefix + node.name
+            if isinstance(node, ast.ClassDef) and node.end_lineno - start + 1 > MAX_SPAN_LINES:
+                # Big class: its header on its own, then each method as "Class.method".
+                inner = [n for n in node.body if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))]
+                first = min([inner[0].lineno, *(d.lineno for d in inner[0].decorator_list)]) if inner else node.end_lineno + 1
+                spans.append((start, first - 1, name))
+                visit(node.body, name + ".")
+            else:
+                spans.append((start, node.end_lineno, name))
+
+    visit(tree.body, "")
+    return spans
+
+
+def _pattern_spans(lines: List[str], markdown: bool) -> List[Span]:
+    """Definitions (or markdown headings) run until the next one starts."""
+    starts: List[Tuple[int, str]] = []
+    for i, line in enumerate(lines, start=1):
+        m = (_HEADING_RE if markdown else _DEF_RE).match(line)
+        if m:
+            starts.append((i, m.group(1) if markdown else next(g for g in m.groups() if g)))
+    spans: List[Span] = []
+    for k, (start, name) in enumerate(starts):
+        end = starts[k + 1][0] - 1 if k + 1 < len(starts) else len(lines)
+        while end > start and not lines[end - 1].strip():
+            end -= 1
+        spans.append((start, end, name))
+    return spans
+
+
+def _windows(start: int, end: int, symbol: str) -> List[Span]:
+    step = WINDOW_LINES - WINDOW_OVERLAP
+    out: List[Span] = []
+    s = start
+    while True:
+        e = min(end, s + WINDOW_LINES - 1)
+        out.append((s, e, symbol))
+        if e >= end:
+            return out
+        s += step
+
+
+def chunk_text(rel: str, text: str) -> List[Chunk]:
+    """Definition-aligned chunks of a source file; line windows where no structure is found.
+
+    Code between definitions (imports, module constants) and definitions longer than
+    MAX_SPAN_LINES are covered by overlapping WINDOW_LINES-line windows.
+    """
+    lines = text.splitlines()
+    if not lines:
+        return []
+    spans: Optional[List[Span]] = None
+    if rel.endswith(".py"):
+        spans = _python_spans(text)
+    if spans is None:
+        spans = _pattern_spans(lines, markdown=rel.endswith((".md", ".mdx")))
+
+    pieces: List[Span] = []
+    pos = 1
+    for start, end, symbol in sorted(spans):
+        if start < pos:  # nested in a span already taken
+            continue
+        if start > pos:
+            pieces.extend(_windows(pos, start - 1, ""))
+        pieces.extend(_windows(start, end, symbol) if end - start + 1 > MAX_SPAN_LINES else [(start, end, symbol)])
+        pos = end + 1
+    if pos <= len(lines):
+        pieces.extend(_windows(pos, len(lines), ""))
+
+    chunks: List[Chunk] = []
+    for start, end, symbol in pieces:
+        body = "\n".join(lines[start - 1:end])
+        if body.strip():
+            chunks.append(Chunk(start, end, symbol, body))
+    return chunks
+
+
+def embed_input(rel: str, chunk: Chunk) -> str:
+    """What gets embedded for a chunk: its path and symbol give the model context."""
+    head = f"{rel}: {chunk.symbol}" if chunk.symbol else rel
+    return f"{head}\n{chunk.text}"[:MAX_EMBED_CHARS]
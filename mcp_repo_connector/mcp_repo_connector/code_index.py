@@ -0,0 +1,379 @@
+from __future__ import annotations
+
+import atexit
+import hashlib
+import os
+import pickle
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from .chunking import Chunk, chunk_text, embed_input
+from .git_tools import _run_git
+from .security import resolve_within
+from .telemetry import phase
+from .text_index import SKIP_DIRS
+from .watch import TreeWatcher, watcher_for
+
+CODE_EXTENSIONS = {
+    ".py", ".js", ".jsx", ".ts", ".tsx", ".mjs", ".cjs", ".vue", ".svelte",
+    ".go", ".rs", ".java", ".kt", ".scala", ".swift", ".rb", ".php",
+    ".c", ".h", ".cc", ".cpp", ".hpp", ".cs", ".sh", ".sql",
+    ".css", ".scss", ".html", ".md", ".mdx", ".yml", ".yaml", ".toml",
+}
+MAX_FILE_BYTES = 1024 * 1024
+EMBED_BATCH_CHUNKS = 64
+RESCAN_SECONDS = 60.0
+WATCH_READY_SECONDS = 1.0
+RETRY_SECONDS = 30.0
+SAVE_INTERVAL_SECONDS = 30.0
+FORMAT_VERSION = 1
+
+
+def _slug(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "-", name).strip("-") or "model"
+
+
+class CodeIndex:
+    """Embedded code chunks for one root: a float32 matrix on disk plus pickled metadata.
+
+    `vectors.f32` is append-only. A changed file's old rows are marked dead and its
+    new chunks are appended; dead rows are compacted away when they outnumber live ones.
+    Queries read the matrix through np.memmap, so only the pages a query touches are
+    loaded. A daemon thread keeps the index current: it re-embeds files whose sha256
+    changed, learns about edits from the shared watcher (or rescans every
+    RESCAN_SECONDS without one), and retries after RETRY_SECONDS if embedding fails.
+    """
+
+    def __init__(self, root: Path, path: Path, embedder):
+        self.root = root
+        self.path = path
+        self.embedder = embedder
+        self.lock = threading.RLock()
+        self.files: Dict[str, Tuple[int, int, str, List[int]]] = {}  # rel -> (mtime_ns, size, sha256, rows)
+        self.rows: List[Optional[Tuple[str, int, int, str]]] = []  # (rel, start line, end line, symbol); None = dead
+        self.alive = np.zeros(0, dtype=bool)
+        self.dim = 0
+        self.dead = 0
+        self.pending = 0
+        self.scanned = False
+        self.error: Optional[str] = None
+        self.dirty_paths: Set[str] = set()
+        self.changed = False
+        self.last_save = 0.0
+        self.watcher: Optional[TreeWatcher] = None
+        self.scan_watched = False
+        self._matrix: Optional[np.memmap] = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._load()
+        self._thread = threading.Thread(target=self._run, name=f"code-index:{root}", daemon=True)
+        self._thread.start()
+
+    @property
+    def vectors_path(self) -> Path:
+        return self.path / "vectors.f32"
+
+    @property
+    def meta_path(self) -> Path:
+        return self.path / "meta.pkl"
+
+    # ---- persistence ----
+
+    def _load(self) -> None:
+        try:
+            with self.meta_path.open("rb") as f:
+                state = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ValueError):
+            state = None
+        if not state or state.get("version") != FORMAT_VERSION or state.get("root") != str(self.root):
+            state = {"files": {}, "rows": [], "dim": 0}
+        self.files, self.rows, self.dim = state["files"], state["rows"], state["dim"]
+        self.alive = np.array([r is not None for r in self.rows], dtype=bool)
+        self.dead = len(self.rows) - int(self.alive.sum())
+        self.path.mkdir(parents=True, exist_ok=True)
+        # Rows appended after the last metadata save are unknown: drop them.
+        with open(self.vectors_path, "ab") as f:
+            f.truncate(len(self.rows) * self.dim * 4)
+
+    def save(self) -> None:
+        with self.lock:
+            if not self.changed:
+                return
+            tmp = self.meta_path.with_name(f".{self.meta_path.name}.tmp")
+            with tmp.open("wb") as f:
+                pickle.dump({"version": FORMAT_VERSION, "root": str(self.root), "files": self.files,
+                             "rows": self.rows, "dim": self.dim}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self.meta_path)
+            self.changed = False
+            self.last_save = time.monotonic()
+
+    # ---- indexing ----
+
+    def _list(self) -> List[str]:
+        try:
+            out = _run_git(self.root, ["ls-files", "-z", "--cached", "--others", "--exclude-standard"])
+            rels = [p for p in out.split("\0") if p]
+        except (RuntimeError, OSError):
+            rels = []
+            base = len(str(self.root).rstrip(os.sep)) + 1
+            for dirpath, dirnames, filenames in os.walk(self.root):
+                dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS and not d.startswith(".")]
+                rels.extend(os.path.join(dirpath, fn)[base:] for fn in filenames)
+        return sorted(r for r in rels if os.path.splitext(r)[1].lower() in CODE_EXTENSIONS)
+
+    def _stale(self, rel: str) -> Optional[os.stat_result]:
+        """The file's stat if it needs (re)indexing, else None; drops files that are gone.
+
+        Symlinks leading outside the root count as gone: their targets are never read.
+        """
+        fp = resolve_within(self.root, rel)
+        try:
+            st = os.stat(fp) if fp is not None else None
+        except OSError:
+            st = None
+        if st is None or st.st_size > MAX_FILE_BYTES:
+            with self.lock:
+                self._drop(rel)
+            return None
+        known = self.files.get(rel)
+        if known is not None and known[0] == st.st_mtime_ns and known[1] == st.st_size:
+            return None
+        return st
+
+    def _drop(self, rel: str) -> None:
+        known = self.files.pop(rel, None)
+        if known is None:
+            return
+        for r in known[3]:
+            self.rows[r] = None
+            self.alive[r] = False
+        self.dead += len(known[3])
+        self.changed = True
+
+    def _prepare(self, rel: str, st: os.stat_result) -> Optional[Tuple[str, os.stat_result, str, List[Chunk]]]:
+        fp = resolve_within(self.root, rel)  # again: the link may have changed since _stale
+        if fp is None:
+            return None
+        try:
+            with open(fp, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        digest = hashlib.sha256(data).hexdigest()
+        known = self.files.get(rel)
+        if known is not None and known[2] == digest:
+            with self.lock:  # touched but unchanged: keep its vectors
+                self.files[rel] = (st.st_mtime_ns, st.st_size, digest, known[3])
+                self.changed = True
+            return None
+        if b"\0" in data[:8192]:
+            return rel, st, digest, []
+        return rel, st, digest, chunk_text(rel, data.decode("utf-8", errors="replace"))
+
+    def _commit(self, batch: List[Tuple[str, os.stat_result, str, List[Chunk]]]) -> None:
+        """Embed a batch of files' chunks and swap them in; nothing changes if embedding fails."""
+        texts = [embed_input(rel, c) for rel, _, _, chunks in batch for c in chunks]
+        vectors = self.embedder.embed(texts) if texts else np.zeros((0, self.dim), dtype=np.float32)
+        with self.lock:
+            if texts:
+                if not self.dim:
+                    self.dim = vectors.shape[1]
+                elif vectors.shape[1] != self.dim:
+                    raise RuntimeError(f"Embedding size changed from {self.dim} to {vectors.shape[1]}")
+                with open(self.vectors_path, "ab") as f:
+                    f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+            for rel, st, digest, chunks in batch:
+                self._drop(rel)
+                first = len(self.rows)
+                self.rows.extend((rel, c.start_line, c.end_line, c.symbol) for c in chunks)
+                self.files[rel] = (st.st_mtime_ns, st.st_size, digest, list(range(first, len(self.rows))))
+            self.alive = np.concatenate([self.alive, np.ones(len(self.rows) - len(self.alive), dtype=bool)])
+            self.changed = True
+            if self.dead > max(1000, len(self.rows) - self.dead):
+                self._compact()
+
+    def _compact(self) -> None:
+        keep = np.flatnonzero(self.alive)
+        remap = {int(old): new for new, old in enumerate(keep)}
+        tmp = self.vectors_path.with_name(".vectors.f32.tmp")
+        if self.dim and len(self.rows):
+            m = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(len(self.rows), self.dim))
+            with open(tmp, "wb") as f:
+                for i in range(0, len(keep), 4096):
+                    f.write(np.ascontiguousarray(m[keep[i:i + 4096]]).tobytes())
+            del m
+        else:
+            tmp.write_bytes(b"")
+        os.replace(tmp, self.vectors_path)  # open memmaps keep reading the old inode
+        self.rows = [self.rows[int(i)] for i in keep]
+        self.files = {rel: (a, b, d, [remap[r] for r in rows]) for rel, (a, b, d, rows) in self.files.items()}
+        self.alive = np.ones(len(self.rows), dtype=bool)
+        self.dead = 0
+        self._matrix = None
+        self.changed = True
+        self.save()
+
+    def _index(self, rels: List[str]) -> None:
+        todo = [(rel, st) for rel in rels for st in [self._stale(rel)] if st is not None]
+        self.pending = len(todo)
+        batch: List[Tuple[str, os.stat_result, str, List[Chunk]]] = []
+        size = 0
+        for rel, st in todo:
+            if self._stop.is_set():
+                return
+            item = self._prepare(rel, st)
+            self.pending -= 1
+            if item is None:
+                continue
+            batch.append(item)
+            size += len(item[3])
+            if size >= EMBED_BATCH_CHUNKS:
+                self._commit(batch)
+                batch, size = [], 0
+                if time.monotonic() - self.last_save >= SAVE_INTERVAL_SECONDS:
+                    self.save()
+        if batch:
+            self._commit(batch)
+        self.save()
+
+    def _on_changes(self, paths: Set[str]) -> None:
+        base = str(self.root).rstrip(os.sep) + os.sep
+        rels = set()
+        for p in paths:
+            if p.startswith(base):
+                rel = p[len(base):]
+                if not any(part in SKIP_DIRS for part in rel.split(os.sep)) and os.path.splitext(rel)[1].lower() in CODE_EXTENSIONS:
+                    rels.add(rel)
+        if rels:
+            with self.lock:
+                self.dirty_paths |= rels
+            self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                if self.watcher is None:
+                    self.watcher = watcher_for(self.root)
+                    if self.watcher is not None:
+                        self.watcher.subscribe(self._on_changes)
+                        self.watcher.wait_ready(WATCH_READY_SECONDS)
+                watching = self.watcher is not None and self.watcher.alive
+                # Events only keep a scan current if the watcher was armed before it began.
+                if not self.scanned or not watching or not self.scan_watched:
+                    self.scan_watched = watching
+                    listed = self._list()
+                    self._index(listed)
+                    # Files deleted while the server was down are only noticed by a full scan.
+                    keep = set(listed)
+                    with self.lock:
+                        for rel in [r for r in self.files if r not in keep]:
+                            self._drop(rel)
+                    self.scanned = True
+                else:
+                    with self.lock:
+                        dirty, self.dirty_paths = sorted(self.dirty_paths), set()
+                    self._index(dirty)
+                self.error = None
+                self._wake.wait(timeout=RESCAN_SECONDS)
+                self._wake.clear()
+            except Exception as e:  # embedder down or misconfigured: keep serving what is indexed
+                self.error = f"{type(e).__name__}: {e}"
+                self._stop.wait(RETRY_SECONDS)
+
+    # ---- queries ----
+
+    def _matrix_for(self, n: int) -> Optional[np.memmap]:
+        if not n or not self.dim:
+            return None
+        if self._matrix is None or self._matrix.shape[0] != n:
+            self._matrix = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(n, self.dim))
+        return self._matrix
+
+    def search(self, query: str, k: int, under: str = "", name_ok=None) -> List[Tuple[float, Tuple[str, int, int, str]]]:
+        """The k best (score, row) pairs by cosine similarity, restricted to files under `under`."""
+        with phase("embed"):
+            q = self.embedder.embed([query])[0]
+        with phase("rank"):
+            return self._rank(q, k, under, name_ok)
+
+    def _rank(self, q: np.ndarray, k: int, under: str, name_ok) -> List[Tuple[float, Tuple[str, int, int, str]]]:
+        with self.lock:
+            n = len(self.rows)
+            matrix = self._matrix_for(n)
+            rows = self.rows
+            alive = self.alive[:n].copy()
+        if matrix is None:
+            return []
+        if q.shape[0] != matrix.shape[1]:
+            raise RuntimeError(f"Query embedding has {q.shape[0]} dimensions, index has {matrix.shape[1]}")
+        scores = matrix @ q
+        prefix = under.rstrip("/") + "/" if under else ""
+        if prefix or name_ok is not None:
+            for i in np.flatnonzero(alive):
+                row = rows[i]
+                if row is None or (prefix and not row[0].startswith(prefix)) or (name_ok is not None and not name_ok(row[0].rsplit("/", 1)[-1])):
+                    alive[i] = False
+        scores[~alive] = -np.inf
+        live = int(alive.sum())
+        if not live:
+            return []
+        k = min(k, live)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        # A row can die between the snapshot and here if its file was just re-indexed.
+        return [(float(scores[i]), rows[i]) for i in top if rows[i] is not None]
+
+    def status(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "model": self.embedder.name,
+                "files": len(self.files),
+                "chunks": len(self.rows) - self.dead,
+                "pendingFiles": self.pending + len(self.dirty_paths),
+                "complete": self.scanned and not self.pending and not self.dirty_paths and self.error is None,
+                "error": self.error,
+            }
+
+    def wait_idle(self, timeout: float) -> bool:
+        """Block up to `timeout` seconds for the index to catch up; True if it did."""
+        end = time.monotonic() + timeout
+        while time.monotonic() < end:
+            if self.status()["complete"]:
+                return True
+            time.sleep(0.05)
+        return False
+
+    def close(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout=5.0)
+        self.save()
+
+
+_indexes: Dict[Tuple[str, str], CodeIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def code_index_for(root: Path, index_dir: Path, embedder) -> CodeIndex:
+    """The root's index for this embedder, created (and its indexer started) on first use."""
+    key = (str(root), embedder.name)
+    with _indexes_lock:
+        idx = _indexes.get(key)
+        if idx is None:
+            name = hashlib.sha1(key[0].encode("utf-8")).hexdigest()[:16] + "." + _slug(embedder.name)
+            idx = _indexes[key] = CodeIndex(root, index_dir / "code" / name, embedder)
+    return idx
+
+
+@atexit.register
+def _close_all() -> None:
+    for idx in list(_indexes.values()):
+        try:
+            idx.close()
+        except Exception:
+            pass
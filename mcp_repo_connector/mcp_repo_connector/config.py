@@ -17,6 +17,22 @@ class Settings:
     max_read_bytes: int
     max_diff_bytes: int
     max_search_results: int
+    index_dir: Path
+
+    # Tool execution: default slots/deadline per tool, and "name=value,..." overrides
+    tool_concurrency: int
+    tool_timeout: float
+    tool_limits: str
+    tool_timeouts: str
+
+    # Telemetry: calls slower than this are logged with a phase breakdown; /metrics in streamable-http mode
+    slow_call_ms: float
+    metrics: bool
+
+    # Code embeddings for semantic_search_code ("ollama", or "hash" for the model-free test embedder)
+    embedder: str
+    embed_model: str
+    ollama_base_url: str
 
     # Website connector
     connector_api_base: str
@@ -35,6 +51,16 @@ class Settings:
             max_read_bytes=int(os.environ.get("MCP_MAX_READ_BYTES", "200000")),
             max_diff_bytes=int(os.environ.get("MCP_MAX_DIFF_BYTES", "300000")),
             max_search_results=int(os.environ.get("MCP_MAX_SEARCH_RESULTS", "50")),
+            index_dir=Path(os.environ.get("MCP_INDEX_DIR", "~/.cache/mcp-repo-connector")).expanduser(),
+            tool_concurrency=int(os.environ.get("MCP_TOOL_CONCURRENCY", "4")),
+            tool_timeout=float(os.environ.get("MCP_TOOL_TIMEOUT", "60")),
+            tool_limits=os.environ.get("MCP_TOOL_LIMITS", ""),
+            tool_timeouts=os.environ.get("MCP_TOOL_TIMEOUTS", ""),
+            slow_call_ms=float(os.environ.get("MCP_SLOW_CALL_MS", "1000")),
+            metrics=os.environ.get("MCP_METRICS", "0").strip().lower() in {"1", "true", "yes", "on"},
+            embedder=os.environ.get("MCP_EMBEDDER", "ollama").strip().lower(),
+            embed_model=os.environ.get("MCP_EMBED_MODEL", "nomic-embed-text"),
+            ollama_base_url=os.environ.get("OLLAMA_BASE_URL", "http://127.0.0.1:11434").rstrip("/"),
             connector_api_base=os.environ.get("CONNECTOR_API_BASE", "http://127.0.0.1:8090").rstrip("/"),
             connector_bearer_token=os.environ.get("CONNECTOR_TOKEN"),
         )
@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+import base64
+import json
+from typing import Any
+
+
+def encode_cursor(state: Any) -> str:
+    """Opaque paging token: URL-safe base64 of compact JSON."""
+    raw = json.dumps(state, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Any:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        return json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import hashlib
+import re
+from typing import List, Sequence
+
+import numpy as np
+import requests
+
+from .config import Settings
+from .tool_runner import time_left
+
+EMBED_BATCH_SIZE = 32
+
+_WORD = re.compile(r"[A-Za-z][a-z]*|[A-Z]+(?![a-z])|\d+")
+
+
+def _normalize(m: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(m, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return m / norms
+
+
+class OllamaEmbedder:
+    """Batched client for Ollama's /api/embed endpoint; rows come back unit-length."""
+
+    def __init__(self, base_url: str, model: str, batch_size: int = EMBED_BATCH_SIZE):
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.name = model
+        self.batch_size = max(1, batch_size)
+        self._session = requests.Session()
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        out: List[List[float]] = []
+        for i in range(0, len(texts), self.batch_size):
+            batch = list(texts[i:i + self.batch_size])
+            r = self._session.post(f"{self.base_url}/api/embed", json={"model": self.model, "input": batch}, timeout=time_left(120))
+            r.raise_for_status()
+            vectors = r.json().get("embeddings") or []
+            if len(vectors) != len(batch):
+                raise RuntimeError(f"Ollama returned {len(vectors)} embeddings for {len(batch)} inputs")
+            out.extend(vectors)
+        return _normalize(np.asarray(out, dtype=np.float32).reshape(len(out), -1))
+
+
+class HashEmbedder:
+    """Feature-hashed bag of identifier parts: no model, deterministic, for tests and offline use.
+
+    camelCase and snake_case names are split into words, so "parse config" lands near
+    `parseConfig` and `parse_config`.
+    """
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+        self.name = f"hash-{dim}"
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        m = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in _WORD.findall(text):
+                h = int.from_bytes(hashlib.blake2b(word.lower().encode("utf-8"), digest_size=8).digest(), "little")
+                m[row, h % self.dim] += 1.0 if (h >> 63) else -1.0
+        return _normalize(m)
+
+
+def embedder_for(settings: Settings):
+    if settings.embedder == "hash":
+        return HashEmbedder()
+    return OllamaEmbedder(settings.ollama_base_url, settings.embed_model)
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+import re
+import threading
+from array import array
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Hashable, Iterator, Optional, Tuple
+
+# Start offset of every LINE_STRIDE-th line is kept; a lookup scans at most LINE_STRIDE-1 newlines.
+LINE_STRIDE = 256
+CACHE_FILES = 256
+BINARY_SNIFF_BYTES = 8192
+_NEWLINE = re.compile(b"\n")
+
+
+class _LRU:
+    def __init__(self, cap: int):
+        self.cap = cap
+        self.items: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        with self.lock:
+            if key in self.items:
+                self.items.move_to_end(key)
+                return self.items[key]
+        value = compute()
+        with self.lock:
+            self.items[key] = value
+            while len(self.items) > self.cap:
+                self.items.popitem(last=False)
+        return value
+
+
+class LineIndex:
+    """Sparse line → byte offset table for one version of a file."""
+
+    def __init__(self, checkpoints: array, lines: int):
+        self.checkpoints = checkpoints
+        self.lines = lines
+
+    @classmethod
+    def build(cls, data) -> "LineIndex":
+        checkpoints = array("Q", [0])
+        n = 0
+        for n, m in enumerate(_NEWLINE.finditer(data), start=1):
+            if n % LINE_STRIDE == 0:
+                checkpoints.append(m.end())
+        lines = n + (1 if len(data) and data[-1:] != b"\n" else 0)
+        return cls(checkpoints, lines)
+
+    def offset(self, data, line: int) -> int:
+        """Byte offset where 1-based `line` starts (len(data) past the end)."""
+        if line > self.lines:
+            return len(data)
+        k, rest = divmod(max(line, 1) - 1, LINE_STRIDE)
+        pos = self.checkpoints[k]
+        for _ in range(rest):
+            pos = data.find(b"\n", pos) + 1
+        return pos
+
+
+_line_indexes = _LRU(CACHE_FILES)
+_hashes = _LRU(CACHE_FILES * 4)
+
+
+def _version(path: Path, st: os.stat_result) -> Tuple[str, int, int, int]:
+    return (str(path), st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+@contextmanager
+def mapped(path: Path) -> Iterator[Tuple[Any, os.stat_result]]:
+    """Read-only mmap of a file (b"" when empty) and the stat it was opened with."""
+    with path.open("rb") as f:
+        st = os.fstat(f.fileno())
+        if st.st_size == 0:
+            yield b"", st
+            return
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield mm, st
+        finally:
+            mm.close()
+
+
+def line_index(path: Path, st: os.stat_result, data) -> LineIndex:
+    return _line_indexes.get_or_compute(_version(path, st), lambda: LineIndex.build(data))
+
+
+def content_hash(path: Path, st: os.stat_result, data) -> str:
+    return _hashes.get_or_compute(_version(path, st), lambda: "sha256:" + hashlib.sha256(data).hexdigest())
+
+
+def is_binary(data) -> bool:
+    return data.find(b"\0", 0, BINARY_SNIFF_BYTES) != -1
+
+
+def line_span(path: Path, st: os.stat_result, data, start_line: Optional[int], end_line: Optional[int]) -> Tuple[int, int, int]:
+    """(start byte, end byte, total lines) for 1-based inclusive lines; open ends mean file start/end."""
+    idx = line_index(path, st, data)
+    start = idx.offset(data, start_line) if start_line else 0
+    end = idx.offset(data, end_line + 1) if end_line else len(data)
+    return start, max(start, end), idx.lines
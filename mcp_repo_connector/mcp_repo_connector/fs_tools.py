@@ -1,86 +1,395 @@
 from __future__ import annotations
 
 import fnmatch
+import heapq
 import os
-from pathlib import Path
-from typing import List, Optional
+import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
+from .code_index import code_index_for
 from .config import Settings
-from .security import resolve_and_check, ensure_is_dir, ensure_is_file
+from .cursors import decode_cursor, encode_cursor
+from .embeddings import embedder_for
+from .file_ranges import content_hash, is_binary, line_span, mapped
+from .git_tools import _run_git
+from .security import PathDenied, resolve_and_check, resolve_within, ensure_is_dir, ensure_is_file, root_of
+from .telemetry import count, phase
+from .text_index import SKIP_DIRS, fold, index_for, required_literals
+from .tool_runner import checkpoint, time_left
 
 
-def list_dir(settings: Settings, path: str, max_entries: int = 200) -> List[dict]:
+READ_WORKERS = 8
+
+
+def _entry_key(entry: os.DirEntry) -> Tuple[bool, str, str]:
+    # Directories first, then case-insensitive name; the raw name breaks ties so keys are unique.
+    try:
+        is_file = entry.is_file()
+    except OSError:
+        is_file = False
+    return (is_file, entry.name.lower(), entry.name)
+
+
+def list_dir(settings: Settings, path: str, max_entries: int = 200, cursor: Optional[str] = None) -> Dict[str, Any]:
+    """One page of a directory listing, directories first, by name.
+
+    Entries come from os.scandir (type from the cached d_type) and only the page is
+    selected with a heap, so a huge directory costs one pass and `max_entries` stats.
+    Pass `nextCursor` back as `cursor` for the following page.
+    """
     rp = resolve_and_check(path, settings.allowed_roots)
     ensure_is_dir(rp)
 
+    after = None
+    if cursor:
+        state = decode_cursor(cursor)
+        if not isinstance(state, list) or len(state) != 3:
+            raise ValueError("Invalid cursor")
+        after = (bool(state[0]), str(state[1]), str(state[2]))
+
+    total = 0
+    with os.scandir(rp) as it:
+        keyed = []
+        for entry in it:
+            total += 1
+            key = _entry_key(entry)
+            if after is None or key > after:
+                keyed.append((key, entry))
+    remaining = len(keyed)
+    page = heapq.nsmallest(max_entries, keyed, key=lambda ke: ke[0])
+
     out: List[dict] = []
-    for i, entry in enumerate(sorted(rp.iterdir(), key=lambda p: (p.is_file(), p.name.lower()))):
-        if i >= max_entries:
-            break
+    for key, entry in page:
         try:
+            is_dir = entry.is_dir()
             st = entry.stat()
             out.append({
                 "name": entry.name,
-                "path": str(entry),
-                "type": "dir" if entry.is_dir() else "file",
-                "size": st.st_size if entry.is_file() else None,
+                "path": entry.path,
+                "type": "dir" if is_dir else "file",
+                "size": st.st_size if key[0] else None,
                 "mtime": int(st.st_mtime),
             })
-        except Exception:
-            out.append({"name": entry.name, "path": str(entry), "type": "unknown"})
-    return out
+        except OSError:
+            out.append({"name": entry.name, "path": entry.path, "type": "unknown"})
+
+    more = remaining > len(page)
+    return {
+        "path": str(rp),
+        "total": total,
+        "entries": out,
+        "nextCursor": encode_cursor(list(page[-1][0])) if more and page else None,
+    }
+
+
+def _tree_files(rp) -> Tuple[str, List[str]]:
+    """Relative paths of the files under rp and where they came from.
+
+    Inside a git work tree this is `git ls-files --cached --others --exclude-standard`,
+    which applies every .gitignore, .git/info/exclude and core.excludesFile rule.
+    Elsewhere it is a walk that skips the usual build/dependency directories.
+    """
+    try:
+        out = _run_git(rp, ["ls-files", "-z", "--cached", "--others", "--exclude-standard"])
+        return "git", sorted({p for p in out.split("\0") if p})
+    except (RuntimeError, OSError, ValueError):
+        pass
+    found: List[str] = []
+    base = str(rp).rstrip("/") + "/"
+    stack = [str(rp)]
+    while stack:
+        checkpoint()
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in SKIP_DIRS:
+                        stack.append(entry.path)
+                else:
+                    found.append(entry.path[len(base):])
+    return "walk", sorted(found)
+
+
+def repo_tree(settings: Settings, path: str, max_depth: int = 3, max_entries: int = 1000, include_files: bool = True) -> Dict[str, Any]:
+    """Directory tree of `path` in one call, ignoring what git ignores.
+
+    Every directory node carries the recursive file count and total size of its
+    subtree, including levels below `max_depth` that are not expanded. Nodes are
+    emitted breadth-first up to `max_entries`, so shallow levels are never crowded
+    out by one deep subtree; a node whose children were cut has `omitted`.
+    """
+    rp = resolve_and_check(path, settings.allowed_roots)
+    ensure_is_dir(rp)
+    source, files = _tree_files(rp)
+
+    def new_dir() -> Dict[str, Any]:
+        return {"dirs": {}, "files": [], "count": 0, "size": 0}
+
+    root = new_dir()
+    base = str(rp).rstrip("/") + "/"
+    for rel in files:
+        try:
+            st = os.lstat(base + rel)
+        except OSError:
+            continue  # tracked but deleted from the work tree
+        parts = rel.split("/")
+        node = root
+        node["count"] += 1
+        node["size"] += st.st_size
+        for part in parts[:-1]:
+            node = node["dirs"].setdefault(part, new_dir())
+            node["count"] += 1
+            node["size"] += st.st_size
+        node["files"].append((parts[-1], st.st_size))
+
+    def describe(node: Dict[str, Any], name: str, rel: str) -> Dict[str, Any]:
+        return {"name": name, "path": base + rel if rel else str(rp), "type": "dir", "files": node["count"], "size": node["size"]}
+
+    out = describe(root, rp.name, "")
+    budget = max_entries
+    truncated = False
+    queue = deque([(root, out, "", 0)])
+    while queue:
+        node, doc, rel, depth = queue.popleft()
+        if depth >= max_depth:
+            continue
+        children: List[Tuple[Dict[str, Any], Optional[Dict[str, Any]], str]] = []
+        for name in sorted(node["dirs"], key=lambda n: (n.lower(), n)):
+            child_rel = f"{rel}/{name}" if rel else name
+            children.append((describe(node["dirs"][name], name, child_rel), node["dirs"][name], child_rel))
+        if include_files:
+            for name, size in sorted(node["files"], key=lambda f: (f[0].lower(), f[0])):
+                child_rel = f"{rel}/{name}" if rel else name
+                children.append(({"name": name, "path": base + child_rel, "type": "file", "size": size}, None, child_rel))
+        shown = children[:budget]
+        budget -= len(shown)
+        doc["children"] = [c[0] for c in shown]
+        if len(shown) < len(children):
+            doc["omitted"] = len(children) - len(shown)
+            truncated = True
+        for child_doc, child_node, child_rel in shown:
+            if child_node is not None:
+                queue.append((child_node, child_doc, child_rel, depth + 1))
+
+    return {"source": source, "maxDepth": max_depth, "tree": out, "truncated": truncated}
+
 
+def _span(rp, st, data, offset, length, start_line, end_line) -> Tuple[int, int, Optional[int]]:
+    """Requested [start, end) byte span and, for line ranges, the file's line count."""
+    if start_line is not None or end_line is not None:
+        if offset is not None or length is not None:
+            raise ValueError("Use either offset/length or start_line/end_line, not both")
+        return line_span(rp, st, data, start_line, end_line)
+    start = min(max(offset or 0, 0), len(data))
+    end = len(data) if length is None else min(len(data), start + max(length, 0))
+    return start, end, None
 
-def read_file(settings: Settings, path: str, max_bytes: Optional[int] = None) -> str:
+
+def read_file(
+    settings: Settings,
+    path: str,
+    max_bytes: Optional[int] = None,
+    offset: Optional[int] = None,
+    length: Optional[int] = None,
+    start_line: Optional[int] = None,
+    end_line: Optional[int] = None,
+) -> str:
+    """A byte range (offset/length) or 1-based inclusive line range of a file, capped at max_bytes.
+
+    The file is memory-mapped, so a range deep in a large file costs only that range;
+    line ranges use a sparse line-offset table cached per (path, inode, mtime, size).
+    """
     rp = resolve_and_check(path, settings.allowed_roots)
     ensure_is_file(rp)
 
     cap = max_bytes if max_bytes is not None else settings.max_read_bytes
-    with rp.open("rb") as f:
-        data = f.read(cap + 1)
-    if len(data) > cap:
-        data = data[:cap]
+    with mapped(rp) as (data, st):
+        start, end, _ = _span(rp, st, data, offset, length, start_line, end_line)
+        chunk = bytes(data[start:min(end, start + cap)])
+    if end - start > cap:
         suffix = b"\n\n[TRUNCATED]\n"
-        return (data + suffix).decode("utf-8", errors="replace")
-    return data.decode("utf-8", errors="replace")
+        return (chunk + suffix).decode("utf-8", errors="replace")
+    return chunk.decode("utf-8", errors="replace")
 
 
-def _iter_files(root: Path, glob: Optional[str]) -> List[Path]:
-    patterns = [glob] if glob else ["*.js", "*.ts", "*.jsx", "*.tsx", "*.css", "*.scss", "*.html", "*.md", "*.json", "*.yml", "*.yaml"]
+def _load_for_batch(settings: Settings, path: str, cap: int, known: Optional[str]) -> Dict[str, Any]:
+    try:
+        rp = resolve_and_check(path, settings.allowed_roots)
+        ensure_is_file(rp)
+        with mapped(rp) as (data, st):
+            doc: Dict[str, Any] = {"path": str(rp), "size": st.st_size, "hash": content_hash(rp, st, data)}
+            if known is not None and known == doc["hash"]:
+                doc["unchanged"] = True
+            elif is_binary(data):
+                doc["binary"] = True
+            else:
+                doc["data"] = bytes(data[:cap])
+        return doc
+    except (PathDenied, OSError, ValueError) as e:
+        return {"path": path, "error": str(e)}
 
-    found: List[Path] = []
-    for dirpath, dirnames, filenames in os.walk(root):
-        dirnames[:] = [d for d in dirnames if d not in {"node_modules", ".git", ".next", "dist", "build"}]
-        for fn in filenames:
-            fp = Path(dirpath) / fn
-            for pat in patterns:
-                if fnmatch.fnmatch(fn, pat):
-                    found.append(fp)
-                    break
-    return found
+
+def read_files(
+    settings: Settings,
+    paths: List[str],
+    max_bytes: Optional[int] = None,
+    max_bytes_per_file: Optional[int] = None,
+    known_hashes: Optional[Dict[str, str]] = None,
+) -> Dict[str, Any]:
+    """Read several files concurrently under one byte budget, in request order.
+
+    Every entry carries the file's sha256 `hash`. When `known_hashes[path]` equals it the
+    entry is `unchanged` and has no content. Binary files (NUL in the first 8 KiB) are
+    reported without content. Content is spent from `max_bytes` in request order; a
+    file cut short has `truncated`, and files after the budget ran out get none.
+    """
+    budget = max_bytes if max_bytes is not None else settings.max_read_bytes
+    per_file = min(budget, max_bytes_per_file) if max_bytes_per_file is not None else budget
+    known = known_hashes or {}
+
+    workers = max(1, min(READ_WORKERS, len(paths)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="read-files") as pool:
+        docs = list(pool.map(lambda p: _load_for_batch(settings, p, per_file, known.get(p)), paths))
+
+    remaining = budget
+    for doc in docs:
+        data = doc.pop("data", None)
+        if data is None:
+            continue
+        take = min(len(data), remaining)
+        remaining -= take
+        doc["content"] = data[:take].decode("utf-8", errors="replace")
+        doc["truncated"] = take < doc["size"]
+    return {"files": docs, "bytesReturned": budget - remaining, "budgetExhausted": remaining <= 0}
+
+
+DEFAULT_PATTERNS = ["*.js", "*.ts", "*.jsx", "*.tsx", "*.css", "*.scss", "*.html", "*.md", "*.json", "*.yml", "*.yaml"]
+
+
+def _line_matcher(query: str, regex: bool, case_sensitive: bool) -> Callable[[str], bool]:
+    if regex:
+        try:
+            rx = re.compile(query, 0 if case_sensitive else re.IGNORECASE)
+        except re.error as e:
+            raise ValueError(f"Invalid regex: {e}") from e
+        return lambda s: rx.search(s) is not None
+    if case_sensitive:
+        return lambda s: query in s
+    q = fold(query)
+    return lambda s: q in fold(s)
 
 
-def search_text(settings: Settings, query: str, path: str, glob: Optional[str] = None, max_results: Optional[int] = None) -> List[dict]:
+def search_text(
+    settings: Settings,
+    query: str,
+    path: str,
+    glob: Optional[str] = None,
+    max_results: Optional[int] = None,
+    regex: bool = False,
+    case_sensitive: bool = False,
+) -> List[dict]:
+    """Matching lines under `path`, in path order.
+
+    Candidates come from the root's trigram index (files that contain every trigram of
+    the query, or of the literal parts of a regex); only those are read, and reading
+    stops once `max_results` lines are found.
+    """
     rp = resolve_and_check(path, settings.allowed_roots)
     ensure_is_dir(rp)
 
     limit = max_results if max_results is not None else settings.max_search_results
     results: List[dict] = []
+    matches = _line_matcher(query, regex, case_sensitive)
+    name_ok = re.compile("|".join(fnmatch.translate(p) for p in ([glob] if glob else DEFAULT_PATTERNS))).match
 
-    files = _iter_files(rp, glob)
-    q = query.lower()
+    root = root_of(rp, settings.allowed_roots)
+    index = index_for(root, settings.index_dir)
+    with phase("indexRefresh"):
+        index.refresh()
+    under = str(rp)[len(str(root)):].strip("/")
 
-    for fp in files:
-        if len(results) >= limit:
-            break
-        try:
-            text = fp.read_text(encoding="utf-8", errors="replace")
-        except Exception:
-            continue
-        for idx, line in enumerate(text.splitlines(), start=1):
-            if q in line.lower():
-                results.append({"file": str(fp), "line": idx, "text": line[:400]})
+    scanned = 0
+    try:
+        with phase("scan"):
+            for rel in index.candidates(required_literals(query, regex), under):
                 if len(results) >= limit:
                     break
+                checkpoint()
+                if not name_ok(rel.rsplit("/", 1)[-1]):
+                    continue
+                fp = index.base + rel
+                try:
+                    with open(fp, "r", encoding="utf-8", errors="replace") as f:
+                        text = f.read()
+                except Exception:
+                    continue
+                scanned += 1
+                if not regex and not matches(text):  # whole-file substring check skips most of the line loop
+                    continue
+                for idx, line in enumerate(text.splitlines(), start=1):
+                    if matches(line):
+                        results.append({"file": fp, "line": idx, "text": line[:400]})
+                        if len(results) >= limit:
+                            break
+    finally:
+        count("filesScanned", scanned)
 
     return results
+
+
+FIRST_QUERY_WAIT_SECONDS = 5.0
+SNIPPET_LINES = 40
+
+
+def semantic_search_code(
+    settings: Settings,
+    query: str,
+    path: str,
+    max_results: int = 10,
+    glob: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Code chunks under `path` ranked by embedding similarity to a natural-language query.
+
+    Chunks are functions/classes where the language allows, line windows otherwise.
+    Each result carries its line span, symbol and a snippet; `stale` marks files edited
+    since they were embedded. `index` reports coverage: while `complete` is false the
+    background indexer is still catching up and results may be missing files.
+    """
+    rp = resolve_and_check(path, settings.allowed_roots)
+    ensure_is_dir(rp)
+    root = root_of(rp, settings.allowed_roots)
+    index = code_index_for(root, settings.index_dir, embedder_for(settings))
+    if not index.scanned:
+        with phase("indexWait"):
+            index.wait_idle(time_left(FIRST_QUERY_WAIT_SECONDS))
+
+    name_ok = re.compile(fnmatch.translate(glob)).match if glob else None
+    under = str(rp)[len(str(root)):].strip("/")
+    results: List[Dict[str, Any]] = []
+    for score, (rel, start, end, symbol) in index.search(query, max(1, max_results), under, name_ok):
+        fp = os.path.join(str(root), rel)
+        real = resolve_within(root, rel)
+        if real is None:
+            continue  # a symlink out of the root, as read_file would refuse it
+        known = index.files.get(rel)
+        try:
+            st = os.stat(real)
+            with open(real, "r", encoding="utf-8", errors="replace") as f:
+                lines = f.read().splitlines()[start - 1:min(end, start + SNIPPET_LINES - 1)]
+        except OSError:
+            continue
+        results.append({
+            "file": fp,
+            "startLine": start,
+            "endLine": end,
+            "symbol": symbol,
+            "score": round(score, 4),
+            "text": "\n".join(line[:400] for line in lines),
+            "stale": known is None or (known[0], known[1]) != (st.st_mtime_ns, st.st_size),
+        })
+    return {"results": results, "index": index.status()}
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import subprocess
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from .watch import watcher_for
+
+CACHE_ENTRIES = 256
+CACHE_BYTES = 32 * 1024 * 1024
+
+
+def _size(value: Any) -> int:
+    return len(value) if isinstance(value, (str, bytes)) else len(repr(value))
+
+
+class ResultCache:
+    """LRU of git results bounded by entry count and approximate bytes."""
+
+    def __init__(self, max_entries: int = CACHE_ENTRIES, max_bytes: int = CACHE_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.items: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        with self.lock:
+            item = self.items.get(key)
+            if item is None:
+                self.misses += 1
+                return False, None
+            self.items.move_to_end(key)
+            self.hits += 1
+            return True, item[0]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        size = _size(value)
+        if size > self.max_bytes // 4:
+            return
+        with self.lock:
+            old = self.items.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self.items[key] = (value, size)
+            self.bytes += size
+            while len(self.items) > self.max_entries or self.bytes > self.max_bytes:
+                _, (_, evicted) = self.items.popitem(last=False)
+                self.bytes -= evicted
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self.items),
+                "bytes": self.bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRatio": self.hits / total if total else 0.0,
+            }
+
+
+class RepoState:
+    """Cheap fingerprints of a repository's git state and working tree.
+
+    `fingerprint()` covers HEAD, every ref (loose ref file stats and packed-refs) and
+    .git/index, read straight from the git directory without starting git. The work
+    tree is tracked by a shared watcher's change counter; without one (or before its
+    watches are armed), results that depend on the work tree are not cached.
+    """
+
+    def __init__(self, git_dir: Path, common_dir: Path, toplevel: Path):
+        self.git_dir = git_dir
+        self.common_dir = common_dir
+        self.toplevel = toplevel
+
+    @classmethod
+    def discover(cls, root: Path) -> Optional["RepoState"]:
+        p = subprocess.run(
+            ["git", "-C", str(root), "rev-parse", "--absolute-git-dir", "--git-common-dir", "--show-toplevel"],
+            capture_output=True, text=True,
+        )
+        lines = p.stdout.splitlines()
+        if p.returncode != 0 or len(lines) != 3:
+            return None  # not a work tree (or a bare repo): nothing is cached
+        common = Path(lines[1])
+        if not common.is_absolute():
+            common = (root / common).resolve()
+        state = cls(Path(lines[0]), common, Path(lines[2]))
+        watcher_for(state.toplevel)  # start arming now; worktree results are cached once it is ready
+        return state
+
+    @staticmethod
+    def _stat(path: Path) -> Tuple[int, int]:
+        try:
+            st = os.stat(path)
+            return st.st_mtime_ns, st.st_size
+        except OSError:
+            return 0, -1
+
+    def fingerprint(self) -> str:
+        parts: List[Any] = []
+        try:
+            parts.append((self.git_dir / "HEAD").read_bytes())
+        except OSError:
+            parts.append(b"")
+        for d in {self.git_dir, self.common_dir}:
+            parts.append(self._stat(d / "packed-refs"))
+            for dirpath, _, filenames in os.walk(d / "refs"):
+                for fn in filenames:
+                    parts.append((dirpath, fn, self._stat(Path(dirpath) / fn)))
+        parts.append(self._stat(self.git_dir / "index"))
+        return hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=16).hexdigest()
+
+    def worktree_version(self) -> Optional[int]:
+        w = watcher_for(self.toplevel)
+        return w.version if w is not None and w.alive else None
+
+
+_repos: Dict[str, Optional[RepoState]] = {}
+_repos_lock = threading.Lock()
+results = ResultCache()
+
+
+def repo_state(root: Path) -> Optional[RepoState]:
+    key = str(root)
+    with _repos_lock:
+        if key in _repos:
+            return _repos[key]
+    state = RepoState.discover(root)
+    with _repos_lock:
+        _repos[key] = state
+    return state
+
+
+def cached(root: Path, key: Hashable, worktree: bool, compute: Callable[[], Any]) -> Any:
+    """compute() memoized on (root, key, git state[, work-tree version]).
+
+    A result is stored only if the git state was the same before and after computing
+    it: a command that rewrites .git/index itself (git status refreshing stat data)
+    is simply cached on the next call, once the state is stable.
+    """
+    state = repo_state(root)
+    if state is None:
+        return compute()
+    version = state.worktree_version() if worktree else 0
+    if version is None:
+        return compute()
+    before = state.fingerprint()
+    full_key = (str(root), key, before, version)
+    hit, value = results.get(full_key)
+    if hit:
+        return value
+    value = compute()
+    if state.fingerprint() == before:
+        results.put(full_key, value)
+    return value
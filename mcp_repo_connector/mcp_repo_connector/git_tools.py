@@ -1,56 +1,674 @@
 from __future__ import annotations
 
+import atexit
+import bisect
+import re
+import secrets
 import subprocess
-from pathlib import Path
-from typing import List, Optional
+import tempfile
+import threading
+import time
+from array import array
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from pathlib import Path, PurePosixPath
+from typing import IO, Any, Dict, Iterator, List, Optional, Sequence, Tuple
 
 from .config import Settings
+from .cursors import decode_cursor, encode_cursor
+from .git_cache import cached, results
 from .security import resolve_and_check, ensure_is_dir
+from .telemetry import phase
+from .tool_runner import checkpoint, on_cancel
 
 
 def _run_git(root: Path, args: List[str]) -> str:
-    p = subprocess.run(["git", "-C", str(root), *args], capture_output=True, text=True)
-    if p.returncode != 0:
-        stderr = (p.stderr or "").strip()
-        stdout = (p.stdout or "").strip()
-        raise RuntimeError(f"git {' '.join(args)} failed: {stderr or stdout}")
-    return p.stdout
+    with _git_process(root, args) as (p, err):
+        out = p.stdout.read()
+        _check_exit(p, err, args)
+    return out.decode("utf-8", errors="replace")
+
+
+@contextmanager
+def _git_process(root: Path, args: List[str]) -> Iterator[Tuple[subprocess.Popen, IO[bytes]]]:
+    """A git child with stdout piped; killed on exit if the caller stopped reading early.
+
+    stderr goes to a temp file so a chatty stderr can never block the stdout reader.
+    The child is also killed if the tool call running it is cancelled or times out.
+    """
+    err = tempfile.TemporaryFile()
+    p = subprocess.Popen(["git", "-C", str(root), *args], stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=err)
+    try:
+        with on_cancel(p.kill), phase("git"):
+            yield p, err
+    finally:
+        if p.poll() is None:
+            p.kill()
+        p.stdout.close()
+        p.wait()
+        err.close()
+
+
+def _check_exit(p: subprocess.Popen, err: IO[bytes], args: List[str], ok: Sequence[int] = (0,)) -> None:
+    if p.wait() not in ok:
+        checkpoint()  # killed by cancellation rather than a git error
+        err.seek(0)
+        raise RuntimeError(f"git {' '.join(args)} failed: {err.read().decode('utf-8', errors='replace').strip()}")
+
+
+def _git_read(root: Path, args: List[str], max_bytes: int) -> Tuple[bytes, bool]:
+    """At most max_bytes of stdout and whether there was more; git is killed as soon as the cap is hit."""
+    with _git_process(root, args) as (p, err):
+        data = p.stdout.read(max_bytes + 1)
+        if len(data) > max_bytes:
+            return data[:max_bytes], True
+        _check_exit(p, err, args)
+        return data, False
+
+
+def _git_lines(root: Path, args: List[str], limit: int, ok: Sequence[int] = (0,)) -> Tuple[List[str], bool]:
+    """The first `limit` stdout lines and whether there were more; git is killed at the limit."""
+    with _git_process(root, args) as (p, err):
+        out: List[str] = []
+        for raw in p.stdout:
+            if len(out) >= limit:
+                return out, True
+            out.append(raw.decode("utf-8", errors="replace").rstrip("\n"))
+        _check_exit(p, err, args, ok)
+        return out, False
+
+
+class CatFile:
+    """A long-lived `git cat-file --batch` for one directory: object reads without a fork each."""
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.lock = threading.Lock()
+        self.proc: Optional[subprocess.Popen] = None
+
+    def _start(self) -> subprocess.Popen:
+        if self.proc is None or self.proc.poll() is not None:
+            self.proc = subprocess.Popen(
+                ["git", "-C", str(self.root), "cat-file", "--batch"],
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            )
+        return self.proc
+
+    def read(self, spec: str, max_bytes: Optional[int] = None) -> Optional[Tuple[str, str, int, bytes]]:
+        """(oid, type, size, data) for an object spec such as `HEAD:./src/app.py`; None if missing.
+
+        Objects bigger than max_bytes are drained from the pipe but only the head is kept.
+        """
+        if "\n" in spec:
+            raise ValueError("Object names cannot contain newlines")
+        with phase("catFile"), self.lock, on_cancel(self._kill):
+            for attempt in (0, 1):
+                checkpoint()
+                p = self._start()
+                try:
+                    p.stdin.write(spec.encode("utf-8") + b"\n")
+                    p.stdin.flush()
+                    header = p.stdout.readline()
+                    if not header:
+                        raise BrokenPipeError("git cat-file exited")
+                    break
+                except (BrokenPipeError, OSError):
+                    self.close()
+                    if attempt:
+                        raise RuntimeError(f"git cat-file failed in {self.root}")
+            fields = header.decode("utf-8", errors="replace").split()
+            if len(fields) != 3:
+                return None  # "<spec> missing" or "<spec> ambiguous"
+            oid, kind, size = fields[0], fields[1], int(fields[2])
+            keep = size if max_bytes is None else min(size, max_bytes)
+            data = p.stdout.read(keep)
+            left = size - keep
+            while left > 0:
+                chunk = p.stdout.read(min(left, 1 << 20))
+                if not chunk:
+                    break
+                left -= len(chunk)
+            p.stdout.read(1)  # trailing newline
+            checkpoint()  # a cancelled read may have been cut short by the kill
+            return oid, kind, size, data
+
+    def _kill(self) -> None:
+        # Runs from the cancelling thread; the next read() notices the dead child and restarts it.
+        proc = self.proc
+        if proc is not None and proc.poll() is None:
+            proc.kill()
+
+    def close(self) -> None:
+        if self.proc is not None:
+            if self.proc.poll() is None:
+                self.proc.kill()
+            self.proc.wait()
+            self.proc = None
+
+
+_cat_files: Dict[str, CatFile] = {}
+_cat_files_lock = threading.Lock()
+
+
+def _cat_file(root: Path) -> CatFile:
+    with _cat_files_lock:
+        worker = _cat_files.get(str(root))
+        if worker is None:
+            worker = _cat_files[str(root)] = CatFile(root)
+        return worker
+
+
+@atexit.register
+def _close_cat_files() -> None:
+    for worker in list(_cat_files.values()):
+        worker.close()
+
+
+_OID = re.compile(r"[0-9a-f]{40}|[0-9a-f]{64}")
+
+
+def _check_rev(rev: str) -> None:
+    if not rev or any(c in rev for c in ":\n") or rev.startswith("-"):
+        raise ValueError(f"Invalid revision: {rev!r}")
+
+
+def _log_cursor(state: Any) -> Tuple[str, int, Optional[str], Optional[str]]:
+    """(tip, offset, walk token, path) of a git_log_records cursor; cursors are client input."""
+    if not isinstance(state, dict):
+        raise ValueError("Invalid cursor")
+    tip, at, token, path = state.get("tip"), state.get("at"), state.get("walk"), state.get("path")
+    if not isinstance(tip, str) or not _OID.fullmatch(tip):
+        raise ValueError("Invalid cursor")
+    if not isinstance(at, int) or isinstance(at, bool) or at < 0:
+        raise ValueError("Invalid cursor")
+    if not (token is None or isinstance(token, str)) or not (path is None or isinstance(path, str)):
+        raise ValueError("Invalid cursor")
+    return tip, at, token, path
+
+
+def _object_spec(rev: str, path: str) -> str:
+    """`rev:./path` (path relative to the root directory) after rejecting escapes from it."""
+    _check_rev(rev)
+    rel = PurePosixPath(path.strip("/")) if path else PurePosixPath(".")
+    if path.startswith("/") or ".." in rel.parts:
+        raise ValueError(f"Path must be relative to root without '..': {path!r}")
+    return f"{rev}:./{rel}" if str(rel) != "." else f"{rev}:./"
 
 
 def git_status(settings: Settings, root: str) -> str:
     rp = resolve_and_check(root, settings.allowed_roots)
     ensure_is_dir(rp)
-    return _run_git(rp, ["status", "--porcelain=v1", "--branch"])
+    args = ["status", "--porcelain=v1", "--branch"]
+    return cached(rp, tuple(args), True, lambda: _run_git(rp, args))
 
 
 def git_diff(settings: Settings, root: str, staged: bool = False, path: Optional[str] = None, max_bytes: Optional[int] = None) -> str:
     rp = resolve_and_check(root, settings.allowed_roots)
     ensure_is_dir(rp)
 
+    args = _diff_args(staged, path)
+    cap = max_bytes if max_bytes is not None else settings.max_diff_bytes
+
+    def run() -> str:
+        data, truncated = _git_read(rp, args, cap)
+        out = data.decode("utf-8", errors="replace")
+        if truncated:
+            return out + "\n\n[TRUNCATED]\n"
+        return out
+
+    # A staged diff depends only on HEAD and the index; an unstaged one also on the work tree.
+    return cached(rp, (*args, cap), not staged, run)
+
+
+def _diff_args(staged: bool, path: Optional[str]) -> List[str]:
     args = ["diff"]
     if staged:
         args.append("--staged")
     if path:
         args += ["--", path]
+    return args
 
-    out = _run_git(rp, args)
-    cap = max_bytes if max_bytes is not None else settings.max_diff_bytes
-    if len(out.encode("utf-8")) > cap:
-        return out[:cap] + "\n\n[TRUNCATED]\n"
-    return out
+
+def git_diff_stat(settings: Settings, root: str, staged: bool = False, path: Optional[str] = None) -> Dict[str, Any]:
+    """Per-file additions and deletions (git diff --numstat), without any patch text."""
+    rp = resolve_and_check(root, settings.allowed_roots)
+    ensure_is_dir(rp)
+    args = _diff_args(staged, path)
+    args[1:1] = ["--numstat", "-z"]
+
+    def run() -> Dict[str, Any]:
+        data, _ = _git_read(rp, args, settings.max_diff_bytes * 16)
+        files: List[Dict[str, Any]] = []
+        fields = data.decode("utf-8", errors="replace").split("\0")
+        i = 0
+        while i < len(fields) and fields[i]:
+            added, deleted, name = fields[i].split("\t", 2)
+            entry: Dict[str, Any] = {"path": name}
+            if not name:  # rename/copy: "<a>\t<d>\t\0<old>\0<new>\0"
+                entry = {"path": fields[i + 2], "oldPath": fields[i + 1]}
+                i += 2
+            binary = added == "-"
+            entry.update({"additions": 0 if binary else int(added), "deletions": 0 if binary else int(deleted), "binary": binary})
+            files.append(entry)
+            i += 1
+        return {
+            "files": files,
+            "totals": {
+                "files": len(files),
+                "additions": sum(f["additions"] for f in files),
+                "deletions": sum(f["deletions"] for f in files),
+            },
+        }
+
+    return cached(rp, tuple(args), not staged, run)
+
+
+DIFF_SPOOLS = 8
+DIFF_SPOOL_IDLE_SECONDS = 600.0
+
+
+def _diff_file_path(line: bytes) -> str:
+    # "diff --git a/<old> b/<new>" (names may be quoted)
+    text = line.decode("utf-8", errors="replace").rstrip("\n")[len("diff --git "):]
+    cut = max(text.rfind(" b/"), text.rfind(' "b/'))
+    return text[cut + 1:].strip('"')[2:] if cut >= 0 else text
+
+
+class _DiffSpool:
+    """One run of git diff saved to a temp file, with the offsets of every file and hunk header.
+
+    Pages are cut at those offsets, so they hold whole files or whole hunks; a page that
+    starts inside a file repeats that file's header so it reads as a valid patch.
+    """
+
+    def __init__(self, root: Path, args: List[str]):
+        self.args = args
+        self.key = (str(root), tuple(args))
+        self.spool = tempfile.TemporaryFile()
+        self.units = array("Q")  # offsets of "diff --git" and "@@" lines
+        self.file_starts: List[int] = []
+        self.file_paths: List[str] = []
+        self.last_used = time.monotonic()
+        self.lock = threading.Lock()
+        pos = 0
+        with _git_process(root, args) as (p, err):
+            for line in p.stdout:
+                if line.startswith(b"diff --git "):
+                    self.units.append(pos)
+                    self.file_starts.append(pos)
+                    self.file_paths.append(_diff_file_path(line))
+                elif line.startswith(b"@@"):
+                    self.units.append(pos)
+                self.spool.write(line)
+                pos += len(line)
+            _check_exit(p, err, args)
+        self.size = pos
+
+    def _read(self, start: int, end: int) -> bytes:
+        self.spool.seek(start)
+        return self.spool.read(end - start)
+
+    def _line_end(self, pos: int) -> int:
+        """Offset just past the line containing pos; a line longer than the budget is not split."""
+        self.spool.seek(pos)
+        while pos < self.size:
+            chunk = self.spool.read(1 << 16)
+            nl = chunk.find(b"\n")
+            if nl >= 0:
+                return pos + nl + 1
+            pos += len(chunk)
+        return self.size
+
+    def page(self, at: int, budget: int) -> Dict[str, Any]:
+        self.last_used = time.monotonic()
+        at = min(max(at, 0), self.size)
+        f = bisect.bisect_right(self.file_starts, at) - 1
+        header = b""
+        if f >= 0 and at > self.file_starts[f]:
+            j = bisect.bisect_right(self.units, self.file_starts[f])
+            first_hunk = self.units[j] if j < len(self.units) else self.size
+            if at >= first_hunk:
+                header = self._read(self.file_starts[f], first_hunk)
+        limit = at + max(budget - len(header), 1)
+        if limit >= self.size:
+            end, partial = self.size, False
+        else:
+            k = bisect.bisect_right(self.units, limit) - 1
+            cut = self.units[k] if k >= 0 else at
+            g = bisect.bisect_right(self.file_starts, cut) - 1
+            if g >= 0 and cut > self.file_starts[g] and self.units[k - 1] == self.file_starts[g]:
+                cut = self.file_starts[g]  # a file's first hunk: don't end the page on its bare header
+            if cut > at:
+                end, partial = cut, False
+            else:
+                # One hunk is larger than the budget: cut it at a line end.
+                chunk = self._read(at, limit)
+                nl = chunk.rfind(b"\n")
+                end, partial = (at + nl + 1 if nl >= 0 else self._line_end(limit)), True
+        body = header + self._read(at, end)
+        lo = max(f, 0)
+        hi = bisect.bisect_left(self.file_starts, end)
+        return {
+            "diff": body.decode("utf-8", errors="replace"),
+            "files": self.file_paths[lo:hi] if self.file_starts else [],
+            "offset": at,
+            "end": end,
+            "totalBytes": self.size,
+            "partialHunk": partial,
+        }
+
+    def close(self) -> None:
+        self.spool.close()
+
+
+_diff_spools: "OrderedDict[str, _DiffSpool]" = OrderedDict()
+_diff_spools_lock = threading.Lock()
+
+
+def _get_spool(token: Optional[str], key: Tuple[str, Tuple[str, ...]]) -> Optional[_DiffSpool]:
+    with _diff_spools_lock:
+        now = time.monotonic()
+        for t in [t for t, sp in _diff_spools.items() if now - sp.last_used > DIFF_SPOOL_IDLE_SECONDS]:
+            _diff_spools.pop(t).close()
+        spool = _diff_spools.get(token) if token else None
+        if spool is None or spool.key != key:
+            return None
+        _diff_spools.move_to_end(token)
+        return spool
+
+
+def _keep_spool(spool: _DiffSpool) -> str:
+    token = secrets.token_hex(8)
+    with _diff_spools_lock:
+        _diff_spools[token] = spool
+        while len(_diff_spools) > DIFF_SPOOLS:
+            _diff_spools.popitem(last=False)[1].close()
+    return token
+
+
+@atexit.register
+def _close_diff_spools() -> None:
+    with _diff_spools_lock:
+        while _diff_spools:
+            _diff_spools.popitem()[1].close()
+
+
+def git_diff_page(
+    settings: Settings,
+    root: str,
+    staged: bool = False,
+    path: Optional[str] = None,
+    max_bytes: Optional[int] = None,
+    cursor: Optional[str] = None,
+) -> Dict[str, Any]:
+    """One page of a diff: whole files, or whole hunks of a large file, up to max_bytes.
+
+    The diff runs once; its output is kept in a temp file and the cursor points into it.
+    If that copy has expired, the diff is run again and paging resumes at the next
+    file or hunk boundary at or after the cursor (`regenerated` is set).
+    """
+    rp = resolve_and_check(root, settings.allowed_roots)
+    ensure_is_dir(rp)
+    budget = max_bytes if max_bytes is not None else settings.max_diff_bytes
+
+    def serve(spool: _DiffSpool, token: str, at: int) -> Dict[str, Any]:
+        with spool.lock:
+            page = spool.page(at, budget)
+        more = page["end"] < spool.size
+        page["nextCursor"] = encode_cursor({"spool": token, "at": page["end"], "args": spool.args}) if more else None
+        return page
+
+    if not cursor:
+        args = _diff_args(staged, path)
+
+        def first_page() -> Dict[str, Any]:
+            spool = _DiffSpool(rp, args)
+            return serve(spool, _keep_spool(spool), 0)
+
+        return cached(rp, ("diff-page", *args, budget), not staged, first_page)
+
+    state = decode_cursor(cursor)
+    if not isinstance(state, dict) or not {"at", "args"} <= set(state) or not isinstance(state["args"], list):
+        raise ValueError("Invalid cursor")
+    args = [str(a) for a in state["args"]]
+    cursor_path = args[args.index("--") + 1] if "--" in args and args.index("--") + 1 < len(args) else None
+    if args != _diff_args("--staged" in args, cursor_path):
+        raise ValueError("Invalid cursor")
+    at = int(state["at"])
+    spool = _get_spool(state.get("spool"), (str(rp), tuple(args)))
+    if spool is not None:
+        return serve(spool, state["spool"], at)
+    spool = _DiffSpool(rp, args)
+    k = bisect.bisect_left(spool.units, at)
+    page = serve(spool, _keep_spool(spool), spool.units[k] if k < len(spool.units) else spool.size)
+    page["regenerated"] = True
+    return page
 
 
 def git_log(settings: Settings, root: str, max_count: int = 20) -> str:
     rp = resolve_and_check(root, settings.allowed_roots)
     ensure_is_dir(rp)
-    return _run_git(rp, ["log", f"-n{max_count}", "--oneline", "--decorate"])
+    args = ["log", f"-n{max_count}", "--oneline", "--decorate"]
+    return cached(rp, tuple(args), False, lambda: _run_git(rp, args))
 
 
 def git_grep(settings: Settings, root: str, pattern: str, max_results: int = 50) -> str:
     rp = resolve_and_check(root, settings.allowed_roots)
     ensure_is_dir(rp)
-    out = _run_git(rp, ["grep", "-n", "--no-color", pattern])
-    lines = out.splitlines()
-    if len(lines) > max_results:
-        lines = lines[:max_results] + ["[TRUNCATED]"]
-    return "\n".join(lines)
+    args = ["grep", "-n", "--no-color", "-e", pattern]
+
+    def run() -> str:
+        # Exit status 1 means no matches.
+        lines, truncated = _git_lines(rp, args, max_results, ok=(0, 1))
+        if truncated:
+            lines.append("[TRUNCATED]")
+        return "\n".join(lines)
+
+    return cached(rp, (*args, max_results), True, run)
+
+
+LOG_FORMAT = "%H%x1f%P%x1f%an%x1f%ae%x1f%aI%x1f%cI%x1f%s"
+LOG_WALKS = 16
+LOG_WALK_IDLE_SECONDS = 300.0
+
+
+def _commit_record(line: str) -> Dict[str, Any]:
+    oid, parents, author, email, authored, committed, subject = line.split("\x1f", 6)
+    return {
+        "oid": oid,
+        "parents": parents.split() if parents else [],
+        "author": author,
+        "authorEmail": email,
+        "authoredAt": authored,
+        "committedAt": committed,
+        "subject": subject,
+    }
+
+
+class _LogWalk:
+    """A paused `git log` whose pipe is read one page at a time, so later pages continue the walk."""
+
+    def __init__(self, root: Path, tip: str, path: Optional[str], skip: int):
+        args = ["log", f"--format={LOG_FORMAT}", *([f"--skip={skip}"] if skip else []), "--end-of-options", tip, "--", *([path] if path else [])]
+        self.root = root
+        self.key = (str(root), tip, path)
+        self.position = skip
+        self.last_used = time.monotonic()
+        self.lock = threading.Lock()
+        self._pending: Optional[bytes] = None
+        self.proc = subprocess.Popen(["git", "-C", str(root), *args], stdin=subprocess.DEVNULL,
+                                     stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+
+    def take(self, n: int) -> Tuple[List[Dict[str, Any]], bool]:
+        out: List[Dict[str, Any]] = []
+        with on_cancel(self.proc.kill):
+            while len(out) < n:
+                raw = self._pending if self._pending is not None else self.proc.stdout.readline()
+                self._pending = None
+                if not raw:
+                    break
+                out.append(_commit_record(raw.decode("utf-8", errors="replace").rstrip("\n")))
+            self._pending = self.proc.stdout.readline()  # peek, to know whether there is a next page
+        checkpoint()
+        self.position += len(out)
+        self.last_used = time.monotonic()
+        return out, bool(self._pending)
+
+    def close(self) -> None:
+        if self.proc.poll() is None:
+            self.proc.kill()
+        self.proc.stdout.close()
+        self.proc.wait()
+
+
+_log_walks: "OrderedDict[str, _LogWalk]" = OrderedDict()
+_log_walks_lock = threading.Lock()
+
+
+def _claim_walk(token: Optional[str], key: Tuple[str, str, Optional[str]], position: int) -> Optional[_LogWalk]:
+    """Take a paused walk out of the registry if it is exactly where the cursor points."""
+    with _log_walks_lock:
+        now = time.monotonic()
+        for t in [t for t, w in _log_walks.items() if now - w.last_used > LOG_WALK_IDLE_SECONDS]:
+            _log_walks.pop(t).close()
+        walk = _log_walks.get(token) if token else None
+        if walk is None or walk.key != key or walk.position != position:
+            return None
+        return _log_walks.pop(token)
+
+
+def _park_walk(walk: _LogWalk) -> str:
+    token = secrets.token_hex(8)
+    with _log_walks_lock:
+        _log_walks[token] = walk
+        while len(_log_walks) > LOG_WALKS:
+            _log_walks.popitem(last=False)[1].close()
+    return token
+
+
+@atexit.register
+def _close_log_walks() -> None:
+    with _log_walks_lock:
+        while _log_walks:
+            _log_walks.popitem()[1].close()
+
+
+def git_log_records(
+    settings: Settings,
+    root: str,
+    rev: str = "HEAD",
+    max_count: int = 50,
+    cursor: Optional[str] = None,
+    path: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Parsed commits (newest first) from `rev`, one page at a time.
+
+    The first page pins `rev` to a commit oid, so later pages are stable even if the
+    branch moves. The git log process is kept paused between pages and resumed by
+    the cursor; if it has been reclaimed the page is served with --skip instead.
+    Pages are cached by (tip, offset, size), which never go stale.
+    """
+    rp = resolve_and_check(root, settings.allowed_roots)
+    ensure_is_dir(rp)
+    if cursor:
+        tip, at, token, path = _log_cursor(decode_cursor(cursor))
+    else:
+        _check_rev(rev)
+        obj = _cat_file(rp).read(f"{rev}^{{commit}}", max_bytes=0)
+        if obj is None:
+            raise ValueError(f"Unknown revision: {rev}")
+        tip, at, token = obj[0], 0, None
+
+    key = ("log-records", tip, path, at, max_count)
+    hit, page = results.get((str(rp), key))
+    if hit:
+        return page
+
+    walk_key = (str(rp), tip, path)
+    walk = _claim_walk(token, walk_key, at) or _LogWalk(rp, tip, path, at)
+    with walk.lock:
+        try:
+            commits, more = walk.take(max_count)
+        except Exception:
+            walk.close()
+            raise
+    next_cursor = None
+    if more:
+        next_cursor = encode_cursor({"tip": tip, "at": walk.position, "path": path, "walk": _park_walk(walk)})
+    else:
+        walk.close()
+    page = {"tip": tip, "offset": at, "commits": commits, "nextCursor": next_cursor}
+    results.put((str(rp), key), page)
+    return page
+
+
+def git_show_file(settings: Settings, root: str, path: str, rev: str = "HEAD", max_bytes: Optional[int] = None) -> str:
+    """A file's content at a revision (path relative to root), read through the root's cat-file worker."""
+    rp = resolve_and_check(root, settings.allowed_roots)
+    ensure_is_dir(rp)
+    spec = _object_spec(rev, path)
+    cap = max_bytes if max_bytes is not None else settings.max_read_bytes
+    obj = _cat_file(rp).read(spec, max_bytes=cap)
+    if obj is None:
+        raise FileNotFoundError(f"Not found in git: {spec}")
+    _, kind, size, data = obj
+    if kind != "blob":
+        raise ValueError(f"{spec} is a {kind}, not a file")
+    if size > cap:
+        return (data + b"\n\n[TRUNCATED]\n").decode("utf-8", errors="replace")
+    return data.decode("utf-8", errors="replace")
+
+
+def _parse_tree(data: bytes, oid_len: int) -> Iterator[Tuple[str, str, str]]:
+    # Raw tree entries: "<mode> <name>\0<binary oid>".
+    pos = 0
+    while pos < len(data):
+        space = data.index(b" ", pos)
+        nul = data.index(b"\0", space)
+        mode = data[pos:space].decode("ascii")
+        name = data[space + 1:nul].decode("utf-8", errors="replace")
+        yield mode, name, data[nul + 1:nul + 1 + oid_len].hex()
+        pos = nul + 1 + oid_len
+
+
+def _entry_type(mode: str) -> str:
+    if mode == "40000":
+        return "tree"
+    if mode == "160000":
+        return "commit"
+    return "blob"
+
+
+def git_ls_tree(settings: Settings, root: str, rev: str = "HEAD", path: str = "", recursive: bool = False, max_entries: int = 1000) -> Dict[str, Any]:
+    """Entries of a tree at a revision (path relative to root), breadth-first when recursive.
+
+    Trees are read through the root's cat-file worker, so no git process is started per call.
+    """
+    rp = resolve_and_check(root, settings.allowed_roots)
+    ensure_is_dir(rp)
+    worker = _cat_file(rp)
+    spec = _object_spec(rev, path)
+    obj = worker.read(spec)
+    if obj is None:
+        raise FileNotFoundError(f"Not found in git: {spec}")
+    oid, kind, _, data = obj
+    if kind != "tree":
+        raise ValueError(f"{spec} is a {kind}, not a directory")
+
+    oid_len = len(oid) // 2
+    entries: List[Dict[str, Any]] = []
+    pending = deque([("", data)])
+    truncated = False
+    while pending and not truncated:
+        prefix, tree = pending.popleft()
+        for mode, name, entry_oid in _parse_tree(tree, oid_len):
+            if len(entries) >= max_entries:
+                truncated = True
+                break
+            kind = _entry_type(mode)
+            entries.append({"path": prefix + name, "type": kind, "mode": mode, "oid": entry_oid})
+            if recursive and kind == "tree":
+                sub = worker.read(entry_oid)
+                if sub is not None:
+                    pending.append((f"{prefix}{name}/", sub[3]))
+    return {"rev": rev, "path": path, "oid": oid, "entries": entries, "truncated": truncated}
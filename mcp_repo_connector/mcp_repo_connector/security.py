@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, Optional
 
 
 class PathDenied(Exception):
@@ -23,6 +23,29 @@ def resolve_and_check(path: str, allowed_roots: Iterable[Path]) -> Path:
     raise PathDenied(f"Path is outside allowed roots: {rp}")
 
 
+def is_within(p: Path, root: Path) -> bool:
+    """Whether a resolved path is `root` or below it."""
+    return p == root or str(p).startswith(str(root).rstrip("/") + "/")
+
+
+def resolve_within(root: Path, rel: str) -> Optional[Path]:
+    """`root/rel` with symlinks resolved, or None when it leads outside `root` (a resolved root)."""
+    try:
+        rp = (root / rel).resolve(strict=False)
+    except (OSError, RuntimeError):
+        return None
+    return rp if is_within(rp, root) else None
+
+
+def root_of(p: Path, allowed_roots: Iterable[Path]) -> Path:
+    """The innermost allowed root containing an already-checked path."""
+    matches = [r.resolve() for r in allowed_roots]
+    matches = [r for r in matches if is_within(p, r)]
+    if not matches:
+        raise PathDenied(f"Path is outside allowed roots: {p}")
+    return max(matches, key=lambda r: len(str(r)))
+
+
 def ensure_is_dir(p: Path) -> None:
     if not p.exists() or not p.is_dir():
         raise FileNotFoundError(f"Directory not found: {p}")
@@ -1,120 +1,352 @@
 from __future__ import annotations
 
+import json
 import os
 from typing import Any, Dict, Optional
 
-from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp import Context, FastMCP
 
 from .config import Settings
-from .fs_tools import list_dir as _list_dir, read_file as _read_file, search_text as _search_text
-from .git_tools import git_status as _git_status, git_diff as _git_diff, git_log as _git_log, git_grep as _git_grep
+from .git_cache import results as _git_results
+from .telemetry import Telemetry
+from .tool_runner import ToolRunner
+from .watch import start_watchers
+from .fs_tools import (
+    list_dir as _list_dir,
+    read_file as _read_file,
+    read_files as _read_files,
+    repo_tree as _repo_tree,
+    search_text as _search_text,
+    semantic_search_code as _semantic_search_code,
+)
+from .git_tools import (
+    git_status as _git_status,
+    git_diff as _git_diff,
+    git_diff_page as _git_diff_page,
+    git_diff_stat as _git_diff_stat,
+    git_log as _git_log,
+    git_log_records as _git_log_records,
+    git_grep as _git_grep,
+    git_show_file as _git_show_file,
+    git_ls_tree as _git_ls_tree,
+)
 from .website_client import (
     get_sitemap as _get_sitemap,
     get_page as _get_page,
+    get_pages as _get_pages,
     search_pages as _search_pages,
-    recommend_content as _recommend_content,
+    iter_recommendations as _iter_recommendations,
     get_changes as _get_changes,
     lint_site as _lint_site,
     cluster_topics as _cluster_topics,
     export_page as _export_page,
     daily_brief as _daily_brief,
+    daily_brief_status as _daily_brief_status,
+    cache_stats as _website_cache_stats,
 )
 
 settings = Settings.from_env()
+runner = ToolRunner(settings.tool_concurrency, settings.tool_timeout, settings.tool_limits, settings.tool_timeouts)
+telemetry = Telemetry(settings.slow_call_ms)
 
 mcp = FastMCP("Apotheon Repo + Website Connector", json_response=True)
 
+# Blocking tools run on worker threads (@runner.threaded) so the event loop stays free:
+# each tool has its own concurrency cap and deadline, and cancelling a call kills its
+# git children and aborts its HTTP requests. @telemetry.instrument records every call,
+# including slot waits and timeouts, for server_stats and /metrics.
+
 # ---- Repo / folder tools ----
 
 @mcp.tool()
-def list_dir(path: str, max_entries: int = 200):
-    """List a directory (sandboxed to MCP_ALLOWED_ROOTS)."""
-    return _list_dir(settings, path, max_entries=max_entries)
+@telemetry.instrument
+@runner.threaded
+def list_dir(path: str, max_entries: int = 200, cursor: Optional[str] = None):
+    """List a directory (sandboxed to MCP_ALLOWED_ROOTS), directories first.
+
+    Returns one page of entries; pass the returned nextCursor as `cursor` for the next page.
+    """
+    return _list_dir(settings, path, max_entries=max_entries, cursor=cursor)
+
+@mcp.tool()
+@telemetry.instrument
+@runner.threaded
+def repo_tree(path: str, max_depth: int = 3, max_entries: int = 1000, include_files: bool = True):
+    """Depth-limited directory tree in one call, skipping git-ignored files.
+
+    Each directory has its recursive file count and total size, even below max_depth.
+    """
+    return _repo_tree(settings, path, max_depth=max_depth, max_entries=max_entries, include_files=include_files)
+
+@mcp.tool()
+@telemetry.instrument
+@runner.threaded
+def read_file(
+    path: str,
+    max_bytes: Optional[int] = None,
+    offset: Optional[int] = None,
+    length: Optional[int] = None,
+    start_line: Optional[int] = None,
+    end_line: Optional[int] = None,
+):
+    """Read a file (sandboxed to MCP_ALLOWED_ROOTS).
+
+    Optionally only a byte range (offset/length) or a 1-based inclusive line range (start_line/end_line).
+    """
+    return _read_file(settings, path, max_bytes=max_bytes, offset=offset, length=length, start_line=start_line, end_line=end_line)
+
+@mcp.tool()
+@telemetry.instrument
+@runner.threaded
+def read_files(
+    paths: list[str],
+    max_bytes: Optional[int] = None,
+    max_bytes_per_file: Optional[int] = None,
+    known_hashes: Optional[Dict[str, str]] = None,
+):
+    """Read several files at once under a total byte budget (sandboxed to MCP_ALLOWED_ROOTS).
+
+    Each result has a content hash; pass hashes you already hold in known_hashes ({path: hash})
+    and unchanged files come back as `unchanged` without content.
+    """
+    return _read_files(settings, paths, max_bytes=max_bytes, max_bytes_per_file=max_bytes_per_file, known_hashes=known_hashes)
 
 @mcp.tool()
-def read_file(path: str, max_bytes: Optional[int] = None):
-    """Read a file (sandboxed to MCP_ALLOWED_ROOTS)."""
-    return _read_file(settings, path, max_bytes=max_bytes)
+@telemetry.instrument
+@runner.threaded
+def search_text(query: str, path: str, glob: Optional[str] = None, max_results: Optional[int] = None, regex: bool = False, case_sensitive: bool = False):
+    """Search for text within a folder tree (skips node_modules/.git).
+
+    Uses a persistent trigram index per allowed root, so repeated searches only read files
+    that can match. `regex=True` treats the query as a Python regular expression (matched per line).
+    """
+    return _search_text(settings, query, path, glob=glob, max_results=max_results, regex=regex, case_sensitive=case_sensitive)
 
 @mcp.tool()
-def search_text(query: str, path: str, glob: Optional[str] = None, max_results: Optional[int] = None):
-    """Search for text within a folder tree (skips node_modules/.git)."""
-    return _search_text(settings, query, path, glob=glob, max_results=max_results)
+@telemetry.instrument
+@runner.threaded
+def semantic_search_code(query: str, path: str, max_results: int = 10, glob: Optional[str] = None):
+    """Find code by meaning: describe what you are looking for ("where are auth tokens refreshed").
+
+    Returns the best-matching functions/classes (or line windows) with file, line span,
+    score and a snippet. Backed by a local embedding index that updates in the background.
+    """
+    return _semantic_search_code(settings, query, path, max_results=max_results, glob=glob)
 
 @mcp.tool()
+@telemetry.instrument
+@runner.threaded
 def git_status(root: str):
     """git status --porcelain (sandboxed root)."""
     return _git_status(settings, root)
 
 @mcp.tool()
+@telemetry.instrument
+@runner.threaded
 def git_diff(root: str, staged: bool = False, path: Optional[str] = None, max_bytes: Optional[int] = None):
     """git diff (optionally staged) with truncation."""
     return _git_diff(settings, root, staged=staged, path=path, max_bytes=max_bytes)
 
 @mcp.tool()
+@telemetry.instrument
+@runner.threaded
+def git_diff_stat(root: str, staged: bool = False, path: Optional[str] = None):
+    """Per-file additions/deletions of the diff (git diff --numstat), with totals."""
+    return _git_diff_stat(settings, root, staged=staged, path=path)
+
+@mcp.tool()
+@telemetry.instrument
+@runner.threaded
+def git_diff_page(root: str, staged: bool = False, path: Optional[str] = None, max_bytes: Optional[int] = None, cursor: Optional[str] = None):
+    """A diff in pages of whole files or hunks up to max_bytes.
+
+    Pass the returned nextCursor as `cursor` to read the rest; the diff is not recomputed per page.
+    """
+    return _git_diff_page(settings, root, staged=staged, path=path, max_bytes=max_bytes, cursor=cursor)
+
+@mcp.tool()
+@telemetry.instrument
+@runner.threaded
 def git_log(root: str, max_count: int = 20):
     """git log --oneline."""
     return _git_log(settings, root, max_count=max_count)
 
 @mcp.tool()
+@telemetry.instrument
+@runner.threaded
+def git_log_records(root: str, rev: str = "HEAD", max_count: int = 50, cursor: Optional[str] = None, path: Optional[str] = None):
+    """Parsed commits (oid, parents, author, dates, subject), newest first.
+
+    Pass the returned nextCursor as `cursor` for older commits; paging continues the same walk.
+    """
+    return _git_log_records(settings, root, rev=rev, max_count=max_count, cursor=cursor, path=path)
+
+@mcp.tool()
+@telemetry.instrument
+@runner.threaded
 def git_grep(root: str, pattern: str, max_results: int = 50):
     """git grep pattern (line numbers)."""
     return _git_grep(settings, root, pattern=pattern, max_results=max_results)
 
+@mcp.tool()
+@telemetry.instrument
+@runner.threaded
+def git_show_file(root: str, path: str, rev: str = "HEAD", max_bytes: Optional[int] = None):
+    """A file's content at a revision (path relative to root), with truncation."""
+    return _git_show_file(settings, root, path=path, rev=rev, max_bytes=max_bytes)
+
+@mcp.tool()
+@telemetry.instrument
+@runner.threaded
+def git_ls_tree(root: str, rev: str = "HEAD", path: str = "", recursive: bool = False, max_entries: int = 1000):
+    """Tree entries (path, type, mode, oid) at a revision; path is relative to root."""
+    return _git_ls_tree(settings, root, rev=rev, path=path, recursive=recursive, max_entries=max_entries)
+
 # ---- Website connector tools (thin wrapper over Retrieval API) ----
 
 @mcp.tool()
+@telemetry.instrument
+@runner.threaded
 def get_sitemap():
     """List indexed pages and metadata (calls GET /sitemap)."""
     return _get_sitemap(settings)
 
 @mcp.tool()
+@telemetry.instrument
+@runner.threaded
 def get_page(slug: str):
     """Fetch a page's structured content (calls GET /page/{slug})."""
     return _get_page(settings, slug)
 
 @mcp.tool()
-def search_pages(query: str, limit: int = 8, filters: Optional[Dict[str, Any]] = None):
-    """Semantic search across indexed pages (calls POST /search)."""
-    return _search_pages(settings, query=query, limit=limit, filters=filters)
+@telemetry.instrument
+@runner.threaded
+def get_pages(slugs: list[str]):
+    """Fetch several pages at once (concurrent GET /page/{slug}), returned in the order given."""
+    return _get_pages(settings, slugs)
 
 @mcp.tool()
-def recommend_content(goals, audience: Optional[str] = None, constraints: Optional[Dict[str, Any]] = None):
-    """Recommend new pages, improvements, and internal links (calls POST /recommend)."""
-    return _recommend_content(settings, goals=goals, audience=audience, constraints=constraints)
+@telemetry.instrument
+@runner.threaded
+def search_pages(query: str, limit: int = 8, filters: Optional[Dict[str, Any]] = None, mode: str = "hybrid"):
+    """Search indexed pages (calls POST /search). mode: lexical (exact terms, no embedding), vector, or hybrid."""
+    return _search_pages(settings, query=query, limit=limit, filters=filters, mode=mode)
+
+@mcp.tool()
+@telemetry.instrument
+async def recommend_content(goals, audience: Optional[str] = None, constraints: Optional[Dict[str, Any]] = None, ctx: Context = None):
+    """Recommend new pages, improvements, and internal links (streams POST /recommend).
+
+    Each recommendation is reported as a progress/log notification as soon as it arrives;
+    the return value is the complete list.
+    """
+    out: Dict[str, Any] = {"recommendations": []}
+    done = object()
+    async with runner.call("recommend_content") as call:
+        events = _iter_recommendations(settings, goals=goals, audience=audience, constraints=constraints)
+        try:
+            while True:
+                item = await runner.run_sync(call, next, events, done)
+                if item is done:
+                    break
+                event, data = item
+                if event == "recommendation":
+                    out["recommendations"].append(data)
+                    if ctx is not None:
+                        await ctx.report_progress(len(out["recommendations"]))
+                        await ctx.info(json.dumps({"recommendation": data}))
+                elif event == "error":
+                    raise RuntimeError(f"recommend failed: {data.get('detail')}")
+                else:
+                    out[event] = data
+        finally:
+            if not call.cancelled.is_set():
+                events.close()  # a cancelled stream was aborted mid-read; its thread may still own it
+    return out
 
 
 @mcp.tool()
-def get_changes(since: Optional[str] = None):
-    """Get changed/seen pages since timestamp (calls GET /changes)."""
-    return _get_changes(settings, since=since)
+@telemetry.instrument
+@runner.threaded
+def get_changes(since: Optional[str] = None, cursor: Optional[str] = None, limit: int = 100):
+    """Page change events (added/modified/removed) from the change journal (calls GET /changes).
+
+    Pass the returned nextCursor as `cursor` to poll for only new events; `since` accepts
+    epoch seconds or an ISO 8601 timestamp.
+    """
+    return _get_changes(settings, since=since, cursor=cursor, limit=limit)
 
 
 @mcp.tool()
+@telemetry.instrument
+@runner.threaded
 def lint_site(thin_word_threshold: int = 250, scope_slugs: Optional[list[str]] = None):
     """Run content/SEO lint checks (calls POST /lint)."""
     return _lint_site(settings, thin_word_threshold=thin_word_threshold, scope_slugs=scope_slugs)
 
 
 @mcp.tool()
-def cluster_topics(max_pages: int = 300, similarity_threshold: float = 0.35):
-    """Topic clustering for content planning (calls POST /clusters)."""
+@telemetry.instrument
+@runner.threaded
+def cluster_topics(max_pages: Optional[int] = None, similarity_threshold: float = 0.35):
+    """Topic clustering for content planning (calls POST /clusters). max_pages=None clusters the whole site."""
     return _cluster_topics(settings, max_pages=max_pages, similarity_threshold=similarity_threshold)
 
 
 @mcp.tool()
+@telemetry.instrument
+@runner.threaded
 def export_page_stub(title: str, slug_suggestion: str, outline: list[str], proposed_meta: Dict[str, Any], write: bool = False):
     """Export a PR-ready markdown stub (calls POST /export)."""
     return _export_page(settings, title=title, slug_suggestion=slug_suggestion, outline=outline, proposed_meta=proposed_meta, write=write)
 
 
 @mcp.tool()
+@telemetry.instrument
+@runner.threaded
 def daily_brief(goals: Optional[list[str]] = None, audience: Optional[str] = None):
-    """Generate a daily markdown brief under CONNECTOR_REPORTS_DIR (calls POST /daily-brief)."""
+    """Start generating a daily markdown brief under CONNECTOR_REPORTS_DIR (calls POST /daily-brief).
+
+    Returns a jobId immediately; poll daily_brief_status for the report path.
+    """
     return _daily_brief(settings, goals=goals, audience=audience)
 
 
+@mcp.tool()
+@telemetry.instrument
+@runner.threaded
+def daily_brief_status(job_id: str):
+    """Status of a daily brief job: queued, running, succeeded (with report path), failed (calls GET /daily-brief/{job_id})."""
+    return _daily_brief_status(settings, job_id)
+
+
+# ---- Server telemetry ----
+
+@mcp.tool()
+def server_stats():
+    """Per-tool call counts, latency percentiles, response sizes, truncations, errors and recent slow calls.
+
+    Also reports concurrency slots in use and git/website cache hit rates.
+    """
+    return {
+        **telemetry.stats(),
+        "slots": runner.stats(),
+        "caches": {"git": _git_results.stats(), "website": _website_cache_stats()},
+    }
+
+
+if settings.metrics:
+    from starlette.requests import Request
+    from starlette.responses import PlainTextResponse
+
+    @mcp.custom_route("/metrics", methods=["GET"], include_in_schema=False)
+    async def metrics(request: Request) -> PlainTextResponse:
+        """Prometheus exposition (served in streamable-http mode only)."""
+        return PlainTextResponse(telemetry.prometheus(runner.stats()), media_type="text/plain; version=0.0.4")
+
+
 def main():
+    start_watchers(settings.allowed_roots)
     transport = os.environ.get("MCP_TRANSPORT", "stdio").strip().lower()
     if transport not in {"stdio", "streamable-http"}:
         transport = "stdio"
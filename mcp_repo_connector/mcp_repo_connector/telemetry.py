@@ -0,0 +1,308 @@
+from __future__ import annotations
+
+import bisect
+import functools
+import json
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Sequence
+
+# Seconds, bytes and work items (files scanned, ...) per call.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+COUNT_BUCKETS = (1, 10, 100, 1000, 10000, 100000)
+TRUNCATED_MARKER = "[TRUNCATED]"
+SLOW_CALLS_KEPT = 50
+ARG_PREVIEW_CHARS = 120
+
+log = logging.getLogger("mcp_repo_connector.telemetry")
+
+
+class _Histogram:
+    __slots__ = ("bounds", "counts", "sum", "count", "max")
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (the max for the overflow bucket)."""
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.bounds, self.counts):
+            seen += n
+            if seen >= rank and n:
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self, scale: float = 1.0, digits: int = 3) -> Dict[str, Any]:
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "mean": round(self.sum / self.count * scale, digits),
+            "p50": round(self.quantile(0.5) * scale, digits),
+            "p90": round(self.quantile(0.9) * scale, digits),
+            "p99": round(self.quantile(0.99) * scale, digits),
+            "max": round(self.max * scale, digits),
+            "total": round(self.sum * scale, digits),
+        }
+
+
+class CallTrace:
+    """Where one tool call spent its time, filled in by the code it runs.
+
+    Phases are summed across threads, so a call that fans out (get_pages) can
+    report more phase time than wall time.
+    """
+
+    __slots__ = ("name", "started", "phases", "counts", "_lock")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def add(self, phase: str, seconds: float) -> None:
+        with self._lock:
+            self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def count(self, name: str, n: int) -> None:
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + n
+
+
+_trace: ContextVar[Optional[CallTrace]] = ContextVar("mcp_call_trace", default=None)
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Add the block's duration to phase `name` of the current tool call (no-op outside one)."""
+    trace = _trace.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, time.perf_counter() - started)
+
+
+def add_phase(name: str, seconds: float) -> None:
+    trace = _trace.get()
+    if trace is not None:
+        trace.add(name, seconds)
+
+
+def count(name: str, n: int = 1) -> None:
+    """Count work done by the current tool call, e.g. count("filesScanned")."""
+    trace = _trace.get()
+    if trace is not None:
+        trace.count(name, n)
+
+
+def _json_size(value: Any) -> int:
+    """Approximate JSON size of a tool result without serializing it (strings count as 1 byte per char)."""
+    if isinstance(value, str):
+        return len(value) + 2
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, dict):
+        return 2 + sum(len(str(k)) + 4 + _json_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return 2 + sum(_json_size(v) + 1 for v in value)
+    return 4 if value is None or isinstance(value, bool) else len(str(value))
+
+
+def _truncated(value: Any) -> bool:
+    if isinstance(value, str):
+        return TRUNCATED_MARKER in value[-32:]
+    if isinstance(value, dict):
+        files = value.get("files")  # read_files: per-file flags
+        return bool(value.get("truncated")) or (isinstance(files, list) and any(isinstance(f, dict) and f.get("truncated") for f in files))
+    return False
+
+
+def _preview(value: Any) -> Any:
+    if isinstance(value, (list, tuple)):
+        return f"[{len(value)} items]"
+    if isinstance(value, dict):
+        return f"{{{len(value)} keys}}"
+    if isinstance(value, str) and len(value) > ARG_PREVIEW_CHARS:
+        return value[:ARG_PREVIEW_CHARS] + "..."
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return type(value).__name__
+
+
+def _error_kind(error: BaseException) -> str:
+    if isinstance(error, TimeoutError):
+        return "timeout"
+    if not isinstance(error, Exception):
+        return "cancelled"  # the client cancelled the request
+    return type(error).__name__
+
+
+class _ToolStats:
+    def __init__(self) -> None:
+        self.latency = _Histogram(LATENCY_BUCKETS)
+        self.bytes = _Histogram(SIZE_BUCKETS)
+        self.counts: Dict[str, _Histogram] = {}
+        self.phases: Dict[str, float] = {}
+        self.errors: Dict[str, int] = {}
+        self.truncated = 0
+
+
+class Telemetry:
+    """Per-tool latency, response size, truncation, error and work counters.
+
+    `instrument` wraps a tool so every call runs with a CallTrace in a context
+    variable; code it calls marks phases (`phase("git")`) and counts work
+    (`count("filesScanned", n)`). Calls slower than `slow_call_ms` are logged with
+    their phase breakdown and kept for `server_stats`.
+    """
+
+    def __init__(self, slow_call_ms: float):
+        self.slow_call_ms = slow_call_ms
+        self.started = time.time()
+        self.tools: Dict[str, _ToolStats] = {}
+        self.slow_calls: Deque[Dict[str, Any]] = deque(maxlen=SLOW_CALLS_KEPT)
+        self._lock = threading.Lock()
+
+    def instrument(self, fn: Callable[..., Any]) -> Callable[..., Any]:
+        """Record every call of an async tool (put it between @mcp.tool() and @runner.threaded)."""
+        name = fn.__name__
+
+        @functools.wraps(fn)
+        async def run(*args: Any, **kwargs: Any) -> Any:
+            trace = CallTrace(name)
+            token = _trace.set(trace)
+            result: Any = None
+            error: Optional[BaseException] = None
+            try:
+                result = await fn(*args, **kwargs)
+                return result
+            except BaseException as exc:
+                error = exc
+                raise
+            finally:
+                _trace.reset(token)
+                self.record(trace, time.perf_counter() - trace.started, result, error, kwargs)
+
+        return run
+
+    def record(self, trace: CallTrace, elapsed: float, result: Any, error: Optional[BaseException], kwargs: Dict[str, Any]) -> None:
+        size = _json_size(result) if error is None else 0
+        truncated = error is None and _truncated(result)
+        with self._lock:
+            stats = self.tools.get(trace.name)
+            if stats is None:
+                stats = self.tools[trace.name] = _ToolStats()
+            stats.latency.observe(elapsed)
+            if error is None:
+                stats.bytes.observe(size)
+            else:
+                kind = _error_kind(error)
+                stats.errors[kind] = stats.errors.get(kind, 0) + 1
+            if truncated:
+                stats.truncated += 1
+            for key, n in trace.counts.items():
+                hist = stats.counts.get(key)
+                if hist is None:
+                    hist = stats.counts[key] = _Histogram(COUNT_BUCKETS)
+                hist.observe(n)
+            for key, seconds in trace.phases.items():
+                stats.phases[key] = stats.phases.get(key, 0.0) + seconds
+
+        if elapsed * 1000 < self.slow_call_ms:
+            return
+        phases = {k: round(v * 1000, 1) for k, v in sorted(trace.phases.items(), key=lambda kv: -kv[1])}
+        entry = {
+            "tool": trace.name,
+            "at": round(time.time(), 3),
+            "ms": round(elapsed * 1000, 1),
+            "phasesMs": phases,
+            "otherMs": round(max(0.0, elapsed * 1000 - sum(phases.values())), 1),
+            "counts": dict(trace.counts),
+            "bytes": size,
+            "truncated": truncated,
+            "error": None if error is None else _error_kind(error),
+            "args": {k: _preview(v) for k, v in kwargs.items() if k != "ctx"},
+        }
+        self.slow_calls.append(entry)
+        log.warning("slow tool call: %s", json.dumps(entry))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            tools = {
+                name: {
+                    "calls": s.latency.count,
+                    "errors": dict(s.errors),
+                    "truncated": s.truncated,
+                    "latencyMs": s.latency.summary(scale=1000),
+                    "bytes": s.bytes.summary(digits=0),
+                    "phasesMs": {k: round(v * 1000, 1) for k, v in sorted(s.phases.items())},
+                    "counts": {k: h.summary(digits=1) for k, h in sorted(s.counts.items())},
+                }
+                for name, s in sorted(self.tools.items())
+            }
+            slow = list(self.slow_calls)
+        return {"uptimeSeconds": round(time.time() - self.started, 1), "slowCallMs": self.slow_call_ms, "tools": tools, "slowCalls": slow}
+
+    def prometheus(self, slots: Optional[Dict[str, Dict[str, Any]]] = None) -> str:
+        """Prometheus text exposition; `slots` is ToolRunner.stats() for the running/waiting gauges."""
+        lines: List[str] = []
+
+        def family(metric: str, kind: str, help: str) -> None:
+            lines.extend((f"# HELP {metric} {help}", f"# TYPE {metric} {kind}"))
+
+        def histogram(metric: str, labels: str, hist: _Histogram) -> None:
+            cumulative = 0
+            for bound, n in zip(list(hist.bounds) + ["+Inf"], hist.counts):
+                cumulative += n
+                lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"{metric}_sum{{{labels}}} {hist.sum}")
+            lines.append(f"{metric}_count{{{labels}}} {hist.count}")
+
+        with self._lock:
+            tools = sorted(self.tools.items())
+            family("mcp_tool_call_seconds", "histogram", "Tool call latency, including time waiting for a slot.")
+            for name, s in tools:
+                histogram("mcp_tool_call_seconds", f'tool="{name}"', s.latency)
+            family("mcp_tool_response_bytes", "histogram", "Approximate JSON size of successful tool results.")
+            for name, s in tools:
+                histogram("mcp_tool_response_bytes", f'tool="{name}"', s.bytes)
+            family("mcp_tool_work_items", "histogram", "Work done per call, e.g. files scanned by search_text.")
+            for name, s in tools:
+                for key, hist in sorted(s.counts.items()):
+                    histogram("mcp_tool_work_items", f'tool="{name}",item="{key}"', hist)
+            family("mcp_tool_errors_total", "counter", "Failed tool calls by error kind (timeout, cancelled, exception type).")
+            for name, s in tools:
+                lines.extend(f'mcp_tool_errors_total{{tool="{name}",kind="{kind}"}} {n}' for kind, n in sorted(s.errors.items()))
+            family("mcp_tool_truncations_total", "counter", "Tool results cut at a byte or result cap.")
+            lines.extend(f'mcp_tool_truncations_total{{tool="{name}"}} {s.truncated}' for name, s in tools)
+            family("mcp_tool_phase_seconds_total", "counter", "Time tool calls spent per phase (queue, git, http, ...).")
+            for name, s in tools:
+                lines.extend(f'mcp_tool_phase_seconds_total{{tool="{name}",phase="{k}"}} {v}' for k, v in sorted(s.phases.items()))
+        if slots:
+            family("mcp_tool_running", "gauge", "Calls holding a slot.")
+            lines.extend(f'mcp_tool_running{{tool="{name}"}} {s["running"]}' for name, s in slots.items())
+            family("mcp_tool_waiting", "gauge", "Calls waiting for a slot.")
+            lines.extend(f'mcp_tool_waiting{{tool="{name}"}} {s["waiting"]}' for name, s in slots.items())
+        return "\n".join(lines) + "\n"
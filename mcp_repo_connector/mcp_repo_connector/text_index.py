@@ -0,0 +1,345 @@
+from __future__ import annotations
+
+import atexit
+import hashlib
+import os
+import pickle
+import re
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .tool_runner import checkpoint
+from .watch import TreeWatcher, watcher_for
+
+try:
+    from re import _constants as sre_constants, _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_constants
+    import sre_parse
+
+SKIP_DIRS = {"node_modules", ".git", ".next", "dist", "build"}
+MAX_INDEXED_BYTES = 2 * 1024 * 1024
+BINARY_SNIFF_BYTES = 8192
+RESCAN_SECONDS = 2.0
+WATCH_READY_SECONDS = 1.0
+SAVE_INTERVAL_SECONDS = 30.0
+FORMAT_VERSION = 1
+
+# Files over MAX_INDEXED_BYTES are not broken into trigrams; they are candidates for every query.
+UNINDEXED = -1
+BINARY = -2
+
+
+def fold(text: str) -> str:
+    """Case folding used by the index and by case-insensitive matching (context-free, unlike lower())."""
+    return text.casefold()
+
+
+def trigrams(text: str) -> Set[bytes]:
+    data = fold(text).encode("utf-8", errors="replace")
+    return {data[i:i + 3] for i in range(len(data) - 2)}
+
+
+def _literal_runs(parsed: Iterable, out: List[str]) -> None:
+    """Literal strings every match of a parsed regex must contain (AND semantics)."""
+    run: List[str] = []
+
+    def flush() -> None:
+        if len(run) >= 3:
+            out.append("".join(run))
+        run.clear()
+
+    for op, arg in parsed:
+        if op is sre_constants.LITERAL:
+            run.append(chr(arg))
+            continue
+        flush()
+        if op is sre_constants.SUBPATTERN:
+            _literal_runs(arg[-1], out)
+        elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT) and arg[0] >= 1:
+            _literal_runs(arg[2], out)
+    flush()
+
+
+def required_literals(query: str, regex: bool) -> List[str]:
+    if not regex:
+        return [query]
+    out: List[str] = []
+    try:
+        _literal_runs(sre_parse.parse(query), out)
+    except (re.error, TypeError, ValueError):
+        return []
+    return out
+
+
+def _is_binary(path: str) -> bool:
+    try:
+        with open(path, "rb") as f:
+            return b"\0" in f.read(BINARY_SNIFF_BYTES)
+    except OSError:
+        return True
+
+
+class TrigramIndex:
+    """Trigram → file posting lists for one root, kept current by mtime/size or a watcher.
+
+    Files are addressed by id; a changed or deleted file's id is retired (its postings
+    are skipped) and a changed file is indexed again under a new id. Postings are
+    compacted when retired ids outnumber live ones. The index is pickled to `path`.
+    """
+
+    def __init__(self, root: Path, path: Path):
+        self.root = root
+        self.path = path
+        self.lock = threading.RLock()
+        self.files: List[Optional[Tuple[str, int, int, int]]] = []  # (rel path, mtime_ns, size, kind)
+        self.by_path: Dict[str, int] = {}
+        self.large: Set[int] = set()
+        self.postings: Dict[bytes, array] = {}
+        self.retired = 0
+        self.dirty_paths: Set[str] = set()
+        self.last_scan = 0.0
+        self.last_save = 0.0
+        self.changed = False
+        self.watcher: Optional[TreeWatcher] = None
+        self.scan_watched = False  # the last full walk began with the watcher armed
+        self.base = str(root).rstrip(os.sep) + os.sep
+        self._load()
+
+    # ---- persistence ----
+
+    def _load(self) -> None:
+        try:
+            with self.path.open("rb") as f:
+                state = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ValueError):
+            return
+        if state.get("version") != FORMAT_VERSION or state.get("root") != str(self.root):
+            return
+        self.files = state["files"]
+        self.postings = state["postings"]
+        self.retired = sum(1 for f in self.files if f is None)
+        self._reindex_paths()
+
+    def _reindex_paths(self) -> None:
+        self.by_path = {f[0]: i for i, f in enumerate(self.files) if f is not None}
+        self.large = {i for i, f in enumerate(self.files) if f is not None and f[3] == UNINDEXED}
+
+    def save(self) -> None:
+        with self.lock:
+            if not self.changed:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(f".{self.path.name}.tmp")
+            with tmp.open("wb") as f:
+                pickle.dump({"version": FORMAT_VERSION, "root": str(self.root), "files": self.files, "postings": self.postings},
+                            f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self.path)
+            self.changed = False
+            self.last_save = time.monotonic()
+
+    # ---- updates ----
+
+    def _walk(self, top: Optional[str] = None) -> Iterator[Tuple[str, os.stat_result]]:
+        """(path relative to the root, stat) for files under `top`, pruning SKIP_DIRS."""
+        stack = [top or str(self.root)]
+        prefix = len(self.base)
+        while stack:
+            d = stack.pop()
+            try:
+                it = os.scandir(d)
+            except OSError:
+                continue
+            with it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in SKIP_DIRS:
+                                stack.append(entry.path)
+                        elif entry.is_file():
+                            yield entry.path[prefix:], entry.stat()
+                    except OSError:
+                        continue
+
+    def _retire(self, rel: str) -> None:
+        fid = self.by_path.pop(rel, None)
+        if fid is not None:
+            self.files[fid] = None
+            self.large.discard(fid)
+            self.retired += 1
+            self.changed = True
+
+    def _add(self, rel: str, st: os.stat_result) -> None:
+        self._retire(rel)
+        full = self.base + rel
+        kind = 0
+        grams: Set[bytes] = set()
+        if st.st_size > MAX_INDEXED_BYTES:
+            kind = UNINDEXED
+        elif _is_binary(full):
+            kind = BINARY
+        else:
+            try:
+                with open(full, "r", encoding="utf-8", errors="replace") as f:
+                    grams = trigrams(f.read())
+            except OSError:
+                return
+        fid = len(self.files)
+        self.files.append((rel, st.st_mtime_ns, st.st_size, kind))
+        self.by_path[rel] = fid
+        if kind == UNINDEXED:
+            self.large.add(fid)
+        for g in grams:
+            posting = self.postings.get(g)
+            if posting is None:
+                self.postings[g] = array("I", (fid,))
+            else:
+                posting.append(fid)
+        self.changed = True
+
+    def _update(self, rel: str, st: os.stat_result) -> None:
+        known = self.files[self.by_path[rel]] if rel in self.by_path else None
+        if known is None or known[1] != st.st_mtime_ns or known[2] != st.st_size:
+            self._add(rel, st)
+
+    def _check(self, rel: str) -> None:
+        """Re-examine one path reported by the watcher; a directory event covers everything under it."""
+        full = self.base + rel
+        try:
+            st = os.stat(full)
+        except OSError:
+            st = None
+        if st is not None and os.path.isdir(full):
+            for sub, sub_st in self._walk(full):
+                self._update(sub, sub_st)
+            return
+        if st is None:
+            under = rel + os.sep
+            for r in [r for r in self.by_path if r == rel or r.startswith(under)]:
+                self._retire(r)
+            return
+        self._update(rel, st)
+
+    def rescan(self) -> None:
+        """Full stat walk: index new or changed files, retire vanished ones."""
+        seen: Set[str] = set()
+        for n, (rel, st) in enumerate(self._walk()):
+            if n % 256 == 0:
+                checkpoint()  # an interrupted walk leaves last_scan unset, so the next query resumes it
+            seen.add(rel)
+            self._update(rel, st)
+        for rel in [r for r in self.by_path if r not in seen]:
+            self._retire(rel)
+        self.last_scan = time.monotonic()
+
+    def _compact(self) -> None:
+        live = [f for f in self.files if f is not None]
+        remap = array("i", [-1]) * len(self.files)
+        for new, old in enumerate(i for i, f in enumerate(self.files) if f is not None):
+            remap[old] = new
+        postings: Dict[bytes, array] = {}
+        for g, ids in self.postings.items():
+            kept = array("I", (remap[i] for i in ids if remap[i] >= 0))
+            if kept:
+                postings[g] = kept
+        self.files = live
+        self.postings = postings
+        self.retired = 0
+        self._reindex_paths()
+
+    def refresh(self) -> None:
+        """Bring the index up to date before a query."""
+        with self.lock:
+            watching = self.watcher is not None and self.watcher.alive
+            if watching and self.scan_watched and self.last_scan:
+                pending, self.dirty_paths = self.dirty_paths, set()
+                for rel in sorted(pending):
+                    self._check(rel)
+            elif watching or not self.last_scan or time.monotonic() - self.last_scan >= RESCAN_SECONDS:
+                # Watch first so changes made during a long walk are reported too. Only a walk
+                # that started with the watcher armed can be kept current from its events.
+                self._start_watcher()
+                self.scan_watched = self.watcher is not None and self.watcher.alive
+                self.rescan()
+            if self.retired > max(1000, len(self.by_path)):
+                self._compact()
+            if self.changed and time.monotonic() - self.last_save >= SAVE_INTERVAL_SECONDS:
+                try:
+                    self.save()
+                except OSError:
+                    self.last_save = time.monotonic()  # index dir not writable: keep serving from memory
+
+    def _start_watcher(self) -> None:
+        # Without watchfiles (or once the watcher fails) the tree is re-stat'ed at most every RESCAN_SECONDS.
+        if self.watcher is None:
+            self.watcher = watcher_for(self.root)
+            if self.watcher is not None:
+                self.watcher.subscribe(self._on_changes)
+                self.watcher.wait_ready(WATCH_READY_SECONDS)
+
+    def _on_changes(self, paths: Set[str]) -> None:
+        rels = set()
+        for p in paths:
+            if p.startswith(self.base):
+                rel = p[len(self.base):]
+                if not any(part in SKIP_DIRS for part in rel.split(os.sep)):
+                    rels.add(rel)
+        if rels:
+            with self.lock:
+                self.dirty_paths |= rels
+
+    # ---- queries ----
+
+    def candidates(self, literals: List[str], under: str = "") -> List[str]:
+        """Relative paths (sorted) of files that may contain every literal, restricted to `under`."""
+        with self.lock:
+            grams: Set[bytes] = set()
+            for lit in literals:
+                grams |= trigrams(lit)
+            if grams:
+                lists = sorted((self.postings.get(g, ()) for g in grams), key=len)
+                ids: Set[int] = set(lists[0])
+                for posting in lists[1:]:
+                    if not ids:
+                        break
+                    ids.intersection_update(posting)
+                ids |= self.large
+            else:
+                ids = {i for i, f in enumerate(self.files) if f is not None and f[3] != BINARY}
+            prefix = under + os.sep if under else ""
+            out = []
+            for i in ids:
+                f = self.files[i]
+                if f is not None and f[0].startswith(prefix):
+                    out.append(f[0])
+        out.sort()
+        return out
+
+    def close(self) -> None:
+        self.save()
+
+
+_indexes: Dict[str, TrigramIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def index_for(root: Path, index_dir: Path) -> TrigramIndex:
+    key = str(root)
+    with _indexes_lock:
+        idx = _indexes.get(key)
+        if idx is None:
+            name = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16] + ".trigrams.pkl"
+            idx = _indexes[key] = TrigramIndex(root, index_dir / name)
+    return idx
+
+
+@atexit.register
+def _close_all() -> None:
+    for idx in list(_indexes.values()):
+        try:
+            idx.close()
+        except Exception:
+            pass
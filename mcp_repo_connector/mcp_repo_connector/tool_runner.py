@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import functools
+import itertools
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional
+
+import anyio
+
+from .telemetry import add_phase
+
+# Heavy tools get few slots so they cannot starve cheap ones; anything unlisted gets the default.
+DEFAULT_LIMITS: Dict[str, int] = {
+    "search_text": 2,
+    "semantic_search_code": 4,
+    "repo_tree": 2,
+    "git_grep": 2,
+    "git_diff": 2,
+    "git_diff_page": 2,
+    "git_log_records": 4,
+    "read_file": 16,
+    "read_files": 8,
+    "list_dir": 16,
+    "git_show_file": 8,
+    "git_ls_tree": 8,
+    "get_page": 16,
+    "get_pages": 4,
+    "recommend_content": 2,
+}
+DEFAULT_TIMEOUTS: Dict[str, float] = {
+    "recommend_content": 300.0,
+    "cluster_topics": 120.0,
+}
+
+
+class Cancelled(RuntimeError):
+    pass
+
+
+class CallScope:
+    """Deadline and cancellation state of one tool call.
+
+    Code running for the call finds it through a context variable and registers
+    callbacks (kill a git child, shut an HTTP socket) that run when the call is
+    cancelled or times out, so the work stops instead of running on unobserved.
+    """
+
+    def __init__(self, name: str, timeout: float):
+        self.name = name
+        self.deadline = time.monotonic() + timeout
+        self.cancelled = threading.Event()
+        self._callbacks: Dict[int, Callable[[], Any]] = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+
+    def remaining(self) -> float:
+        return self.deadline - time.monotonic()
+
+    def on_cancel(self, callback: Callable[[], Any]) -> int:
+        with self._lock:
+            handle = next(self._ids)
+            if not self.cancelled.is_set():
+                self._callbacks[handle] = callback
+                return handle
+        callback()
+        return handle
+
+    def remove(self, handle: int) -> None:
+        with self._lock:
+            self._callbacks.pop(handle, None)
+
+    def cancel(self) -> None:
+        with self._lock:
+            self.cancelled.set()
+            callbacks, self._callbacks = list(self._callbacks.values()), {}
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+    def check(self) -> None:
+        if self.cancelled.is_set():
+            raise Cancelled(f"{self.name} was cancelled")
+
+
+_current: ContextVar[Optional[CallScope]] = ContextVar("mcp_call_scope", default=None)
+
+
+def current() -> Optional[CallScope]:
+    return _current.get()
+
+
+@contextmanager
+def on_cancel(callback: Callable[[], Any]) -> Iterator[None]:
+    """Run callback if the current tool call is cancelled while the block is active."""
+    scope = _current.get()
+    if scope is None:
+        yield
+        return
+    handle = scope.on_cancel(callback)
+    try:
+        yield
+    finally:
+        scope.remove(handle)
+
+
+def checkpoint() -> None:
+    """Raise Cancelled if the current tool call was cancelled (for long pure-Python loops)."""
+    scope = _current.get()
+    if scope is not None:
+        scope.check()
+
+
+def time_left(default: float) -> float:
+    """`default` capped at what is left of the current call's deadline."""
+    scope = _current.get()
+    if scope is None:
+        return default
+    left = scope.remaining()
+    if left <= 0 or scope.cancelled.is_set():
+        raise Cancelled(f"{scope.name} ran out of time")
+    return min(default, left)
+
+
+def _parse_overrides(raw: str, cast: Callable[[str], Any]) -> Dict[str, Any]:
+    out: Dict[str, Any] = {}
+    for part in raw.split(","):
+        name, sep, value = part.partition("=")
+        if sep and name.strip():
+            out[name.strip()] = cast(value.strip())
+    return out
+
+
+class ToolRunner:
+    """Runs blocking tools on worker threads with per-tool concurrency caps and deadlines."""
+
+    def __init__(self, default_limit: int, default_timeout: float, limits: str = "", timeouts: str = ""):
+        self.default_limit = default_limit
+        self.default_timeout = default_timeout
+        self.limits = {**DEFAULT_LIMITS, **_parse_overrides(limits, int)}
+        self.timeouts = {**DEFAULT_TIMEOUTS, **_parse_overrides(timeouts, float)}
+        self._limiters: Dict[str, anyio.CapacityLimiter] = {}
+
+    def _limiter(self, name: str) -> anyio.CapacityLimiter:
+        limiter = self._limiters.get(name)
+        if limiter is None:
+            limiter = self._limiters[name] = anyio.CapacityLimiter(max(1, self.limits.get(name, self.default_limit)))
+        return limiter
+
+    @asynccontextmanager
+    async def call(self, name: str) -> AsyncIterator[CallScope]:
+        """Slot + deadline for one call; time spent waiting for a slot counts against the deadline."""
+        timeout = self.timeouts.get(name, self.default_timeout)
+        scope = CallScope(name, timeout)
+        try:
+            with anyio.fail_after(timeout):
+                queued = time.perf_counter()
+                async with self._limiter(name):
+                    add_phase("queue", time.perf_counter() - queued)
+                    yield scope
+        except TimeoutError:
+            scope.cancel()
+            raise TimeoutError(f"{name} exceeded its {timeout:g}s deadline") from None
+        except anyio.get_cancelled_exc_class():
+            scope.cancel()
+            raise
+
+    @staticmethod
+    async def run_sync(scope: CallScope, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        def work() -> Any:
+            token = _current.set(scope)
+            try:
+                scope.check()
+                return fn(*args, **kwargs)
+            finally:
+                _current.reset(token)
+
+        # Abandoned on cancel: the scope's callbacks make the thread finish promptly.
+        return await anyio.to_thread.run_sync(work, abandon_on_cancel=True)
+
+    def threaded(self, fn: Callable[..., Any]) -> Callable[..., Any]:
+        """Turn a blocking tool into an async one that runs under this runner."""
+        name = fn.__name__
+
+        @functools.wraps(fn)
+        async def run(*args: Any, **kwargs: Any) -> Any:
+            async with self.call(name) as scope:
+                return await self.run_sync(scope, fn, *args, **kwargs)
+
+        return run
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            name: {"limit": int(lim.total_tokens), "running": lim.borrowed_tokens, "waiting": lim.statistics().tasks_waiting}
+            for name, lim in sorted(self._limiters.items())
+        }
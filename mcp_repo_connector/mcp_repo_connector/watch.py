@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import atexit
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+try:
+    import watchfiles
+except ImportError:  # optional: callers fall back to stat checks or no caching
+    watchfiles = None
+
+# How often the watch loop wakes without changes. The first wake-up (or first change) proves
+# the inotify watches are in place; until then nothing may rely on the watcher.
+READY_POLL_MS = 200
+
+
+class TreeWatcher:
+    """One recursive watchfiles watcher per directory, shared by everything that needs it.
+
+    `version` increases on every batch of changes, which makes it a constant-time
+    working-tree fingerprint; subscribers also receive the changed absolute paths.
+    Changes inside `.git` are ignored (callers fingerprint git state separately).
+    The watches are set up on the watcher's thread, so edits made before `ready` is
+    set can be missed: `alive` stays false until then.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.version = 0
+        self.failed = False
+        self.ready = threading.Event()
+        self.stop = threading.Event()
+        self._subscribers: List[Callable[[Set[str]], None]] = []
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name=f"watch:{root}", daemon=True)
+        self._thread.start()
+
+    @property
+    def alive(self) -> bool:
+        return self.ready.is_set() and not self.failed and self._thread.is_alive()
+
+    def wait_ready(self, timeout: float) -> bool:
+        """Wait until the watches are armed; False if that takes longer than timeout or watching failed."""
+        self.ready.wait(timeout)
+        return self.alive
+
+    def subscribe(self, callback: Callable[[Set[str]], None]) -> None:
+        with self._lock:
+            self._subscribers.append(callback)
+
+    @staticmethod
+    def _watched(change, path: str) -> bool:
+        return f"{os.sep}.git{os.sep}" not in path and not path.endswith(f"{os.sep}.git")
+
+    def _run(self) -> None:
+        try:
+            for changes in watchfiles.watch(self.root, watch_filter=self._watched, stop_event=self.stop,
+                                            debounce=50, step=10, raise_interrupt=False,
+                                            yield_on_timeout=True, rust_timeout=READY_POLL_MS):
+                self.ready.set()
+                if not changes:
+                    continue
+                paths = {p for _, p in changes}
+                with self._lock:
+                    self.version += 1
+                    subscribers = list(self._subscribers)
+                for callback in subscribers:
+                    callback(paths)
+        except Exception:
+            # e.g. out of inotify watches: callers fall back to their non-watching path.
+            self.failed = True
+
+    def close(self) -> None:
+        self.stop.set()
+        self._thread.join(timeout=2.0)
+
+
+_watchers: Dict[str, TreeWatcher] = {}
+_watchers_lock = threading.Lock()
+
+
+def watcher_for(root: Path) -> Optional[TreeWatcher]:
+    """The shared watcher for root (started on first use), or None if watching is unavailable."""
+    if watchfiles is None:
+        return None
+    with _watchers_lock:
+        w = _watchers.get(str(root))
+        if w is None:
+            w = _watchers[str(root)] = TreeWatcher(root)
+    return w if not w.failed else None
+
+
+def start_watchers(roots: Iterable[Path]) -> None:
+    """Start watchers ahead of the first tool call, so they are armed by the time results are cached."""
+    for root in roots:
+        watcher_for(root)
+
+
+@atexit.register
+def _close_all() -> None:
+    for w in list(_watchers.values()):
+        w.close()
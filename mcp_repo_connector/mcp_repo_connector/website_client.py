@@ -1,10 +1,151 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Optional
+import json
+import socket
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from typing import Any, Dict, Hashable, Iterator, List, Optional, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
 
 from .config import Settings
+from .telemetry import phase
+from .tool_runner import current, time_left
+
+POOL_SIZE = 16
+ETAG_CACHE_ENTRIES = 1024
+GET_PAGES_WORKERS = 8
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def _abort(conn) -> None:
+    sock = getattr(conn, "sock", None)
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+class _AbortOnCancel:
+    """Pool mixin: while a connection is checked out for a tool call, cancelling the call
+    shuts its socket down, so a blocked send/recv fails at once instead of at the timeout.
+    """
+
+    def _get_conn(self, timeout=None):
+        conn = super()._get_conn(timeout)
+        scope = current()
+        if scope is not None:
+            if scope.cancelled.is_set():
+                # Stops retries of an aborted request. urlopen returns a slot to the
+                # pool on any error, so the slot is taken first and the connection dropped.
+                conn.close()
+                scope.check()
+            conn._cancel_hook = (scope, scope.on_cancel(lambda: _abort(conn)))
+        return conn
+
+    def _put_conn(self, conn) -> None:
+        hook = getattr(conn, "_cancel_hook", None)
+        if hook is not None:
+            hook[0].remove(hook[1])
+            conn._cancel_hook = None
+        super()._put_conn(conn)
+
+
+class _HTTPPool(_AbortOnCancel, HTTPConnectionPool):
+    pass
+
+
+class _HTTPSPool(_AbortOnCancel, HTTPSConnectionPool):
+    pass
+
+
+class _Adapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": _HTTPPool, "https": _HTTPSPool}
+
+    def send(self, request, **kwargs):
+        with phase("http"):  # until the response headers; streamed bodies are read after
+            return super().send(request, **kwargs)
+
+
+def _http() -> requests.Session:
+    """One keep-alive session for all connector calls.
+
+    Connection failures are retried for every method (nothing was sent); GETs are also
+    retried on 502/503/504 and read errors, with exponential backoff. Requests made
+    inside a tool call are aborted when the call is cancelled or runs out of time.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(
+                total=3,
+                backoff_factor=0.2,
+                status_forcelist=(502, 503, 504),
+                allowed_methods=frozenset({"GET", "HEAD"}),
+                respect_retry_after_header=True,
+                raise_on_status=False,
+            )
+            adapter = _Adapter(pool_connections=4, pool_maxsize=POOL_SIZE, max_retries=retry)
+            s = requests.Session()
+            s.mount("http://", adapter)
+            s.mount("https://", adapter)
+            _session = s
+        return _session
+
+
+class _ETagCache:
+    """Last raw body and ETag per GET request; revalidated with If-None-Match, reused on 304.
+
+    Bodies are kept as bytes and parsed on every hit, so callers never share (or mutate) cached objects.
+    """
+
+    def __init__(self, cap: int):
+        self.cap = cap
+        self.items: "OrderedDict[Hashable, Tuple[str, bytes]]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.revalidated = 0  # 304: body reused
+        self.fetched = 0  # 200 with an ETag: body stored
+
+    def get(self, key: Hashable) -> Optional[Tuple[str, bytes]]:
+        with self.lock:
+            item = self.items.get(key)
+            if item is not None:
+                self.items.move_to_end(key)
+            return item
+
+    def hit(self) -> None:
+        with self.lock:
+            self.revalidated += 1
+
+    def put(self, key: Hashable, etag: str, body: bytes) -> None:
+        with self.lock:
+            self.fetched += 1
+            self.items[key] = (etag, body)
+            self.items.move_to_end(key)
+            while len(self.items) > self.cap:
+                self.items.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {"entries": len(self.items), "revalidated": self.revalidated, "fetched": self.fetched}
+
+
+_etags = _ETagCache(ETAG_CACHE_ENTRIES)
+
+
+def cache_stats() -> Dict[str, Any]:
+    """ETag cache counters: bodies stored on 200 and reused on 304."""
+    return _etags.stats()
 
 
 def _headers(settings: Settings) -> Dict[str, str]:
@@ -13,62 +154,132 @@ def _headers(settings: Settings) -> Dict[str, str]:
     return {}
 
 
-def get_sitemap(settings: Settings) -> Dict[str, Any]:
-    r = requests.get(f"{settings.connector_api_base}/sitemap", headers=_headers(settings), timeout=30)
+def _get_json(settings: Settings, path: str, params: Optional[Dict[str, Any]] = None, timeout: float = 30) -> Any:
+    url = f"{settings.connector_api_base}{path}"
+    key = (url, tuple(sorted((params or {}).items())), settings.connector_bearer_token)
+    headers = _headers(settings)
+    cached = _etags.get(key)
+    if cached is not None:
+        headers["If-None-Match"] = cached[0]
+    r = _http().get(url, params=params, headers=headers, timeout=time_left(timeout))
+    if r.status_code == 304 and cached is not None:
+        _etags.hit()
+        return json.loads(cached[1])
     r.raise_for_status()
-    return r.json()
+    body = r.json()
+    etag = r.headers.get("ETag")
+    if etag:
+        _etags.put(key, etag, r.content)
+    return body
+
+
+def get_sitemap(settings: Settings) -> Dict[str, Any]:
+    return _get_json(settings, "/sitemap")
 
 
 def get_page(settings: Settings, slug: str) -> Dict[str, Any]:
-    r = requests.get(f"{settings.connector_api_base}/page/{slug}", headers=_headers(settings), timeout=30)
-    r.raise_for_status()
-    return r.json()
+    return _get_json(settings, f"/page/{slug}")
 
 
-def search_pages(settings: Settings, query: str, limit: int = 8, filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-    payload = {"query": query, "limit": limit, "filters": filters}
-    r = requests.post(f"{settings.connector_api_base}/search", json=payload, headers=_headers(settings), timeout=60)
+def get_pages(settings: Settings, slugs: List[str]) -> Dict[str, Any]:
+    """Several pages fetched concurrently over the shared session, in request order.
+
+    A slug that fails comes back as {"slug", "error", "status"} instead of failing the batch.
+    Each fetch runs in a copy of the caller's context, so it shares the call's deadline.
+    """
+    def fetch(slug: str) -> Dict[str, Any]:
+        try:
+            return get_page(settings, slug)
+        except requests.HTTPError as e:
+            return {"slug": slug, "error": str(e), "status": e.response.status_code if e.response is not None else None}
+        except requests.RequestException as e:
+            return {"slug": slug, "error": str(e), "status": None}
+
+    workers = max(1, min(GET_PAGES_WORKERS, len(slugs)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="get-pages") as pool:
+        futures = [pool.submit(copy_context().run, fetch, slug) for slug in slugs]
+        pages = [f.result() for f in futures]
+    return {"pages": pages, "count": len(pages), "errors": sum(1 for p in pages if "error" in p)}
+
+
+def search_pages(settings: Settings, query: str, limit: int = 8, filters: Optional[Dict[str, Any]] = None, mode: str = "hybrid") -> Dict[str, Any]:
+    payload = {"query": query, "limit": limit, "filters": filters, "mode": mode}
+    r = _http().post(f"{settings.connector_api_base}/search", json=payload, headers=_headers(settings), timeout=time_left(60))
     r.raise_for_status()
     return r.json()
 
 
+def iter_recommendations(settings: Settings, goals, audience: Optional[str] = None, constraints: Optional[Dict[str, Any]] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Stream POST /recommend as (event, data) pairs: context, recommendation..., done."""
+    payload = {"goals": goals, "audience": audience, "constraints": constraints, "stream": True}
+    headers = {**_headers(settings), "Accept": "text/event-stream"}
+    # The read timeout applies between events, so a long generation no longer hits it.
+    with _http().post(f"{settings.connector_api_base}/recommend", json=payload, headers=headers, stream=True, timeout=(time_left(10), time_left(60))) as r:
+        r.raise_for_status()
+        event, data = "message", []
+        for line in r.iter_lines(decode_unicode=True):
+            if line is None:
+                continue
+            if not line:
+                if data:
+                    yield event, json.loads("\n".join(data))
+                event, data = "message", []
+            elif line.startswith("event:"):
+                event = line[6:].strip()
+            elif line.startswith("data:"):
+                data.append(line[5:].strip())
+        if data:
+            yield event, json.loads("\n".join(data))
+
+
 def recommend_content(settings: Settings, goals, audience: Optional[str] = None, constraints: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-    payload = {"goals": goals, "audience": audience, "constraints": constraints}
-    r = requests.post(f"{settings.connector_api_base}/recommend", json=payload, headers=_headers(settings), timeout=60)
-    r.raise_for_status()
-    return r.json()
+    out: Dict[str, Any] = {"recommendations": []}
+    for event, data in iter_recommendations(settings, goals, audience=audience, constraints=constraints):
+        if event == "recommendation":
+            out["recommendations"].append(data)
+        elif event == "error":
+            raise RuntimeError(f"recommend failed: {data.get('detail')}")
+        else:
+            out[event] = data
+    return out
 
 
-def get_changes(settings: Settings, since: Optional[str] = None) -> Dict[str, Any]:
-    params = {"since": since} if since else None
-    r = requests.get(f"{settings.connector_api_base}/changes", params=params, headers=_headers(settings), timeout=30)
-    r.raise_for_status()
-    return r.json()
+def get_changes(settings: Settings, since: Optional[str] = None, cursor: Optional[str] = None, limit: int = 100) -> Dict[str, Any]:
+    params: Dict[str, Any] = {"limit": limit}
+    if cursor:
+        params["cursor"] = cursor
+    elif since:
+        params["since"] = since
+    return _get_json(settings, "/changes", params=params)
 
 
 def lint_site(settings: Settings, thin_word_threshold: int = 250, scope_slugs: Optional[list[str]] = None) -> Dict[str, Any]:
     payload = {"thinWordThreshold": thin_word_threshold, "scopeSlugs": scope_slugs}
-    r = requests.post(f"{settings.connector_api_base}/lint", json=payload, headers=_headers(settings), timeout=60)
+    r = _http().post(f"{settings.connector_api_base}/lint", json=payload, headers=_headers(settings), timeout=time_left(60))
     r.raise_for_status()
     return r.json()
 
 
-def cluster_topics(settings: Settings, max_pages: int = 300, similarity_threshold: float = 0.35) -> Dict[str, Any]:
+def cluster_topics(settings: Settings, max_pages: Optional[int] = None, similarity_threshold: float = 0.35) -> Dict[str, Any]:
     payload = {"maxPages": max_pages, "similarityThreshold": similarity_threshold}
-    r = requests.post(f"{settings.connector_api_base}/clusters", json=payload, headers=_headers(settings), timeout=60)
+    r = _http().post(f"{settings.connector_api_base}/clusters", json=payload, headers=_headers(settings), timeout=time_left(60))
     r.raise_for_status()
     return r.json()
 
 
 def export_page(settings: Settings, title: str, slug_suggestion: str, outline: list[str], proposed_meta: Dict[str, Any], write: bool = False) -> Dict[str, Any]:
     payload = {"title": title, "slugSuggestion": slug_suggestion, "outline": outline, "proposedMeta": proposed_meta, "write": write}
-    r = requests.post(f"{settings.connector_api_base}/export", json=payload, headers=_headers(settings), timeout=60)
+    r = _http().post(f"{settings.connector_api_base}/export", json=payload, headers=_headers(settings), timeout=time_left(60))
     r.raise_for_status()
     return r.json()
 
 
 def daily_brief(settings: Settings, goals: Optional[list[str]] = None, audience: Optional[str] = None) -> Dict[str, Any]:
     payload = {"goals": goals, "audience": audience}
-    r = requests.post(f"{settings.connector_api_base}/daily-brief", json=payload, headers=_headers(settings), timeout=60)
+    r = _http().post(f"{settings.connector_api_base}/daily-brief", json=payload, headers=_headers(settings), timeout=time_left(30))
     r.raise_for_status()
     return r.json()
+
+
+def daily_brief_status(settings: Settings, job_id: str) -> Dict[str, Any]:
+    return _get_json(settings, f"/daily-brief/{job_id}")
@@ -0,0 +1,51 @@
+"""Fixtures for the MCP repo connector: a temp git repo as the only allowed root."""
+from __future__ import annotations
+
+import subprocess
+from pathlib import Path
+from typing import Callable
+
+import pytest
+
+from mcp_repo_connector.config import Settings
+
+FILES = {
+    "README.md": "# Demo\n\nA small repository used by the tests.\n",
+    "src/app.py": "def greet(name):\n    return f'hello {name}'\n\n\nclass Greeter:\n    pass\n",
+    "src/util.py": "import os\n\n\ndef join_paths(a, b):\n    return os.path.join(a, b)\n",
+    "docs/guide.md": "# Guide\n\nUse greet() to say hello.\n",
+}
+
+
+def run_git(repo: Path, *args: str) -> str:
+    return subprocess.run(
+        ["git", "-c", "user.name=Test", "-c", "user.email=test@example.com", "-c", "commit.gpgsign=false", *args],
+        cwd=repo, check=True, capture_output=True, text=True,
+    ).stdout
+
+
+@pytest.fixture
+def repo(tmp_path: Path) -> Path:
+    root = (tmp_path / "repo").resolve()
+    root.mkdir()
+    for rel, text in FILES.items():
+        (root / rel).parent.mkdir(parents=True, exist_ok=True)
+        (root / rel).write_text(text, encoding="utf-8")
+    run_git(root, "init", "-q", "-b", "main")
+    run_git(root, "add", "-A")
+    run_git(root, "commit", "-q", "-m", "Initial commit")
+    return root
+
+
+@pytest.fixture
+def git(repo: Path) -> Callable[..., str]:
+    return lambda *args: run_git(repo, *args)
+
+
+@pytest.fixture
+def settings(repo: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Settings:
+    monkeypatch.setenv("MCP_ALLOWED_ROOTS", str(repo))
+    monkeypatch.setenv("MCP_INDEX_DIR", str(tmp_path / "index"))
+    monkeypatch.setenv("MCP_EMBEDDER", "hash")
+    monkeypatch.delenv("CONNECTOR_TOKEN", raising=False)
+    return Settings.from_env()
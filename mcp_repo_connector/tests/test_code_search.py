@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import os
+import time
+
+import numpy as np
+import pytest
+
+from mcp_repo_connector import code_index
+from mcp_repo_connector.chunking import MAX_SPAN_LINES, WINDOW_LINES, chunk_text
+from mcp_repo_connector.code_index import CodeIndex
+from mcp_repo_connector.embeddings import HashEmbedder
+from mcp_repo_connector.fs_tools import semantic_search_code
+
+
+class CountingEmbedder(HashEmbedder):
+    def __init__(self):
+        super().__init__()
+        self.texts = 0
+
+    def embed(self, texts):
+        self.texts += len(texts)
+        return super().embed(texts)
+
+
+@pytest.fixture(autouse=True)
+def close_indexes():
+    yield
+    with code_index._indexes_lock:
+        indexes = list(code_index._indexes.values())
+        code_index._indexes.clear()
+    for idx in indexes:
+        idx.close()
+
+
+def until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return predicate()
+
+
+def symbols(results):
+    return [(os.path.basename(r["file"]), r["symbol"]) for r in results["results"]]
+
+
+def test_python_chunks_follow_definitions():
+    text = "import os\n\n\n@wrap\ndef one():\n    return 1\n\n\nclass Two:\n    def method(self):\n        pass\n"
+    chunks = chunk_text("m.py", text)
+    assert [(c.start_line, c.end_line, c.symbol) for c in chunks] == [(1, 3, ""), (4, 6, "one"), (9, 11, "Two")]  # blank gaps are dropped
+
+
+def test_big_definitions_are_split():
+    methods = "".join(f"    def m{n}(self):\n" + "        x = 1\n" * 10 for n in range(20))
+    chunks = chunk_text("big.py", "class Big:\n    '''doc'''\n" + methods)
+    assert chunks[0].symbol == "Big" and chunks[0].end_line == 2
+    assert [c.symbol for c in chunks[1:]] == [f"Big.m{n}" for n in range(20)]
+
+    long_fn = "def long():\n" + "    x = 1\n" * (MAX_SPAN_LINES + 20)
+    windows = chunk_text("long.py", long_fn)
+    assert len(windows) > 1 and all(c.symbol == "long" and c.end_line - c.start_line < WINDOW_LINES for c in windows)
+    assert windows[-1].end_line == MAX_SPAN_LINES + 21
+
+
+def test_other_languages_use_patterns_and_headings():
+    js = "import x from 'y';\nexport function loadConfig(path) {\n  return 1;\n}\n\nclass Store {\n}\n"
+    assert [c.symbol for c in chunk_text("a.js", js)] == ["", "loadConfig", "Store"]
+    md = "# Title\n\nIntro.\n\n## Usage\n\nRun it.\n"
+    assert [c.symbol for c in chunk_text("a.md", md)] == ["Title", "Usage"]
+    assert chunk_text("broken.py", "def (:\n") != []  # unparsable Python falls back to patterns
+
+
+def test_hash_embedder_splits_identifiers():
+    e = HashEmbedder(64)
+    a, b, c, d = e.embed(["parseConfig", "parse_config", "parse config", "render template"])
+    assert np.allclose(a, b) and np.allclose(a, c)
+    assert float(a @ d) < 0.5
+    assert np.allclose(np.linalg.norm(e.embed(["x y z"]), axis=1), 1.0)
+
+
+def test_semantic_search_finds_a_function(settings, repo):
+    out = semantic_search_code(settings, "join two paths", str(repo))
+    assert out["index"]["complete"] and out["index"]["model"] == "hash-256"
+    top = out["results"][0]
+    assert (os.path.basename(top["file"]), top["symbol"]) == ("util.py", "join_paths")
+    assert (top["startLine"], top["endLine"]) == (4, 5)
+    assert top["text"].startswith("def join_paths") and not top["stale"]
+
+    assert symbols(semantic_search_code(settings, "greet", str(repo / "src"), max_results=1)) == [("app.py", "greet")]
+    assert all(r["file"].endswith(".md") for r in semantic_search_code(settings, "greet", str(repo), glob="*.md")["results"])
+
+
+def test_edits_are_flagged_stale_until_reindexed(settings, repo):
+    semantic_search_code(settings, "greet", str(repo))
+    idx = code_index.code_index_for(repo, settings.index_dir, HashEmbedder())
+    idx._stop.set()  # hold the background indexer so the edit stays unindexed
+    idx._wake.set()
+    idx._thread.join(5)
+    idx._stop.clear()
+
+    (repo / "src" / "util.py").write_text("def compress_archive(data):\n    return data\n", encoding="utf-8")
+    stale = semantic_search_code(settings, "join paths", str(repo), max_results=1)["results"][0]
+    assert stale["file"].endswith("util.py") and stale["stale"]
+
+    idx._index(["src/util.py"])
+    fresh = semantic_search_code(settings, "compress archive", str(repo), max_results=1)["results"][0]
+    assert fresh["symbol"] == "compress_archive" and not fresh["stale"]
+    assert idx.dead == 2 and idx.status()["chunks"] == len(idx.rows) - 2  # the import block and join_paths
+
+
+def test_symlinks_out_of_the_root_are_never_indexed(settings, repo, tmp_path):
+    secret = tmp_path / "secret.py"
+    secret.write_text("def exfiltrate_credentials():\n    return 'token'\n", encoding="utf-8")
+    os.symlink(secret, repo / "src" / "leak.py")
+    os.symlink(repo / "src" / "app.py", repo / "src" / "alias.py")  # inside the root: fine
+
+    out = semantic_search_code(settings, "exfiltrate credentials", str(repo), max_results=20)
+    assert all(not r["file"].endswith("leak.py") for r in out["results"])
+    idx = code_index.code_index_for(repo, settings.index_dir, HashEmbedder())
+    assert "src/leak.py" not in idx.files and "src/alias.py" in idx.files
+
+
+def test_index_persists_and_skips_unchanged_files(repo, tmp_path):
+    embedder = CountingEmbedder()
+    idx = CodeIndex(repo, tmp_path / "code", embedder)
+    assert until(lambda: idx.status()["complete"])
+    idx.close()
+    embedded = embedder.texts
+    assert embedded > 0
+
+    again = CodeIndex(repo, tmp_path / "code", embedder)
+    try:
+        assert until(lambda: again.status()["complete"])
+        assert embedder.texts == embedded
+        assert [r[1][0] for r in again.search("greet someone", 1)] == ["src/app.py"]
+    finally:
+        again.close()
+
+
+def test_compaction_keeps_search_results(repo, tmp_path):
+    idx = CodeIndex(repo, tmp_path / "code", HashEmbedder())
+    try:
+        assert until(lambda: idx.status()["complete"])
+        for rel in list(idx.files):
+            with idx.lock:
+                idx._drop(rel)
+        idx._index(idx._list())
+        assert idx.dead > 0
+        with idx.lock:
+            idx._compact()
+        assert idx.dead == 0 and all(r is not None for r in idx.rows)
+        assert os.path.getsize(idx.vectors_path) == len(idx.rows) * idx.dim * 4
+        assert [r[1][3] for r in idx.search("join paths", 1)] == ["join_paths"]
+    finally:
+        idx.close()
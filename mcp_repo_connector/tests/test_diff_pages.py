@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import pytest
+
+from mcp_repo_connector import git_tools
+from mcp_repo_connector.cursors import decode_cursor, encode_cursor
+from mcp_repo_connector.git_tools import git_diff_page
+
+
+@pytest.fixture
+def changes(repo, git):
+    """A staged diff of five small files and one file with three distant hunks."""
+    for n in range(5):
+        (repo / f"small{n}.txt").write_text(f"small file {n}\n", encoding="utf-8")
+    (repo / "big.txt").write_text("".join(f"line {n}\n" for n in range(300)), encoding="utf-8")
+    git("add", "-A")
+    git("commit", "-q", "-m", "Add files")
+    for n in range(5):
+        (repo / f"small{n}.txt").write_text(f"small file {n}, edited\n", encoding="utf-8")
+    lines = [f"line {n}\n" for n in range(300)]
+    for at in (10, 150, 290):
+        lines[at] = f"changed {at}\n" * 20
+    (repo / "big.txt").write_text("".join(lines), encoding="utf-8")
+    git("add", "-A")
+    return git("diff", "--staged")
+
+
+def walk(settings, repo, budget):
+    pages = [git_diff_page(settings, str(repo), staged=True, max_bytes=budget)]
+    while pages[-1]["nextCursor"]:
+        pages.append(git_diff_page(settings, str(repo), staged=True, max_bytes=budget, cursor=pages[-1]["nextCursor"]))
+    return pages
+
+
+def test_one_page_when_it_fits(settings, repo, changes):
+    (page,) = walk(settings, repo, 10 ** 6)
+    assert page["diff"] == changes and page["nextCursor"] is None
+    assert page["files"] == ["big.txt"] + [f"small{n}.txt" for n in range(5)]
+
+
+@pytest.mark.parametrize("budget", [700, 1200])
+def test_pages_tile_the_diff_at_file_and_hunk_boundaries(settings, repo, changes, budget):
+    pages = walk(settings, repo, budget)
+    assert len(pages) > 1
+    data = changes.encode()
+    assert pages[0]["offset"] == 0 and pages[-1]["end"] == len(data)
+    for prev, nxt in zip(pages, pages[1:]):
+        assert nxt["offset"] == prev["end"]
+    for page in pages:
+        body = page["diff"]
+        assert body.startswith("diff --git ")  # a page inside a file repeats the file header
+        assert body.endswith(data[page["offset"]:page["end"]].decode())
+        assert not page["partialHunk"]
+    seen = [f for p in pages for f in p["files"]]
+    assert set(seen) == {"big.txt"} | {f"small{n}.txt" for n in range(5)}
+
+
+@pytest.mark.parametrize("budget", [250, 400])
+def test_small_files_are_never_split(settings, repo, changes, budget):
+    pages = walk(settings, repo, budget)
+    for page in pages:
+        for name in page["files"]:
+            if name.startswith("small"):
+                assert f"+small file {name[5]}, edited" in page["diff"]
+    assert sum(p["diff"].count("diff --git a/small") for p in pages) == 5
+
+
+def test_a_hunk_larger_than_the_budget_is_cut_at_a_line_end(settings, repo, changes):
+    pages = walk(settings, repo, 120)
+    assert any(p["partialHunk"] for p in pages)
+    for page in pages:
+        assert page["diff"].endswith("\n")
+    assert [p["files"] for p in walk(settings, repo, 1)][-1] == ["small4.txt"]  # one line per page, still whole lines
+    assert b"".join(changes.encode()[p["offset"]:p["end"]] for p in pages) == changes.encode()
+
+
+def test_an_expired_spool_is_regenerated_at_the_next_boundary(settings, repo, changes, monkeypatch):
+    first = git_diff_page(settings, str(repo), staged=True, max_bytes=700)
+    with git_tools._diff_spools_lock:
+        while git_tools._diff_spools:
+            git_tools._diff_spools.popitem()[1].close()
+    second = git_diff_page(settings, str(repo), staged=True, max_bytes=700, cursor=first["nextCursor"])
+    assert second["regenerated"] and second["offset"] == first["end"]
+
+    state = decode_cursor(first["nextCursor"])
+    state["at"] += 3  # mid-line: resumes at the following unit
+    third = git_diff_page(settings, str(repo), staged=True, max_bytes=700, cursor=encode_cursor(state))
+    assert third["offset"] > first["end"] and third["diff"].startswith("diff --git ")
+
+
+@pytest.mark.parametrize("state", [
+    {"at": 0, "args": ["diff", "--output=/tmp/x"]},
+    {"at": 0, "args": ["log"]},
+    {"at": 0, "args": ["diff", "--", "a", "--output=/tmp/x"]},
+    {"at": 0, "args": "diff"},
+    {"args": ["diff"]},
+    [0, ["diff"]],
+])
+def test_invalid_cursors_are_rejected(settings, repo, state):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        git_diff_page(settings, str(repo), cursor=encode_cursor(state))
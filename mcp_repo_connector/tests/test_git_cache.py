@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from mcp_repo_connector.cursors import decode_cursor, encode_cursor
+from mcp_repo_connector.git_cache import ResultCache, cached, repo_state
+from mcp_repo_connector.git_tools import git_diff, git_log_records
+from mcp_repo_connector.watch import watcher_for
+
+
+class Counter:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return f"result {self.calls}"
+
+
+def test_result_cache_bounds():
+    cache = ResultCache(max_entries=2, max_bytes=1000)
+    cache.put("a", "x" * 10)
+    cache.put("b", "y" * 10)
+    assert cache.get("a") == (True, "x" * 10)
+    cache.put("c", "z" * 10)
+    assert cache.get("b") == (False, None)  # least recently used
+    assert cache.get("a")[0] and cache.get("c")[0]
+
+    cache.put("huge", "h" * 300)  # over a quarter of max_bytes: never stored
+    assert cache.get("huge") == (False, None)
+    cache.put("d", "d" * 240)
+    cache.put("e", "e" * 240)
+    assert cache.stats()["bytes"] == 480 and cache.stats()["entries"] == 2
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (3, 2)
+    assert stats["hitRatio"] == pytest.approx(0.6)
+
+
+def test_git_state_results_are_reused_until_the_index_or_head_moves(repo, git):
+    compute = Counter()
+    assert cached(repo, "k", False, compute) == "result 1"
+    assert cached(repo, "k", False, compute) == "result 1"
+
+    (repo / "src" / "app.py").write_text("changed\n", encoding="utf-8")
+    assert cached(repo, "k", False, compute) == "result 1"  # work-tree edits don't matter to this key
+
+    git("add", "src/app.py")
+    assert cached(repo, "k", False, compute) == "result 2"
+    git("commit", "-q", "-m", "Change app")
+    assert cached(repo, "k", False, compute) == "result 3"
+    git("branch", "topic")
+    assert cached(repo, "k", False, compute) == "result 4"
+    git("checkout", "-q", "topic")
+    assert cached(repo, "k", False, compute) == "result 5"
+    assert compute.calls == 5
+
+
+def test_work_tree_results_follow_the_watcher(repo):
+    state = repo_state(repo)
+    if watcher_for(repo) is None or not watcher_for(repo).wait_ready(5):
+        pytest.skip("no file watcher")
+    compute = Counter()
+    assert cached(repo, "wt", True, compute) == "result 1"
+    assert cached(repo, "wt", True, compute) == "result 1"
+
+    version = state.worktree_version()
+    (repo / "docs" / "guide.md").write_text("edited\n", encoding="utf-8")
+    deadline = time.monotonic() + 5
+    while state.worktree_version() == version and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert cached(repo, "wt", True, compute) == "result 2"
+
+
+def test_nothing_is_cached_outside_a_work_tree(tmp_path, monkeypatch):
+    monkeypatch.setenv("GIT_CEILING_DIRECTORIES", str(tmp_path))
+    plain = tmp_path / "plain"
+    plain.mkdir()
+    compute = Counter()
+    cached(plain, "k", False, compute)
+    cached(plain, "k", False, compute)
+    assert compute.calls == 2
+
+
+def test_staged_git_diff_is_invalidated_by_staging(settings, repo, git):
+    assert git_diff(settings, str(repo), staged=True) == ""
+    (repo / "README.md").write_text("# Renamed\n", encoding="utf-8")
+    assert git_diff(settings, str(repo), staged=True) == ""
+    git("add", "README.md")
+    assert "+# Renamed" in git_diff(settings, str(repo), staged=True)
+
+
+@pytest.fixture
+def history(repo, git):
+    for n in range(7):
+        (repo / "log.txt").write_text(f"{n}\n", encoding="utf-8")
+        git("add", "log.txt")
+        git("commit", "-q", "-m", f"Commit {n}")
+    return git("log", "--format=%H").split()
+
+
+def all_pages(settings, repo, size, **kw):
+    pages = [git_log_records(settings, str(repo), max_count=size, **kw)]
+    while pages[-1]["nextCursor"]:
+        pages.append(git_log_records(settings, str(repo), max_count=size, cursor=pages[-1]["nextCursor"]))
+    return pages
+
+
+def test_log_pages_cover_history_once(settings, repo, history):
+    pages = all_pages(settings, repo, 3)
+    assert [len(p["commits"]) for p in pages] == [3, 3, 2]
+    assert [c["oid"] for p in pages for c in p["commits"]] == history
+    assert pages[0]["commits"][0]["subject"] == "Commit 6"
+    assert pages[-1]["commits"][-1]["parents"] == []
+    assert [c["oid"] for p in all_pages(settings, repo, 50, path="log.txt") for c in p["commits"]] == history[:7]
+
+
+def test_log_pages_are_pinned_to_the_first_tip(settings, repo, git, history):
+    first = git_log_records(settings, str(repo), max_count=2)
+    (repo / "log.txt").write_text("later\n", encoding="utf-8")
+    git("commit", "-qam", "Later")
+    second = git_log_records(settings, str(repo), max_count=2, cursor=first["nextCursor"])
+    assert [c["oid"] for c in second["commits"]] == history[2:4]
+
+
+def test_log_page_without_its_paused_walk_falls_back_to_skip(settings, repo, history):
+    first = git_log_records(settings, str(repo), max_count=3)
+    state = decode_cursor(first["nextCursor"])
+    state["walk"] = "0" * 16
+    page = git_log_records(settings, str(repo), max_count=2, cursor=encode_cursor(state))
+    assert [c["oid"] for c in page["commits"]] == history[3:5]
+    assert page == git_log_records(settings, str(repo), max_count=2, cursor=encode_cursor(state))
+
+
+@pytest.mark.parametrize("state", [
+    {"tip": "--output=/tmp/x", "at": 0},
+    {"tip": "HEAD", "at": 0},
+    {"tip": "a" * 40, "at": -1},
+    {"tip": "a" * 40, "at": True},
+    {"tip": "a" * 40, "at": "3"},
+    {"tip": "a" * 40, "at": 0, "path": ["x"]},
+    {"tip": "a" * 40, "at": 0, "walk": 5},
+    ["a" * 40, 0],
+])
+def test_log_cursors_are_validated(settings, repo, state):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        git_log_records(settings, str(repo), cursor=encode_cursor(state))
+
+
+def test_log_rejects_option_like_revisions(settings, repo):
+    with pytest.raises(ValueError):
+        git_log_records(settings, str(repo), rev="--output=/tmp/x")
+    with pytest.raises(ValueError, match="Unknown revision"):
+        git_log_records(settings, str(repo), rev="no-such-branch")
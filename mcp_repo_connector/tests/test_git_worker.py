@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import pytest
+
+from mcp_repo_connector.git_tools import CatFile, _git_lines, _git_read, git_diff, git_grep, git_ls_tree, git_show_file
+
+
+@pytest.fixture
+def big_change(repo):
+    # An unstaged diff of roughly 2000 lines across two files.
+    (repo / "src" / "app.py").write_text("".join(f"value_{n} = {n}\n" for n in range(1000)), encoding="utf-8")
+    (repo / "src" / "util.py").write_text("".join(f"other_{n} = {n}\n" for n in range(1000)), encoding="utf-8")
+    return repo
+
+
+def test_git_grep_finds_and_truncates(settings, repo):
+    assert git_grep(settings, str(repo), "greet").splitlines() == [
+        "docs/guide.md:3:Use greet() to say hello.",
+        "src/app.py:1:def greet(name):",
+    ]
+    assert git_grep(settings, str(repo), "greet", max_results=1).splitlines()[1:] == ["[TRUNCATED]"]
+    assert git_grep(settings, str(repo), "no such words anywhere") == ""
+
+
+def test_git_grep_reports_git_errors(settings, repo):
+    with pytest.raises(RuntimeError, match="git grep"):
+        git_grep(settings, str(repo), "[unclosed")
+
+
+def test_git_diff_stops_at_the_cap(settings, big_change):
+    full = git_diff(settings, str(big_change), max_bytes=10 ** 7)
+    assert "[TRUNCATED]" not in full and "+value_999 = 999" in full
+    capped = git_diff(settings, str(big_change), max_bytes=500)
+    assert capped == full[:500] + "\n\n[TRUNCATED]\n"
+
+
+def test_readers_return_early_without_waiting_for_git(big_change):
+    data, more = _git_read(big_change, ["diff"], 100)
+    assert len(data) == 100 and more
+    lines, more = _git_lines(big_change, ["diff"], 3)
+    assert lines[0].startswith("diff --git") and len(lines) == 3 and more
+    lines, more = _git_lines(big_change, ["ls-files"], 100)
+    assert lines == ["README.md", "docs/guide.md", "src/app.py", "src/util.py"] and not more
+
+
+def test_cat_file_reads_objects_through_one_process(repo, git):
+    worker = CatFile(repo)
+    try:
+        oid, kind, size, data = worker.read("HEAD:./src/app.py")
+        assert kind == "blob" and data == (repo / "src" / "app.py").read_bytes() and size == len(data)
+        assert oid == git("rev-parse", "HEAD:src/app.py").strip()
+        proc = worker.proc
+        assert worker.read("HEAD:./missing.py") is None
+        assert worker.read("HEAD")[1] == "commit"
+        assert worker.proc is proc
+    finally:
+        worker.close()
+
+
+def test_cat_file_drains_capped_objects_and_survives_a_dead_process(repo):
+    worker = CatFile(repo)
+    try:
+        head = worker.read("HEAD:./src/util.py", max_bytes=5)
+        assert head[3] == b"impor" and head[2] > 5
+        assert worker.read("HEAD:./README.md")[3].startswith(b"# Demo")  # the rest of util.py was not left in the pipe
+
+        worker._kill()
+        worker.proc.wait()
+        assert worker.read("HEAD:./README.md")[3].startswith(b"# Demo")
+        with pytest.raises(ValueError):
+            worker.read("HEAD\nHEAD")
+    finally:
+        worker.close()
+
+
+def test_git_show_file_and_ls_tree(settings, repo):
+    assert git_show_file(settings, str(repo), "src/app.py").startswith("def greet")
+    assert git_show_file(settings, str(repo), "README.md", max_bytes=6) == "# Demo\n\n[TRUNCATED]\n"
+    with pytest.raises(FileNotFoundError):
+        git_show_file(settings, str(repo), "nope.py")
+    with pytest.raises(ValueError):
+        git_show_file(settings, str(repo), "src")
+    with pytest.raises(ValueError):
+        git_show_file(settings, str(repo), "../secret")
+    with pytest.raises(ValueError):
+        git_show_file(settings, str(repo), "README.md", rev="--output=/tmp/x")
+
+    top = git_ls_tree(settings, str(repo))
+    assert [(e["path"], e["type"]) for e in top["entries"]] == [("README.md", "blob"), ("docs", "tree"), ("src", "tree")]
+    deep = git_ls_tree(settings, str(repo), recursive=True)
+    assert [e["path"] for e in deep["entries"]] == ["README.md", "docs", "src", "docs/guide.md", "src/app.py", "src/util.py"]
+    assert git_ls_tree(settings, str(repo), recursive=True, max_entries=4)["truncated"]
+    assert [e["path"] for e in git_ls_tree(settings, str(repo), path="src")["entries"]] == ["app.py", "util.py"]
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import os
+from dataclasses import replace
+
+import pytest
+
+from mcp_repo_connector.cursors import encode_cursor
+from mcp_repo_connector.fs_tools import list_dir, repo_tree
+from mcp_repo_connector.security import PathDenied
+
+
+def walk_pages(settings, path, size):
+    pages, cursor = [], None
+    while True:
+        page = list_dir(settings, path, max_entries=size, cursor=cursor)
+        pages.append(page)
+        cursor = page["nextCursor"]
+        if cursor is None:
+            return pages
+
+
+@pytest.fixture
+def big_dir(repo):
+    d = repo / "big"
+    d.mkdir()
+    for n in range(23):
+        (d / f"File{n:02d}.txt").write_text("x" * n, encoding="utf-8")
+    for name in ("sub", "Alpha", "alpha"):
+        (d / name).mkdir()
+    return d
+
+
+def test_list_dir_pages_cover_every_entry_once_dirs_first(settings, big_dir):
+    pages = walk_pages(settings, str(big_dir), 5)
+    names = [e["name"] for p in pages for e in p["entries"]]
+    assert len(pages) == 6
+    assert all(p["total"] == 26 for p in pages)
+    assert sorted(names) == sorted(os.listdir(big_dir))
+    assert len(names) == len(set(names))
+    assert names[:3] == ["Alpha", "alpha", "sub"]
+    assert names[3:] == sorted(names[3:], key=str.lower)
+
+
+def test_list_dir_entry_fields(settings, big_dir):
+    entries = {e["name"]: e for e in list_dir(settings, str(big_dir))["entries"]}
+    assert entries["sub"]["type"] == "dir" and entries["sub"]["size"] is None
+    assert entries["File07.txt"] == {**entries["File07.txt"], "type": "file", "size": 7, "path": str(big_dir / "File07.txt")}
+
+
+def test_list_dir_single_page_has_no_cursor(settings, repo):
+    page = list_dir(settings, str(repo))
+    assert page["nextCursor"] is None
+    assert [e["name"] for e in page["entries"]] == [".git", "docs", "src", "README.md"]
+
+
+def test_list_dir_rejects_bad_cursors(settings, repo):
+    for cursor in ("!!not base64!!", encode_cursor({"after": "x"}), encode_cursor([1, 2])):
+        with pytest.raises(ValueError, match="Invalid cursor"):
+            list_dir(settings, str(repo), cursor=cursor)
+
+
+def test_list_dir_refuses_paths_outside_the_roots(settings, tmp_path):
+    with pytest.raises(PathDenied):
+        list_dir(settings, str(tmp_path))
+
+
+def child(node, name):
+    return next(c for c in node["children"] if c["name"] == name)
+
+
+def test_repo_tree_respects_gitignore(settings, repo):
+    (repo / ".gitignore").write_text("*.log\nout/\n", encoding="utf-8")
+    (repo / "out").mkdir()
+    (repo / "out" / "bundle.js").write_text("x", encoding="utf-8")
+    (repo / "src" / "debug.log").write_text("x", encoding="utf-8")
+    (repo / "src" / "untracked.py").write_text("x = 1\n", encoding="utf-8")
+
+    result = repo_tree(settings, str(repo))
+    assert result["source"] == "git" and not result["truncated"]
+    tree = result["tree"]
+    assert [c["name"] for c in tree["children"]] == ["docs", "src", ".gitignore", "README.md"]
+    assert [c["name"] for c in child(tree, "src")["children"]] == ["app.py", "untracked.py", "util.py"]
+    assert tree["files"] == 6
+    assert child(tree, "src")["files"] == 3
+
+
+def test_repo_tree_counts_levels_below_max_depth(settings, repo):
+    deep = repo / "src" / "a" / "b"
+    deep.mkdir(parents=True)
+    (deep / "leaf.py").write_text("12345", encoding="utf-8")
+    tree = repo_tree(settings, str(repo), max_depth=1)["tree"]
+    src = child(tree, "src")
+    assert "children" not in src
+    assert src["files"] == 3
+    assert src["size"] == sum(p.stat().st_size for p in (repo / "src").rglob("*") if p.is_file())
+
+
+def test_repo_tree_budget_is_breadth_first(settings, repo):
+    result = repo_tree(settings, str(repo), max_entries=3)
+    tree = result["tree"]
+    assert result["truncated"]
+    assert [c["name"] for c in tree["children"]] == ["docs", "src", "README.md"]
+    assert child(tree, "src")["children"] == [] and child(tree, "src")["omitted"] == 2
+
+
+def test_repo_tree_without_git_walks_and_skips_build_dirs(settings, tmp_path, monkeypatch):
+    plain = (tmp_path / "plain").resolve()
+    (plain / "node_modules" / "dep").mkdir(parents=True)
+    (plain / "node_modules" / "dep" / "index.js").write_text("x", encoding="utf-8")
+    (plain / "main.js").write_text("x", encoding="utf-8")
+    monkeypatch.setenv("GIT_CEILING_DIRECTORIES", str(tmp_path))
+    result = repo_tree(replace(settings, allowed_roots=[plain]), str(plain))
+    assert result["source"] == "walk"
+    assert [c["name"] for c in result["tree"]["children"]] == ["main.js"]
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import hashlib
+
+import pytest
+
+from mcp_repo_connector.file_ranges import LineIndex
+from mcp_repo_connector.fs_tools import read_file, read_files
+
+LINES = [f"line {n} " + "x" * (n % 7) for n in range(1, 1001)]
+
+
+@pytest.fixture
+def long_file(repo):
+    p = repo / "long.txt"
+    p.write_text("\n".join(LINES) + "\n", encoding="utf-8")
+    return p
+
+
+def expected(first, last):
+    return "".join(line + "\n" for line in LINES[first - 1:last])
+
+
+@pytest.mark.parametrize("first,last", [(1, 1), (1, 10), (255, 258), (256, 256), (257, 513), (999, 1000), (1000, 1000)])
+def test_line_ranges_match_splitlines(settings, long_file, first, last):
+    assert read_file(settings, str(long_file), start_line=first, end_line=last) == expected(first, last)
+
+
+def test_open_ended_and_out_of_range_lines(settings, long_file):
+    assert read_file(settings, str(long_file), start_line=998) == expected(998, 1000)
+    assert read_file(settings, str(long_file), end_line=2) == expected(1, 2)
+    assert read_file(settings, str(long_file), start_line=1001, end_line=2000) == ""
+    assert read_file(settings, str(long_file), start_line=5, end_line=3) == ""
+
+
+def test_line_index_without_trailing_newline():
+    data = b"a\nb\nc"
+    idx = LineIndex.build(data)
+    assert idx.lines == 3
+    assert [idx.offset(data, n) for n in (1, 2, 3, 4)] == [0, 2, 4, 5]
+    assert LineIndex.build(b"").lines == 0
+
+
+def test_byte_ranges_and_cap(settings, long_file):
+    raw = long_file.read_bytes()
+    assert read_file(settings, str(long_file), offset=7, length=20) == raw[7:27].decode()
+    assert read_file(settings, str(long_file), offset=len(raw) + 10) == ""
+    capped = read_file(settings, str(long_file), offset=0, length=100, max_bytes=10)
+    assert capped == raw[:10].decode() + "\n\n[TRUNCATED]\n"
+    with pytest.raises(ValueError):
+        read_file(settings, str(long_file), offset=0, start_line=1)
+
+
+def test_edited_file_gets_a_fresh_line_index(settings, repo):
+    p = repo / "edit.txt"
+    p.write_text("one\ntwo\n", encoding="utf-8")
+    assert read_file(settings, str(p), start_line=2, end_line=2) == "two\n"
+    p.write_text("zero\none\ntwo\n", encoding="utf-8")
+    assert read_file(settings, str(p), start_line=2, end_line=2) == "one\n"
+
+
+def sha(path):
+    return "sha256:" + hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def test_read_files_hashes_and_skips_unchanged(settings, repo):
+    app, util = repo / "src" / "app.py", repo / "src" / "util.py"
+    first = read_files(settings, [str(app), str(util)])
+    assert [f["hash"] for f in first["files"]] == [sha(app), sha(util)]
+    assert first["files"][0]["content"] == app.read_text()
+
+    again = read_files(settings, [str(app), str(util)], known_hashes={str(app): sha(app), str(util): "sha256:stale"})
+    assert again["files"][0]["unchanged"] and "content" not in again["files"][0]
+    assert again["files"][1]["content"] == util.read_text()
+    assert again["bytesReturned"] == util.stat().st_size
+
+    app.write_text("changed\n", encoding="utf-8")
+    edited = read_files(settings, [str(app)], known_hashes={str(app): first["files"][0]["hash"]})
+    assert edited["files"][0]["content"] == "changed\n" and edited["files"][0]["hash"] == sha(app)
+
+
+def test_read_files_budget_in_request_order(settings, repo):
+    paths = []
+    for n in range(3):
+        p = repo / f"f{n}.txt"
+        p.write_text(str(n) * 10, encoding="utf-8")
+        paths.append(str(p))
+    out = read_files(settings, paths, max_bytes=15)
+    files = out["files"]
+    assert [f["content"] for f in files] == ["0" * 10, "1" * 5, ""]
+    assert [f["truncated"] for f in files] == [False, True, True]
+    assert out["bytesReturned"] == 15 and out["budgetExhausted"]
+
+    per_file = read_files(settings, paths, max_bytes=100, max_bytes_per_file=4)["files"]
+    assert [f["content"] for f in per_file] == ["0000", "1111", "2222"]
+
+
+def test_read_files_reports_errors_and_binaries_per_entry(settings, repo, tmp_path):
+    (repo / "blob.bin").write_bytes(b"\0\1\2")
+    outside = tmp_path / "outside.txt"
+    outside.write_text("secret", encoding="utf-8")
+    files = read_files(settings, [str(repo / "blob.bin"), str(repo / "missing.txt"), str(outside), str(repo / "README.md")])["files"]
+    assert files[0]["binary"] and "content" not in files[0]
+    assert "error" in files[1] and "error" in files[2]
+    assert files[3]["content"].startswith("# Demo")
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import logging
+import time
+
+import anyio
+import pytest
+
+from mcp_repo_connector.fs_tools import read_file, search_text
+from mcp_repo_connector.telemetry import LATENCY_BUCKETS, CallTrace, Telemetry, _Histogram, _json_size, _truncated, count, phase
+from mcp_repo_connector.tool_runner import ToolRunner
+
+
+def tool(telemetry, runner, fn):
+    return telemetry.instrument(runner.threaded(fn))
+
+
+def test_histogram_quantiles_are_bucket_bounds():
+    h = _Histogram(LATENCY_BUCKETS)
+    for v in [0.002] * 90 + [0.2] * 9 + [400.0]:
+        h.observe(v)
+    assert h.quantile(0.5) == 0.0025
+    assert h.quantile(0.9) == 0.0025
+    assert h.quantile(0.99) == 0.25
+    assert h.quantile(1.0) == 400.0
+    summary = h.summary(scale=1000)
+    assert summary["count"] == 100 and summary["max"] == 400000.0
+    assert _Histogram(LATENCY_BUCKETS).summary() == {"count": 0}
+
+
+def test_sizes_and_truncation_markers():
+    assert _json_size("abc") == 5
+    assert _json_size({"a": [1, None]}) == 2 + 1 + 4 + (2 + 2 + 5)
+    assert _truncated("lots of diff\n\n[TRUNCATED]\n")
+    assert _truncated({"files": [{"truncated": False}, {"truncated": True}]})
+    assert not _truncated({"files": [{"truncated": False}]}) and not _truncated(["[TRUNCATED]"])
+
+
+def test_phases_and_counts_are_noops_outside_a_call():
+    with phase("git"):
+        count("filesScanned", 3)
+    trace = CallTrace("t")
+    trace.add("git", 0.5)
+    trace.add("git", 0.25)
+    assert trace.phases == {"git": 0.75}
+
+
+def test_calls_record_latency_size_phases_and_work(settings, repo):
+    telemetry = Telemetry(slow_call_ms=10_000)
+    runner = ToolRunner(4, 10.0)
+
+    def search_text_tool(query: str):
+        return search_text(settings, query, str(repo), glob="*.py")
+
+    run = tool(telemetry, runner, search_text_tool)
+    for q in ("greet", "join_paths", "nothing matches this"):
+        anyio.run(lambda: run(query=q))
+
+    stats = telemetry.stats()["tools"]["search_text_tool"]
+    assert stats["calls"] == 3 and stats["errors"] == {} and stats["truncated"] == 0
+    assert {"queue", "indexRefresh", "scan"} <= set(stats["phasesMs"])
+    assert stats["counts"]["filesScanned"]["count"] == 3
+    assert stats["bytes"]["count"] == 3 and stats["bytes"]["max"] > 2
+    assert telemetry.stats()["slowCalls"] == []
+
+
+def test_errors_are_counted_by_kind(settings, repo):
+    telemetry = Telemetry(slow_call_ms=10_000)
+    runner = ToolRunner(4, 0.1)
+
+    def failing():
+        raise ValueError("bad input")
+
+    def sleepy():
+        time.sleep(0.3)
+
+    for fn, exc in ((failing, ValueError), (sleepy, TimeoutError)):
+        with pytest.raises(exc):
+            anyio.run(tool(telemetry, runner, fn))
+
+    async def cancelled():
+        with anyio.move_on_after(0.05):
+            await tool(telemetry, ToolRunner(4, 10.0), sleepy)()
+
+    anyio.run(cancelled)
+    tools = telemetry.stats()["tools"]
+    assert tools["failing"]["errors"] == {"ValueError": 1}
+    assert tools["sleepy"]["errors"] == {"timeout": 1, "cancelled": 1}
+    assert tools["sleepy"]["bytes"] == {"count": 0}
+
+
+def test_slow_calls_are_logged_with_their_breakdown(settings, repo, caplog):
+    telemetry = Telemetry(slow_call_ms=0)
+    runner = ToolRunner(4, 10.0)
+
+    def read_file_tool(path: str, max_bytes: int):
+        return read_file(settings, path, max_bytes=max_bytes)
+
+    with caplog.at_level(logging.WARNING, logger="mcp_repo_connector.telemetry"):
+        result = anyio.run(lambda: tool(telemetry, runner, read_file_tool)(path=str(repo / "README.md"), max_bytes=5))
+    assert result.endswith("[TRUNCATED]\n")
+    (entry,) = telemetry.stats()["slowCalls"]
+    assert entry["tool"] == "read_file_tool" and entry["truncated"] and entry["error"] is None
+    assert entry["args"] == {"path": str(repo / "README.md"), "max_bytes": 5}
+    assert "queue" in entry["phasesMs"] and entry["otherMs"] >= 0
+    assert "slow tool call" in caplog.text and '"read_file_tool"' in caplog.text
+    assert telemetry.stats()["tools"]["read_file_tool"]["truncated"] == 1
+
+
+def test_prometheus_exposition():
+    telemetry = Telemetry(slow_call_ms=10_000)
+    trace = CallTrace("git_grep")
+    trace.add("git", 0.02)
+    trace.count("matches", 12)
+    telemetry.record(trace, 0.03, "x" * 100, None, {})
+    telemetry.record(CallTrace("git_grep"), 5.0, None, TimeoutError(), {})
+    text = telemetry.prometheus({"git_grep": {"limit": 2, "running": 1, "waiting": 3}})
+    lines = text.splitlines()
+    assert "# TYPE mcp_tool_call_seconds histogram" in lines
+    assert 'mcp_tool_call_seconds_bucket{tool="git_grep",le="0.05"} 1' in lines
+    assert 'mcp_tool_call_seconds_bucket{tool="git_grep",le="+Inf"} 2' in lines
+    assert 'mcp_tool_call_seconds_count{tool="git_grep"} 2' in lines
+    assert 'mcp_tool_response_bytes_count{tool="git_grep"} 1' in lines
+    assert 'mcp_tool_work_items_bucket{tool="git_grep",item="matches",le="100"} 1' in lines
+    assert 'mcp_tool_errors_total{tool="git_grep",kind="timeout"} 1' in lines
+    assert 'mcp_tool_phase_seconds_total{tool="git_grep",phase="git"} 0.02' in lines
+    assert 'mcp_tool_running{tool="git_grep"} 1' in lines and 'mcp_tool_waiting{tool="git_grep"} 3' in lines
+    assert text.endswith("\n")
+
+
+def test_server_stats_reports_instrumented_tools(settings, repo, monkeypatch):
+    server = pytest.importorskip("mcp_repo_connector.server")
+    monkeypatch.setattr(server, "settings", settings)
+    anyio.run(lambda: server.list_dir(path=str(repo)))
+    stats = server.server_stats()
+    assert stats["tools"]["list_dir"]["calls"] >= 1
+    assert "list_dir" in stats["slots"]
+    assert {"git", "website"} <= set(stats["caches"])
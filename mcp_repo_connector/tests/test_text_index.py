@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import os
+import time
+
+import pytest
+
+from mcp_repo_connector import text_index
+from mcp_repo_connector.fs_tools import search_text
+from mcp_repo_connector.text_index import TrigramIndex, required_literals, trigrams
+
+
+@pytest.fixture
+def polling(monkeypatch):
+    """No watcher: every refresh re-stats the tree, so edits are seen at the next query."""
+    monkeypatch.setattr(text_index, "watcher_for", lambda root: None)
+    monkeypatch.setattr(text_index, "RESCAN_SECONDS", 0.0)
+
+
+def hits(results):
+    return [(os.path.basename(r["file"]), r["line"]) for r in results]
+
+
+def test_trigrams_fold_case():
+    assert trigrams("AbCd") == {b"abc", b"bcd"}
+    assert trigrams("ab") == set()
+
+
+def test_required_literals_of_a_regex():
+    assert required_literals("greet", regex=False) == ["greet"]
+    assert required_literals(r"def\s+join_\w+", regex=True) == ["def", "join_"]
+    assert required_literals(r"(hello|bye)", regex=True) == []
+    assert required_literals(r"[unclosed", regex=True) == []
+
+
+def test_candidates_are_files_containing_every_literal(repo, tmp_path):
+    idx = TrigramIndex(repo, tmp_path / "idx.pkl")
+    idx.rescan()
+    assert idx.candidates(["greet"]) == ["docs/guide.md", "src/app.py"]
+    assert idx.candidates(["greet", "class"]) == ["src/app.py"]
+    assert idx.candidates(["greet"], under="docs") == ["docs/guide.md"]
+    assert idx.candidates(["no such text"]) == []
+    assert not any(p.startswith(".git") for p in idx.candidates([]))
+
+
+def test_search_text_literal_regex_and_case(settings, repo, polling):
+    assert hits(search_text(settings, "greet", str(repo), glob="*.py")) == [("app.py", 1), ("app.py", 5)]
+    assert hits(search_text(settings, r"def \w+_paths", str(repo), glob="*.py", regex=True)) == [("util.py", 4)]
+    assert hits(search_text(settings, "GREETER", str(repo), glob="*.py")) == [("app.py", 5)]
+    assert search_text(settings, "GREETER", str(repo), glob="*.py", case_sensitive=True) == []
+    assert hits(search_text(settings, "greet", str(repo / "docs"))) == [("guide.md", 3)]
+    with pytest.raises(ValueError):
+        search_text(settings, "[", str(repo), regex=True)
+
+
+def test_search_text_stops_at_max_results(settings, repo, polling):
+    (repo / "src" / "many.py").write_text("needle\n" * 20, encoding="utf-8")
+    assert len(search_text(settings, "needle", str(repo), glob="*.py", max_results=5)) == 5
+
+
+def test_edits_are_picked_up_incrementally(settings, repo, polling):
+    assert search_text(settings, "farewell", str(repo), glob="*.py") == []
+    idx = text_index.index_for(repo, settings.index_dir)
+    before = len(idx.files)
+
+    (repo / "src" / "app.py").write_text("def farewell(name):\n    return name\n", encoding="utf-8")
+    (repo / "src" / "new.py").write_text("farewell = 1\n", encoding="utf-8")
+    (repo / "src" / "util.py").unlink()
+
+    assert hits(search_text(settings, "farewell", str(repo), glob="*.py")) == [("app.py", 1), ("new.py", 1)]
+    assert search_text(settings, "greet", str(repo), glob="*.py") == []
+    assert search_text(settings, "join_paths", str(repo), glob="*.py") == []
+    # Only the edited and the new file were read again; the rest kept their ids.
+    assert len(idx.files) == before + 2
+    assert idx.retired == 2
+
+
+def test_skip_dirs_are_not_indexed(settings, repo, polling):
+    (repo / "node_modules" / "pkg").mkdir(parents=True)
+    (repo / "node_modules" / "pkg" / "index.js").write_text("const vendored = 1;\n", encoding="utf-8")
+    (repo / "src" / "main.js").write_text("const vendored = 2;\n", encoding="utf-8")
+    assert hits(search_text(settings, "vendored", str(repo))) == [("main.js", 1)]
+
+
+def test_binary_files_are_never_candidates(repo, tmp_path):
+    (repo / "blob.bin").write_bytes(b"greet\0\x01\x02")
+    idx = TrigramIndex(repo, tmp_path / "idx.pkl")
+    idx.rescan()
+    assert "blob.bin" not in idx.candidates(["greet"])
+    assert "blob.bin" not in idx.candidates([])
+
+
+def test_index_persists_across_restarts(repo, tmp_path):
+    path = tmp_path / "idx.pkl"
+    idx = TrigramIndex(repo, path)
+    idx.rescan()
+    idx.save()
+    assert path.exists()
+
+    again = TrigramIndex(repo, path)
+    assert again.candidates(["greet"]) == ["docs/guide.md", "src/app.py"]
+    again.rescan()
+    assert not again.changed  # nothing on disk moved, so nothing was re-read
+
+    assert TrigramIndex(tmp_path, path).files == []  # an index saved for another root is ignored
+
+
+def test_compaction_keeps_results(repo, tmp_path):
+    idx = TrigramIndex(repo, tmp_path / "idx.pkl")
+    idx.rescan()
+    target = repo / "src" / "app.py"
+    for n in range(3):
+        target.write_text(f"def greet_{n}():\n    pass\n", encoding="utf-8")
+        os.utime(target, ns=(n + 1, n + 1))
+        idx.rescan()
+    assert idx.retired == 3
+    idx._compact()
+    assert idx.retired == 0 and all(f is not None for f in idx.files)
+    assert idx.candidates(["greet_2"]) == ["src/app.py"]
+    assert idx.candidates(["greet"]) == ["docs/guide.md", "src/app.py"]
+
+
+def test_watcher_reports_edits(settings, repo):
+    if text_index.watcher_for(repo) is None:
+        pytest.skip("watchfiles is not installed")
+    search_text(settings, "greet", str(repo))
+    idx = text_index.index_for(repo, settings.index_dir)
+    assert idx.scan_watched
+
+    (repo / "src" / "watched.py").write_text("observed = True\n", encoding="utf-8")
+    deadline = time.monotonic() + 5
+    while not search_text(settings, "observed", str(repo), glob="*.py") and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert hits(search_text(settings, "observed", str(repo), glob="*.py")) == [("watched.py", 1)]
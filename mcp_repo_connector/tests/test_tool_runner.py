@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import anyio
+import pytest
+
+from mcp_repo_connector.tool_runner import Cancelled, CallScope, ToolRunner, _parse_overrides, checkpoint, on_cancel, time_left
+
+
+def test_overrides_and_limits():
+    assert _parse_overrides("a=1, b = 2,broken,=3", int) == {"a": 1, "b": 2}
+    runner = ToolRunner(3, 10.0, limits="search_text=5,custom=1", timeouts="git_grep=2.5")
+    assert runner.limits["search_text"] == 5 and runner.limits["custom"] == 1 and runner.limits["read_file"] == 16
+    assert runner.timeouts["git_grep"] == 2.5 and runner.timeouts["recommend_content"] == 300.0
+    assert runner._limiter("unlisted").total_tokens == 3
+
+
+class Gauge:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = 0
+        self.peak = 0
+
+    def work(self, seconds: float) -> str:
+        with self.lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        time.sleep(seconds)
+        with self.lock:
+            self.running -= 1
+        return "done"
+
+
+def test_each_tool_is_capped_separately():
+    runner = ToolRunner(4, 10.0, limits="heavy_tool=2")
+    heavy, light = Gauge(), Gauge()
+
+    def heavy_tool():
+        return heavy.work(0.1)
+
+    def light_tool():
+        return light.work(0.01)
+
+    run_heavy, run_light = runner.threaded(heavy_tool), runner.threaded(light_tool)
+    light_done = []
+
+    async def main():
+        async with anyio.create_task_group() as tg:
+            for _ in range(6):
+                tg.start_soon(run_heavy)
+            await anyio.sleep(0.02)
+            started = time.monotonic()
+            await run_light()
+            light_done.append(time.monotonic() - started)
+
+    anyio.run(main)
+    assert heavy.peak == 2
+    assert light_done[0] < 0.1  # did not queue behind the saturated tool
+    assert run_heavy.__name__ == "heavy_tool"
+
+
+def test_a_call_past_its_deadline_is_cancelled_and_its_work_stops():
+    runner = ToolRunner(4, 0.2)
+    stopped = threading.Event()
+    killed = threading.Event()
+
+    def spin():
+        with on_cancel(killed.set):
+            try:
+                while True:
+                    checkpoint()
+                    time.sleep(0.01)
+            finally:
+                stopped.set()
+
+    async def main():
+        await runner.threaded(spin)()
+
+    with pytest.raises(TimeoutError, match="spin exceeded its 0.2s deadline"):
+        anyio.run(main)
+    assert killed.is_set()
+    assert stopped.wait(2)
+
+
+def test_waiting_for_a_slot_counts_against_the_deadline():
+    runner = ToolRunner(1, 0.3)
+
+    def slow():
+        time.sleep(0.25)
+
+    results = []
+
+    async def call():
+        try:
+            await runner.threaded(slow)()
+            results.append("ok")
+        except TimeoutError:
+            results.append("timeout")
+
+    async def main():
+        async with anyio.create_task_group() as tg:
+            for _ in range(2):
+                tg.start_soon(call)
+
+    anyio.run(main)
+    assert sorted(results) == ["ok", "timeout"]
+
+
+def test_cancelling_the_caller_runs_cancel_callbacks():
+    runner = ToolRunner(4, 10.0)
+    entered = threading.Event()
+    killed = threading.Event()
+    raised = []
+
+    def blocked():
+        with on_cancel(killed.set):
+            entered.set()
+            killed.wait(5)
+        try:
+            checkpoint()
+        except Cancelled as e:
+            raised.append(str(e))
+
+    async def main():
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(runner.threaded(blocked))
+            await anyio.to_thread.run_sync(entered.wait, 5)
+            tg.cancel_scope.cancel()
+
+    anyio.run(main)
+    assert killed.wait(2)
+    deadline = time.monotonic() + 2
+    while not raised and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert raised == ["blocked was cancelled"]
+
+
+def test_call_scope_callbacks():
+    scope = CallScope("tool", 10.0)
+    calls = []
+    handle = scope.on_cancel(lambda: calls.append("a"))
+    scope.on_cancel(lambda: calls.append("b"))
+    scope.remove(handle)
+    scope.on_cancel(lambda: 1 / 0)  # a failing callback does not stop the others
+    scope.cancel()
+    assert calls == ["b"]
+    scope.on_cancel(lambda: calls.append("late"))  # registered after cancel: runs at once
+    assert calls == ["b", "late"]
+    with pytest.raises(Cancelled):
+        scope.check()
+
+
+def test_helpers_outside_a_call_are_no_ops():
+    checkpoint()
+    assert time_left(7.0) == 7.0
+    with on_cancel(lambda: None):
+        pass
+
+
+def test_time_left_is_capped_by_the_deadline():
+    runner = ToolRunner(4, 0.5)
+    seen = []
+
+    def tool():
+        seen.append(time_left(60))
+
+    anyio.run(runner.threaded(tool))
+    assert 0 < seen[0] <= 0.5
+    runner = ToolRunner(4, 0.5)
+
+    def late():
+        time.sleep(0.6)
+        time_left(60)
+
+    with pytest.raises(TimeoutError):
+        anyio.run(runner.threaded(late))
+
+
+def test_stats_report_slots():
+    runner = ToolRunner(4, 10.0)
+    anyio.run(runner.threaded(lambda: None))
+    assert runner.stats() == {"<lambda>": {"limit": 4, "running": 0, "waiting": 0}}
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import json
+import threading
+from dataclasses import replace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from mcp_repo_connector import website_client as wc
+
+
+class FakeConnector(BaseHTTPRequestHandler):
+    """GET /page/<slug> and /sitemap with ETags, POST /search and an SSE /recommend."""
+
+    protocol_version = "HTTP/1.1"
+    pages = {}
+    requests = []
+    peers = set()
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body=b"", headers=()):
+        self.send_response(status)
+        for k, v in headers:
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.requests.append(("GET", self.path, self.headers.get("Authorization"), self.headers.get("If-None-Match")))
+        self.peers.add(self.client_address)
+        if self.path == "/sitemap":
+            doc = {"pages": sorted(self.pages)}
+        elif self.path.startswith("/page/") and self.path[6:] in self.pages:
+            doc = self.pages[self.path[6:]]
+        else:
+            return self._send(404, b'{"detail":"Not found"}')
+        body = json.dumps(doc).encode()
+        etag = f'"{hash(body) & 0xffffffff:x}"'
+        if self.headers.get("If-None-Match") == etag:
+            return self._send(304, headers=[("ETag", etag)])
+        self._send(200, body, [("ETag", etag), ("Content-Type", "application/json")])
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.requests.append(("POST", self.path, self.headers.get("Authorization"), payload))
+        if self.path == "/search":
+            return self._send(200, json.dumps({"results": [{"slug": s} for s in sorted(self.pages)][:payload["limit"]]}).encode())
+        stream = (b"event: context\ndata: {\"pages\": 2}\n\n"
+                  b"event: recommendation\ndata: {\"title\": \"A\"}\n\n"
+                  b"event: recommendation\ndata: {\"title\":\ndata: \"B\"}\n\n"
+                  b"event: done\ndata: {\"count\": 2}\n\n")
+        self._send(200, stream, [("Content-Type", "text/event-stream")])
+
+
+@pytest.fixture
+def connector(settings):
+    FakeConnector.pages = {f"p{n}": {"slug": f"p{n}", "title": f"Page {n}", "tags": ["a"]} for n in range(6)}
+    FakeConnector.requests = []
+    FakeConnector.peers = set()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeConnector)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield replace(settings, connector_api_base=f"http://127.0.0.1:{server.server_address[1]}", connector_bearer_token="tok")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_get_page_revalidates_with_etag(connector):
+    before = wc.cache_stats()
+    first = wc.get_page(connector, "p1")
+    second = wc.get_page(connector, "p1")
+    assert first == second == FakeConnector.pages["p1"]
+    (_, _, auth, inm1), (_, _, _, inm2) = FakeConnector.requests
+    assert auth == "Bearer tok" and inm1 is None and inm2 is not None
+    stats = wc.cache_stats()
+    assert stats["fetched"] - before["fetched"] == 1 and stats["revalidated"] - before["revalidated"] == 1
+
+    FakeConnector.pages["p1"] = {"slug": "p1", "title": "Renamed"}
+    assert wc.get_page(connector, "p1")["title"] == "Renamed"
+
+
+def test_a_304_hands_out_a_fresh_copy(connector):
+    wc.get_page(connector, "p2")
+    hit = wc.get_page(connector, "p2")
+    hit["tags"].append("mutated")
+    hit["title"] = "mutated"
+    again = wc.get_page(connector, "p2")
+    assert again == FakeConnector.pages["p2"]
+    assert again is not hit and again["tags"] is not hit["tags"]
+
+
+def test_get_pages_keeps_order_and_reports_errors_per_slug(connector):
+    out = wc.get_pages(connector, ["p3", "missing", "p0", "p5"])
+    assert [p.get("slug") for p in out["pages"]] == ["p3", "missing", "p0", "p5"]
+    assert out["count"] == 4 and out["errors"] == 1
+    assert out["pages"][1]["status"] == 404 and "error" in out["pages"][1]
+
+
+def test_calls_share_pooled_connections(connector):
+    for _ in range(10):
+        wc.get_sitemap(connector)
+    assert len(FakeConnector.requests) == 10
+    assert len(FakeConnector.peers) == 1
+
+
+def test_search_and_streamed_recommendations(connector):
+    assert wc.search_pages(connector, "x", limit=2) == {"results": [{"slug": "p0"}, {"slug": "p1"}]}
+    assert FakeConnector.requests[-1][3] == {"query": "x", "limit": 2, "filters": None, "mode": "hybrid"}
+
+    events = list(wc.iter_recommendations(connector, ["grow"]))
+    assert [e for e, _ in events] == ["context", "recommendation", "recommendation", "done"]
+    out = wc.recommend_content(connector, ["grow"])
+    assert out == {"recommendations": [{"title": "A"}, {"title": "B"}], "context": {"pages": 2}, "done": {"count": 2}}
+
+
+def test_unreachable_connector_raises(settings, monkeypatch):
+    monkeypatch.setattr(wc, "_session", None)
+    dead = replace(settings, connector_api_base="http://127.0.0.1:9")
+    with pytest.raises(requests.ConnectionError):
+        wc.get_sitemap(dead)
+    assert wc.get_pages(dead, ["p0"])["errors"] == 1
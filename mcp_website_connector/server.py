@@ -1,10 +1,54 @@
+from __future__ import annotations
+
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import anyio
 from mcp.server.fastmcp import FastMCP
 
-mcp = FastMCP('Apotheon Website Connector MCP')
+from apotheon_connector.app.core.config import DATA_DIR
+from apotheon_connector.app.indexing.extractor import slug_for_path
+from apotheon_connector.app.storage.reader import SiteReader
+
+# Reads the connector's index files directly (same CONNECTOR_DATA_DIR as the connector),
+# so lookups skip HTTP, auth and JSON round trips.
+reader = SiteReader(Path(DATA_DIR))
+
+mcp = FastMCP('Apotheon Website Connector MCP', json_response=True)
+
+
+@mcp.tool()
+async def search_pages(query: str, limit: int = 8, filters: Optional[Dict[str, Any]] = None, mode: str = 'hybrid'):
+    """Search indexed pages. mode: lexical (exact terms, no embedding), vector, or hybrid."""
+    started = time.perf_counter()
+    # vector/hybrid may call Ollama for the query embedding: keep that off the event loop.
+    results = await anyio.to_thread.run_sync(lambda: reader.search(query, mode=mode, limit=limit, filters=filters))
+    return {'query': query, 'mode': mode, 'results': results, 'tookMs': round((time.perf_counter() - started) * 1000, 3)}
+
+
+@mcp.tool()
+def get_page(slug: str):
+    """A page's structured content: title, description, headings, sections, links."""
+    doc = reader.page(slug_for_path(slug))
+    if doc is None:
+        raise ValueError(f'Unknown page: {slug}')
+    return doc
+
 
 @mcp.tool()
-def search_pages(query: str):
-    return {'query': query}
+def get_sitemap():
+    """Every indexed page with its title, description and word count."""
+    return reader.sitemap()
+
+
+def main():
+    transport = os.environ.get('MCP_TRANSPORT', 'stdio').strip().lower()
+    if transport not in {'stdio', 'streamable-http'}:
+        transport = 'stdio'
+    mcp.run(transport=transport)
+
 
 if __name__ == '__main__':
-    mcp.run()
+    main()